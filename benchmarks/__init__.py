@@ -0,0 +1,5 @@
+"""Load generators and benchmarks for Stickfix.
+
+Benchmarks are run from the repository root, e.g. ``python -m benchmarks.dispatcher_throughput``.
+They never contact Telegram: updates are synthesized as Bot API payloads and answered by a fake bot.
+"""
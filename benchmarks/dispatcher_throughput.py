@@ -0,0 +1,304 @@
+"""End-to-end throughput of the Stickfix dispatcher under a synthetic update mix.
+
+Each run wires the real handlers with `register_handlers` onto a PTB `Dispatcher` whose bot is a
+`FakeBot`, seeds a fresh `StickfixDB` with a `SyntheticPopulation`, and pushes pre-parsed updates
+through the dispatcher's update queue exactly like the polling `Updater` does. An update's latency
+runs from the moment it is queued until its handler returns, so it includes the time spent waiting
+behind other updates, and throughput is the number of updates over the wall time of the run.
+
+With ``workers=0`` updates are handled one at a time on the dispatcher thread, which is how
+Stickfix runs today; with ``workers=N`` every handler runs asynchronously on PTB's pool of ``N``
+worker threads.
+
+Run it from the repository root::
+
+    python -m benchmarks.dispatcher_throughput --updates 5000 --workers 0 1 4 8
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import tempfile
+import threading
+import time
+from collections import Counter
+from collections.abc import Callable, Iterable, Mapping, Sequence
+from dataclasses import dataclass
+from functools import wraps
+from queue import Queue
+from typing import Any
+
+from telegram import Update
+from telegram.ext import CallbackContext, Defaults, Dispatcher
+
+from benchmarks.load import Payload, PopulationSpec, SyntheticPopulation, UpdateFactory, UpdateMix
+from bot.database.storage import StickfixDB
+from bot.infrastructure.telegram import TelegramStickerSender
+from bot.stickfix import register_handlers
+from bot.utils.metrics import LatencyHistogram
+from bot.utils.profiler import SamplingProfiler
+
+BOT_ID = 1
+BOT_USERNAME = "stickfixbot"
+UNLIMITED_RATE = 1e9
+
+
+class FakeBot:
+    """Stand-in for `telegram.Bot` that counts the API calls handlers make instead of sending them.
+
+    `defaults` plays the same role as on a real bot: setting ``Defaults(run_async=True)`` makes PTB
+    run every handler on its worker pool.
+    """
+
+    def __init__(self) -> None:
+        self.id = BOT_ID
+        self.username = BOT_USERNAME
+        self.defaults: Defaults | None = None
+        self.calls: Counter[str] = Counter()
+        self._lock = threading.Lock()
+
+    def answer_inline_query(self, *_args: Any, **_kwargs: Any) -> bool:
+        return self._record("answer_inline_query")
+
+    def send_message(self, *_args: Any, **_kwargs: Any) -> bool:
+        return self._record("send_message")
+
+    def send_sticker(self, *_args: Any, **_kwargs: Any) -> bool:
+        return self._record("send_sticker")
+
+    def _record(self, method: str) -> bool:
+        with self._lock:
+            self.calls[method] += 1
+        return True
+
+
+@dataclass(frozen=True, slots=True)
+class ThroughputResult:
+    """Outcome of pushing one stream of updates through the dispatcher."""
+
+    workers: int
+    updates: int
+    seconds: float
+    latency: LatencyHistogram
+    by_kind: Mapping[str, LatencyHistogram]
+    errors: int
+    ignored: int
+    completed: bool
+
+    @property
+    def updates_per_second(self) -> float:
+        return self.updates / self.seconds if self.seconds else 0.0
+
+
+class _CompletionTracker:
+    """Wraps handler callbacks to time every update from its enqueueing to its completion."""
+
+    def __init__(self, expected: int) -> None:
+        self.latency = LatencyHistogram()
+        self.by_kind: dict[str, LatencyHistogram] = {}
+        self.errors = 0
+        self.finished = 0.0
+        self._expected = expected
+        self._enqueued: dict[int, float] = {}
+        self._done = 0
+        self._condition = threading.Condition()
+
+    def enqueue(self, update: Update) -> None:
+        self.by_kind.setdefault(update_kind(update), LatencyHistogram())
+        self._enqueued[update.update_id] = time.perf_counter()
+
+    def wrap(self, callback: Callable[[Update, CallbackContext], Any]) -> Callable[..., Any]:
+        @wraps(callback)
+        def tracked(update: Update, context: CallbackContext) -> Any:
+            failed = True
+            try:
+                result = callback(update, context)
+                failed = False
+                return result
+            finally:
+                self._complete(update, failed)
+
+        return tracked
+
+    def wait(self, timeout: float) -> bool:
+        with self._condition:
+            return self._condition.wait_for(lambda: self._done >= self._expected, timeout)
+
+    def _complete(self, update: Update, failed: bool) -> None:
+        now = time.perf_counter()
+        latency = now - self._enqueued[update.update_id]
+        self.latency.record(latency)
+        self.by_kind[update_kind(update)].record(latency)
+        with self._condition:
+            self._done += 1
+            self.errors += failed
+            self.finished = now
+            self._condition.notify_all()
+
+
+def update_kind(update: Update) -> str:
+    """Name the kind of `update` latencies are broken down by: its command or its update type."""
+    if update.inline_query is not None:
+        return "inline_query"
+    if update.chosen_inline_result is not None:
+        return "chosen_inline_result"
+    text = update.message.text if update.message is not None else None
+    if text and text.startswith("/"):
+        return text.split(maxsplit=1)[0].split("@", 1)[0]
+    return "other"
+
+
+def run_benchmark(
+    seed_store: Callable[[StickfixDB], None],
+    payloads: Sequence[Payload],
+    workers: int,
+    rate: float | None = None,
+    timeout: float = 300.0,
+    bot: FakeBot | None = None,
+    offsets: Sequence[float] | None = None,
+) -> ThroughputResult:
+    """Push `payloads` through a freshly wired dispatcher with `workers` worker threads.
+
+    `seed_store` fills the empty store before the run, e.g. `SyntheticPopulation.seed`. Updates are
+    queued as fast as possible, at `rate` updates per second, or each at its offset in seconds from
+    the start of the run given by `offsets`. Updates no handler accepts are left out and counted as
+    ignored. Pass `bot` to inspect the API calls the handlers made afterwards.
+    """
+    bot = bot or FakeBot()
+    bot.defaults = Defaults(run_async=True) if workers > 0 else None
+    update_queue: Queue[object] = Queue()
+    dispatcher = Dispatcher(bot, update_queue, workers=max(workers, 1))  # type: ignore[arg-type]
+    sender = TelegramStickerSender(
+        bot,  # type: ignore[arg-type]
+        global_rate=UNLIMITED_RATE,
+        chat_rate=UNLIMITED_RATE,
+        chat_burst=int(UNLIMITED_RATE),
+    )
+    parsed = [Update.de_json(payload, bot) for payload in payloads]  # type: ignore[arg-type]
+    if offsets is None:
+        offsets = [index / rate for index in range(len(parsed))] if rate else None
+    with tempfile.TemporaryDirectory(prefix="stickfix-bench-") as data_dir:
+        db = StickfixDB("users", data_dir=data_dir)
+        seed_store(db)
+        register_handlers(dispatcher, db, SamplingProfiler(), sticker_sender=sender)
+        handlers = [handler for group in dispatcher.handlers.values() for handler in group]
+        handled = [
+            index
+            for index, update in enumerate(parsed)
+            if any(handler.check_update(update) for handler in handlers)
+        ]
+        updates = [parsed[index] for index in handled]
+        schedule = [offsets[index] for index in handled] if offsets is not None else None
+        tracker = _CompletionTracker(len(updates))
+        for handler in handlers:
+            handler.callback = tracker.wrap(handler.callback)
+
+        ready = threading.Event()
+        thread = threading.Thread(
+            target=dispatcher.start, kwargs={"ready": ready}, name="bench-dispatcher"
+        )
+        thread.start()
+        if not ready.wait(timeout):
+            raise RuntimeError("The dispatcher did not start")
+        started = time.perf_counter()
+        try:
+            for index, update in enumerate(updates):
+                if schedule is not None:
+                    time.sleep(max(0.0, started + schedule[index] - time.perf_counter()))
+                tracker.enqueue(update)
+                update_queue.put(update)
+            completed = tracker.wait(timeout)
+        finally:
+            dispatcher.stop()
+            thread.join()
+            sender.shutdown()
+    return ThroughputResult(
+        workers=workers,
+        updates=len(updates),
+        seconds=(tracker.finished or time.perf_counter()) - started,
+        latency=tracker.latency,
+        by_kind=tracker.by_kind,
+        errors=tracker.errors,
+        ignored=len(parsed) - len(updates),
+        completed=completed,
+    )
+
+
+def format_results(results: Iterable[ThroughputResult]) -> str:
+    """Render results as a fixed-width table, latencies in milliseconds."""
+    header = ("workers", "updates", "seconds", "updates/s", "p50", "p95", "p99", "max", "errors")
+    rows = [header]
+    for result in results:
+        latency = result.latency
+        rows.append((
+            str(result.workers),
+            str(result.updates) + ("" if result.completed else "*"),
+            f"{result.seconds:.2f}",
+            f"{result.updates_per_second:.0f}",
+            *(f"{latency.quantile(q) * 1000:.2f}" for q in (0.5, 0.95, 0.99)),
+            f"{latency.maximum * 1000:.2f}",
+            str(result.errors),
+        ))
+    return _table(rows)
+
+
+def format_breakdown(result: ThroughputResult) -> str:
+    """Render the latency distribution of each kind of update, in milliseconds."""
+    rows = [("kind", "updates", "p50", "p95", "p99", "max")]
+    for kind, latency in sorted(result.by_kind.items()):
+        rows.append((
+            kind,
+            str(latency.count),
+            *(f"{latency.quantile(q) * 1000:.2f}" for q in (0.5, 0.95, 0.99)),
+            f"{latency.maximum * 1000:.2f}",
+        ))
+    return _table(rows)
+
+
+def _table(rows: Sequence[Sequence[str]]) -> str:
+    widths = [max(len(row[column]) for row in rows) for column in range(len(rows[0]))]
+    return "\n".join(
+        "  ".join(cell.rjust(width) for cell, width in zip(row, widths)) for row in rows
+    )
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    defaults = PopulationSpec()
+    parser.add_argument("--updates", type=int, default=5_000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[0, 1, 2, 4, 8])
+    parser.add_argument("--rate", type=float, default=None, help="offered updates per second")
+    parser.add_argument("--users", type=int, default=defaults.users)
+    parser.add_argument("--tags", type=int, default=defaults.tags)
+    parser.add_argument("--public-stickers", type=int, default=defaults.public_stickers)
+    parser.add_argument("--stickers-per-user", type=int, default=defaults.stickers_per_user)
+    parser.add_argument("--private-ratio", type=float, default=defaults.private_ratio)
+    parser.add_argument("--zipf", type=float, default=defaults.zipf_exponent)
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    parser.add_argument(
+        "--log-level", default="WARNING", help="records below this level are discarded"
+    )
+    args = parser.parse_args(argv)
+
+    logging.disable(logging.getLevelName(args.log_level.upper()) - 1)
+    population = SyntheticPopulation(PopulationSpec(
+        users=args.users,
+        tags=args.tags,
+        public_stickers=args.public_stickers,
+        stickers_per_user=args.stickers_per_user,
+        private_ratio=args.private_ratio,
+        zipf_exponent=args.zipf,
+        seed=args.seed,
+    ))
+    payloads = list(UpdateFactory(population, UpdateMix(), seed=args.seed + 1).payloads(
+        args.updates
+    ))
+    results = [
+        run_benchmark(population.seed, payloads, workers, args.rate) for workers in args.workers
+    ]
+    print(format_results(results))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+"""Synthetic sticker populations and the Telegram updates their users send.
+
+A `SyntheticPopulation` is fully determined by its `PopulationSpec`: the same spec always yields the
+same users, packs and tags, so runs with different settings (worker counts, storage backends, index
+changes) see identical data. Tag popularity follows a Zipf law, both when stickers are tagged and
+when users query, because a few tags ("cat", "lol") carry most of the traffic of a real bot.
+
+`UpdateFactory` turns the population into a stream of Bot API update payloads — the JSON Telegram
+would deliver — mixing inline queries, chosen inline results, ``/add`` and ``/get`` in the
+proportions of an `UpdateMix`. Payloads are plain dicts, so they can be stored, replayed, or parsed
+with ``Update.de_json``.
+"""
+
+from __future__ import annotations
+
+import bisect
+import itertools
+import random
+from collections.abc import Iterator, Mapping
+from dataclasses import dataclass
+from typing import Any
+
+from bot.application.inline_cache_policy import sticker_result_id
+from bot.database.storage import StickfixDB
+from bot.domain.user import SF_PUBLIC, StickfixUser
+
+Payload = dict[str, Any]
+
+FIRST_USER_ID = 100_000
+
+
+@dataclass(frozen=True, slots=True)
+class PopulationSpec:
+    """Size and shape of a synthetic population."""
+
+    users: int = 500
+    tags: int = 2_000
+    public_stickers: int = 5_000
+    stickers_per_user: int = 40
+    tags_per_sticker: int = 3
+    private_ratio: float = 0.2
+    zipf_exponent: float = 1.1
+    seed: int = 0
+
+
+@dataclass(frozen=True, slots=True)
+class UpdateMix:
+    """Relative weights of each kind of update in a generated stream."""
+
+    inline_query: float = 0.70
+    chosen_inline_result: float = 0.15
+    add: float = 0.10
+    get: float = 0.05
+
+
+class ZipfSampler:
+    """Draw ranks ``0..n-1`` with probability proportional to ``1 / (rank + 1) ** exponent``."""
+
+    def __init__(self, n: int, exponent: float) -> None:
+        self._cumulative = list(
+            itertools.accumulate(1 / (rank + 1) ** exponent for rank in range(n))
+        )
+
+    def sample(self, rng: random.Random) -> int:
+        return bisect.bisect(self._cumulative, rng.random() * self._cumulative[-1])
+
+
+class TagPopularity:
+    """Vocabulary of ``tag0..tagN`` whose tags are drawn with Zipf-distributed popularity."""
+
+    def __init__(self, tags: int, exponent: float) -> None:
+        self.tags = [f"tag{rank}" for rank in range(tags)]
+        self._sampler = ZipfSampler(tags, exponent)
+
+    def sample(self, rng: random.Random, count: int) -> list[str]:
+        """Draw up to `count` distinct tags by popularity."""
+        return sorted({self.tags[self._sampler.sample(rng)] for _ in range(count)})
+
+
+class SyntheticPopulation:
+    """Users, packs and tags generated deterministically from a `PopulationSpec`."""
+
+    def __init__(self, spec: PopulationSpec | None = None) -> None:
+        self.spec = spec = spec or PopulationSpec()
+        self.tag_popularity = TagPopularity(spec.tags, spec.zipf_exponent)
+        rng = random.Random(spec.seed)  # noqa: S311
+        self.user_ids = [str(FIRST_USER_ID + index) for index in range(spec.users)]
+        self.private_users = frozenset(
+            user_id for user_id in self.user_ids if rng.random() < spec.private_ratio
+        )
+        self.packs: dict[str, dict[str, tuple[str, ...]]] = {
+            SF_PUBLIC: self._pack(rng, "public", spec.public_stickers)
+        }
+        for user_id in self.user_ids:
+            self.packs[user_id] = self._pack(rng, user_id, spec.stickers_per_user)
+        self.postings = {owner: _postings(pack) for owner, pack in self.packs.items()}
+
+    def users(self) -> dict[str, StickfixUser]:
+        """Build fresh `StickfixUser` objects holding the generated packs."""
+        users: dict[str, StickfixUser] = {}
+        for owner, pack in self.packs.items():
+            user = StickfixUser(owner)
+            user.private_mode = owner in self.private_users
+            user.add_stickers(pack)
+            users[owner] = user
+        return users
+
+    def seed(self, db: StickfixDB) -> None:
+        """Load the population into `db`, in memory only."""
+        db.apply_batch(self.users())
+
+    def effective_owner(self, user_id: str) -> str:
+        """Return whose pack answers the queries of `user_id`."""
+        return user_id if user_id in self.private_users else SF_PUBLIC
+
+    def _pack(self, rng: random.Random, owner: str, size: int) -> dict[str, tuple[str, ...]]:
+        return {
+            f"{owner}-sticker-{index}": tuple(
+                self.tag_popularity.sample(rng, self.spec.tags_per_sticker)
+            )
+            for index in range(size)
+        }
+
+
+class UpdateFactory:
+    """Generate Bot API update payloads sent by the users of a `SyntheticPopulation`."""
+
+    def __init__(
+        self, population: SyntheticPopulation, mix: UpdateMix | None = None, seed: int = 1
+    ) -> None:
+        mix = mix or UpdateMix()
+        self._population = population
+        self._rng = random.Random(seed)  # noqa: S311
+        self._kinds = {
+            "inline_query": self._inline_query,
+            "chosen_inline_result": self._chosen_inline_result,
+            "add": self._add,
+            "get": self._get,
+        }
+        self._weights = [getattr(mix, kind) for kind in self._kinds]
+        self._update_ids = itertools.count(1)
+
+    def payloads(self, count: int) -> Iterator[Payload]:
+        """Yield `count` update payloads with increasing update ids."""
+        kinds = list(self._kinds.values())
+        for _ in range(count):
+            build = self._rng.choices(kinds, self._weights)[0]
+            user_id = self._rng.choice(self._population.user_ids)
+            yield {"update_id": next(self._update_ids), **build(user_id)}
+
+    def _query(self) -> list[str]:
+        return self._population.tag_popularity.sample(self._rng, self._rng.choice((1, 1, 2)))
+
+    def _inline_query(self, user_id: str) -> Payload:
+        return {
+            "inline_query": {
+                "id": str(self._rng.getrandbits(63)),
+                "from": _user(user_id),
+                "query": " ".join(self._query()),
+                "offset": "",
+            }
+        }
+
+    def _chosen_inline_result(self, user_id: str) -> Payload:
+        tags = self._query()
+        owner = self._population.effective_owner(user_id)
+        candidates = self._population.postings[owner].get(tags[0])
+        if not candidates:
+            return self._inline_query(user_id)
+        return {
+            "chosen_inline_result": {
+                "result_id": sticker_result_id(self._rng.choice(candidates)),
+                "from": _user(user_id),
+                "query": " ".join(tags),
+            }
+        }
+
+    def _add(self, user_id: str) -> Payload:
+        sticker_id = f"{user_id}-new-{self._rng.getrandbits(32)}"
+        reply = _message(user_id, 1, sticker=_sticker(sticker_id))
+        return {"message": _command(user_id, "add", self._query(), reply_to_message=reply)}
+
+    def _get(self, user_id: str) -> Payload:
+        return {"message": _command(user_id, "get", self._query())}
+
+
+def _postings(pack: Mapping[str, tuple[str, ...]]) -> dict[str, list[str]]:
+    postings: dict[str, list[str]] = {}
+    for sticker_id, tags in pack.items():
+        for tag in tags:
+            postings.setdefault(tag, []).append(sticker_id)
+    return postings
+
+
+def _user(user_id: str) -> Payload:
+    return {"id": int(user_id), "is_bot": False, "first_name": f"user{user_id}"}
+
+
+def _message(user_id: str, message_id: int, **fields: Any) -> Payload:
+    return {
+        "message_id": message_id,
+        "date": 0,
+        "from": _user(user_id),
+        "chat": {"id": int(user_id), "type": "private"},
+        **fields,
+    }
+
+
+def _command(user_id: str, command: str, args: list[str], **fields: Any) -> Payload:
+    text = " ".join([f"/{command}", *args])
+    entity = {"type": "bot_command", "offset": 0, "length": len(command) + 1}
+    return _message(user_id, 2, text=text, entities=[entity], **fields)
+
+
+def _sticker(sticker_id: str) -> Payload:
+    return {
+        "file_id": sticker_id,
+        "file_unique_id": sticker_id,
+        "width": 512,
+        "height": 512,
+        "is_animated": False,
+        "is_video": False,
+        "type": "regular",
+        "emoji": "🙂",
+    }
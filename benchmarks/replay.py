@@ -0,0 +1,93 @@
+"""Replay a recording of real updates through the dispatcher benchmark.
+
+Recordings are written by the bot when ``STICKFIX_RECORD_UPDATES`` names a file (see
+`bot.infrastructure.telegram.UpdateRecorder`). The replay feeds them, in order, to the same
+dispatcher and fake bot as ``benchmarks.dispatcher_throughput``, either at their original pace,
+scaled by ``--speed`` (``2`` plays twice as fast), or as fast as possible (``--speed max``), and
+prints the latency distribution overall and per kind of update::
+
+    python -m benchmarks.replay recordings/updates.jsonl.gz --speed 4 --workers 0 4
+
+Recordings carry pseudonymous ids, so the users' private packs of a production store are not found
+again; the shared public pack is. Pass a copy of the store with ``--store`` to replay against real
+tags, otherwise the synthetic population of the throughput benchmark is used.
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import shutil
+import tempfile
+from collections.abc import Callable, Sequence
+from pathlib import Path
+
+from benchmarks.dispatcher_throughput import format_breakdown, format_results, run_benchmark
+from benchmarks.load import Payload, SyntheticPopulation
+from bot.database.storage import StickfixDB
+from bot.infrastructure.telegram import read_recording
+
+
+def load_recording(path: str | Path) -> tuple[list[Payload], list[float]]:
+    """Return the updates of a recording, renumbered in order, and their offsets in seconds."""
+    payloads: list[Payload] = []
+    offsets: list[float] = []
+    start: float | None = None
+    for index, (timestamp, payload) in enumerate(read_recording(path), start=1):
+        start = timestamp if start is None else start
+        payloads.append({**payload, "update_id": index})
+        offsets.append(max(0.0, timestamp - start))
+    return payloads, offsets
+
+
+def scale(offsets: Sequence[float], speed: float | None) -> list[float] | None:
+    """Return the offsets played `speed` times faster, or `None` to play as fast as possible."""
+    if speed is None:
+        return None
+    return [offset / speed for offset in offsets]
+
+
+def store_seeder(path: str | Path) -> Callable[[StickfixDB], None]:
+    """Return a seeder copying the users of the YAML store at `path` into the benchmark's store.
+
+    The store is read from a temporary copy, so a damaged file is never "recovered" in place.
+    """
+
+    def seed(db: StickfixDB) -> None:
+        source_path = Path(path)
+        with tempfile.TemporaryDirectory(prefix="stickfix-replay-") as copy_dir:
+            shutil.copy2(source_path, Path(copy_dir) / source_path.name)
+            source = StickfixDB(Path(source_path.name).stem, data_dir=copy_dir)
+            db.apply_batch(dict(source))
+
+    return seed
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("recording", type=Path)
+    parser.add_argument(
+        "--speed", default="1", help="playback speed factor, or 'max' to ignore the recorded pace"
+    )
+    parser.add_argument("--workers", type=int, nargs="+", default=[0])
+    parser.add_argument("--store", type=Path, help="YAML user store to replay against")
+    parser.add_argument(
+        "--log-level", default="WARNING", help="records below this level are discarded"
+    )
+    args = parser.parse_args(argv)
+
+    logging.disable(logging.getLevelName(args.log_level.upper()) - 1)
+    payloads, offsets = load_recording(args.recording)
+    schedule = scale(offsets, None if args.speed == "max" else float(args.speed))
+    seed = store_seeder(args.store) if args.store else SyntheticPopulation().seed
+    for workers in args.workers:
+        result = run_benchmark(seed, payloads, workers, offsets=schedule)
+        print(format_results([result]))
+        print(format_breakdown(result))
+        if result.ignored:
+            print(f"{result.ignored} updates matched no handler and were skipped")
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+"""Load, save, reload and recovery costs of `StickfixDB` as the user store grows.
+
+For every store size the benchmark generates users with the storage test factories
+(``tests/support/storage.py``), adding stickers tagged with Zipf-distributed popularity, and
+measures on a fresh data directory:
+
+- ``save``: `StickfixDB.save`, including backup rotation and validation;
+- ``init``: opening the saved store with `StickfixDB` (what a restart pays);
+- ``reload``: `StickfixDB.reload` on an open store;
+- ``recover``: opening the store after its main file was corrupted, so it loads from a backup;
+
+plus the size of the YAML snapshot and the peak resident set size of the process. Each size runs in
+its own process, so peak RSS belongs to that size alone. Every operation runs ``repeat`` times and
+the best time is kept, which is the least noisy figure to compare.
+
+Results are written as JSON so runs on two commits can be compared; with ``--baseline`` the run
+fails when loading or saving got more than ``--threshold`` percent slower::
+
+    python -m benchmarks.storage --sizes 1000 10000 --output storage-new.json \\
+        --baseline storage-old.json --threshold 10
+
+The YAML codec is slow enough that 100k and 1M users take minutes to hours, so they only run when
+asked for with ``--sizes``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from collections.abc import Callable, Mapping, Sequence
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from multiprocessing import get_context
+from pathlib import Path
+from typing import Any
+
+from benchmarks.load import TagPopularity
+from bot.database.storage import StickfixDB
+from bot.domain.user import StickfixUser
+from tests.support.storage import create_user_from_spec, make_user_spec, write_valid_or_invalid
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - Windows
+    resource = None  # type: ignore[assignment]
+
+SIZES = (1_000, 10_000, 100_000, 1_000_000)
+DEFAULT_SIZES = (1_000, 10_000)
+OPERATIONS = ("save", "init", "reload", "recover")
+GUARDED_OPERATIONS = ("save", "init", "reload")
+DB_NAME = "users"
+
+Result = dict[str, Any]
+
+
+def generate_users(
+    count: int,
+    stickers_per_user: int = 5,
+    tags_per_sticker: int = 3,
+    tags: int = 2_000,
+    private_ratio: float = 0.2,
+    seed: int = 0,
+) -> dict[str, StickfixUser]:
+    """Generate `count` users holding `stickers_per_user` stickers each, deterministically."""
+    rng = random.Random(seed)  # noqa: S311
+    popularity = TagPopularity(tags, 1.1)
+    users: dict[str, StickfixUser] = {}
+    for index in range(count):
+        user_id = str(index)
+        spec = make_user_spec(
+            private_mode=rng.random() < private_ratio,
+            shuffle=rng.random() < 0.5,
+            tags=tuple(popularity.sample(rng, tags_per_sticker)),
+        )
+        user = create_user_from_spec(user_id, spec)
+        user.add_stickers({
+            f"{user_id}-sticker-{sticker}": popularity.sample(rng, tags_per_sticker)
+            for sticker in range(1, stickers_per_user)
+        })
+        users[user_id] = user
+    return users
+
+
+def measure(size: int, repeat: int = 3, stickers_per_user: int = 5, seed: int = 0) -> Result:
+    """Benchmark one store of `size` users in a temporary directory."""
+    timings: dict[str, list[float]] = {operation: [] for operation in OPERATIONS}
+    with tempfile.TemporaryDirectory(prefix="stickfix-storage-bench-") as data_dir:
+        db = StickfixDB(DB_NAME, data_dir=data_dir)
+        db.apply_batch(generate_users(size, stickers_per_user, seed=seed))
+        db.save()
+        main_path = Path(data_dir) / f"{DB_NAME}.yaml"
+        for _ in range(repeat):
+            timings["save"].append(_timed(db.save))
+        del db
+        for _ in range(repeat):
+            timings["init"].append(_timed(lambda: StickfixDB(DB_NAME, data_dir=data_dir)))
+        db = StickfixDB(DB_NAME, data_dir=data_dir)
+        for _ in range(repeat):
+            timings["reload"].append(_timed(db.reload))
+        for _ in range(repeat):
+            write_valid_or_invalid(main_path, {}, valid=False)
+            timings["recover"].append(_timed(lambda: StickfixDB(DB_NAME, data_dir=data_dir)))
+        snapshot_bytes = main_path.stat().st_size
+    return {
+        "users": size,
+        "seconds": {operation: min(samples) for operation, samples in timings.items()},
+        "samples": timings,
+        "snapshot_bytes": snapshot_bytes,
+        "peak_rss_bytes": peak_rss_bytes(),
+    }
+
+
+def peak_rss_bytes() -> int | None:
+    """Return the peak resident set size of this process, or `None` where it is unknown."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def run(sizes: Sequence[int], repeat: int, stickers_per_user: int, seed: int) -> list[Result]:
+    """Measure every size in a fresh process, smallest first."""
+    results = []
+    for size in sorted(sizes):
+        with ProcessPoolExecutor(1, mp_context=get_context("spawn")) as executor:
+            job = executor.submit(_measure_quietly, size, repeat, stickers_per_user, seed)
+            results.append(job.result())
+    return results
+
+
+def find_regressions(
+    baseline: Mapping[str, Any], current: Mapping[str, Any], threshold: float
+) -> list[str]:
+    """Describe every guarded operation more than `threshold` percent slower than in `baseline`.
+
+    Only sizes present in both reports are compared.
+    """
+    before = {result["users"]: result["seconds"] for result in baseline["results"]}
+    regressions = []
+    for result in current["results"]:
+        previous = before.get(result["users"])
+        if previous is None:
+            continue
+        for operation in GUARDED_OPERATIONS:
+            old, new = previous.get(operation), result["seconds"][operation]
+            if old and new > old * (1 + threshold / 100):
+                regressions.append(
+                    f"{operation} with {result['users']} users: {old:.3f}s -> {new:.3f}s "
+                    f"(+{(new / old - 1) * 100:.0f}%)"
+                )
+    return regressions
+
+
+def format_results(results: Sequence[Result]) -> str:
+    """Render results as a fixed-width table."""
+    header = ("users", *OPERATIONS, "snapshot MB", "peak RSS MB")
+    rows = [header]
+    for result in results:
+        rss = result["peak_rss_bytes"]
+        rows.append((
+            str(result["users"]),
+            *(f"{result['seconds'][operation]:.3f}s" for operation in OPERATIONS),
+            f"{result['snapshot_bytes'] / 1e6:.1f}",
+            "?" if rss is None else f"{rss / 1e6:.0f}",
+        ))
+    widths = [max(len(row[column]) for row in rows) for column in range(len(header))]
+    return "\n".join(
+        "  ".join(cell.rjust(width) for cell, width in zip(row, widths)) for row in rows
+    )
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=list(DEFAULT_SIZES),
+        help=f"numbers of users to benchmark, e.g. {' '.join(map(str, SIZES))}",
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--stickers-per-user", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, default=Path("storage-benchmark.json"))
+    parser.add_argument("--baseline", type=Path, help="results of a previous run to compare with")
+    parser.add_argument(
+        "--threshold", type=float, default=10.0, help="allowed slowdown against the baseline, in %%"
+    )
+    args = parser.parse_args(argv)
+
+    report = {
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "repeat": args.repeat,
+        "stickers_per_user": args.stickers_per_user,
+        "results": run(args.sizes, args.repeat, args.stickers_per_user, args.seed),
+    }
+    args.output.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+    print(format_results(report["results"]))
+    print(f"Results written to {args.output}")
+    if args.baseline is None:
+        return 0
+    baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+    regressions = find_regressions(baseline, report, args.threshold)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    return 1 if regressions else 0
+
+
+def _measure_quietly(size: int, repeat: int, stickers_per_user: int, seed: int) -> Result:
+    logging.disable(logging.CRITICAL)
+    return measure(size, repeat, stickers_per_user, seed)
+
+
+def _timed(operation: Callable[[], object]) -> float:
+    started = time.perf_counter()
+    operation()
+    return time.perf_counter() - started
+
+
+def _git_commit() -> str | None:
+    try:
+        completed = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],  # noqa: S607
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return completed.stdout.strip()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -18,42 +18,57 @@ import from one stable namespace when needed.
 
 from .errors import (
     ApplicationError,
+    InsufficientPermissionsError,
     InvalidCommandInputError,
     MissingReplyStickerError,
     MissingStickerError,
+    StickerSetNotFoundError,
     UserNotFoundError,
     WrongInteractionContextError,
 )
 from .requests import (
     AddStickerCommand,
+    AddStickerSetCommand,
     ClearInlineCacheCommand,
     DeleteStickerCommand,
     DeleteUserCommand,
+    DropTagCommand,
     GetStickersQuery,
     InlineQueryRequest,
+    MergeTagsCommand,
+    RecordChosenResultCommand,
+    RenameTagCommand,
     SetModeCommand,
     SetShuffleCommand,
 )
-from .results import AcknowledgementResult, GetStickersResult, InlineQueryResult
+from .results import AcknowledgementResult, GetStickersResult, InlineQueryResult, TagEditResult
 from .use_cases import ClearInlineCache
 
 __all__ = [
     "AcknowledgementResult",
     "AddStickerCommand",
+    "AddStickerSetCommand",
     "ApplicationError",
     "ClearInlineCache",
     "ClearInlineCacheCommand",
     "DeleteStickerCommand",
     "DeleteUserCommand",
+    "DropTagCommand",
     "GetStickersQuery",
     "GetStickersResult",
     "InlineQueryRequest",
     "InlineQueryResult",
+    "InsufficientPermissionsError",
     "InvalidCommandInputError",
     "MissingReplyStickerError",
+    "MergeTagsCommand",
     "MissingStickerError",
+    "RecordChosenResultCommand",
+    "RenameTagCommand",
     "SetModeCommand",
     "SetShuffleCommand",
+    "StickerSetNotFoundError",
+    "TagEditResult",
     "UserNotFoundError",
     "WrongInteractionContextError",
 ]
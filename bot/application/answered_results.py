@@ -0,0 +1,82 @@
+"""Memory of recent inline answers, for learning from the results users choose.
+
+Telegram reports a chosen inline result with only its opaque result id and the raw query text. The
+result id is a digest of the sticker id (see `sticker_result_id`), so it cannot be turned back into
+a sticker, and the raw text may be a misspelling that was answered through a corrected query.
+`AnsweredResults` keeps both pieces for the answers the bot sent recently:
+
+- which sticker each result id of an answered page stands for;
+- which query was actually searched for a query text, when it was corrected.
+
+Both are bounded, least recently used first out, so memory stays constant however many queries are
+answered. A choice of a result that was forgotten, e.g. after a restart, is simply not learnt from.
+"""
+
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from collections.abc import Iterable
+
+from bot.application.inline_cache_policy import sticker_result_id
+from bot.domain.query import QueryNode, parse_inline_query
+
+_SharedKey = tuple[str | None, str]
+
+
+class AnsweredResults:
+    """Bounded, thread-safe record of recently answered inline results."""
+
+    def __init__(self, sticker_capacity: int = 50_000, query_capacity: int = 10_000) -> None:
+        self._sticker_capacity = sticker_capacity
+        self._query_capacity = query_capacity
+        self._stickers: OrderedDict[str, str] = OrderedDict()
+        self._queries: OrderedDict[_SharedKey, QueryNode] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def remember(
+        self,
+        user_id: str | None,
+        query_text: str,
+        sticker_ids: Iterable[str],
+        corrected_query: QueryNode | None = None,
+        shared: bool = False,
+    ) -> None:
+        """Record one answered page.
+
+        :param user_id: user the answer was computed for.
+        :param query_text: raw query text as sent by Telegram.
+        :param sticker_ids: stickers of the answered page.
+        :param corrected_query: query searched instead of the raw text, if it was corrected.
+        :param shared: whether Telegram may serve the answer to other users as well.
+        """
+        results = [(sticker_result_id(sticker_id), sticker_id) for sticker_id in sticker_ids]
+        keys = [(user_id, query_text), (None, query_text)] if shared else [(user_id, query_text)]
+        queries = [(key, corrected_query) for key in keys] if corrected_query is not None else []
+        with self._lock:
+            _put_all(self._stickers, results, self._sticker_capacity)
+            _put_all(self._queries, queries, self._query_capacity)
+
+    def sticker_id(self, result_id: str) -> str | None:
+        """Return the sticker an answered result id stands for, or `None` if it was forgotten."""
+        with self._lock:
+            return self._stickers.get(result_id)
+
+    def searched_query(self, user_id: str | None, query_text: str) -> QueryNode | None:
+        """Return the query searched to answer `query_text` for `user_id`.
+
+        That is the corrected query when the text was corrected, and the parsed text otherwise.
+        """
+        with self._lock:
+            corrected = self._queries.get((user_id, query_text))
+            if corrected is None:
+                corrected = self._queries.get((None, query_text))
+        return corrected if corrected is not None else parse_inline_query(query_text)
+
+
+def _put_all(entries: OrderedDict, items: Iterable[tuple], capacity: int) -> None:
+    for key, value in items:
+        entries[key] = value
+        entries.move_to_end(key)
+    while len(entries) > capacity:
+        entries.popitem(last=False)
@@ -25,3 +25,11 @@ class MissingReplyStickerError(ApplicationError):
 
 class UserNotFoundError(ApplicationError):
     """Raised when an operation requires a user that does not exist."""
+
+
+class StickerSetNotFoundError(ApplicationError):
+    """Raised when a sticker set cannot be found."""
+
+
+class InsufficientPermissionsError(ApplicationError):
+    """Raised when a user is not allowed to perform an operation."""
@@ -0,0 +1,78 @@
+"""Telegram-side inline caching policy and stable inline result identifiers.
+
+Telegram caches inline answers on its servers for ``cache_time`` seconds and shares them across
+users unless the answer is marked personal. Stickfix used to answer every query with random result
+ids, ``cache_time=1`` and ``is_personal=True``, which disabled that cache entirely.
+
+This module keeps the decision Telegram-free:
+
+- `sticker_result_id` derives a deterministic, Telegram-sized result id from a sticker id, so the
+  same sticker always produces the same inline result.
+- `InlineCachePolicy` decides how long an answer may be cached and whether it may be shared, based
+  on which packs contributed to the answer.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from hashlib import blake2b
+
+from bot.domain.user import StickfixUser
+
+HELP_RESULT_ID = "help"
+
+
+def sticker_result_id(sticker_id: str) -> str:
+    """Return a stable inline result id for one sticker.
+
+    Telegram limits result ids to 64 bytes, while sticker file ids may be longer, so the id is a
+    fixed-size digest of the sticker id instead of the sticker id itself.
+    """
+    return blake2b(sticker_id.encode("utf-8"), digest_size=16).hexdigest()
+
+
+@dataclass(frozen=True, slots=True)
+class InlineCacheDecision:
+    """Caching parameters for one inline answer."""
+
+    cache_time: int
+    is_personal: bool
+
+
+@dataclass(frozen=True, slots=True)
+class InlineCachePolicy:
+    """Compute Telegram cache parameters from the packs that answer an inline query.
+
+    Answers built exclusively from the shared public pack are identical for every user issuing the
+    same query, so Telegram may cache them for `shared_cache_time` seconds and serve them to anyone.
+    Answers that include a private pack, results specific to the user (such as their recently
+    sent stickers), or results the user asked to shuffle stay personal and short-lived.
+    """
+
+    shared_cache_time: int = 300
+    personal_cache_time: int = 1
+
+    def decide(
+        self,
+        user: StickfixUser,
+        public_pack: StickfixUser | None,
+        personal_results: bool = False,
+    ) -> InlineCacheDecision:
+        if (
+            not personal_results
+            and not user.shuffle
+            and self._answers_from_public_pack_only(user, public_pack)
+        ):
+            return InlineCacheDecision(cache_time=self.shared_cache_time, is_personal=False)
+        return InlineCacheDecision(cache_time=self.personal_cache_time, is_personal=True)
+
+    @staticmethod
+    def _answers_from_public_pack_only(
+        user: StickfixUser,
+        public_pack: StickfixUser | None,
+    ) -> bool:
+        if public_pack is None:
+            return False
+        if user is public_pack:
+            return True
+        return not user.private_mode and not user.stickers
@@ -16,6 +16,8 @@ implementation concerns.
 
 - `UserRepository` describes how use cases load and save Stickfix users.
 - `HelpContentProvider` describes how use cases obtain raw help text.
+- `UnitOfWork` describes how use cases batch the repository writes of one invocation.
+- `StickerSetProvider` describes how use cases read the stickers of a Telegram sticker set.
 
 Concrete implementations belong in `bot.infrastructure`, where they may delegate  to YAML files,
 local files, databases, HTTP clients, or other external systems.
@@ -25,6 +27,15 @@ test with fakes, while production wiring can choose the appropriate adapter.
 """
 
 from .help_content import HelpContentProvider
+from .sticker_set_provider import StickerSetItem, StickerSetProvider
+from .unit_of_work import UnitOfWork, UnitOfWorkFactory
 from .user_repository import UserRepository
 
-__all__ = ["HelpContentProvider", "UserRepository"]
+__all__ = [
+    "HelpContentProvider",
+    "StickerSetItem",
+    "StickerSetProvider",
+    "UnitOfWork",
+    "UnitOfWorkFactory",
+    "UserRepository",
+]
@@ -0,0 +1,33 @@
+"""Port for reading Telegram sticker sets.
+
+This port abstracts sticker-set lookups from the application layer, enabling:
+- `AddStickerSet` use case to import a whole set without talking to Telegram directly
+- Tests to provide fixed sticker sets without network access
+
+Adapters (e.g., TelegramStickerSetProvider) implement this port by querying the Bot API.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Protocol, runtime_checkable
+
+
+@dataclass(frozen=True, slots=True)
+class StickerSetItem:
+    """One sticker of a sticker set."""
+
+    file_id: str
+    emoji: str | None = None
+
+
+@runtime_checkable
+class StickerSetProvider(Protocol):
+    """Contract for fetching the stickers of a named sticker set."""
+
+    def get_sticker_set(self, name: str) -> tuple[StickerSetItem, ...]:
+        """Return every sticker of the set, in set order.
+
+        Raises:
+            StickerSetNotFoundError: If no sticker set has that name.
+        """
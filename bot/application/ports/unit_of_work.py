@@ -0,0 +1,54 @@
+"""Port for batching repository writes made during one use-case invocation.
+
+A use case may touch the same user several times while it runs (for example, `AddSticker` may
+create the public pack and then save it again after adding the sticker). Writing through
+`UserRepository` directly turns each of those calls into a separate storage write. A unit of work
+collects them instead and hands the storage layer one batch on `commit`, enabling:
+- One write per use-case call regardless of how many times a user is saved
+- Transactional backends (e.g., SQL) to map one use-case call to one transaction
+- Tests to keep using in-memory repository fakes through the generic buffered implementation
+
+Adapters (e.g., StickfixUnitOfWork) implement this port by applying the batch to a concrete store.
+"""
+
+from __future__ import annotations
+
+from types import TracebackType
+from typing import Callable, Protocol, runtime_checkable
+
+from .user_repository import UserRepository
+
+
+@runtime_checkable
+class UnitOfWork(Protocol):
+    """Contract for collecting repository mutations and committing them as one batch.
+
+    Use cases read and write through `users` inside a ``with`` block and call `commit` once at the
+    end. Leaving the block without committing discards every staged write.
+    """
+
+    users: UserRepository
+
+    def __enter__(self) -> UnitOfWork:
+        """Start collecting mutations."""
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        """Discard any mutation that was not committed."""
+
+    def commit(self) -> None:
+        """Apply every staged save and delete to the backing store as one batch."""
+
+    def rollback(self) -> None:
+        """Discard every staged save and delete.
+
+        Rolling back does not undo in-place changes already made to loaded domain objects; it only
+        prevents them from being written by this unit of work.
+        """
+
+
+UnitOfWorkFactory = Callable[[], UnitOfWork]
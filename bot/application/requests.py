@@ -17,6 +17,15 @@ class AddStickerCommand:
     tags: tuple[str, ...] = field(default_factory=tuple)
 
 
+@dataclass(frozen=True, slots=True)
+class AddStickerSetCommand:
+    user_id: str
+    chat_id: str
+    chat_type: str
+    set_name: str
+    tags: tuple[str, ...] = field(default_factory=tuple)
+
+
 @dataclass(frozen=True, slots=True)
 class GetStickersQuery:
     user_id: str
@@ -63,3 +72,30 @@ class InlineQueryRequest:
 class ClearInlineCacheCommand:
     user_id: str | None
     query_text: str = ""
+
+
+@dataclass(frozen=True, slots=True)
+class RecordChosenResultCommand:
+    user_id: str | None
+    query_text: str
+    result_id: str
+
+
+@dataclass(frozen=True, slots=True)
+class RenameTagCommand:
+    user_id: str
+    old_tag: str
+    new_tag: str
+
+
+@dataclass(frozen=True, slots=True)
+class MergeTagsCommand:
+    user_id: str
+    source_tags: tuple[str, ...]
+    target_tag: str
+
+
+@dataclass(frozen=True, slots=True)
+class DropTagCommand:
+    user_id: str
+    tag: str
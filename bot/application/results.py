@@ -18,6 +18,14 @@ class AddStickerResult:
     changed: bool = False
 
 
+@dataclass(frozen=True, slots=True)
+class AddStickerSetResult:
+    set_name: str
+    sticker_count: int = 0
+    added_count: int = 0
+    changed: bool = False
+
+
 @dataclass(frozen=True, slots=True)
 class DeleteStickerResult:
     sticker_id: str
@@ -38,3 +46,13 @@ class InlineQueryResult:
     help_text: str | None = None
     next_offset: int = 0
     cache_cleared: bool = False
+    cache_time: int = 1
+    is_personal: bool = True
+    corrected_tags: tuple[str, ...] = field(default_factory=tuple)
+
+
+@dataclass(frozen=True, slots=True)
+class TagEditResult:
+    removed_tags: tuple[str, ...] = field(default_factory=tuple)
+    updated_tags: tuple[str, ...] = field(default_factory=tuple)
+    changed: bool = False
@@ -0,0 +1,97 @@
+"""Backend-agnostic unit of work that buffers writes over any `UserRepository`.
+
+`BufferedUnitOfWork` is the default unit of work used by application use cases. It stages saves
+and deletes in memory, serves reads from the staged state first, and writes each touched user once
+when committed. Backends that can apply a batch natively (such as the YAML store) subclass it and
+override `_apply`.
+"""
+
+from __future__ import annotations
+
+from types import TracebackType
+from typing import Any
+
+from bot.application.ports import UserRepository
+from bot.domain.user import SF_PUBLIC, StickfixUser
+
+
+class StagedUserRepository(UserRepository):
+    """`UserRepository` view that records mutations instead of applying them."""
+
+    def __init__(self, repository: UserRepository) -> None:
+        self._repository = repository
+        self.saved: dict[Any, StickfixUser] = {}
+        self.deleted: set[Any] = set()
+
+    def get_user(self, user_id: str) -> StickfixUser | None:
+        if user_id in self.deleted:
+            return None
+        if user_id in self.saved:
+            return self.saved[user_id]
+        return self._repository.get_user(user_id)
+
+    def has_user(self, user_id: str) -> bool:
+        if user_id in self.deleted:
+            return False
+        return user_id in self.saved or self._repository.has_user(user_id)
+
+    def save_user(self, user: StickfixUser) -> None:
+        self.deleted.discard(user.id)
+        self.saved[user.id] = user
+
+    def delete_user(self, user_id: str) -> bool:
+        existed = self.has_user(user_id)
+        self.saved.pop(user_id, None)
+        if existed:
+            self.deleted.add(user_id)
+        return existed
+
+    def get_public_pack(self) -> StickfixUser | None:
+        return self.get_user(SF_PUBLIC)
+
+    def ensure_public_pack(self) -> StickfixUser:
+        public_pack = self.get_public_pack()
+        if public_pack is None:
+            public_pack = StickfixUser(SF_PUBLIC)
+            self.save_user(public_pack)
+        return public_pack
+
+    def clear(self) -> None:
+        self.saved = {}
+        self.deleted = set()
+
+
+class BufferedUnitOfWork:
+    """Collect the writes of one use-case invocation and apply them on `commit`."""
+
+    def __init__(self, users: UserRepository) -> None:
+        self._repository = users
+        self.users = StagedUserRepository(users)
+
+    def __enter__(self) -> BufferedUnitOfWork:
+        self.users.clear()
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self.rollback()
+
+    def commit(self) -> None:
+        saved, deleted = self.users.saved, self.users.deleted
+        self.users.clear()
+        if saved or deleted:
+            self._apply(saved, deleted)
+
+    def rollback(self) -> None:
+        self.users.clear()
+
+    def _apply(self, saved: dict[Any, StickfixUser], deleted: set[Any]) -> None:
+        """Write one batch through the wrapped repository, one call per touched user."""
+        for user in saved.values():
+            self._repository.save_user(user)
+        for user_id in deleted:
+            self._repository.delete_user(user_id)
@@ -11,17 +11,25 @@ imports centralized here makes call sites stable while the internal package evol
 """
 
 from .add_sticker import AddSticker
+from .add_sticker_set import AddStickerSet
 from .clear_inline_cache import ClearInlineCache
 from .delete_sticker import DeleteSticker
+from .edit_tags import DropTag, MergeTags, RenameTag
 from .get_stickers import GetStickers
+from .record_chosen_result import RecordChosenResult
 from .resolve_inline_query import ResolveInlineQuery
 from .set_mode import SetMode
 
 __all__ = [
     "AddSticker",
+    "AddStickerSet",
     "ClearInlineCache",
     "DeleteSticker",
+    "DropTag",
     "GetStickers",
+    "MergeTags",
+    "RecordChosenResult",
+    "RenameTag",
     "ResolveInlineQuery",
     "SetMode",
 ]
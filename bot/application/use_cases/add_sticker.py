@@ -2,30 +2,44 @@
 
 from __future__ import annotations
 
+from functools import partial
+
 from bot.application.errors import MissingStickerError
-from bot.application.ports import UserRepository
+from bot.application.ports import UnitOfWorkFactory, UserRepository
 from bot.application.requests import AddStickerCommand
 from bot.application.results import AddStickerResult
+from bot.application.unit_of_work import BufferedUnitOfWork
+from bot.domain.query import normalize_tags
 from bot.domain.services import StickerPackService
+from bot.utils.metrics import METRICS, USE_CASE_LATENCY
 
 
 class AddSticker:
     """Add a sticker to the public or private pack selected by user settings."""
 
-    def __init__(self, users: UserRepository, stickers: StickerPackService | None = None) -> None:
+    def __init__(
+        self,
+        users: UserRepository,
+        stickers: StickerPackService | None = None,
+        unit_of_work: UnitOfWorkFactory | None = None,
+    ) -> None:
         self._users = users
         self._stickers = stickers or StickerPackService()
+        self._unit_of_work = unit_of_work or partial(BufferedUnitOfWork, users)
 
+    @METRICS.timed(USE_CASE_LATENCY, use_case="AddSticker")
     def __call__(self, command: AddStickerCommand) -> AddStickerResult:
         if command.reply_sticker_id is None:
             raise MissingStickerError("A sticker id is required to add a sticker.")
 
-        public_pack = self._users.ensure_public_pack()
-        user = self._users.get_user(command.user_id) or public_pack
-        tags = self._effective_tags(command)
-        mutation = self._stickers.add_sticker(user, command.reply_sticker_id, tags, public_pack)
-        if tags:
-            self._users.save_user(mutation.effective_pack)
+        with self._unit_of_work() as unit_of_work:
+            public_pack = unit_of_work.users.ensure_public_pack()
+            user = unit_of_work.users.get_user(command.user_id) or public_pack
+            tags = self._effective_tags(command)
+            mutation = self._stickers.add_sticker(user, command.reply_sticker_id, tags, public_pack)
+            if tags:
+                unit_of_work.users.save_user(mutation.effective_pack)
+            unit_of_work.commit()
         return AddStickerResult(
             sticker_id=command.reply_sticker_id,
             effective_tags=tags,
@@ -34,8 +48,9 @@ class AddSticker:
 
     @staticmethod
     def _effective_tags(command: AddStickerCommand) -> tuple[str, ...]:
-        if command.tags:
-            return command.tags
+        tags = normalize_tags(command.tags)
+        if tags:
+            return tags
         if command.reply_sticker_emoji:
-            return (command.reply_sticker_emoji,)
+            return normalize_tags((command.reply_sticker_emoji,))
         return ()
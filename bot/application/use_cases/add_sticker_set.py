@@ -0,0 +1,61 @@
+"""Use case for importing a whole sticker set into the effective sticker pack."""
+
+from __future__ import annotations
+
+from functools import partial
+
+from bot.application.errors import InvalidCommandInputError
+from bot.application.ports import StickerSetProvider, UnitOfWorkFactory, UserRepository
+from bot.application.requests import AddStickerSetCommand
+from bot.application.results import AddStickerSetResult
+from bot.application.unit_of_work import BufferedUnitOfWork
+from bot.domain.query import normalize_tags
+from bot.domain.services import StickerPackService
+from bot.utils.metrics import METRICS, USE_CASE_LATENCY
+
+
+class AddStickerSet:
+    """Add every sticker of a Telegram sticker set to the pack selected by user settings.
+
+    The set is fetched once and linked in a single pack mutation, so importing a set costs one
+    index update and one storage write no matter how many stickers it has. Stickers are tagged with
+    the command tags or, when none are given, with their own emoji.
+    """
+
+    def __init__(
+        self,
+        users: UserRepository,
+        sticker_sets: StickerSetProvider,
+        stickers: StickerPackService | None = None,
+        unit_of_work: UnitOfWorkFactory | None = None,
+    ) -> None:
+        self._users = users
+        self._sticker_sets = sticker_sets
+        self._stickers = stickers or StickerPackService()
+        self._unit_of_work = unit_of_work or partial(BufferedUnitOfWork, users)
+
+    @METRICS.timed(USE_CASE_LATENCY, use_case="AddStickerSet")
+    def __call__(self, command: AddStickerSetCommand) -> AddStickerSetResult:
+        if not command.set_name:
+            raise InvalidCommandInputError("A sticker set name is required.")
+
+        tags = normalize_tags(command.tags)
+        stickers: dict[str, tuple[str, ...]] = {}
+        for item in self._sticker_sets.get_sticker_set(command.set_name):
+            item_tags = tags or normalize_tags((item.emoji or "",))
+            if item_tags:
+                stickers[item.file_id] = item_tags
+
+        with self._unit_of_work() as unit_of_work:
+            public_pack = unit_of_work.users.ensure_public_pack()
+            user = unit_of_work.users.get_user(command.user_id) or public_pack
+            mutation = self._stickers.add_stickers(user, stickers, public_pack)
+            if mutation.changed:
+                unit_of_work.users.save_user(mutation.effective_pack)
+            unit_of_work.commit()
+        return AddStickerSetResult(
+            set_name=command.set_name,
+            sticker_count=len(stickers),
+            added_count=mutation.added_stickers,
+            changed=mutation.changed,
+        )
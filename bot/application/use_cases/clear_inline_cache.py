@@ -2,39 +2,51 @@
 
 from __future__ import annotations
 
+from functools import partial
+
 from bot.application.errors import UserNotFoundError
-from bot.application.ports import UserRepository
+from bot.application.ports import UnitOfWorkFactory, UserRepository
 from bot.application.requests import ClearInlineCacheCommand
 from bot.application.results import AcknowledgementResult
+from bot.application.unit_of_work import BufferedUnitOfWork
 from bot.domain.services import StickerPackService
 from bot.domain.user import StickfixUser
+from bot.utils.metrics import METRICS, USE_CASE_LATENCY
 
 
 class ClearInlineCache:
-    """Clear cached stickers for the effective inline cache owner."""
+    """Clear cached stickers for the effective inline cache owner.
+
+    The cache is transient and never persisted, so clearing it saves nothing and marks no user
+    dirty.
+    """
 
     def __init__(
         self,
         users: UserRepository,
         stickers: StickerPackService | None = None,
+        unit_of_work: UnitOfWorkFactory | None = None,
     ) -> None:
         self._users = users
         self._stickers = stickers or StickerPackService()
+        self._unit_of_work = unit_of_work or partial(BufferedUnitOfWork, users)
 
+    @METRICS.timed(USE_CASE_LATENCY, use_case="ClearInlineCache")
     def __call__(self, command: ClearInlineCacheCommand) -> AcknowledgementResult:
-        public_pack = self._users.get_public_pack()
-        user = self._resolve_request_user(command.user_id, public_pack)
-        cache_owner = self._stickers.resolve_effective_pack(user, public_pack)
-        cache_owner.remove_cached_stickers()
-        self._users.save_user(cache_owner)
+        with self._unit_of_work() as unit_of_work:
+            public_pack = unit_of_work.users.get_public_pack()
+            user = self._resolve_request_user(unit_of_work.users, command.user_id, public_pack)
+            cache_owner = self._stickers.resolve_effective_pack(user, public_pack)
+            cache_owner.remove_cached_stickers()
         return AcknowledgementResult(acknowledged=True)
 
+    @staticmethod
     def _resolve_request_user(
-        self,
+        users: UserRepository,
         user_id: str | None,
         public_pack: StickfixUser | None,
     ) -> StickfixUser:
-        user = self._users.get_user(user_id) if user_id is not None else None
+        user = users.get_user(user_id) if user_id is not None else None
         if user is not None:
             return user
         if public_pack is None:
@@ -2,38 +2,53 @@
 
 from __future__ import annotations
 
+from functools import partial
+
 from bot.application.errors import MissingStickerError, UserNotFoundError
-from bot.application.ports import UserRepository
+from bot.application.ports import UnitOfWorkFactory, UserRepository
 from bot.application.requests import DeleteStickerCommand
 from bot.application.results import DeleteStickerResult
+from bot.application.unit_of_work import BufferedUnitOfWork
+from bot.domain.query import normalize_tags
 from bot.domain.services import StickerPackService
+from bot.utils.metrics import METRICS, USE_CASE_LATENCY
 
 
 class DeleteSticker:
     """Remove a sticker from the public or private pack selected by user settings."""
 
-    def __init__(self, users: UserRepository, stickers: StickerPackService | None = None) -> None:
+    def __init__(
+        self,
+        users: UserRepository,
+        stickers: StickerPackService | None = None,
+        unit_of_work: UnitOfWorkFactory | None = None,
+    ) -> None:
         self._users = users
         self._stickers = stickers or StickerPackService()
+        self._unit_of_work = unit_of_work or partial(BufferedUnitOfWork, users)
 
+    @METRICS.timed(USE_CASE_LATENCY, use_case="DeleteSticker")
     def __call__(self, command: DeleteStickerCommand) -> DeleteStickerResult:
         if command.reply_sticker_id is None:
             raise MissingStickerError("A sticker id is required to delete a sticker.")
 
-        public_pack = self._users.get_public_pack()
-        user = self._users.get_user(command.user_id) or public_pack
-        if user is None:
-            raise UserNotFoundError("No user or public sticker pack exists.")
-
-        mutation = self._stickers.delete_sticker(
-            user,
-            command.reply_sticker_id,
-            command.tags,
-            public_pack,
-        )
-        self._users.save_user(mutation.effective_pack)
+        with self._unit_of_work() as unit_of_work:
+            public_pack = unit_of_work.users.get_public_pack()
+            user = unit_of_work.users.get_user(command.user_id) or public_pack
+            if user is None:
+                raise UserNotFoundError("No user or public sticker pack exists.")
+
+            tags = normalize_tags(command.tags)
+            mutation = self._stickers.delete_sticker(
+                user,
+                command.reply_sticker_id,
+                tags,
+                public_pack,
+            )
+            unit_of_work.users.save_user(mutation.effective_pack)
+            unit_of_work.commit()
         return DeleteStickerResult(
             sticker_id=command.reply_sticker_id,
-            effective_tags=command.tags,
+            effective_tags=tags,
             changed=mutation.changed,
         )
@@ -0,0 +1,113 @@
+"""Use cases for renaming, merging and dropping whole tags of the effective sticker pack."""
+
+from __future__ import annotations
+
+from collections.abc import Callable, Collection
+from functools import partial
+
+from bot.application.errors import (
+    InsufficientPermissionsError,
+    InvalidCommandInputError,
+    UserNotFoundError,
+)
+from bot.application.ports import UnitOfWorkFactory, UserRepository
+from bot.application.requests import DropTagCommand, MergeTagsCommand, RenameTagCommand
+from bot.application.results import TagEditResult
+from bot.application.unit_of_work import BufferedUnitOfWork
+from bot.domain.query import normalize_tag, normalize_tags
+from bot.domain.services import StickerPackService
+from bot.domain.services.sticker_pack_service import StickerPackMutation
+from bot.domain.user import StickfixUser
+from bot.utils.metrics import METRICS, USE_CASE_LATENCY
+
+
+class _EditTags:
+    """Apply one tag edit to the pack selected by user settings.
+
+    Every edit touches only the posting lists of the tags it names, is published as one new pack
+    version and is saved with a single write. Editing the public pack is reserved to `admin_ids`.
+    """
+
+    def __init__(
+        self,
+        users: UserRepository,
+        stickers: StickerPackService | None = None,
+        unit_of_work: UnitOfWorkFactory | None = None,
+        admin_ids: Collection[str] = (),
+    ) -> None:
+        self._users = users
+        self._stickers = stickers or StickerPackService()
+        self._unit_of_work = unit_of_work or partial(BufferedUnitOfWork, users)
+        self._admin_ids = frozenset(str(admin_id) for admin_id in admin_ids)
+
+    def _edit(
+        self,
+        user_id: str,
+        edit: Callable[[StickfixUser, StickfixUser | None], StickerPackMutation],
+    ) -> TagEditResult:
+        with self._unit_of_work() as unit_of_work:
+            public_pack = unit_of_work.users.get_public_pack()
+            user = unit_of_work.users.get_user(user_id) or public_pack
+            if user is None:
+                raise UserNotFoundError("No user or public sticker pack exists.")
+            effective_pack = self._stickers.resolve_effective_pack(user, public_pack)
+            if effective_pack is public_pack and str(user_id) not in self._admin_ids:
+                raise InsufficientPermissionsError("Only admins can edit tags of the public pack.")
+
+            mutation = edit(user, public_pack)
+            if mutation.changed:
+                unit_of_work.users.save_user(mutation.effective_pack)
+            unit_of_work.commit()
+        return TagEditResult(
+            removed_tags=mutation.delta.removed_tags,
+            updated_tags=mutation.delta.updated_tags,
+            changed=mutation.changed,
+        )
+
+
+class RenameTag(_EditTags):
+    """Move every sticker of a tag to a new tag, merging them if the new tag already exists."""
+
+    @METRICS.timed(USE_CASE_LATENCY, use_case="RenameTag")
+    def __call__(self, command: RenameTagCommand) -> TagEditResult:
+        old_tag = normalize_tag(command.old_tag)
+        new_tag = normalize_tag(command.new_tag)
+        if not old_tag or not new_tag:
+            raise InvalidCommandInputError("Renaming a tag requires the old and the new tag.")
+        return self._edit(
+            command.user_id,
+            lambda user, public_pack: self._stickers.rename_tag(
+                user, old_tag, new_tag, public_pack
+            ),
+        )
+
+
+class MergeTags(_EditTags):
+    """Move the stickers of several tags into one tag and remove the merged tags."""
+
+    @METRICS.timed(USE_CASE_LATENCY, use_case="MergeTags")
+    def __call__(self, command: MergeTagsCommand) -> TagEditResult:
+        source_tags = normalize_tags(command.source_tags)
+        target_tag = normalize_tag(command.target_tag)
+        if not source_tags or not target_tag:
+            raise InvalidCommandInputError("Merging tags requires source tags and a target tag.")
+        return self._edit(
+            command.user_id,
+            lambda user, public_pack: self._stickers.merge_tags(
+                user, source_tags, target_tag, public_pack
+            ),
+        )
+
+
+class DropTag(_EditTags):
+    """Remove a tag and unlink every sticker from it."""
+
+    @METRICS.timed(USE_CASE_LATENCY, use_case="DropTag")
+    def __call__(self, command: DropTagCommand) -> TagEditResult:
+        tag = normalize_tag(command.tag)
+        if not tag:
+            raise InvalidCommandInputError("Dropping a tag requires a tag.")
+        return self._edit(
+            command.user_id,
+            lambda user, public_pack: self._stickers.drop_tag(user, tag, public_pack),
+        )
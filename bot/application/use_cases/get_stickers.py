@@ -6,8 +6,10 @@ from bot.application.errors import UserNotFoundError, WrongInteractionContextErr
 from bot.application.ports import UserRepository
 from bot.application.requests import GetStickersQuery
 from bot.application.results import GetStickersResult
+from bot.domain.query import normalize_tags
 from bot.domain.services import StickerPackService
 from bot.domain.user import UserModes
+from bot.utils.metrics import METRICS, USE_CASE_LATENCY
 
 
 class GetStickers:
@@ -17,6 +19,7 @@ class GetStickers:
         self._users = users
         self._stickers = stickers or StickerPackService()
 
+    @METRICS.timed(USE_CASE_LATENCY, use_case="GetStickers")
     def __call__(self, query: GetStickersQuery) -> GetStickersResult:
         if query.chat_type != UserModes.PRIVATE:
             raise WrongInteractionContextError("The /get command only works in private chats.")
@@ -26,5 +29,5 @@ class GetStickers:
         if user is None:
             raise UserNotFoundError("No user or public sticker pack exists.")
 
-        sticker_ids = self._stickers.find_stickers(user, query.tags, public_pack)
+        sticker_ids = self._stickers.find_stickers(user, normalize_tags(query.tags), public_pack)
         return GetStickersResult(sticker_ids=sticker_ids)
@@ -0,0 +1,76 @@
+"""Use case for learning from the inline results users choose."""
+
+from __future__ import annotations
+
+import time
+from functools import partial
+from typing import Callable
+
+from bot.application.answered_results import AnsweredResults
+from bot.application.errors import UserNotFoundError
+from bot.application.ports import UnitOfWorkFactory, UserRepository
+from bot.application.requests import RecordChosenResultCommand
+from bot.application.results import AcknowledgementResult
+from bot.application.unit_of_work import BufferedUnitOfWork
+from bot.domain.services import StickerPackService
+from bot.domain.user import StickfixUser
+from bot.utils.metrics import METRICS, USE_CASE_LATENCY
+
+
+class RecordChosenResult:
+    """Learn from a chosen inline sticker.
+
+    The sticker is credited to the query tags it was found through and added to the user's recent
+    stickers. Telegram only reports the opaque result id and the query text, so both are looked up
+    in the `AnsweredResults` the answers were recorded in, which must be the one shared with
+    `ResolveInlineQuery`. Results that are no longer remembered are not learnt from.
+    """
+
+    def __init__(
+        self,
+        users: UserRepository,
+        stickers: StickerPackService | None = None,
+        unit_of_work: UnitOfWorkFactory | None = None,
+        clock: Callable[[], float] = time.time,
+        answered_results: AnsweredResults | None = None,
+    ) -> None:
+        self._users = users
+        self._stickers = stickers or StickerPackService()
+        self._unit_of_work = unit_of_work or partial(BufferedUnitOfWork, users)
+        self._clock = clock
+        self._answered_results = answered_results or AnsweredResults()
+
+    @METRICS.timed(USE_CASE_LATENCY, use_case="RecordChosenResult")
+    def __call__(self, command: RecordChosenResultCommand) -> AcknowledgementResult:
+        with self._unit_of_work() as unit_of_work:
+            public_pack = unit_of_work.users.get_public_pack()
+            user = self._resolve_request_user(unit_of_work.users, command.user_id, public_pack)
+            sticker_id = self._answered_results.sticker_id(command.result_id)
+            if sticker_id is None:
+                return AcknowledgementResult(acknowledged=False, detail="Unknown result.")
+            query = self._answered_results.searched_query(command.user_id, command.query_text)
+
+            changed = []
+            if query is not None:
+                changed += self._stickers.record_choice(
+                    user, query, sticker_id, self._clock(), public_pack
+                )
+            if user is not public_pack and user.remember_sticker(sticker_id):
+                changed.append(user)
+            for pack in dict.fromkeys(changed):
+                unit_of_work.users.save_user(pack)
+            unit_of_work.commit()
+        return AcknowledgementResult(acknowledged=True)
+
+    @staticmethod
+    def _resolve_request_user(
+        users: UserRepository,
+        user_id: str | None,
+        public_pack: StickfixUser | None,
+    ) -> StickfixUser:
+        user = users.get_user(user_id) if user_id is not None else None
+        if user is not None:
+            return user
+        if public_pack is None:
+            raise UserNotFoundError("No user or public sticker pack exists.")
+        return public_pack
@@ -2,36 +2,85 @@
 
 from __future__ import annotations
 
+from functools import partial
+
+from bot.application.answered_results import AnsweredResults
 from bot.application.errors import UserNotFoundError
-from bot.application.ports import HelpContentProvider, UserRepository
+from bot.application.inline_cache_policy import InlineCachePolicy
+from bot.application.ports import HelpContentProvider, UnitOfWorkFactory, UserRepository
 from bot.application.requests import InlineQueryRequest
 from bot.application.results import InlineQueryResult
-from bot.domain.services import StickerPackService
+from bot.application.unit_of_work import BufferedUnitOfWork
+from bot.domain.query import QueryNode, Term, parse_inline_query, query_terms
+from bot.domain.services import RandomTagSuggester, StickerPackService, TagSuggester
 from bot.domain.user import StickfixUser
+from bot.utils.metrics import METRICS, USE_CASE_LATENCY
 
 
 class ResolveInlineQuery:
-    """Resolve stickers and default-help metadata for Telegram inline queries."""
+    """Resolve stickers and default-help metadata for Telegram inline queries.
+
+    Answering a query only reads the packs, so nothing is saved and no user is marked dirty.
+    """
 
     def __init__(
         self,
         users: UserRepository,
         help_content: HelpContentProvider,
         stickers: StickerPackService | None = None,
+        cache_policy: InlineCachePolicy | None = None,
+        tag_suggester: TagSuggester | None = None,
+        unit_of_work: UnitOfWorkFactory | None = None,
+        prefix_completions: int = 8,
+        fuzzy_matching: bool = True,
+        ranked: bool = True,
+        answered_results: AnsweredResults | None = None,
     ) -> None:
         self._users = users
         self._help_content = help_content
         self._stickers = stickers or StickerPackService()
+        self._cache_policy = cache_policy or InlineCachePolicy()
+        self._tag_suggester = tag_suggester or RandomTagSuggester()
+        self._unit_of_work = unit_of_work or partial(BufferedUnitOfWork, users)
+        self._prefix_completions = prefix_completions
+        self._fuzzy_matching = fuzzy_matching
+        self._ranked = ranked
+        self._answered_results = answered_results or AnsweredResults()
 
+    @METRICS.timed(USE_CASE_LATENCY, use_case="ResolveInlineQuery")
     def __call__(self, request: InlineQueryRequest) -> InlineQueryResult:
-        public_pack = self._users.get_public_pack()
-        user = self._resolve_request_user(request.user_id, public_pack)
-        tags = tuple(request.query_text.split(" "))
-        sticker_ids = self._stickers.find_stickers(user, tags, public_pack)
-        paginated_stickers = sticker_ids[request.offset : request.offset + request.limit]
-        default_tags, help_text = self._resolve_default_help(request, user, public_pack)
+        with self._unit_of_work() as unit_of_work:
+            public_pack = unit_of_work.users.get_public_pack()
+            user = self._resolve_request_user(unit_of_work.users, request.user_id, public_pack)
+            query = parse_inline_query(request.query_text)
+            sticker_ids = self._search(user, query, public_pack, request)
+            corrected_tags: tuple[str, ...] = ()
+            corrected = None
+            if not sticker_ids and query is not None and self._fuzzy_matching:
+                corrected = self._stickers.correct_query(
+                    user, query, public_pack, self._prefix_completions
+                )
+                if corrected is not None:
+                    query = corrected
+                    sticker_ids = self._search(user, query, public_pack, request)
+                    corrected_tags = tuple(
+                        leaf.tag for leaf in query_terms(query) if isinstance(leaf, Term)
+                    )
+            paginated_stickers = sticker_ids[request.offset : request.offset + request.limit]
+            default_tags, help_text = self._resolve_default_help(request, query, user, public_pack)
+            # Empty queries show the user's recent stickers, so even a help-only answer for a user
+            # without any must not be shared with users who have some.
+            cache_decision = self._cache_policy.decide(
+                user, public_pack, personal_results=query is None
+            )
 
-        self._users.save_user(user)
+            self._answered_results.remember(
+                request.user_id,
+                request.query_text,
+                paginated_stickers,
+                corrected_query=corrected,
+                shared=not cache_decision.is_personal,
+            )
 
         return InlineQueryResult(
             sticker_ids=paginated_stickers,
@@ -39,14 +88,37 @@ class ResolveInlineQuery:
             show_default_help=help_text is not None,
             help_text=help_text,
             next_offset=request.offset + request.limit,
+            cache_time=cache_decision.cache_time,
+            is_personal=cache_decision.is_personal,
+            corrected_tags=corrected_tags,
         )
 
-    def _resolve_request_user(
+    def _search(
         self,
+        user: StickfixUser,
+        query: QueryNode | None,
+        public_pack: StickfixUser | None,
+        request: InlineQueryRequest,
+    ) -> tuple[str, ...]:
+        if query is None:
+            # Empty queries are answered with the user's own recent stickers, if any.
+            return () if user is public_pack else tuple(user.recent_stickers())
+        return self._stickers.search_stickers(
+            user,
+            query,
+            public_pack,
+            limit=request.offset + request.limit,
+            prefix_completions=self._prefix_completions,
+            ranked=self._ranked,
+        )
+
+    @staticmethod
+    def _resolve_request_user(
+        users: UserRepository,
         user_id: str | None,
         public_pack: StickfixUser | None,
     ) -> StickfixUser:
-        user = self._users.get_user(user_id) if user_id is not None else None
+        user = users.get_user(user_id) if user_id is not None else None
         if user is not None:
             return user
         if public_pack is None:
@@ -56,12 +128,15 @@ class ResolveInlineQuery:
     def _resolve_default_help(
         self,
         request: InlineQueryRequest,
+        query: QueryNode | None,
         user: StickfixUser,
         public_pack: StickfixUser | None,
     ) -> tuple[tuple[str, ...], str | None]:
-        if request.query_text != "" or request.offset != 0:
+        if query is not None or request.offset != 0:
             return (), None
 
         default_tag_source = user if user.private_mode else public_pack
-        default_tags = tuple(default_tag_source.random_tag()) if default_tag_source else ()
+        default_tags = (
+            self._tag_suggester.suggest(default_tag_source) if default_tag_source else ()
+        )
         return default_tags, self._help_content.get_help_text()
@@ -2,26 +2,38 @@
 
 from __future__ import annotations
 
+from functools import partial
+
 from bot.application.errors import InvalidCommandInputError
-from bot.application.ports import UserRepository
+from bot.application.ports import UnitOfWorkFactory, UserRepository
 from bot.application.requests import SetModeCommand
 from bot.application.results import AcknowledgementResult
+from bot.application.unit_of_work import BufferedUnitOfWork
 from bot.domain.user import StickfixUser, UserModes
+from bot.utils.metrics import METRICS, USE_CASE_LATENCY
 
 
 class SetMode:
     """Change one user's storage mode."""
 
-    def __init__(self, users: UserRepository) -> None:
+    def __init__(
+        self,
+        users: UserRepository,
+        unit_of_work: UnitOfWorkFactory | None = None,
+    ) -> None:
         self._users = users
+        self._unit_of_work = unit_of_work or partial(BufferedUnitOfWork, users)
 
+    @METRICS.timed(USE_CASE_LATENCY, use_case="SetMode")
     def __call__(self, command: SetModeCommand) -> AcknowledgementResult:
         mode = self._validated_mode(command.mode)
-        user = self._users.get_user(command.user_id)
-        if user is None:
-            user = StickfixUser(command.user_id)
-        user.private_mode = mode == UserModes.PRIVATE
-        self._users.save_user(user)
+        with self._unit_of_work() as unit_of_work:
+            user = unit_of_work.users.get_user(command.user_id)
+            if user is None:
+                user = StickfixUser(command.user_id)
+            user.private_mode = mode == UserModes.PRIVATE
+            unit_of_work.users.save_user(user)
+            unit_of_work.commit()
         return AcknowledgementResult()
 
     @staticmethod
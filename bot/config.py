@@ -3,13 +3,24 @@ from __future__ import annotations
 import os
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Mapping
+from typing import Callable, Mapping, TypeVar
+
+from bot.database.flush_policy import FlushPolicy
 
 DEFAULT_ENV = "dev"
 ENV_ENVVAR = "STICKFIX_ENV"
 GENERIC_TOKEN_ENVVAR = "STICKFIX_TOKEN"
 TOKEN_FILE_ENVVAR = "STICKFIX_TOKEN_FILE"
 LOG_PATH_ENVVAR = "STICKFIX_LOG_PATH"
+ADMIN_IDS_ENVVAR = "STICKFIX_ADMIN_IDS"
+RECORD_UPDATES_ENVVAR = "STICKFIX_RECORD_UPDATES"
+FLUSH_MAX_DIRTY_USERS_ENVVAR = "STICKFIX_FLUSH_MAX_DIRTY_USERS"
+FLUSH_MAX_DIRTY_AGE_ENVVAR = "STICKFIX_FLUSH_MAX_DIRTY_AGE"
+FLUSH_MAX_INTERVAL_ENVVAR = "STICKFIX_FLUSH_MAX_INTERVAL"
+FLUSH_MIN_SPACING_ENVVAR = "STICKFIX_FLUSH_MIN_SPACING"
+DISABLED_VALUES = frozenset({"off", "none"})
+
+NumberT = TypeVar("NumberT", int, float)
 TOKEN_BY_ENV: dict[str, str] = {
     "dev": "STICKFIX_TOKEN_DEV",
     "prod": "STICKFIX_TOKEN_PROD",
@@ -25,6 +36,9 @@ class StickfixConfig:
     env: str
     token: str
     log_path: Path | None = None
+    admin_ids: frozenset[str] = frozenset()
+    record_updates: Path | None = None
+    flush_policy: FlushPolicy = FlushPolicy()
 
 
 def load_config(
@@ -41,13 +55,70 @@ def load_config(
     2. `STICKFIX_TOKEN`
     3. Env-specific token (`STICKFIX_TOKEN_DEV`/`STICKFIX_TOKEN_PROD`)
     4. Token file (`STICKFIX_TOKEN_FILE` or `--token-file`)
+
+    Admins, who may edit the public pack's tags, are read from `STICKFIX_ADMIN_IDS` as a
+    comma-separated list of Telegram user ids. Setting `STICKFIX_RECORD_UPDATES` to a file path
+    records sanitized incoming updates there for replay.
+
+    The flush policy of the user store is tuned with `STICKFIX_FLUSH_MAX_DIRTY_USERS`,
+    `STICKFIX_FLUSH_MAX_DIRTY_AGE`, `STICKFIX_FLUSH_MAX_INTERVAL` (seconds; ``off`` disables a
+    trigger) and `STICKFIX_FLUSH_MIN_SPACING` (seconds); unset knobs keep their defaults.
     """
     env_vars = dict(os.environ if environ is None else environ)
     resolved_env = _resolve_env(env, env_vars)
     resolved_token = _resolve_token(env_vars, resolved_env, token, token_file)
     log_path_value = env_vars.get(LOG_PATH_ENVVAR)
     log_path = Path(log_path_value) if log_path_value else None
-    return StickfixConfig(env=resolved_env, token=resolved_token, log_path=log_path)
+    admin_ids = _resolve_admin_ids(env_vars)
+    record_updates_value = env_vars.get(RECORD_UPDATES_ENVVAR, "").strip()
+    return StickfixConfig(
+        env=resolved_env,
+        token=resolved_token,
+        log_path=log_path,
+        admin_ids=admin_ids,
+        record_updates=Path(record_updates_value) if record_updates_value else None,
+        flush_policy=_resolve_flush_policy(env_vars),
+    )
+
+
+def _resolve_admin_ids(env_vars: Mapping[str, str]) -> frozenset[str]:
+    raw = env_vars.get(ADMIN_IDS_ENVVAR, "")
+    return frozenset(admin_id.strip() for admin_id in raw.split(",") if admin_id.strip())
+
+
+def _resolve_flush_policy(env_vars: Mapping[str, str]) -> FlushPolicy:
+    defaults = FlushPolicy()
+    try:
+        return FlushPolicy(
+            max_dirty_users=_flush_knob(
+                env_vars, FLUSH_MAX_DIRTY_USERS_ENVVAR, int, defaults.max_dirty_users
+            ),
+            max_dirty_age=_flush_knob(
+                env_vars, FLUSH_MAX_DIRTY_AGE_ENVVAR, float, defaults.max_dirty_age
+            ),
+            max_interval=_flush_knob(
+                env_vars, FLUSH_MAX_INTERVAL_ENVVAR, float, defaults.max_interval
+            ),
+            min_spacing=_flush_knob(
+                env_vars, FLUSH_MIN_SPACING_ENVVAR, float, defaults.min_spacing
+            ) or 0.0,
+        )
+    except ValueError as error:
+        raise ConfigError(f"Invalid flush policy: {error}") from error
+
+
+def _flush_knob(
+    env_vars: Mapping[str, str],
+    name: str,
+    parse: Callable[[str], NumberT],
+    default: NumberT | None,
+) -> NumberT | None:
+    raw = env_vars.get(name, "").strip()
+    if not raw:
+        return default
+    if raw.lower() in DISABLED_VALUES:
+        return None
+    return parse(raw)
 
 
 def _resolve_env(env: str | None, env_vars: Mapping[str, str]) -> str:
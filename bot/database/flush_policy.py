@@ -0,0 +1,130 @@
+"""When to write the in-memory user store back to disk.
+
+Saving `StickfixDB` rewrites the whole YAML snapshot, so how often it happens trades durability
+(how much work a crash can lose) against disk writes. A `FlushPolicy` expresses that trade-off with
+four knobs; a `StoreFlusher` checks the store against it, typically every second from the bot's job
+queue, and saves only when the policy says so:
+
+- flush once `max_dirty_users` users changed, so bursts of writes are persisted promptly;
+- flush once the oldest unsaved change is `max_dirty_age` seconds old, bounding the durability lag;
+- flush at least every `max_interval` seconds while anything is unsaved;
+- never flush twice within `min_spacing` seconds, bounding write volume during long bursts.
+
+A clean store is never saved, so idle periods cost nothing. Setting a trigger to `None` disables
+it.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Protocol
+
+from bot.utils.logger import StickfixLogger
+from bot.utils.metrics import METRICS
+
+logger = StickfixLogger(__name__)
+
+STORE_FLUSHES = "stickfix_store_flushes_total"
+METRICS.describe(STORE_FLUSHES, "Saves of the user store, by the trigger that caused them.")
+
+
+class FlushableStore(Protocol):
+    """What a `StoreFlusher` needs from a store, as provided by `StickfixDB`."""
+
+    @property
+    def dirty_count(self) -> int: ...
+
+    @property
+    def dirty_since(self) -> float | None: ...
+
+    def save(self) -> None: ...
+
+
+@dataclass(frozen=True, slots=True)
+class FlushPolicy:
+    """Thresholds deciding when unsaved changes are written; times are in seconds."""
+
+    max_dirty_users: int | None = 100
+    max_dirty_age: float | None = 30.0
+    max_interval: float | None = 300.0
+    min_spacing: float = 5.0
+
+    def __post_init__(self) -> None:
+        if self.max_dirty_users is not None and self.max_dirty_users < 1:
+            raise ValueError("max_dirty_users must be at least 1")
+        for name in ("max_dirty_age", "max_interval"):
+            value = getattr(self, name)
+            if value is not None and value <= 0:
+                raise ValueError(f"{name} must be positive")
+        if self.min_spacing < 0:
+            raise ValueError("min_spacing must not be negative")
+
+    def reason_to_flush(
+        self, dirty_users: int, dirty_age: float, since_last_flush: float
+    ) -> str | None:
+        """Return which trigger calls for a flush now, or `None` if the store can wait."""
+        if not dirty_users or since_last_flush < self.min_spacing:
+            return None
+        if self.max_dirty_users is not None and dirty_users >= self.max_dirty_users:
+            return "dirty_users"
+        if self.max_dirty_age is not None and dirty_age >= self.max_dirty_age:
+            return "dirty_age"
+        if self.max_interval is not None and since_last_flush >= self.max_interval:
+            return "interval"
+        return None
+
+
+class StoreFlusher:
+    """Save a store whenever its `FlushPolicy` asks for it.
+
+    `clock` must be the clock the store stamps `dirty_since` with, `time.monotonic` for
+    `StickfixDB`.
+    """
+
+    def __init__(
+        self,
+        store: FlushableStore,
+        policy: FlushPolicy | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._store = store
+        self._policy = policy or FlushPolicy()
+        self._clock = clock
+        self._last_flush = clock()
+        self._lock = threading.Lock()
+
+    @property
+    def policy(self) -> FlushPolicy:
+        return self._policy
+
+    def tick(self) -> bool:
+        """Save the store if the policy calls for it now, returning whether it was saved."""
+        with self._lock:
+            now = self._clock()
+            dirty_since = self._store.dirty_since
+            reason = self._policy.reason_to_flush(
+                self._store.dirty_count,
+                0.0 if dirty_since is None else now - dirty_since,
+                now - self._last_flush,
+            )
+            if reason is None:
+                return False
+            self._save(reason, now)
+            return True
+
+    def flush(self) -> bool:
+        """Save the store now if it has unsaved changes, ignoring the policy, e.g. on shutdown."""
+        with self._lock:
+            if not self._store.dirty_count:
+                return False
+            self._save("forced", self._clock())
+            return True
+
+    def _save(self, reason: str, now: float) -> None:
+        logger.info("Saving %d changed users (%s)", self._store.dirty_count, reason)
+        self._store.save()
+        self._last_flush = now
+        METRICS.increment(STORE_FLUSHES, reason=reason)
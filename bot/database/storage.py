@@ -18,6 +18,10 @@ The persistence strategy favors simplicity and recovery over partial writes:
 - Writes are performed through a temporary sibling file and finalized with an atomic `os.replace`.
 - If the main file becomes unreadable, the store attempts recovery from the most recent readable
   backup.
+- The store tracks which users changed since the last [save] or [reload] and since when, so a
+  flush policy can decide when saving is worth it.
+- [save] only holds the store lock while it snapshots the users' states; dumping, validating and
+  replacing the file happen outside it, so writers are never blocked by a save.
 
 ## Notes
 
@@ -28,7 +32,9 @@ replace that format with an explicit schema and safe serialization/deserializati
 
 import os
 import shutil
-from collections.abc import Iterator, MutableMapping
+import threading
+import time
+from collections.abc import Iterable, Iterator, Mapping, MutableMapping
 from pathlib import Path
 from tempfile import NamedTemporaryFile
 from typing import KeysView
@@ -37,9 +43,30 @@ import yaml
 
 from bot.domain.user import StickfixUser
 from bot.utils.logger import StickfixLogger
+from bot.utils.metrics import METRICS, STORAGE_LATENCY
 
 logger = StickfixLogger(__name__)
 
+_USER_TAG = "tag:yaml.org,2002:python/object:bot.domain.user.StickfixUser"
+
+
+class _UserState:
+    """Detached state of one [StickfixUser], captured for a save."""
+
+    __slots__ = ("state",)
+
+    def __init__(self, state: dict) -> None:
+        self.state = state
+
+
+class _SnapshotDumper(yaml.Dumper):
+    """Dumper writing [_UserState] exactly as PyYAML writes the [StickfixUser] it was taken from."""
+
+
+_SnapshotDumper.add_representer(
+    _UserState, lambda dumper, user: dumper.represent_mapping(_USER_TAG, user.state)
+)
+
 
 class StickfixDB(MutableMapping[str, StickfixUser]):
     """Mutable mapping backed by a YAML snapshot on disk.
@@ -80,6 +107,10 @@ class StickfixDB(MutableMapping[str, StickfixUser]):
     _bak_1_path: Path
     _bak_2_path: Path
     _db: dict[str, StickfixUser]
+    _lock: threading.RLock
+    _save_lock: threading.Lock
+    _dirty: set[str]
+    _dirty_since: float | None
 
     def __init__(self, name: str, data_dir: str | Path = "data") -> None:
         """Initializes the database and loads its current contents.
@@ -98,6 +129,10 @@ class StickfixDB(MutableMapping[str, StickfixUser]):
         self._bak_1_path = Path(f"{self._yaml_path}_1.bak")
         self._bak_2_path = Path(f"{self._yaml_path}_2.bak")
         self._db = {}
+        self._lock = threading.RLock()
+        self._save_lock = threading.Lock()
+        self._dirty = set()
+        self._dirty_since = None
 
         self._data_dir.mkdir(parents=True, exist_ok=True)
         if not self._yaml_path.exists():
@@ -127,7 +162,9 @@ class StickfixDB(MutableMapping[str, StickfixUser]):
             key: Mapping key to insert or replace.
             value: User value associated with `key`.
         """
-        self._db[key] = value
+        with self._lock:
+            self._db[key] = value
+            self._mark_dirty((key,))
 
     def __delitem__(self, key: str) -> None:
         """Removes a user from the in-memory mapping.
@@ -141,7 +178,9 @@ class StickfixDB(MutableMapping[str, StickfixUser]):
         Raises:
             KeyError: If `key` is not present.
         """
-        del self._db[key]
+        with self._lock:
+            del self._db[key]
+            self._mark_dirty((key,))
 
     def __iter__(self) -> Iterator[str]:
         """Iterates over the current in-memory keys.
@@ -170,6 +209,36 @@ class StickfixDB(MutableMapping[str, StickfixUser]):
         """
         return self._db.keys()
 
+    @property
+    def dirty_count(self) -> int:
+        """Returns how many users changed in memory since the last [save] or [reload]."""
+        return len(self._dirty)
+
+    @property
+    def dirty_since(self) -> float | None:
+        """Returns the `time.monotonic` time of the oldest unsaved change, or `None` if clean."""
+        return self._dirty_since
+
+    @METRICS.timed(STORAGE_LATENCY, operation="apply_batch")
+    def apply_batch(self, saved: Mapping[str, StickfixUser], deleted: Iterable[str] = ()) -> None:
+        """Applies several insertions, replacements, and deletions as one in-memory update.
+
+        The batch is applied while holding the store lock, so a concurrent [save] persists either
+        none or all of it. Like the mapping operations, this only updates the in-memory state.
+
+        Args:
+            saved: Users to store, keyed by user identifier.
+            deleted: User identifiers to remove. Missing identifiers are ignored.
+        """
+        deleted = list(deleted)
+        with self._lock:
+            self._db.update(saved)
+            for key in deleted:
+                self._db.pop(key, None)
+            self._mark_dirty(saved)
+            self._mark_dirty(deleted)
+
+    @METRICS.timed(STORAGE_LATENCY, operation="reload")
     def reload(self) -> None:
         """Reloads the in-memory mapping from the disk.
 
@@ -177,46 +246,73 @@ class StickfixDB(MutableMapping[str, StickfixUser]):
         parsing error, it falls back to backup-based recovery.
 
         Recovery tries the most recent backup first and restores the first readable backup as the
-        new main database file.
+        new main database file. Unsaved in-memory changes are discarded, so the store is clean
+        afterwards.
 
         Raises:
             RuntimeError: If neither the main file nor any backup can be loaded.
         """
-        try:
-            self._db = self._load_path(self._yaml_path)
-        except (OSError, yaml.YAMLError):
-            logger.error(f"Unexpected error loading {self._yaml_path}")
-            self._db = self._recover_from_backups()
+        with self._lock:
+            try:
+                self._db = self._load_path(self._yaml_path)
+            except (OSError, yaml.YAMLError):
+                logger.error("Unexpected error loading %s", self._yaml_path)
+                self._db = self._recover_from_backups()
+            self._dirty.clear()
+            self._dirty_since = None
 
+    @METRICS.timed(STORAGE_LATENCY, operation="save")
     def save(self) -> None:
         """Persists the current in-memory mapping to disk.
 
         The save sequence is:
 
-        1. Rotate backups so the previous snapshots remain available.
-        2. Write the current mapping to a temporary sibling file.
-        3. Validate that the temporary file can be loaded successfully.
-        4. Atomically replace the main YAML file with the validated temp file.
-        5. Reload the database from disk so the in-memory state matches the persisted state exactly.
+        1. Under the store lock, snapshot every user's state and mark the store clean.
+        2. Rotate backups so the previous snapshots remain available.
+        3. Write the snapshot to a temporary sibling file.
+        4. Validate that the temporary file can be loaded successfully.
+        5. Atomically replace the main YAML file with the validated temp file.
+
+        Only step 1 holds the store lock, so mapping operations and [apply_batch] keep running while
+        the file is written; changes made meanwhile stay dirty for the next save. Saves themselves
+        run one at a time. The in-memory users are kept rather than reloaded from the new file, so
+        the indexes they derived from their stickers survive the save.
 
-        If validation or replacement fails, the temporary file is removed and the original exception
-        is re-raised.
+        If validation or replacement fails, the temporary file is removed, the users of the failed
+        snapshot are marked dirty again and the original exception is re-raised.
 
         Raises:
             OSError: If file creation, replacement, or cleanup fails.
             yaml.YAMLError: If the temporary YAML snapshot cannot be parsed.
-            RuntimeError: If the final reload fails and backup recovery is not possible.
         """
-        self._rotate_backups()
-        temp_path = self._write_temp_file(self._db)
-        try:
-            self._load_path(temp_path)
-            os.replace(temp_path, self._yaml_path)
-        except Exception:
-            temp_path.unlink(missing_ok=True)
-            raise
-        logger.debug("Database saved.")
-        self.reload()
+        with self._save_lock:
+            with self._lock:
+                snapshot = {key: _UserState(user.__getstate__()) for key, user in self._db.items()}
+                dirty, dirty_since = self._dirty, self._dirty_since
+                self._dirty, self._dirty_since = set(), None
+            try:
+                self._rotate_backups()
+                temp_path = self._write_temp_file(snapshot)
+                try:
+                    self._load_path(temp_path)
+                    os.replace(temp_path, self._yaml_path)
+                except Exception:
+                    temp_path.unlink(missing_ok=True)
+                    raise
+            except Exception:
+                with self._lock:
+                    self._dirty |= dirty
+                    if dirty_since is not None:
+                        self._dirty_since = min(dirty_since, self._dirty_since or dirty_since)
+                raise
+            logger.debug("Database saved.")
+
+    def _mark_dirty(self, keys: Iterable[str]) -> None:
+        """Records that `keys` changed in memory; the caller must hold the store lock."""
+        before = len(self._dirty)
+        self._dirty.update(keys)
+        if self._dirty_since is None and len(self._dirty) > before:
+            self._dirty_since = time.monotonic()
 
     def _recover_from_backups(self) -> dict[str, StickfixUser]:
         """Recovers the database from the first readable backup.
@@ -232,12 +328,12 @@ class StickfixDB(MutableMapping[str, StickfixUser]):
         """
         for backup_path in (self._bak_1_path, self._bak_2_path):
             try:
-                logger.debug(f"Loading {backup_path}")
+                logger.debug("Loading %s", backup_path)
                 db = self._load_path(backup_path)
                 shutil.copy2(backup_path, self._yaml_path)
                 return db
             except (OSError, yaml.YAMLError):
-                logger.error(f"Unexpected error loading {backup_path}")
+                logger.error("Unexpected error loading %s", backup_path)
         raise RuntimeError(f"Could not recover database from backups for {self._yaml_path}")
 
     def _rotate_backups(self) -> None:
@@ -256,14 +352,14 @@ class StickfixDB(MutableMapping[str, StickfixUser]):
         if self._yaml_path.exists():
             shutil.copy2(self._yaml_path, self._bak_1_path)
 
-    def _write_temp_file(self, data: dict[str, StickfixUser]) -> Path:
+    def _write_temp_file(self, data: Mapping[str, _UserState]) -> Path:
         """Writes a full YAML snapshot to a temporary sibling file.
 
         Writing to a temporary file in the same directory allows the final `os.replace` to remain
         atomic on the target filesystem.
 
         Args:
-            data: Full in-memory mapping to serialize.
+            data: Snapshot of every user's state to serialize.
 
         Returns:
             The path to the newly written temporary file.
@@ -277,10 +373,11 @@ class StickfixDB(MutableMapping[str, StickfixUser]):
             dir=self._data_dir,
             delete=False,
         ) as handle:
-            yaml.dump(data, handle, yaml.Dumper)
+            yaml.dump(data, handle, _SnapshotDumper)
             return Path(handle.name)
 
     @staticmethod
+    @METRICS.timed(STORAGE_LATENCY, operation="yaml_dump")
     def _write_yaml_file(path: Path, data: dict[str, StickfixUser]) -> None:
         """Writes a full YAML snapshot directly to `path`.
 
@@ -298,6 +395,7 @@ class StickfixDB(MutableMapping[str, StickfixUser]):
             yaml.dump(data, handle, yaml.Dumper)
 
     @staticmethod
+    @METRICS.timed(STORAGE_LATENCY, operation="yaml_load")
     def _load_path(path: Path) -> dict[str, StickfixUser]:
         """Loads one YAML snapshot from the disk.
 
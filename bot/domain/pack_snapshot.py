@@ -0,0 +1,42 @@
+"""Immutable, versioned views of a sticker pack's posting lists.
+
+Packs publish their posting lists read-copy-update style. Readers take the current `PackSnapshot`
+with one attribute read and never lock: a published snapshot, including every posting list it
+references, is never mutated again. Writers serialize among themselves, build the next mapping by
+copying only the posting lists they touch (untouched lists are shared with the previous snapshot),
+and publish it with a single reference assignment, so a reader sees either the whole change or none
+of it.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Mapping, Sequence
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True, slots=True)
+class PackSnapshot:
+    """Posting lists of one pack at one version.
+
+    `postings` must be treated as read-only; it is only typed as a mapping of sequences because
+    the persisted representation stores plain dicts of lists.
+    """
+
+    version: int
+    postings: Mapping[str, Sequence[str]]
+
+    def get(self, tag: str) -> Sequence[str]:
+        """Return the stickers posted under `tag` in this snapshot."""
+        return self.postings.get(tag, ())
+
+
+@dataclass(frozen=True, slots=True)
+class PackDelta:
+    """Tags whose posting lists one pack mutation removed or rewrote."""
+
+    removed_tags: tuple[str, ...] = ()
+    updated_tags: tuple[str, ...] = ()
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.removed_tags or self.updated_tags)
@@ -0,0 +1,154 @@
+"""Tag normalization and query parsing for sticker lookups.
+
+Tags are compared in a canonical form so that case, width, and compatibility variants of the same
+word resolve to the same posting list. The canonical form is applied both when tags are written
+(`/add`) and when they are read (inline queries, `/get`, `/deleteFrom`), which keeps every pack's
+tag index canonical.
+
+Canonical tags are interned, so the tag strings shared by many packs are stored once and dictionary
+lookups on them can short-circuit on identity.
+
+Inline queries also support a small boolean language, parsed into the AST defined here:
+- ``a b``: stickers tagged with both ``a`` and ``b``
+- ``a|b``: stickers tagged with ``a`` or ``b``
+- ``-a``: excludes stickers tagged with ``a``
+- ``a*``: stickers tagged with any tag starting with ``a``
+"""
+
+from __future__ import annotations
+
+import sys
+import unicodedata
+from collections.abc import Callable, Iterable, Iterator
+from dataclasses import dataclass
+
+
+def normalize_tag(tag: str) -> str:
+    """Return the canonical, interned form of one tag.
+
+    The canonical form is the NFKC-normalized, case-folded tag without surrounding whitespace. The
+    result may be empty when `tag` only contains whitespace.
+    """
+    folded = unicodedata.normalize("NFKC", unicodedata.normalize("NFKC", tag).casefold())
+    return sys.intern(folded.strip())
+
+
+def normalize_tags(tags: Iterable[str]) -> tuple[str, ...]:
+    """Canonicalize tags, dropping empty ones and duplicates while preserving order."""
+    canonical: dict[str, None] = {}
+    for tag in tags:
+        normalized = normalize_tag(tag)
+        if normalized:
+            canonical[normalized] = None
+    return tuple(canonical)
+
+
+def parse_query(text: str) -> tuple[str, ...]:
+    """Split free query text into canonical tags.
+
+    Any run of whitespace separates two tags, so repeated or trailing spaces never produce empty
+    tags.
+    """
+    return normalize_tags(text.split())
+
+
+@dataclass(frozen=True, slots=True)
+class Term:
+    """Stickers posted under one exact tag."""
+
+    tag: str
+
+
+@dataclass(frozen=True, slots=True)
+class Prefix:
+    """Stickers posted under any tag starting with `prefix`."""
+
+    prefix: str
+
+
+@dataclass(frozen=True, slots=True)
+class Not:
+    """Stickers not matched by `operand`; only meaningful inside an `And`."""
+
+    operand: QueryNode
+
+
+@dataclass(frozen=True, slots=True)
+class Or:
+    """Stickers matched by at least one operand."""
+
+    operands: tuple[QueryNode, ...]
+
+
+@dataclass(frozen=True, slots=True)
+class And:
+    """Stickers matched by every operand."""
+
+    operands: tuple[QueryNode, ...]
+
+
+QueryNode = Term | Prefix | Not | Or | And
+
+
+def parse_boolean_query(text: str, complete_last: bool = False) -> QueryNode | None:
+    """Parse free query text into a boolean query, or `None` when it has no usable term.
+
+    Whitespace-separated words are combined with AND. Inside a word, ``|`` separates alternatives,
+    a leading ``-`` negates the word and a trailing ``*`` turns an alternative into a prefix. With
+    `complete_last`, the last plain alternative of a non-negated last word is also treated as a
+    prefix, since the user may still be typing it.
+    """
+    words = text.split()
+    clauses: list[QueryNode] = []
+    for position, word in enumerate(words):
+        negated = word.startswith("-")
+        alternatives = word[1:] if negated else word
+        complete = complete_last and not negated and position == len(words) - 1
+        clause = _parse_word(alternatives, complete)
+        if clause is not None:
+            clauses.append(Not(clause) if negated else clause)
+    unique = tuple(dict.fromkeys(clauses))
+    if not unique:
+        return None
+    return unique[0] if len(unique) == 1 else And(unique)
+
+
+def parse_inline_query(text: str) -> QueryNode | None:
+    """Parse inline query text, completing its last word unless it ends with whitespace."""
+    return parse_boolean_query(text, complete_last=not text[-1:].isspace())
+
+
+def query_terms(query: QueryNode | None) -> Iterator[Term | Prefix]:
+    """Yield every leaf of `query` that is not under a negation, left to right."""
+    if isinstance(query, (Term, Prefix)):
+        yield query
+    elif isinstance(query, (And, Or)):
+        for operand in query.operands:
+            yield from query_terms(operand)
+
+
+def rewrite_leaves(
+    query: QueryNode, rewrite: Callable[[Term | Prefix], QueryNode | None]
+) -> QueryNode:
+    """Return `query` with every non-negated leaf replaced by `rewrite(leaf)`, if not `None`."""
+    if isinstance(query, (Term, Prefix)):
+        return rewrite(query) or query
+    if isinstance(query, And):
+        return And(tuple(rewrite_leaves(operand, rewrite) for operand in query.operands))
+    if isinstance(query, Or):
+        return Or(tuple(rewrite_leaves(operand, rewrite) for operand in query.operands))
+    return query
+
+
+def _parse_word(word: str, complete: bool) -> QueryNode | None:
+    alternatives: list[QueryNode] = []
+    parts = word.split("|")
+    for position, part in enumerate(parts):
+        is_prefix = part.endswith("*") or complete and position == len(parts) - 1
+        tag = normalize_tag(part.rstrip("*"))
+        if tag:
+            alternatives.append(Prefix(tag) if is_prefix else Term(tag))
+    if not alternatives:
+        return None
+    unique = tuple(dict.fromkeys(alternatives))
+    return unique[0] if len(unique) == 1 else Or(unique)
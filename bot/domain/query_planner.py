@@ -0,0 +1,108 @@
+"""Cost-based evaluation of boolean sticker queries over tag posting lists.
+
+The planner never materializes more than it has to. Every node can be evaluated in two ways: as an
+iterator over the stickers it matches, or as a membership test for one sticker. An `And` drives
+iteration with its cheapest positive operand, estimated from posting-list sizes, and filters each
+candidate through the remaining operands (smallest first) and through its negations, so a ``NOT``
+costs one membership test per surviving candidate instead of a pass over its own postings. An `Or`
+is iterated branch by branch, which lets paginated callers stop after the first results they need.
+"""
+
+from __future__ import annotations
+
+import math
+from collections.abc import Iterator, Sequence, Set
+from typing import Protocol
+
+from bot.domain.query import And, Not, Or, Prefix, QueryNode, Term
+
+
+class PostingSource(Protocol):
+    """Read access to the posting lists a query is evaluated against."""
+
+    def cardinality(self, tag: str) -> int:
+        """Return an upper bound of the number of stickers posted under `tag`, without copying."""
+
+    def postings(self, tag: str) -> Set[str]:
+        """Return the stickers posted under `tag`, for membership tests."""
+
+    def ordered(self, tag: str) -> Sequence[str]:
+        """Return the stickers posted under `tag` in a stable order, for iteration."""
+
+    def completions(self, prefix: str) -> list[str]:
+        """Return the known tags starting with `prefix`."""
+
+
+class QueryPlanner:
+    """Evaluate one boolean query against a `PostingSource`."""
+
+    def __init__(self, source: PostingSource) -> None:
+        self._source = source
+
+    def iterate(self, query: QueryNode) -> Iterator[str]:
+        """Yield every sticker matching `query` once, computing as little as possible upfront."""
+        if isinstance(query, Term):
+            return iter(self._source.ordered(query.tag))
+        if isinstance(query, Prefix):
+            completed = Or(tuple(Term(tag) for tag in self._source.completions(query.prefix)))
+            return self.iterate(completed)
+        if isinstance(query, Or):
+            return self._iterate_any(query.operands)
+        if isinstance(query, And):
+            return self._iterate_all(query.operands)
+        return iter(())
+
+    def contains(self, query: QueryNode, sticker_id: str) -> bool:
+        """Return whether `sticker_id` matches `query`."""
+        if isinstance(query, Term):
+            return sticker_id in self._source.postings(query.tag)
+        if isinstance(query, Prefix):
+            return any(
+                sticker_id in self._source.postings(tag)
+                for tag in self._source.completions(query.prefix)
+            )
+        if isinstance(query, Not):
+            return not self.contains(query.operand, sticker_id)
+        if isinstance(query, Or):
+            return any(self.contains(operand, sticker_id) for operand in query.operands)
+        return all(self.contains(operand, sticker_id) for operand in query.operands)
+
+    def estimate(self, query: QueryNode) -> float:
+        """Estimate how many stickers iterating `query` would yield; negations cannot drive."""
+        if isinstance(query, Term):
+            return self._source.cardinality(query.tag)
+        if isinstance(query, Prefix):
+            completions = self._source.completions(query.prefix)
+            return sum(self._source.cardinality(tag) for tag in completions)
+        if isinstance(query, Or):
+            return sum(self.estimate(operand) for operand in query.operands)
+        if isinstance(query, And):
+            return min(
+                (
+                    self.estimate(operand)
+                    for operand in query.operands
+                    if not isinstance(operand, Not)
+                ),
+                default=math.inf,
+            )
+        return math.inf
+
+    def _iterate_any(self, operands: tuple[QueryNode, ...]) -> Iterator[str]:
+        seen: set[str] = set()
+        for operand in operands:
+            for sticker_id in self.iterate(operand):
+                if sticker_id not in seen:
+                    seen.add(sticker_id)
+                    yield sticker_id
+
+    def _iterate_all(self, operands: tuple[QueryNode, ...]) -> Iterator[str]:
+        positives = sorted(
+            (operand for operand in operands if not isinstance(operand, Not)), key=self.estimate
+        )
+        if not positives or self.estimate(positives[0]) == 0:
+            return
+        driver, *filters = positives
+        filters += [operand for operand in operands if isinstance(operand, Not)]
+        for sticker_id in self.iterate(driver):
+            if all(self.contains(operand, sticker_id) for operand in filters):
+                yield sticker_id
@@ -0,0 +1,57 @@
+"""Bounded history of the stickers a user sent most recently."""
+
+from __future__ import annotations
+
+from typing import Any
+
+DEFAULT_CAPACITY = 48
+
+
+class RecentStickers:
+    """Fixed-size ring buffer of sticker ids, newest first when read.
+
+    The buffer is one preallocated list and a write cursor: remembering a sticker overwrites the
+    oldest slot, so updates take constant time and a user never holds more than `capacity` ids.
+    Sending the same sticker twice in a row only records it once; older repeats are skipped when
+    reading.
+    """
+
+    __slots__ = ("_cursor", "_size", "_slots")
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY) -> None:
+        if capacity < 1:
+            raise ValueError("The recent stickers buffer needs at least one slot.")
+        self._slots: list[str | None] = [None] * capacity
+        self._cursor = 0
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def capacity(self) -> int:
+        return len(self._slots)
+
+    def remember(self, sticker_id: str) -> bool:
+        """Record one sent sticker, returning whether the buffer changed."""
+        if self._size and self._slots[self._cursor - 1] == sticker_id:
+            return False
+        self._slots[self._cursor] = sticker_id
+        self._cursor = (self._cursor + 1) % len(self._slots)
+        self._size = min(self._size + 1, len(self._slots))
+        return True
+
+    def latest(self) -> list[str]:
+        """Return the remembered stickers, newest first and without repeats."""
+        stickers: dict[str, None] = {}
+        for offset in range(1, self._size + 1):
+            stickers.setdefault(self._slots[self._cursor - offset], None)
+        return list(stickers)
+
+    def __getstate__(self) -> dict[str, Any]:
+        return {"capacity": len(self._slots), "stickers": self.latest()[::-1]}
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.__init__(state["capacity"])
+        for sticker_id in state["stickers"]:
+            self.remember(sticker_id)
@@ -1,9 +1,10 @@
 """Domain service entrypoints for Telegram-free sticker-pack behavior.
 
-This package re-exports the service used to resolve and mutate effective sticker packs without
-depending on Telegram or persistence details.
+This package re-exports the service used to resolve and mutate effective sticker packs, and the
+strategies used to suggest default tags, without depending on Telegram or persistence details.
 """
 
 from .sticker_pack_service import StickerPackService
+from .tag_suggester import PopularTagSuggester, RandomTagSuggester, TagSuggester
 
-__all__ = ["StickerPackService"]
+__all__ = ["PopularTagSuggester", "RandomTagSuggester", "StickerPackService", "TagSuggester"]
@@ -2,10 +2,11 @@
 
 from __future__ import annotations
 
-from copy import deepcopy
 from dataclasses import dataclass
-from typing import Sequence
+from typing import Mapping, Sequence
 
+from bot.domain.pack_snapshot import PackDelta
+from bot.domain.query import QueryNode
 from bot.domain.user import StickfixUser
 
 
@@ -15,6 +16,8 @@ class StickerPackMutation:
 
     effective_pack: StickfixUser
     changed: bool
+    delta: PackDelta = PackDelta()
+    added_stickers: int = 0
 
 
 class StickerPackService:
@@ -35,14 +38,27 @@ class StickerPackService:
         public_pack: StickfixUser | None = None,
     ) -> StickerPackMutation:
         effective_pack = self.resolve_effective_pack(user, public_pack)
-        before = deepcopy(effective_pack.stickers)
+        before = effective_pack.version
         if tags:
             user.link_sticker(
                 sticker_id=sticker_id,
                 sticker_tags=list(tags),
                 public_user=public_pack,
             )
-        return StickerPackMutation(effective_pack, before != effective_pack.stickers)
+        return StickerPackMutation(effective_pack, before != effective_pack.version)
+
+    def add_stickers(
+        self,
+        user: StickfixUser,
+        stickers: Mapping[str, Sequence[str]],
+        public_pack: StickfixUser | None = None,
+    ) -> StickerPackMutation:
+        effective_pack = self.resolve_effective_pack(user, public_pack)
+        before = effective_pack.version
+        added = user.link_stickers(stickers, public_user=public_pack)
+        return StickerPackMutation(
+            effective_pack, before != effective_pack.version, added_stickers=added
+        )
 
     def delete_sticker(
         self,
@@ -52,18 +68,97 @@ class StickerPackService:
         public_pack: StickfixUser | None = None,
     ) -> StickerPackMutation:
         effective_pack = self.resolve_effective_pack(user, public_pack)
-        before = deepcopy(effective_pack.stickers)
+        before = effective_pack.version
         user.unlink_sticker_from_pack(
             sticker_id=sticker_id,
             sticker_tags=list(tags),
             public_user=public_pack,
         )
-        return StickerPackMutation(effective_pack, before != effective_pack.stickers)
+        return StickerPackMutation(effective_pack, before != effective_pack.version)
+
+    def rename_tag(
+        self,
+        user: StickfixUser,
+        old_tag: str,
+        new_tag: str,
+        public_pack: StickfixUser | None = None,
+    ) -> StickerPackMutation:
+        effective_pack = self.resolve_effective_pack(user, public_pack)
+        delta = effective_pack.rename_tag(old_tag, new_tag)
+        return StickerPackMutation(effective_pack, delta.changed, delta)
+
+    def merge_tags(
+        self,
+        user: StickfixUser,
+        source_tags: Sequence[str],
+        target_tag: str,
+        public_pack: StickfixUser | None = None,
+    ) -> StickerPackMutation:
+        effective_pack = self.resolve_effective_pack(user, public_pack)
+        delta = effective_pack.merge_tags(list(source_tags), target_tag)
+        return StickerPackMutation(effective_pack, delta.changed, delta)
+
+    def drop_tag(
+        self,
+        user: StickfixUser,
+        tag: str,
+        public_pack: StickfixUser | None = None,
+    ) -> StickerPackMutation:
+        effective_pack = self.resolve_effective_pack(user, public_pack)
+        delta = effective_pack.drop_tag(tag)
+        return StickerPackMutation(effective_pack, delta.changed, delta)
 
     def find_stickers(
         self,
         user: StickfixUser,
         tags: Sequence[str],
         public_pack: StickfixUser | None = None,
+        prefix_completions: int = 0,
+    ) -> tuple[str, ...]:
+        return tuple(
+            user.get_shuffled_sticker_list(
+                list(tags),
+                public_user=public_pack,
+                prefix_completions=prefix_completions,
+            )
+        )
+
+    def search_stickers(
+        self,
+        user: StickfixUser,
+        query: QueryNode,
+        public_pack: StickfixUser | None = None,
+        limit: int | None = None,
+        prefix_completions: int = 8,
+        ranked: bool = False,
     ) -> tuple[str, ...]:
-        return tuple(user.get_shuffled_sticker_list(list(tags), public_user=public_pack))
+        return tuple(
+            user.search(
+                query,
+                public_user=public_pack,
+                limit=limit,
+                prefix_completions=prefix_completions,
+                ranked=ranked,
+            )
+        )
+
+    def record_choice(
+        self,
+        user: StickfixUser,
+        query: QueryNode,
+        sticker_id: str,
+        now: float,
+        public_pack: StickfixUser | None = None,
+    ) -> tuple[StickfixUser, ...]:
+        return tuple(user.record_choice(query, sticker_id, now, public_user=public_pack))
+
+    def correct_query(
+        self,
+        user: StickfixUser,
+        query: QueryNode,
+        public_pack: StickfixUser | None = None,
+        prefix_completions: int = 8,
+    ) -> QueryNode | None:
+        return user.correct_query(
+            query, public_user=public_pack, prefix_completions=prefix_completions
+        )
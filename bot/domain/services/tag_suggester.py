@@ -0,0 +1,27 @@
+"""Default-tag suggestion strategies for the inline help article."""
+
+from __future__ import annotations
+
+from typing import Protocol
+
+from bot.domain.user import StickfixUser
+
+
+class TagSuggester(Protocol):
+    """Choose the example tags shown to users who send an empty inline query."""
+
+    def suggest(self, pack: StickfixUser) -> tuple[str, ...]: ...
+
+
+class RandomTagSuggester:
+    """Suggest one tag chosen uniformly among the pack's tags."""
+
+    def suggest(self, pack: StickfixUser) -> tuple[str, ...]:
+        return tuple(pack.random_tag())
+
+
+class PopularTagSuggester:
+    """Suggest one tag chosen with probability proportional to its number of stickers."""
+
+    def suggest(self, pack: StickfixUser) -> tuple[str, ...]:
+        return tuple(pack.popular_random_tag())
@@ -0,0 +1,265 @@
+"""Derived tag indexes kept alongside a sticker pack's posting lists.
+
+A pack stores its stickers as ``tag -> sorted sticker ids``. Some lookups need a different shape of
+the same data, and rebuilding it from the tag dictionary on every request would cost time
+proportional to the number of tags in the pack. The indexes in this module are maintained
+incrementally by the pack's mutators instead, and are never persisted: they can always be rebuilt
+from the posting lists.
+"""
+
+from __future__ import annotations
+
+import random
+import time
+from bisect import bisect_left
+from collections.abc import Callable, Iterable, Iterator, Mapping, Sequence
+from heapq import merge
+from itertools import combinations
+
+
+class TagIndex:
+    """Indexable array of the tags present in one pack.
+
+    Tags are kept in a dense list plus a ``tag -> position`` map, so membership and uniform random
+    selection run in constant time, and removal swaps the tag with the last element.
+
+    A second, sorted copy of the tags answers prefix lookups with a binary search, so completing a
+    partial tag costs ``O(log n)`` plus the number of completions returned.
+
+    Lookups run without locks while the pack is being written, so the lists they scan are never
+    modified: every change publishes new lists instead (copy-on-write). A change therefore costs
+    ``O(n)``; `update` applies a whole batch of changes for the price of one copy.
+    """
+
+    __slots__ = ("_positions", "_sorted", "_tags")
+
+    def __init__(self, tags: Iterable[str] = ()) -> None:
+        self._tags: list[str] = []
+        self._positions: dict[str, int] = {}
+        for tag in tags:
+            if tag not in self._positions:
+                self._positions[tag] = len(self._tags)
+                self._tags.append(tag)
+        self._sorted: list[str] = sorted(self._tags)
+
+    def __contains__(self, tag: object) -> bool:
+        return tag in self._positions
+
+    def __len__(self) -> int:
+        return len(self._tags)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._tags)
+
+    def add(self, tag: str) -> bool:
+        """Add one tag, returning whether it was absent."""
+        return bool(self.update(added=(tag,)))
+
+    def discard(self, tag: str) -> bool:
+        """Remove one tag if present, returning whether it was removed."""
+        return bool(self.update(removed=(tag,)))
+
+    def update(self, added: Iterable[str] = (), removed: Iterable[str] = ()) -> int:
+        """Remove then add tags in one change, returning how many tags were added or removed."""
+        removed = [tag for tag in dict.fromkeys(removed) if tag in self._positions]
+        removed_set = set(removed)
+        added = [
+            tag for tag in dict.fromkeys(added) if tag not in self._positions or tag in removed_set
+        ]
+        if not removed and not added:
+            return 0
+        tags = list(self._tags)
+        for tag in removed:
+            position = self._positions.pop(tag)
+            last = tags.pop()
+            if position < len(tags):
+                tags[position] = last
+                self._positions[last] = position
+        for tag in added:
+            self._positions[tag] = len(tags)
+            tags.append(tag)
+        kept = [tag for tag in self._sorted if tag not in removed_set]
+        self._tags, self._sorted = tags, list(merge(kept, sorted(added)))
+        return len(removed) + len(added)
+
+    def with_prefix(self, prefix: str, limit: int) -> list[str]:
+        """Return up to `limit` tags starting with `prefix`, in lexicographic order."""
+        completions = []
+        sorted_tags = self._sorted
+        position = bisect_left(sorted_tags, prefix)
+        while len(completions) < limit and position < len(sorted_tags):
+            tag = sorted_tags[position]
+            if not tag.startswith(prefix):
+                break
+            completions.append(tag)
+            position += 1
+        return completions
+
+    def random_tag(self) -> str | None:
+        """Return a uniformly chosen tag, or `None` when the index is empty."""
+        tags = self._tags
+        if not tags:
+            return None
+        return random.choice(tags)  # noqa: S311
+
+
+class WeightedTagSampler:
+    """Sample tags with probability proportional to how many stickers they hold.
+
+    The sampler keeps one slot per ``(tag, sticker)`` posting, so choosing a uniform slot picks a
+    tag weighted by its posting-list size. Every slot records its owner tag and its offset inside
+    that tag's slot list, which keeps both posting insertion and removal constant time.
+
+    Copying the slots on every change would cost a pass over every posting of the pack, so they are
+    updated in place and sampling tolerates a concurrent writer instead: a sample drawn during a
+    change may be weighted as before or after it, and a slot removed under it is drawn again.
+    """
+
+    __slots__ = ("_offsets", "_slots", "_slots_by_tag")
+
+    def __init__(self, postings: Mapping[str, Sequence[str]] | None = None) -> None:
+        self._slots: list[str] = []
+        self._offsets: list[int] = []
+        self._slots_by_tag: dict[str, list[int]] = {}
+        for tag, sticker_ids in (postings or {}).items():
+            for _ in sticker_ids:
+                self.add(tag)
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def add(self, tag: str) -> None:
+        """Record one more sticker posted under `tag`."""
+        tag_slots = self._slots_by_tag.setdefault(tag, [])
+        self._offsets.append(len(tag_slots))
+        tag_slots.append(len(self._slots))
+        self._slots.append(tag)
+
+    def remove(self, tag: str) -> None:
+        """Forget one sticker posted under `tag`."""
+        tag_slots = self._slots_by_tag.get(tag)
+        if not tag_slots:
+            return
+        position = tag_slots.pop()
+        if not tag_slots:
+            del self._slots_by_tag[tag]
+        last_tag = self._slots.pop()
+        last_offset = self._offsets.pop()
+        if position == len(self._slots):
+            return
+        self._slots[position] = last_tag
+        self._offsets[position] = last_offset
+        self._slots_by_tag[last_tag][last_offset] = position
+
+    def random_tag(self) -> str | None:
+        """Return a popularity-weighted tag, or `None` when no sticker is posted."""
+        slots = self._slots
+        while slots:
+            try:
+                return random.choice(slots)  # noqa: S311
+            except IndexError:
+                continue
+        return None
+
+
+class FuzzyTagIndex:
+    """SymSpell-style deletion index for typo-tolerant tag lookups.
+
+    Every tag is registered under each string obtained by deleting up to `max_distance` characters
+    from its first `prefix_length` characters. A misspelled query generates its own deletions and
+    only the tags sharing one of them are compared with the query, so a lookup never scans the
+    pack's whole vocabulary. Capping the prefix bounds the number of deletions per tag, and
+    therefore the memory used by packs with tens of thousands of tags.
+
+    Candidates are ranked by optimal-string-alignment distance (insertions, deletions,
+    substitutions and adjacent transpositions), then alphabetically. Verification stops once
+    `budget` seconds have elapsed, returning the best matches found so far.
+
+    Lookups iterate the candidates of a deletion without locks, so writers never modify those sets:
+    adding or removing a tag replaces the sets of its deletions with new ones.
+    """
+
+    __slots__ = ("_budget", "_clock", "_deletes", "_max_distance", "_prefix_length")
+
+    def __init__(
+        self,
+        tags: Iterable[str] = (),
+        *,
+        max_distance: int = 2,
+        prefix_length: int = 7,
+        budget: float = 0.005,
+        clock: Callable[[], float] = time.perf_counter,
+    ) -> None:
+        self._max_distance = max_distance
+        self._prefix_length = prefix_length
+        self._budget = budget
+        self._clock = clock
+        self._deletes: dict[str, frozenset[str]] = {}
+        for tag in tags:
+            self.add(tag)
+
+    def add(self, tag: str) -> None:
+        """Register one tag under all of its deletions."""
+        for key in self._deletions(tag):
+            self._deletes[key] = self._deletes.get(key, frozenset()) | {tag}
+
+    def discard(self, tag: str) -> None:
+        """Forget one tag, dropping deletion keys that no longer point anywhere."""
+        for key in self._deletions(tag):
+            candidates = self._deletes.get(key)
+            if candidates is None or tag not in candidates:
+                continue
+            if len(candidates) > 1:
+                self._deletes[key] = candidates - {tag}
+            else:
+                del self._deletes[key]
+
+    def nearest(self, query: str, limit: int = 1) -> list[str]:
+        """Return up to `limit` known tags within `max_distance` edits of `query`, nearest first."""
+        deadline = self._clock() + self._budget
+        distances: dict[str, int] = {}
+        for key in self._deletions(query):
+            for tag in self._deletes.get(key, ()):
+                if tag not in distances:
+                    distances[tag] = bounded_distance(query, tag, self._max_distance)
+                    if self._clock() > deadline:
+                        return self._ranked(distances, limit)
+        return self._ranked(distances, limit)
+
+    def _ranked(self, distances: dict[str, int], limit: int) -> list[str]:
+        matches = sorted(
+            (distance, tag) for tag, distance in distances.items() if distance <= self._max_distance
+        )
+        return [tag for _, tag in matches[:limit]]
+
+    def _deletions(self, tag: str) -> set[str]:
+        prefix = tag[: self._prefix_length]
+        deletions = {prefix}
+        for count in range(1, min(self._max_distance, len(prefix)) + 1):
+            for removed in combinations(range(len(prefix)), count):
+                deletions.add("".join(c for i, c in enumerate(prefix) if i not in removed))
+        return deletions
+
+
+def bounded_distance(source: str, target: str, max_distance: int) -> int:
+    """Optimal-string-alignment distance, or ``max_distance + 1`` once it is exceeded."""
+    if abs(len(source) - len(target)) > max_distance:
+        return max_distance + 1
+    previous_previous: list[int] = []
+    previous = list(range(len(target) + 1))
+    for i, source_char in enumerate(source, start=1):
+        current = [i] + [0] * len(target)
+        for j, target_char in enumerate(target, start=1):
+            cost = source_char != target_char
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if (
+                i > 1
+                and j > 1
+                and source_char == target[j - 2]
+                and source[i - 2] == target_char
+            ):
+                current[j] = min(current[j], previous_previous[j - 2] + 1)
+        if min(current) > max_distance:
+            return max_distance + 1
+        previous_previous, previous = previous, current
+    return min(previous[-1], max_distance + 1)
@@ -0,0 +1,37 @@
+"""Exponentially decayed usage scores used to rank stickers.
+
+Scores use forward decay. A use at time ``t`` adds ``2 ** (t / half_life)`` to a score, rather
+than every stored score being decayed as time passes. Between two instants all scores shrink by the
+same factor, so comparing stored values ranks stickers exactly as comparing their decayed scores
+would, and recording a use only touches one entry. Values are stored as base-2 logarithms so they
+never overflow.
+"""
+
+from __future__ import annotations
+
+import math
+from collections.abc import Iterable
+
+DEFAULT_HALF_LIFE = 7 * 24 * 60 * 60.0
+UNUSED = -math.inf
+
+
+def record_use(log_score: float, now: float, half_life: float = DEFAULT_HALF_LIFE) -> float:
+    """Return `log_score` after one more use at time `now`."""
+    return combine((log_score, now / half_life))
+
+
+def combine(log_scores: Iterable[float]) -> float:
+    """Return the logarithm of the sum of several logarithmic scores."""
+    scores = [score for score in log_scores if score != UNUSED]
+    if not scores:
+        return UNUSED
+    highest = max(scores)
+    return highest + math.log2(sum(2.0 ** (score - highest) for score in scores))
+
+
+def decayed_score(log_score: float, now: float, half_life: float = DEFAULT_HALF_LIFE) -> float:
+    """Return the number of uses of a score, each weighted by how long ago it happened."""
+    if log_score == UNUSED:
+        return 0.0
+    return 2.0 ** (log_score - now / half_life)
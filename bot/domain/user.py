@@ -1,10 +1,33 @@
 """User domain model and sticker-tag behavior."""
 
+import copy
+import heapq
 import random
+import threading
+from collections import OrderedDict
 from enum import Enum
-from typing import Dict, List, Set
+from itertools import islice
+from typing import Any, Dict, FrozenSet, List, Mapping, Sequence, Set, Tuple
 
-from bot.utils.logger import StickfixLogger
+from bot.domain.pack_snapshot import PackDelta, PackSnapshot
+from bot.domain.query import (
+    Prefix,
+    QueryNode,
+    Term,
+    normalize_tag,
+    query_terms,
+    rewrite_leaves,
+)
+from bot.domain.query_planner import QueryPlanner
+from bot.domain.recent_stickers import RecentStickers
+from bot.domain.tag_index import (
+    FuzzyTagIndex,
+    TagIndex,
+    WeightedTagSampler,
+    bounded_distance,
+)
+from bot.domain.usage import UNUSED, combine, record_use
+from bot.utils.logger import Lazy, StickfixLogger
 
 logger = StickfixLogger(__name__)
 
@@ -21,13 +44,28 @@ class Switch(str, Enum):
 
 SF_PUBLIC = "SF-PUBLIC"
 
+# Indexes derived from `stickers`; rebuilt on demand and never persisted.
+_DERIVED_STATE = ("_tag_index", "_tag_sampler", "_fuzzy_index")
+# Maximum number of merged posting lists kept, across all users.
+MERGED_VIEW_CAPACITY = 4096
+
+_MergedView = Tuple[Tuple[Sequence[str], ...], FrozenSet[str], Sequence[str]]
+# Runtime publication state; `stickers` is persisted in its place.
+_RUNTIME_STATE = ("_snapshot", "_write_lock")
+
 
 class StickfixUser:
     OFF = False
     ON = True
     _shuffle: bool
     cached_stickers: Dict[str, List[str]]
-    stickers: Dict[str, List[str]]
+    usage: Dict[str, Dict[str, float]]
+    recent: RecentStickers
+    _tag_index: TagIndex | None
+    _tag_sampler: WeightedTagSampler | None
+    _fuzzy_index: FuzzyTagIndex | None
+    _snapshot: PackSnapshot
+    _write_lock: threading.Lock
 
     def __init__(self, user_id):
         """
@@ -37,10 +75,68 @@ class StickfixUser:
             ID of the user.
         """
         self.id = user_id
-        self.stickers = dict()
+        self._write_lock = threading.Lock()
+        self._snapshot = PackSnapshot(0, {})
+        self.usage = {}
+        self.recent = RecentStickers()
         self.cached_stickers = {}
         self.private_mode = False
         self._shuffle = False
+        self._tag_index = None
+        self._tag_sampler = None
+        self._fuzzy_index = None
+
+    def __getstate__(self) -> Dict[str, Any]:
+        """Returns a detached copy of the persisted state, safe to serialize on another thread.
+
+        The inline cache is transient: it is persisted empty, so filling or clearing it never needs
+        a save.
+        """
+        with self._write_lock:
+            state = dict(self.__dict__)
+            for name in _DERIVED_STATE + _RUNTIME_STATE:
+                state.pop(name, None)
+            state["stickers"] = dict(self._snapshot.postings)
+            if "usage" in state:
+                state["usage"] = {tag: dict(scores) for tag, scores in state["usage"].items()}
+            if "recent" in state:
+                state["recent"] = copy.copy(state["recent"])
+            if "cached_stickers" in state:
+                state["cached_stickers"] = {}
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        state = dict(state)
+        stickers = state.pop("stickers", None) or {}
+        self.__dict__.update(state)
+        self.__dict__.setdefault("usage", {})
+        self.__dict__.setdefault("recent", RecentStickers())
+        for name in _DERIVED_STATE:
+            self.__dict__[name] = None
+        self._write_lock = threading.Lock()
+        self._snapshot = PackSnapshot(0, _canonical_postings(stickers) if stickers else {})
+
+    @property
+    def stickers(self) -> Dict[str, List[str]]:
+        """Current posting lists (``tag -> sorted sticker ids``); treat them as read-only."""
+        return self._snapshot.postings
+
+    @stickers.setter
+    def stickers(self, value) -> None:
+        with self._write_lock:
+            for name in _DERIVED_STATE:
+                setattr(self, name, None)
+            self._publish(dict(value or {}))
+
+    @property
+    def snapshot(self) -> PackSnapshot:
+        """Immutable view of the posting lists, safe to read without locking."""
+        return self._snapshot
+
+    @property
+    def version(self) -> int:
+        """Number of changes published since this pack was created or loaded."""
+        return self._snapshot.version
 
     @property
     def shuffle(self) -> bool:
@@ -54,6 +150,37 @@ class StickfixUser:
     def cache(self) -> Dict[str, List[str]]:
         return self.cached_stickers
 
+    @property
+    def tag_index(self) -> TagIndex:
+        """Indexable array of this pack's tags, built on first use."""
+        if self._tag_index is None:
+            with self._write_lock:
+                if self._tag_index is None:
+                    self._tag_index = TagIndex(self.stickers)
+        return self._tag_index
+
+    @property
+    def tag_sampler(self) -> WeightedTagSampler:
+        """Popularity-weighted tag sampler for this pack, built on first use."""
+        if self._tag_sampler is None:
+            with self._write_lock:
+                if self._tag_sampler is None:
+                    self._tag_sampler = WeightedTagSampler(self.stickers)
+        return self._tag_sampler
+
+    @property
+    def fuzzy_index(self) -> FuzzyTagIndex:
+        """Typo-tolerant index over this pack's tags, built on first use."""
+        if self._fuzzy_index is None:
+            with self._write_lock:
+                if self._fuzzy_index is None:
+                    self._fuzzy_index = FuzzyTagIndex(self.stickers)
+        return self._fuzzy_index
+
+    def build_indexes(self) -> None:
+        """Builds every derived tag index now, so no request has to wait for it."""
+        _ = self.tag_index, self.tag_sampler, self.fuzzy_index
+
     def get_effective_pack(self, public_user=None):
         if self.private_mode or public_user is None:
             return self
@@ -68,22 +195,136 @@ class StickfixUser:
         :param sticker_tags:
             List of the tags that will represent the sticker.
         """
-        for tag in sticker_tags:
-            if self.stickers is None:
-                self.stickers = {tag: [sticker_id]}
-            else:
-                if tag in self.stickers:
-                    aux = self.stickers[tag]
-                    if sticker_id not in aux:
-                        aux.append(sticker_id)
-                else:
-                    aux = [sticker_id]
-                self.stickers[tag] = sorted(aux)
-        logger.info(f"Sticker added to {self.id} pack with tags: {', '.join(sticker_tags)}")
+        self._link_postings({sticker_id: sticker_tags})
+        logger.info(
+            "Sticker added to %s pack with tags: %s", self.id, Lazy(", ".join, sticker_tags)
+        )
+
+    def add_stickers(self, stickers: Mapping[str, Sequence[str]]) -> int:
+        """
+        Adds many stickers at once, publishing a single new version of the pack.
+
+        :param stickers:
+            Tags to link, by sticker ID.
+        :returns:
+            Number of stickers that gained at least one tag; stickers that already had all of
+            their tags are not counted.
+        """
+        added, links = self._link_postings(stickers)
+        logger.info(
+            "%d of %d stickers added to %s pack (%d new links)",
+            added,
+            len(stickers),
+            self.id,
+            links,
+        )
+        return added
+
+    def _link_postings(self, stickers: Mapping[str, Sequence[str]]) -> Tuple[int, int]:
+        """Links the stickers and returns how many stickers and links were new."""
+        with self._write_lock:
+            postings = self._snapshot.postings
+            touched: Dict[str, Set[str]] = {}
+            posted: List[str] = []
+            new_tags: List[str] = []
+            added = 0
+            for sticker_id, sticker_tags in stickers.items():
+                linked = len(posted)
+                for tag in sticker_tags:
+                    members = touched.get(tag)
+                    if members is None:
+                        members = touched[tag] = set(postings.get(tag, ()))
+                    if sticker_id not in members:
+                        if not members:
+                            new_tags.append(tag)
+                        members.add(sticker_id)
+                        posted.append(tag)
+                added += len(posted) != linked
+            if posted:
+                self._reindex(new_tags=new_tags, posted=posted)
+                updated = {
+                    tag: sorted(members)
+                    for tag, members in touched.items()
+                    if len(members) != len(postings.get(tag, ()))
+                }
+                self._publish({**postings, **updated})
+        return added, len(posted)
 
     def link_sticker(self, sticker_id, sticker_tags, public_user=None):
         self.get_effective_pack(public_user).add_sticker(sticker_id, sticker_tags)
 
+    def link_stickers(self, stickers: Mapping[str, Sequence[str]], public_user=None) -> int:
+        return self.get_effective_pack(public_user).add_stickers(stickers)
+
+    def rename_tag(self, old_tag: str, new_tag: str) -> PackDelta:
+        """
+        Moves every sticker of a tag to another tag, merging them if the new tag already exists.
+
+        :param old_tag:
+            Tag to rename.
+        :param new_tag:
+            New name of the tag.
+        """
+        return self.merge_tags([old_tag], new_tag)
+
+    def merge_tags(self, source_tags: Sequence[str], target_tag: str) -> PackDelta:
+        """
+        Moves the stickers of several tags into one tag and removes the source tags.
+
+        Posting lists are merged in one pass over the affected lists, usage scores follow the
+        stickers to the target tag, and the result is published as a single new version.
+
+        :param source_tags:
+            Tags to merge and remove.
+        :param target_tag:
+            Tag receiving every sticker of the source tags.
+        """
+        with self._write_lock:
+            postings = self._snapshot.postings
+            sources = [tag for tag in dict.fromkeys(source_tags) if tag != target_tag]
+            sources = [tag for tag in sources if tag in postings]
+            if not sources:
+                return PackDelta()
+            target = postings.get(target_tag, ())
+            merged = _merge_postings([target, *(postings[tag] for tag in sources)])
+            updated = dict(postings)
+            for tag in sources:
+                self._move_usage(tag, target_tag)
+                del updated[tag]
+            self._reindex(
+                new_tags=() if target else (target_tag,),
+                removed_tags=sources,
+                posted=[target_tag] * (len(merged) - len(target)),
+                unposted=[tag for tag in sources for _ in postings[tag]],
+            )
+            updated[target_tag] = merged
+            self._publish(updated)
+        self._forget_cached_tags([*sources, target_tag])
+        logger.info(
+            "Merged tags %s into %s in %s pack", Lazy(", ".join, sources), target_tag, self.id
+        )
+        return PackDelta(removed_tags=tuple(sources), updated_tags=(target_tag,))
+
+    def drop_tag(self, tag: str) -> PackDelta:
+        """
+        Removes a tag and unlinks every sticker from it.
+
+        :param tag:
+            Tag to remove.
+        """
+        with self._write_lock:
+            postings = self._snapshot.postings
+            if tag not in postings:
+                return PackDelta()
+            self._reindex(removed_tags=(tag,), unposted=[tag] * len(postings[tag]))
+            self.usage.pop(tag, None)
+            updated = dict(postings)
+            del updated[tag]
+            self._publish(updated)
+        self._forget_cached_tags([tag])
+        logger.info("Dropped tag %s from %s pack", tag, self.id)
+        return PackDelta(removed_tags=(tag,))
+
     def get_stickers(self, sticker_tag: str) -> Set[str]:
         """
         Gets all stickers from the database that matches the tag.
@@ -98,36 +339,239 @@ class StickfixUser:
                 return set(self.cache[sticker_tag])
             except KeyError:
                 pass
-        if sticker_tag in self.stickers:
-            return set(self.stickers[sticker_tag])
-        return set()
+        return set(self._snapshot.get(sticker_tag))
+
+    def knows_tag(self, tag: str) -> bool:
+        """Returns whether the tag is part of this pack's vocabulary."""
+        return tag in self.tag_index
+
+    def complete_tag(self, prefix: str, limit: int, public_user=None) -> List[str]:
+        """
+        Returns up to `limit` known tags starting with `prefix`, in lexicographic order.
+
+        :param prefix:
+            Partial tag typed by the user.
+        :param limit:
+            Maximum number of completions to return.
+        :param public_user:
+            Public pack whose tags are also considered when the user is not in private mode.
+        """
+        completions = self.tag_index.with_prefix(prefix, limit)
+        public_pack = None if self.private_mode else public_user
+        if public_pack is not None:
+            public_completions = public_pack.tag_index.with_prefix(prefix, limit)
+            completions = sorted(set(completions).union(public_completions))
+        return completions[:limit]
+
+    def suggest_tag(self, tag: str, public_user=None) -> str | None:
+        """
+        Returns the known tag nearest to a misspelled one, or `None` when none is close enough.
+
+        :param tag:
+            Canonical tag that is not part of the vocabulary.
+        :param public_user:
+            Public pack whose tags are also considered when the user is not in private mode.
+        """
+        candidates = self.fuzzy_index.nearest(tag)
+        public_pack = None if self.private_mode else public_user
+        if public_pack is not None:
+            candidates += public_pack.fuzzy_index.nearest(tag)
+        if not candidates:
+            return None
+        return min(candidates, key=lambda candidate: (_distance(tag, candidate), candidate))
+
+    def correct_query(self, query: QueryNode, public_user=None, prefix_completions: int = 8):
+        """
+        Replaces every unknown tag of a query with its nearest known tag.
+
+        Prefixes are only corrected when nothing completes them. Returns the corrected query, or
+        `None` when no tag was replaced.
+
+        :param query:
+            Parsed boolean query.
+        :param public_user:
+            Public pack whose tags are also considered when the user is not in private mode.
+        :param prefix_completions:
+            Maximum number of tags a prefix expands to.
+        """
+        public_pack = None if self.private_mode else public_user
+
+        def correct(leaf):
+            if isinstance(leaf, Prefix):
+                if self.complete_tag(leaf.prefix, 1, public_user=public_user):
+                    return None
+                tag = leaf.prefix
+            elif self.knows_tag(leaf.tag) or public_pack is not None and public_pack.knows_tag(
+                leaf.tag
+            ):
+                return None
+            else:
+                tag = leaf.tag
+            suggestion = self.suggest_tag(tag, public_user=public_user)
+            return None if suggestion is None else Term(suggestion)
+
+        corrected = rewrite_leaves(query, correct)
+        return None if corrected == query else corrected
+
+    def search(
+        self,
+        query: QueryNode,
+        public_user=None,
+        limit: int | None = None,
+        prefix_completions=8,
+        ranked: bool = False,
+    ) -> List[str]:
+        """
+        Returns the stickers matching a boolean query.
+
+        Results come in a stable order, and only the first `limit` are computed. When `ranked`, the
+        most used stickers for the query's tags come first; only the top `limit` are selected, with
+        a heap, instead of sorting every match. When shuffling is on, every match is computed and
+        shuffled instead.
+
+        :param query:
+            Parsed boolean query.
+        :param public_user:
+            Public pack merged into the lookup when the user is not in private mode.
+        :param limit:
+            Maximum number of stickers to return, or `None` for all of them.
+        :param prefix_completions:
+            Maximum number of tags a prefix expands to.
+        :param ranked:
+            Whether to order results by decayed usage.
+        """
+        public_pack = None if self.private_mode else public_user
+        source = _PackPostings(self, public_pack, prefix_completions)
+        matches = QueryPlanner(source).iterate(query)
+        tags = _query_tags(query, source)
+        usage = self._query_usage(tags, public_pack) if ranked and not self.shuffle else []
+
+        def score(sticker_id: str) -> float:
+            return combine(scores.get(sticker_id, UNUSED) for scores in usage)
+
+        if self.shuffle:
+            stickers = list(matches)
+            random.shuffle(stickers)
+        elif not usage:
+            stickers = list(islice(matches, limit))
+        elif limit is None:
+            stickers = sorted(matches, key=score, reverse=True)
+        else:
+            stickers = heapq.nlargest(limit, matches, key=score)
+        source.remember(tags)
+        return stickers
+
+    def record_choice(self, query: QueryNode, sticker_id: str, now: float, public_user=None):
+        """
+        Credits a chosen sticker to every query tag it is posted under.
+
+        :param query:
+            Parsed query the sticker was chosen from.
+        :param sticker_id:
+            Chosen sticker.
+        :param now:
+            Time of the choice, in seconds.
+        :param public_user:
+            Public pack whose usage is also updated when the user is not in private mode.
+        :returns:
+            The packs whose usage changed.
+        """
+        public_pack = None if self.private_mode else public_user
+        source = _PackPostings(self, public_pack, prefix_completions=8)
+        packs = [pack for pack in (self, public_pack) if pack is not None]
+        changed = []
+        for tag in _query_tags(query, source):
+            for pack in packs:
+                if sticker_id in pack.snapshot.get(tag):
+                    pack.record_usage(tag, sticker_id, now)
+                    if pack not in changed:
+                        changed.append(pack)
+        return changed
+
+    def remember_sticker(self, sticker_id: str) -> bool:
+        """Records a sticker the user just sent, returning whether the history changed."""
+        with self._write_lock:
+            return self.recent.remember(sticker_id)
+
+    def recent_stickers(self) -> List[str]:
+        """Returns the stickers the user sent most recently, newest first."""
+        return self.recent.latest()
+
+    def record_usage(self, tag: str, sticker_id: str, now: float) -> None:
+        """Records one use of a sticker found through a tag.
+
+        Like the posting lists, a tag's scores are replaced rather than updated in place, so
+        rankings read them without the lock.
+        """
+        with self._write_lock:
+            scores = dict(self.usage.get(tag, ()))
+            scores[sticker_id] = record_use(scores.get(sticker_id, UNUSED), now)
+            self.usage[tag] = scores
+
+    def _query_usage(self, tags: Sequence[str], public_pack) -> List[Dict[str, float]]:
+        packs = [pack for pack in (self, public_pack) if pack is not None]
+        return [pack.usage[tag] for tag in tags for pack in packs if pack.usage.get(tag)]
 
-    def resolve_sticker_list(self, tags: List[str], public_user=None) -> List[str]:
+    def resolve_sticker_list(
+        self, tags: List[str], public_user=None, prefix_completions: int = 0
+    ) -> List[str]:
+        """
+        Returns the stickers matching every tag.
+
+        :param tags:
+            Canonical tags to intersect.
+        :param public_user:
+            Public pack merged into the lookup when the user is not in private mode.
+        :param prefix_completions:
+            When positive, the last tag is treated as a prefix and matches the union of up to this
+            many tags that start with it.
+        """
         if not tags:
             return []
         stickers = []
         public_pack = None if self.private_mode else public_user
-        for tag in tags:
-            match = set()
-            if public_pack is not None:
-                match = public_pack.get_stickers(tag)
-            match = match.union(self.get_stickers(tag))
-            stickers.append(match)
-            self.cache[tag] = list(match)
+        exact_tags = tags[:-1] if prefix_completions > 0 else tags
+        for tag in exact_tags:
+            if not (self.knows_tag(tag) or public_pack is not None and public_pack.knows_tag(tag)):
+                return []
+        if prefix_completions > 0:
+            completions = self.complete_tag(tags[-1], prefix_completions, public_user=public_user)
+            if not completions:
+                return []
+        for tag in exact_tags:
+            stickers.append(self._match_tag(tag, public_pack))
+        if prefix_completions > 0:
+            completed = (self._match_tag(tag, public_pack) for tag in completions)
+            stickers.append(set().union(*completed))
         return list(set.intersection(*stickers)) if stickers else []
 
-    def get_shuffled_sticker_list(self, tags: List[str], public_user=None) -> List[str]:
-        stickers = self.resolve_sticker_list(tags, public_user=public_user)
+    def _match_tag(self, tag: str, public_pack) -> Set[str]:
+        match = set()
+        if public_pack is not None:
+            match = public_pack.get_stickers(tag)
+        match = match.union(self.get_stickers(tag))
+        self.cache[tag] = list(match)
+        return match
+
+    def get_shuffled_sticker_list(
+        self, tags: List[str], public_user=None, prefix_completions: int = 0
+    ) -> List[str]:
+        stickers = self.resolve_sticker_list(
+            tags, public_user=public_user, prefix_completions=prefix_completions
+        )
         if self.shuffle:
             random.shuffle(stickers)
         return stickers
 
     def random_tag(self):
         """Returns a random tag from the database."""
-        tag_list = list(self.stickers.keys())
-        if len(tag_list) == 0:
-            return []
-        return [random.choice(tag_list)]
+        tag = self.tag_index.random_tag()
+        return [] if tag is None else [tag]
+
+    def popular_random_tag(self):
+        """Returns a random tag, weighted by how many stickers each tag holds."""
+        tag = self.tag_sampler.random_tag()
+        return [] if tag is None else [tag]
 
     def remove_cached_stickers(self, user_id=None):
         """
@@ -147,13 +591,217 @@ class StickfixUser:
         :param sticker_tags:
             List of tags that contains the sticker.
         """
-        for tag in sticker_tags:
-            if tag in self.stickers:
-                self.stickers[tag] = [x for x in self.stickers[tag] if x != sticker_id]
-                if len(self.stickers[tag]) == 0:
-                    del self.stickers[tag]
+        with self._write_lock:
+            postings = dict(self._snapshot.postings)
+            unposted: List[str] = []
+            removed_tags: List[str] = []
+            for tag in sticker_tags:
+                current = postings.get(tag, ())
+                if sticker_id not in current:
+                    continue
+                remaining = [x for x in current if x != sticker_id]
+                self._forget_usage(tag, sticker_id)
+                unposted.append(tag)
+                if remaining:
+                    postings[tag] = remaining
+                else:
+                    removed_tags.append(tag)
+                    del postings[tag]
+            if unposted:
+                self._reindex(removed_tags=removed_tags, unposted=unposted)
+                self._publish(postings)
         if sticker_tags:
-            logger.info(f"Removed sticker {sticker_id} from tags {', '.join(sticker_tags)}")
+            logger.info(
+                "Removed sticker %s from tags %s", sticker_id, Lazy(", ".join, sticker_tags)
+            )
+
+    def merged_view(
+        self, tag: str, snapshots: Sequence[PackSnapshot]
+    ) -> Tuple[FrozenSet[str], Sequence[str]]:
+        """
+        Returns the union of a tag's posting lists across packs, as a set and as a sorted sequence.
+
+        Views are shared by every user and kept in one bounded LRU cache, keyed by the posting list
+        objects they merge. Published posting lists are never mutated, so a view stays valid
+        exactly as long as the packs still publish the same list objects for the tag: a write to
+        the tag in any pack replaces its list and invalidates the view, while writes to other tags
+        leave it untouched. When only one pack has stickers for the tag, its own posting list is
+        the sorted sequence, so public-mode users without private stickers for a tag all share the
+        public pack's list instead of copying it.
+
+        :param tag:
+            Canonical tag to look up.
+        :param snapshots:
+            Snapshots of the packs whose postings are merged, usually the user's and the public
+            pack's.
+        """
+        return _MERGED_VIEWS.get(tuple(filter(None, (snapshot.get(tag) for snapshot in snapshots))))
+
+    def _move_usage(self, source_tag: str, target_tag: str) -> None:
+        scores = self.usage.pop(source_tag, None)
+        if not scores:
+            return
+        target = dict(self.usage.get(target_tag, ()))
+        for sticker_id, score in scores.items():
+            target[sticker_id] = combine((target.get(sticker_id, UNUSED), score))
+        self.usage[target_tag] = target
+
+    def _forget_cached_tags(self, tags: Sequence[str]) -> None:
+        for tag in tags:
+            self.cached_stickers.pop(tag, None)
+
+    def _forget_usage(self, tag: str, sticker_id: str) -> None:
+        scores = self.usage.get(tag)
+        if scores is None or sticker_id not in scores:
+            return
+        remaining = {other: score for other, score in scores.items() if other != sticker_id}
+        if remaining:
+            self.usage[tag] = remaining
+        else:
+            del self.usage[tag]
+
+    def _publish(self, postings: Dict[str, List[str]]) -> None:
+        """Replace the current snapshot; callers hold the write lock and never mutate `postings`."""
+        self._snapshot = PackSnapshot(self._snapshot.version + 1, postings)
+
+    def _reindex(
+        self,
+        new_tags: Sequence[str] = (),
+        removed_tags: Sequence[str] = (),
+        posted: Sequence[str] = (),
+        unposted: Sequence[str] = (),
+    ) -> None:
+        """Bring the built derived indexes up to date with one write; callers hold the write lock.
+
+        :param new_tags: tags the write introduces.
+        :param removed_tags: tags left without stickers.
+        :param posted: tag of every ``(tag, sticker)`` posting added, once per posting.
+        :param unposted: tag of every posting removed, once per posting.
+        """
+        if self._fuzzy_index is not None:
+            for tag in removed_tags:
+                self._fuzzy_index.discard(tag)
+            for tag in new_tags:
+                self._fuzzy_index.add(tag)
+        if self._tag_index is not None:
+            self._tag_index.update(added=new_tags, removed=removed_tags)
+        if self._tag_sampler is not None:
+            for tag in unposted:
+                self._tag_sampler.remove(tag)
+            for tag in posted:
+                self._tag_sampler.add(tag)
 
     def unlink_sticker_from_pack(self, sticker_id, sticker_tags, public_user=None):
         self.get_effective_pack(public_user).unlink_sticker(sticker_id, sticker_tags)
+
+
+class _MergedViews:
+    """Bounded LRU cache of merged posting lists, keyed by the identity of the lists merged.
+
+    Each entry holds the lists it was built from, so their ids cannot be reused while it is cached.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._views: "OrderedDict[Tuple[int, ...], _MergedView]" = OrderedDict()
+
+    def get(self, sources: Tuple[Sequence[str], ...]) -> Tuple[FrozenSet[str], Sequence[str]]:
+        key = tuple(map(id, sources))
+        with self._lock:
+            view = self._views.get(key)
+            if view is not None:
+                self._views.move_to_end(key)
+                return view[1], view[2]
+        members = frozenset().union(*sources)
+        ordered = sources[0] if len(sources) == 1 else tuple(sorted(members))
+        with self._lock:
+            self._views[key] = (sources, members, ordered)
+            while len(self._views) > MERGED_VIEW_CAPACITY:
+                self._views.popitem(last=False)
+        return members, ordered
+
+
+_MERGED_VIEWS = _MergedViews()
+
+
+class _PackPostings:
+    """`PostingSource` over a pack merged with the public pack, memoized for one query.
+
+    The packs' snapshots are taken once, so one query never mixes two versions of a pack that is
+    being written concurrently. Postings come from the user's merged views of those snapshots
+    rather than the inline cache, so switching modes never serves stale merged results. Each tag's
+    view is fetched once per query, however many membership tests the planner runs against it, and
+    `remember` refreshes the inline cache once per tag the answer was drawn from.
+    """
+
+    def __init__(self, user: StickfixUser, public_pack, prefix_completions: int) -> None:
+        self._user = user
+        self._public_pack = public_pack
+        self._snapshots = [pack.snapshot for pack in (user, public_pack) if pack is not None]
+        self._prefix_completions = prefix_completions
+        self._completions: Dict[str, List[str]] = {}
+        self._views: Dict[str, Tuple[FrozenSet[str], Sequence[str]]] = {}
+
+    def cardinality(self, tag: str) -> int:
+        return sum(len(snapshot.get(tag)) for snapshot in self._snapshots)
+
+    def postings(self, tag: str) -> FrozenSet[str]:
+        return self._view(tag)[0]
+
+    def ordered(self, tag: str) -> Sequence[str]:
+        return self._view(tag)[1]
+
+    def remember(self, tags: Sequence[str]) -> None:
+        """Refresh the inline cache entries of the `tags` whose postings this query read."""
+        for tag in tags:
+            view = self._views.get(tag)
+            if view is not None:
+                self._user.cache[tag] = list(view[1])
+
+    def _view(self, tag: str) -> Tuple[FrozenSet[str], Sequence[str]]:
+        view = self._views.get(tag)
+        if view is None:
+            view = self._views[tag] = self._user.merged_view(tag, self._snapshots)
+        return view
+
+    def completions(self, prefix: str) -> List[str]:
+        if prefix not in self._completions:
+            self._completions[prefix] = self._user.complete_tag(
+                prefix, self._prefix_completions, public_user=self._public_pack
+            )
+        return self._completions[prefix]
+
+
+def _merge_postings(lists: Sequence[Sequence[str]]) -> List[str]:
+    """Merge sorted posting lists into one sorted list without duplicates."""
+    merged: List[str] = []
+    for sticker_id in heapq.merge(*lists):
+        if not merged or merged[-1] != sticker_id:
+            merged.append(sticker_id)
+    return merged
+
+
+def _query_tags(query: QueryNode, source) -> List[str]:
+    """Non-negated tags of a query, with prefixes expanded to their completions."""
+    tags: Dict[str, None] = {}
+    for leaf in query_terms(query):
+        if isinstance(leaf, Term):
+            tags[leaf.tag] = None
+        else:
+            tags.update(dict.fromkeys(source.completions(leaf.prefix)))
+    return list(tags)
+
+
+def _distance(tag: str, candidate: str) -> int:
+    return bounded_distance(tag, candidate, len(tag) + len(candidate))
+
+
+def _canonical_postings(stickers: Dict[str, List[str]]) -> Dict[str, List[str]]:
+    """Re-key legacy posting lists by canonical tag, merging lists that collapse together."""
+    if all(normalize_tag(tag) in (tag, "") for tag in stickers):
+        return stickers
+    canonical: Dict[str, List[str]] = {}
+    for tag, sticker_ids in stickers.items():
+        key = normalize_tag(tag) or tag
+        canonical[key] = sorted(set(canonical.get(key, [])).union(sticker_ids))
+    return canonical
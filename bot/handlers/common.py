@@ -5,18 +5,66 @@
     You should have received a copy of the license along with this
     work. If not, see <http://creativecommons.org/licenses/by/4.0/>.
 """
-from typing import List
+import time
+from functools import wraps
+from typing import Callable, List, TypeVar
 
-from telegram.ext import Dispatcher
+from telegram import Update
+from telegram.ext import CallbackContext, Dispatcher
 
 from bot.database.storage import StickfixDB
 from bot.domain.user import SF_PUBLIC, StickfixUser
-from bot.utils.logger import StickfixLogger
+from bot.utils.logger import Lazy, StickfixLogger, update_context
+from bot.utils.metrics import HANDLER_LATENCY, HANDLER_UPDATES, METRICS
 
 logger = StickfixLogger(__name__)
 
 HELP_PATH = "bot/utils/HELP.md"
 
+HandlerT = TypeVar("HandlerT", bound=Callable[..., None])
+
+
+def log_update(command: str) -> Callable[[HandlerT], HandlerT]:
+    """Run a handler callback inside an update context and log how long it took.
+
+    Records logged while the callback runs carry the update and user ids, and a final ``Handled``
+    record reports ``latency_ms`` and ``outcome`` so per-command latencies can be read from logs.
+    The latency and outcome are also recorded in the process metrics.
+    """
+
+    name = getattr(command, "value", command)
+    histogram = METRICS.histogram(HANDLER_LATENCY, command=name)
+
+    def decorate(callback: HandlerT) -> HandlerT:
+        @wraps(callback)
+        def wrapper(self, update: Update, context: CallbackContext) -> None:
+            user = getattr(update, "effective_user", None)
+            with update_context(
+                name,
+                update_id=getattr(update, "update_id", None),
+                user_id=getattr(user, "id", None),
+            ):
+                started = time.perf_counter()
+                outcome = "error"
+                try:
+                    callback(self, update, context)
+                    outcome = "ok"
+                finally:
+                    elapsed = time.perf_counter() - started
+                    histogram.record(elapsed)
+                    METRICS.increment(HANDLER_UPDATES, command=name, outcome=outcome)
+                    latency = elapsed * 1000
+                    logger.info(
+                        "Handled %s in %.1f ms",
+                        name,
+                        latency,
+                        fields={"latency_ms": round(latency, 3), "outcome": outcome},
+                    )
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorate
+
 
 class StickfixHandler:
     _dispatcher: Dispatcher
@@ -29,11 +77,10 @@ class StickfixHandler:
     def _create_user(self, user_id):
         """ Creates and adds a user to the database.    """
         self._user_db[user_id] = StickfixUser(user_id)
-        logger.info(f"Created user with id {user_id}")
+        logger.info("Created user with id %s", user_id)
 
     def _get_sticker_list(self, user: StickfixUser, tags: List[str]) -> List[str]:
         """ Returns the list of stickers associated with a tag and a user.  """
-        for tag in tags:
-            logger.info(f"Getting stickers matching {tag}")
+        logger.info("Getting stickers matching %s", Lazy(", ".join, tags))
         public_user = self._user_db[SF_PUBLIC] if SF_PUBLIC in self._user_db else None
         return user.get_shuffled_sticker_list(tags, public_user=public_user)
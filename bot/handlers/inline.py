@@ -6,8 +6,8 @@ You should have received a copy of the license along with this
 work. If not, see <http://creativecommons.org/licenses/by/4.0/>.
 """
 
+from functools import partial
 from pathlib import Path
-from uuid import uuid4
 
 from telegram import (
     InlineQueryResultArticle,
@@ -18,13 +18,22 @@ from telegram import (
 )
 from telegram.ext import CallbackContext, ChosenInlineResultHandler, Dispatcher, InlineQueryHandler
 
-from bot.application.requests import ClearInlineCacheCommand, InlineQueryRequest
+from bot.application.answered_results import AnsweredResults
+from bot.application.inline_cache_policy import HELP_RESULT_ID, sticker_result_id
+from bot.application.ports import HelpContentProvider
+from bot.application.requests import (
+    ClearInlineCacheCommand,
+    InlineQueryRequest,
+    RecordChosenResultCommand,
+)
 from bot.application.use_cases.clear_inline_cache import ClearInlineCache
+from bot.application.use_cases.record_chosen_result import RecordChosenResult
 from bot.application.use_cases.resolve_inline_query import ResolveInlineQuery
 from bot.database.storage import StickfixDB
 from bot.domain.services.sticker_pack_service import StickerPackService
-from bot.handlers.common import HELP_PATH, StickfixHandler
-from bot.infrastructure.help.file_help_content_provider import FileHelpContentProvider
+from bot.handlers.common import HELP_PATH, StickfixHandler, log_update
+from bot.infrastructure.help.cached_help_content_provider import CachedHelpContentProvider
+from bot.infrastructure.persistence.stickfix_unit_of_work import StickfixUnitOfWork
 from bot.infrastructure.persistence.stickfix_user_repository import StickfixUserRepository
 from bot.utils.errors import unexpected_error
 from bot.utils.logger import StickfixLogger
@@ -39,29 +48,41 @@ class InlineHandler(StickfixHandler):
         user_db: StickfixDB,
         resolve_inline_query: ResolveInlineQuery | None = None,
         clear_inline_cache: ClearInlineCache | None = None,
+        help_content: HelpContentProvider | None = None,
+        record_chosen_result: RecordChosenResult | None = None,
     ) -> None:
         super().__init__(dispatcher, user_db)
+        answered_results = AnsweredResults()
         self._resolve_inline_query = (
-            resolve_inline_query or self._build_default_resolve_inline_query(user_db)
+            resolve_inline_query
+            or self._build_default_resolve_inline_query(user_db, help_content, answered_results)
         )
         self._clear_inline_cache = clear_inline_cache or self._build_default_clear_inline_cache(
             user_db
         )
+        self._record_chosen_result = (
+            record_chosen_result
+            or self._build_default_record_chosen_result(user_db, answered_results)
+        )
         self._dispatcher.add_handler(InlineQueryHandler(self.__inline_get))
         self._dispatcher.add_handler(ChosenInlineResultHandler(self.__on_result))
 
     @staticmethod
     def _build_default_resolve_inline_query(
         user_db: StickfixDB,
+        help_content: HelpContentProvider | None = None,
+        answered_results: AnsweredResults | None = None,
     ) -> ResolveInlineQuery:
         """Build the default ResolveInlineQuery use case from infrastructure."""
         repository = StickfixUserRepository(user_db)
-        help_provider = FileHelpContentProvider(Path(HELP_PATH))
+        help_provider = help_content or CachedHelpContentProvider(Path(HELP_PATH))
         pack_service = StickerPackService()
         return ResolveInlineQuery(
             users=repository,
             help_content=help_provider,
             stickers=pack_service,
+            unit_of_work=partial(StickfixUnitOfWork, user_db),
+            answered_results=answered_results,
         )
 
     @staticmethod
@@ -74,8 +95,25 @@ class InlineHandler(StickfixHandler):
         return ClearInlineCache(
             users=repository,
             stickers=pack_service,
+            unit_of_work=partial(StickfixUnitOfWork, user_db),
+        )
+
+    @staticmethod
+    def _build_default_record_chosen_result(
+        user_db: StickfixDB,
+        answered_results: AnsweredResults | None = None,
+    ) -> RecordChosenResult:
+        """Build the default RecordChosenResult use case from infrastructure."""
+        repository = StickfixUserRepository(user_db)
+        pack_service = StickerPackService()
+        return RecordChosenResult(
+            users=repository,
+            stickers=pack_service,
+            unit_of_work=partial(StickfixUnitOfWork, user_db),
+            answered_results=answered_results,
         )
 
+    @log_update("inline_query")
     def __inline_get(
         self,
         update: Update,
@@ -109,7 +147,7 @@ class InlineHandler(StickfixHandler):
             for sticker_id in result.sticker_ids:
                 telegram_results.append(
                     InlineQueryResultCachedSticker(
-                        id=str(uuid4()),
+                        id=sticker_result_id(sticker_id),
                         sticker_file_id=sticker_id,
                     )
                 )
@@ -118,20 +156,21 @@ class InlineHandler(StickfixHandler):
             context.bot.answer_inline_query(
                 inline_query.id,
                 telegram_results,
-                cache_time=1,
-                is_personal=True,
+                cache_time=result.cache_time,
+                is_personal=result.is_personal,
                 next_offset=str(result.next_offset),
             )
         except Exception as e:
             unexpected_error(e, logger)
             raise e
 
+    @log_update("chosen_inline_result")
     def __on_result(
         self,
         update: Update,
         context: CallbackContext,  # noqa: ARG002
     ) -> None:
-        """Clear cached stickers after a chosen inline result."""
+        """Clear cached stickers and record usage after a chosen inline result."""
         try:
             user = update.effective_user
             chosen_result = update.chosen_inline_result
@@ -147,9 +186,16 @@ class InlineHandler(StickfixHandler):
 
             # Delegate to application layer
             self._clear_inline_cache(command)
+            self._record_chosen_result(
+                RecordChosenResultCommand(
+                    user_id=user_id,
+                    query_text=chosen_result.query,
+                    result_id=chosen_result.result_id,
+                )
+            )
 
             # Log success
-            logger.info(f"Answered inline query for {chosen_result.query}")
+            logger.info("Answered inline query for %s", chosen_result.query)
         except Exception as e:
             unexpected_error(e, logger)
 
@@ -158,7 +204,7 @@ class InlineHandler(StickfixHandler):
         display_title = "Click me for help"
         first_tag = result.default_tags[0] if result.default_tags else "help"
         return InlineQueryResultArticle(
-            id=str(uuid4()),
+            id=HELP_RESULT_ID,
             title=display_title,
             description=f"Try calling me inline like `@stickfixbot {first_tag}`",
             input_message_content=InputTextMessageContent(
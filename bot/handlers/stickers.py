@@ -5,16 +5,43 @@
     You should have received a copy of the license along with this
     work. If not, see <http://creativecommons.org/licenses/by/4.0/>.
 """
+from collections.abc import Collection
+from functools import partial
+
 from telegram import Message, Sticker, Update
-from telegram.error import BadRequest
 from telegram.ext import CallbackContext, CommandHandler, Dispatcher
 
-from bot.application.errors import MissingStickerError, WrongInteractionContextError
-from bot.application.requests import AddStickerCommand, DeleteStickerCommand, GetStickersQuery
-from bot.application.use_cases import AddSticker, DeleteSticker, GetStickers
+from bot.application.errors import (
+    InsufficientPermissionsError,
+    InvalidCommandInputError,
+    MissingStickerError,
+    StickerSetNotFoundError,
+    WrongInteractionContextError,
+)
+from bot.application.ports import StickerSetProvider
+from bot.application.requests import (
+    AddStickerCommand,
+    AddStickerSetCommand,
+    DeleteStickerCommand,
+    DropTagCommand,
+    GetStickersQuery,
+    MergeTagsCommand,
+    RenameTagCommand,
+)
+from bot.application.results import TagEditResult
+from bot.application.use_cases import (
+    AddSticker,
+    AddStickerSet,
+    DeleteSticker,
+    DropTag,
+    GetStickers,
+    MergeTags,
+    RenameTag,
+)
 from bot.database.storage import StickfixDB
-from bot.handlers.common import StickfixHandler
-from bot.infrastructure.persistence import StickfixUserRepository
+from bot.handlers.common import StickfixHandler, log_update
+from bot.infrastructure.persistence import StickfixUnitOfWork, StickfixUserRepository
+from bot.infrastructure.telegram import TelegramStickerSender, TelegramStickerSetProvider
 from bot.utils.errors import NoStickerException, WrongContextException, unexpected_error
 from bot.utils.logger import StickfixLogger
 from bot.utils.messages import (
@@ -29,19 +56,48 @@ logger = StickfixLogger(__name__)
 
 
 class StickerHandler(StickfixHandler):
-    def __init__(self, dispatcher: Dispatcher, user_db: StickfixDB):
+    def __init__(
+        self,
+        dispatcher: Dispatcher,
+        user_db: StickfixDB,
+        sticker_sets: StickerSetProvider | None = None,
+        admin_ids: Collection[str] = (),
+        sticker_sender: TelegramStickerSender | None = None,
+    ):
         super().__init__(dispatcher, user_db)
         user_repository = StickfixUserRepository(user_db)
-        self.__add_sticker_use_case = AddSticker(user_repository)
+        unit_of_work = partial(StickfixUnitOfWork, user_db)
+        self.__add_sticker_use_case = AddSticker(user_repository, unit_of_work=unit_of_work)
+        self.__add_sticker_set_use_case = AddStickerSet(
+            user_repository,
+            sticker_sets or TelegramStickerSetProvider(dispatcher.bot),
+            unit_of_work=unit_of_work,
+        )
         self.__get_stickers_use_case = GetStickers(user_repository)
-        self.__delete_sticker_use_case = DeleteSticker(user_repository)
+        self.__sticker_sender = sticker_sender or TelegramStickerSender(dispatcher.bot)
+        self.__delete_sticker_use_case = DeleteSticker(user_repository, unit_of_work=unit_of_work)
+        self.__rename_tag_use_case = RenameTag(
+            user_repository, unit_of_work=unit_of_work, admin_ids=admin_ids)
+        self.__merge_tags_use_case = MergeTags(
+            user_repository, unit_of_work=unit_of_work, admin_ids=admin_ids)
+        self.__drop_tag_use_case = DropTag(
+            user_repository, unit_of_work=unit_of_work, admin_ids=admin_ids)
         self._dispatcher.add_handler(
             CommandHandler(Commands.ADD, self.__add_sticker, pass_args=True))
+        self._dispatcher.add_handler(
+            CommandHandler(Commands.ADD_SET, self.__add_sticker_set, pass_args=True))
         self._dispatcher.add_handler(
             CommandHandler(Commands.GET, self.__get_stickers, pass_args=True))
         self._dispatcher.add_handler(
             CommandHandler(Commands.DELETE_FROM, self.__delete_from, pass_args=True))
+        self._dispatcher.add_handler(
+            CommandHandler(Commands.RENAME_TAG, self.__rename_tag, pass_args=True))
+        self._dispatcher.add_handler(
+            CommandHandler(Commands.MERGE_TAGS, self.__merge_tags, pass_args=True))
+        self._dispatcher.add_handler(
+            CommandHandler(Commands.DROP_TAG, self.__drop_tag, pass_args=True))
 
+    @log_update(Commands.ADD)
     def __add_sticker(self, update: Update, context: CallbackContext) -> None:
         """ Answers the /add command by adding a sticker to the DB. """
         sticker: Sticker
@@ -69,8 +125,38 @@ class StickerHandler(StickfixHandler):
         except Exception as e:
             unexpected_error(e, logger)
 
+    @log_update(Commands.ADD_SET)
+    def __add_sticker_set(self, update: Update, context: CallbackContext) -> None:
+        """ Answers the /addset command by adding a whole sticker set to the DB. """
+        try:
+            msg, user, chat = get_message_meta(update)
+            set_name, *tags = context.args or [""]
+            command = AddStickerSetCommand(
+                user_id=user.id,
+                chat_id=chat.id,
+                chat_type=chat.type,
+                set_name=set_name,
+                tags=tuple(tags),
+            )
+            result = self.__add_sticker_set_use_case(command)
+            skipped = result.sticker_count - result.added_count
+            if skipped:
+                msg.reply_text(
+                    f"Ok! Added {result.added_count} stickers, "
+                    f"{skipped} were already in the pack."
+                )
+            else:
+                msg.reply_text(f"Ok! Added {result.added_count} stickers.")
+        except InvalidCommandInputError:
+            msg.reply_text("Usage: /addset <set name> <tags...>")
+        except StickerSetNotFoundError:
+            msg.reply_text("I couldn't find that sticker set.")
+        except Exception as e:
+            unexpected_error(e, logger)
+
+    @log_update(Commands.GET)
     def __get_stickers(self, update: Update, context: CallbackContext) -> None:
-        """ Sends all the stickers linked with a tag.   """
+        """ Queues all the stickers linked with a tag for rate-limited delivery. """
         try:
             message, user, chat = get_message_meta(update)
             query = GetStickersQuery(
@@ -80,8 +166,7 @@ class StickerHandler(StickfixHandler):
                 tags=tuple(context.args),
             )
             result = self.__get_stickers_use_case(query)
-            for sticker_id in result.sticker_ids:
-                chat.send_sticker(sticker_id)
+            self.__sticker_sender.submit(chat.id, result.sticker_ids)
         except WrongInteractionContextError:
             message.reply_text("This command only works in private chats.")
             try:
@@ -92,11 +177,10 @@ class StickerHandler(StickfixHandler):
                 logger.debug("Handled exception.")
         except WrongContextException:
             logger.debug("Handled exception.")
-        except BadRequest as e:
-            raise e
         except Exception as e:
             unexpected_error(e, logger)
 
+    @log_update(Commands.DELETE_FROM)
     def __delete_from(self, update: Update, context: CallbackContext) -> None:
         """ Deletes a sticker from the database. """
         sticker: Sticker
@@ -120,3 +204,58 @@ class StickerHandler(StickfixHandler):
             logger.debug("Handled error.")
         except Exception as e:
             unexpected_error(e, logger)
+
+    @log_update(Commands.RENAME_TAG)
+    def __rename_tag(self, update: Update, context: CallbackContext) -> None:
+        """ Answers the /renameTag command by moving every sticker of a tag to another tag. """
+        try:
+            msg, user, _ = get_message_meta(update)
+            old_tag, new_tag = context.args or ["", ""]
+            command = RenameTagCommand(user_id=user.id, old_tag=old_tag, new_tag=new_tag)
+            result = self.__rename_tag_use_case(command)
+            self.__reply_tag_edit(msg, result)
+        except (ValueError, InvalidCommandInputError):
+            msg.reply_text("Usage: /renameTag <old tag> <new tag>")
+        except InsufficientPermissionsError:
+            msg.reply_text("Only admins can edit the tags of the public pack.")
+        except Exception as e:
+            unexpected_error(e, logger)
+
+    @log_update(Commands.MERGE_TAGS)
+    def __merge_tags(self, update: Update, context: CallbackContext) -> None:
+        """ Answers the /mergeTags command by merging several tags into the last one. """
+        try:
+            msg, user, _ = get_message_meta(update)
+            *source_tags, target_tag = context.args or [""]
+            command = MergeTagsCommand(
+                user_id=user.id, source_tags=tuple(source_tags), target_tag=target_tag)
+            result = self.__merge_tags_use_case(command)
+            self.__reply_tag_edit(msg, result)
+        except InvalidCommandInputError:
+            msg.reply_text("Usage: /mergeTags <tags...> <target tag>")
+        except InsufficientPermissionsError:
+            msg.reply_text("Only admins can edit the tags of the public pack.")
+        except Exception as e:
+            unexpected_error(e, logger)
+
+    @log_update(Commands.DROP_TAG)
+    def __drop_tag(self, update: Update, context: CallbackContext) -> None:
+        """ Answers the /dropTag command by removing a tag and all of its links. """
+        try:
+            msg, user, _ = get_message_meta(update)
+            tag, = context.args or [""]
+            result = self.__drop_tag_use_case(DropTagCommand(user_id=user.id, tag=tag))
+            self.__reply_tag_edit(msg, result)
+        except (ValueError, InvalidCommandInputError):
+            msg.reply_text("Usage: /dropTag <tag>")
+        except InsufficientPermissionsError:
+            msg.reply_text("Only admins can edit the tags of the public pack.")
+        except Exception as e:
+            unexpected_error(e, logger)
+
+    @staticmethod
+    def __reply_tag_edit(msg: Message, result: TagEditResult) -> None:
+        if result.changed:
+            msg.reply_text("Ok!")
+        else:
+            msg.reply_text("I couldn't find those tags.")
@@ -5,71 +5,85 @@
     You should have received a copy of the license along with this
     work. If not, see <http://creativecommons.org/licenses/by/4.0/>.
 """
+from collections.abc import Collection
+from functools import partial
+from pathlib import Path
+
 from telegram import ParseMode, Update
 from telegram.ext import CallbackContext, CommandHandler, Dispatcher
 
 from bot.application.errors import InvalidCommandInputError
+from bot.application.ports import HelpContentProvider
 from bot.application.requests import SetModeCommand
 from bot.application.use_cases import SetMode
 from bot.database.storage import StickfixDB
 from bot.domain.user import Switch
-from bot.handlers.common import HELP_PATH, StickfixHandler
-from bot.infrastructure.persistence import StickfixUserRepository
+from bot.handlers.common import HELP_PATH, StickfixHandler, log_update
+from bot.infrastructure.help import CachedHelpContentProvider
+from bot.infrastructure.persistence import StickfixUnitOfWork, StickfixUserRepository
 from bot.utils.errors import unexpected_error
 from bot.utils.logger import StickfixLogger
 from bot.utils.messages import Commands, get_message_meta
+from bot.utils.profiler import SamplingProfiler
 
 logger = StickfixLogger(__name__)
 
 
-def send_help_message(update: Update, context: CallbackContext) -> None:
-    """ Sends a help message to the chat.   """
-    try:
-        _, _, chat = get_message_meta(update)
-        with open(HELP_PATH, "r") as help_file:
-            context.bot.send_message(chat_id=chat.id, text=help_file.read(),
-                                     parse_mode=ParseMode.MARKDOWN)
-        logger.info(f"Sent help message to {chat.username}.")
-    except Exception as e:
-        unexpected_error(e, logger)
-
-
 class HelperHandler(StickfixHandler):
-    def __init__(self, dispatcher: Dispatcher, user_db: StickfixDB):
+    def __init__(self, dispatcher: Dispatcher, user_db: StickfixDB,
+                 help_content: HelpContentProvider | None = None):
         super().__init__(dispatcher, user_db)
+        self.__help_content = help_content or CachedHelpContentProvider(Path(HELP_PATH))
         self._dispatcher.add_handler(CommandHandler(Commands.START, self.__send_hello_message))
-        self._dispatcher.add_handler(CommandHandler(Commands.HELP, send_help_message))
+        self._dispatcher.add_handler(CommandHandler(Commands.HELP, self.__send_help_message))
 
+    @log_update(Commands.HELP)
+    def __send_help_message(self, update: Update, context: CallbackContext) -> None:
+        """ Sends a help message to the chat.   """
+        try:
+            _, _, chat = get_message_meta(update)
+            context.bot.send_message(chat_id=chat.id, text=self.__help_content.get_help_text(),
+                                     parse_mode=ParseMode.MARKDOWN)
+            logger.info("Sent help message to %s.", chat.username)
+        except Exception as e:
+            unexpected_error(e, logger)
+
+    @log_update(Commands.START)
     def __send_hello_message(self, update: Update, context: CallbackContext) -> None:
         """ Answers the /start command with a hello sticker and adds the user to the database. """
         _, _, chat = get_message_meta(update)
         context.bot.send_sticker(chat.id, sticker='CAADBAADTAADqAABTgXzVqN6dJUIXwI')
         if chat.id not in self._user_db:
             self._create_user(chat.id)
-            logger.info(f"User {chat.id} was added to the database.")
+            logger.info("User %s was added to the database.", chat.id)
 
 
 class UserHandler(StickfixHandler):
     def __init__(self, dispatcher: Dispatcher, user_db: StickfixDB):
         super().__init__(dispatcher, user_db)
-        self.__set_mode_use_case = SetMode(StickfixUserRepository(user_db))
+        self.__set_mode_use_case = SetMode(
+            StickfixUserRepository(user_db),
+            unit_of_work=partial(StickfixUnitOfWork, user_db),
+        )
         self._dispatcher.add_handler(CommandHandler(Commands.DELETE_ME, self.__remove_user))
         self._dispatcher.add_handler(CommandHandler(Commands.SET_MODE, self.__set_mode))
         self._dispatcher.add_handler(CommandHandler(Commands.SHUFFLE, self.__set_shuffle,
                                                     pass_args=True))
 
     # noinspection PyUnusedLocal
+    @log_update(Commands.DELETE_ME)
     def __remove_user(self, update: Update, context: CallbackContext) -> None:
         """ Removes a user from the database.   """
         try:
             message, user, _ = get_message_meta(update)
             if user.id in self._user_db:
                 del self._user_db[user.id]
-                logger.info(f"User {user.id} was removed from the database.")
+                logger.info("User %s was removed from the database.", user.id)
                 message.reply_text("Sure!")
         except Exception as e:
             unexpected_error(e, logger)
 
+    @log_update(Commands.SET_MODE)
     def __set_mode(self, update: Update, context: CallbackContext) -> None:
         """ Sets a user mode to private or public.   """
         try:
@@ -79,7 +93,7 @@ class UserHandler(StickfixHandler):
                 command = SetModeCommand(user_id=user.id, mode=mode)
                 self.__set_mode_use_case(command)
                 message.reply_text("Leave it to me!")
-                logger.info(f"Changed {user.username} to {mode} mode.")
+                logger.info("Changed %s to %s mode.", user.username, mode)
         except InvalidCommandInputError:
             message.reply_markdown(
                 "Sorry, I didn't understand. This command syntax is `/setMode private` "
@@ -88,6 +102,7 @@ class UserHandler(StickfixHandler):
         except Exception as e:
             unexpected_error(e, logger)
 
+    @log_update(Commands.SHUFFLE)
     def __set_shuffle(self, update: Update, context: CallbackContext) -> None:
         """ Turns on or off the shuffle flag for the user. """
         try:
@@ -97,8 +112,35 @@ class UserHandler(StickfixHandler):
             sf_user = self._user_db[user.id]
             if context.args[0] == Switch.ON or context.args[0] == Switch.OFF:
                 sf_user.shuffle = context.args[0] == Switch.ON
-                logger.info(f"User {user.username} turned {context.args[0]} shuffle.")
+                logger.info("User %s turned %s shuffle.", user.username, context.args[0])
             self._user_db[user.id] = sf_user
             message.reply_text("Done")
         except Exception as e:
             unexpected_error(e, logger)
+
+
+class ProfilerHandler(StickfixHandler):
+    """Lets admins toggle the sampling profiler from a chat."""
+
+    def __init__(self, dispatcher: Dispatcher, user_db: StickfixDB, profiler: SamplingProfiler,
+                 admin_ids: Collection[str] = ()):
+        super().__init__(dispatcher, user_db)
+        self.__profiler = profiler
+        self.__admin_ids = frozenset(str(admin_id) for admin_id in admin_ids)
+        self._dispatcher.add_handler(CommandHandler(Commands.PROFILE, self.__toggle_profiler))
+
+    @log_update(Commands.PROFILE)
+    def __toggle_profiler(self, update: Update, context: CallbackContext) -> None:
+        """ Starts the profiler, or stops it and tells where the profile was written. """
+        try:
+            msg, user, _ = get_message_meta(update)
+            if str(user.id) not in self.__admin_ids:
+                msg.reply_text("Only admins can use this command.")
+                return
+            path = self.__profiler.toggle()
+            if path is None:
+                msg.reply_text("Profiling started. Send /profile again to stop it.")
+            else:
+                msg.reply_text(f"Profile written to {path}.")
+        except Exception as e:
+            unexpected_error(e, logger)
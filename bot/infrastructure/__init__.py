@@ -10,5 +10,8 @@ external systems.
 
 Current adapters:
 - persistence.StickfixUserRepository: implements UserRepository port
+- persistence.StickfixUnitOfWork: implements UnitOfWork port
 - help.FileHelpContentProvider: implements HelpContentProvider port
+- help.CachedHelpContentProvider: implements HelpContentProvider port with in-memory caching
+- telegram.TelegramStickerSetProvider: implements StickerSetProvider port
 """
@@ -9,6 +9,7 @@ through the port contract.
 Runtime composition code is responsible for choosing and injecting the adapter used in production.
 """
 
+from .cached_help_content_provider import CachedHelpContentProvider
 from .file_help_content_provider import FileHelpContentProvider
 
-__all__ = ["FileHelpContentProvider"]
+__all__ = ["CachedHelpContentProvider", "FileHelpContentProvider"]
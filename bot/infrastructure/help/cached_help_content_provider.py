@@ -0,0 +1,100 @@
+"""In-memory help-content adapter with mtime-based invalidation.
+
+This adapter implements the HelpContentProvider port by loading the help file once and serving it
+from memory. Every empty inline query and every `/help` command asks for the help text, so reading
+the file each time would put a filesystem read on the most frequent request path.
+
+Freshness is preserved cheaply:
+- The file is re-validated with a single `stat` call, at most once per `revalidate_interval`
+- The content is re-read only when the file's modification time or size changed
+- If the file disappears after a successful load, the last known content keeps being served
+
+Telegram parse modes and article formatting remain the handler's responsibility.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from pathlib import Path
+from typing import Callable
+
+from bot.application.ports import HelpContentProvider
+from bot.utils.logger import StickfixLogger
+
+logger = StickfixLogger(__name__)
+
+
+class CachedHelpContentProvider(HelpContentProvider):
+    """Serve help text from memory and reload it when the file changes on disk.
+
+    Attributes:
+        _path: The filesystem path to read help text from.
+        _revalidate_interval: Minimum number of seconds between two `stat` calls.
+        _clock: Monotonic clock used to rate-limit revalidation.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        *,
+        revalidate_interval: float = 5.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Initialize with the path to the help file.
+
+        Args:
+            path: The filesystem path to read help text from. Must be readable with UTF-8 encoding.
+            revalidate_interval: Minimum number of seconds between two freshness checks.
+            clock: Monotonic time source, injectable for tests.
+
+        Raises:
+            FileNotFoundError: If the path does not exist (raised on first read, not during
+                initialization).
+        """
+        self._path = path
+        self._revalidate_interval = revalidate_interval
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._text: str | None = None
+        self._signature: tuple[int, int] | None = None
+        self._checked_at = 0.0
+
+    def get_help_text(self) -> str:
+        """Return the cached help text, reloading it if the file changed.
+
+        Returns:
+            The raw file content as a string.
+
+        Raises:
+            FileNotFoundError: If the configured file has never been readable.
+            UnicodeDecodeError: If the file is not valid UTF-8.
+        """
+        text = self._text
+        if text is not None and self._clock() - self._checked_at < self._revalidate_interval:
+            return text
+        with self._lock:
+            return self._revalidate()
+
+    def _revalidate(self) -> str:
+        now = self._clock()
+        if self._text is not None and now - self._checked_at < self._revalidate_interval:
+            return self._text
+        try:
+            stat = self._path.stat()
+        except FileNotFoundError:
+            if self._text is None:
+                raise
+            logger.warning("Help file %s disappeared; serving cached help text.", self._path)
+            self._checked_at = now
+            return self._text
+        signature = (stat.st_mtime_ns, stat.st_size)
+        if self._text is None or signature != self._signature:
+            self._text = self._read()
+            self._signature = signature
+            logger.debug("Loaded help text from %s.", self._path)
+        self._checked_at = now
+        return self._text
+
+    def _read(self) -> str:
+        return self._path.read_text(encoding="utf-8")
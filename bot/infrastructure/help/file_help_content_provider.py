@@ -5,7 +5,7 @@ UTF-8 file. It's the concrete implementation used by the application layer when
 loading help content during inline query resolution.
 
 The adapter is intentionally thin:
-- Reads the file on every call (no caching in this cycle)
+- Reads the file on every call (see CachedHelpContentProvider for the cached variant)
 - Preserves file content exactly (no Markdown parsing)
 - Delegates filesystem concerns to pathlib.Path
 
@@ -23,8 +23,8 @@ class FileHelpContentProvider(HelpContentProvider):
     """Load help text from a UTF-8 file on every call.
 
     This adapter reads the help file each time get_help_text() is called,
-    so changes to the file are reflected immediately. Caching is not included
-    in this implementation and may be added in a future cycle if needed.
+    so changes to the file are reflected immediately. Production wiring uses
+    CachedHelpContentProvider, which serves the same content from memory.
 
     Attributes:
         _path: The filesystem path to read help text from.
@@ -0,0 +1,49 @@
+"""UnitOfWork adapter backed by legacy StickfixDB storage.
+
+This adapter implements the UnitOfWork port for the YAML-backed store. Reads and writes made by a
+use case are staged by the generic buffered unit of work; on commit, the whole batch is handed to
+`StickfixDB.apply_batch`, which applies it under the store lock in one step.
+
+Architecture:
+    Use Cases ─(depend on)─> UnitOfWork (port)
+                                  ↓
+                         StickfixUnitOfWork (this adapter)
+                                  ↓
+                         StickfixDB.apply_batch (YAML storage)
+"""
+
+from __future__ import annotations
+
+from typing import Any
+
+from bot.application.unit_of_work import BufferedUnitOfWork
+from bot.database.storage import StickfixDB
+from bot.domain.user import StickfixUser
+
+from .stickfix_user_repository import StickfixUserRepository
+
+
+class StickfixUnitOfWork(BufferedUnitOfWork):
+    """Commit the writes of one use-case invocation to StickfixDB as a single batch.
+
+    Attributes:
+        _store: The StickfixDB instance receiving committed batches.
+    """
+
+    def __init__(self, store: StickfixDB) -> None:
+        """Initialize with a StickfixDB storage backend.
+
+        Args:
+            store: The StickfixDB instance to read from and commit batches to.
+        """
+        super().__init__(StickfixUserRepository(store))
+        self._store = store
+
+    def _apply(self, saved: dict[Any, StickfixUser], deleted: set[Any]) -> None:
+        """Apply the staged batch to StickfixDB in one locked update.
+
+        Args:
+            saved: Users saved during the unit of work, keyed by user id.
+            deleted: User ids deleted during the unit of work.
+        """
+        self._store.apply_batch(saved, deleted)
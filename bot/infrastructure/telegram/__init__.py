@@ -0,0 +1,21 @@
+"""Telegram Bot API infrastructure adapters.
+
+This package contains concrete implementations of application-layer ports that read data through
+the Telegram Bot API, keeping Telegram client objects out of application use cases, and the
+rate-limited sender handlers use to deliver sticker batches, and the opt-in recorder of sanitized
+updates.
+"""
+
+from .sticker_sender import SendJob, TelegramStickerSender, TokenBucket
+from .telegram_sticker_set_provider import TelegramStickerSetProvider
+from .update_recorder import UpdateRecorder, read_recording, sanitize_update
+
+__all__ = [
+    "SendJob",
+    "TelegramStickerSender",
+    "TelegramStickerSetProvider",
+    "TokenBucket",
+    "UpdateRecorder",
+    "read_recording",
+    "sanitize_update",
+]
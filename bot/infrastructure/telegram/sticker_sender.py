@@ -0,0 +1,329 @@
+"""Rate-limited background delivery of sticker batches through the Bot API.
+
+Telegram throttles bots globally (about thirty messages per second) and per chat (about one message
+per second, with short bursts tolerated), answering anything faster with ``RetryAfter``. Sending a
+batch inline from a handler therefore blocks a dispatcher worker for the whole batch. The sender in
+this module queues each batch as a job instead: every send first takes a token from the chat's
+bucket and from the global bucket, a scheduler thread waits for those tokens on a delay queue, a
+bounded pool of worker threads makes the due sends, and flood-control answers pause the offending
+chat for the time Telegram asks for.
+"""
+
+from __future__ import annotations
+
+import heapq
+import itertools
+import threading
+import time
+from collections import deque
+from collections.abc import Callable, Sequence
+from concurrent.futures import ThreadPoolExecutor
+
+from telegram import Bot
+from telegram.error import RetryAfter, TelegramError
+
+from bot.utils.logger import StickfixLogger
+
+logger = StickfixLogger(__name__)
+
+GLOBAL_RATE = 30.0
+CHAT_RATE = 1.0
+CHAT_BURST = 5
+MAX_WORKERS = 4
+MAX_RETRIES = 3
+
+
+class TokenBucket:
+    """Thread-safe token bucket that hands out reservations instead of blocking.
+
+    `reserve` always takes one token, letting the balance go negative, and returns how long the
+    caller must wait before using it. Reservations are therefore served in call order and waiting
+    happens outside the lock.
+    """
+
+    __slots__ = ("_capacity", "_clock", "_lock", "_rate", "_tokens", "_updated")
+
+    def __init__(
+        self, rate: float, capacity: float, clock: Callable[[], float] = time.monotonic
+    ) -> None:
+        self._rate = rate
+        self._capacity = capacity
+        self._clock = clock
+        self._tokens = float(capacity)
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Take one token, returning the seconds to wait before it may be used."""
+        with self._lock:
+            self._refill()
+            self._tokens -= 1
+            return max(0.0, -self._tokens / self._rate)
+
+    def pause(self, seconds: float) -> None:
+        """Withhold tokens for `seconds`, e.g. after a flood-control answer."""
+        with self._lock:
+            self._refill()
+            self._tokens = min(self._tokens, 0.0) - seconds * self._rate
+
+    @property
+    def idle(self) -> bool:
+        """Whether the bucket is full again, so forgetting it loses nothing."""
+        with self._lock:
+            self._refill()
+            return self._tokens >= self._capacity
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self._tokens = min(self._capacity, self._tokens + (now - self._updated) * self._rate)
+        self._updated = now
+
+
+class SendJob:
+    """Handle of one queued batch: tracks its progress and lets callers cancel it."""
+
+    def __init__(self, chat_id: int | str, sticker_ids: Sequence[str]) -> None:
+        self.chat_id = chat_id
+        self.sticker_ids = tuple(sticker_ids)
+        self.sent = 0
+        self._cancelled = threading.Event()
+        self._done = threading.Event()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    @property
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    def cancel(self) -> None:
+        """Stop sending; a send already in flight still completes."""
+        self._cancelled.set()
+
+    def wait(self, timeout: float | None = None) -> bool:
+        """Block until the job finishes, returning whether it did within `timeout`."""
+        return self._done.wait(timeout)
+
+    def finish(self) -> None:
+        self._done.set()
+
+
+class _ChatQueue:
+    """Jobs queued for one chat; only the first one is being delivered."""
+
+    __slots__ = ("attempts", "bucket", "chat_token", "closed", "global_token", "jobs", "position")
+
+    def __init__(self, bucket: TokenBucket) -> None:
+        self.bucket = bucket
+        self.jobs: deque[SendJob] = deque()
+        self.position = 0
+        self.attempts = 0
+        self.chat_token = False
+        self.global_token = False
+        self.closed = False
+
+
+class TelegramStickerSender:
+    """Deliver sticker batches in the background at the highest rate Telegram allows.
+
+    Each chat delivers one job at a time, in submission order, so batches for the same chat never
+    interleave. A scheduler thread keeps a delay queue of the chats waiting for a token and hands
+    each due send to a pool of at most `max_workers` threads, which only make the API call: waiting
+    never holds a worker, so one large batch cannot block other chats and all chats together can
+    use the whole global rate. A chat's bucket outlives its jobs until it refills, so back-to-back
+    batches cannot reset the chat's rate, and is dropped afterwards, so memory stays proportional
+    to the chats served recently.
+    """
+
+    def __init__(
+        self,
+        bot: Bot,
+        *,
+        max_workers: int = MAX_WORKERS,
+        global_rate: float = GLOBAL_RATE,
+        chat_rate: float = CHAT_RATE,
+        chat_burst: int = CHAT_BURST,
+        max_retries: int = MAX_RETRIES,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._bot = bot
+        self._max_workers = max_workers
+        self._chat_rate = chat_rate
+        self._chat_burst = chat_burst
+        self._max_retries = max_retries
+        self._clock = clock
+        self._global_bucket = TokenBucket(global_rate, global_rate, clock)
+        self._chat_buckets: dict[int | str, TokenBucket] = {}
+        self._chats: dict[int | str, _ChatQueue] = {}
+        self._due: list[tuple[float, int, _ChatQueue]] = []
+        self._sequence = itertools.count()
+        self._jobs: set[SendJob] = set()
+        self._in_flight: set[SendJob] = set()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._executor: ThreadPoolExecutor | None = None
+        self._scheduler: threading.Thread | None = None
+
+    def submit(self, chat_id: int | str, sticker_ids: Sequence[str]) -> SendJob:
+        """Queue `sticker_ids` for delivery to `chat_id` and return immediately."""
+        job = SendJob(chat_id, sticker_ids)
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    self._max_workers, thread_name_prefix="sticker-sender"
+                )
+                self._scheduler = threading.Thread(
+                    target=self._schedule,
+                    args=(self._executor,),
+                    name="sticker-scheduler",
+                    daemon=True,
+                )
+                self._scheduler.start()
+            self._forget_idle_chats()
+            self._jobs.add(job)
+            chat = self._chats.get(chat_id)
+            if chat is None:
+                chat_bucket = self._chat_buckets.get(chat_id)
+                if chat_bucket is None:
+                    chat_bucket = self._chat_buckets[chat_id] = TokenBucket(
+                        self._chat_rate, self._chat_burst, self._clock
+                    )
+                chat = self._chats[chat_id] = _ChatQueue(chat_bucket)
+                self._schedule_at(chat, self._clock())
+            chat.jobs.append(job)
+        return job
+
+    @property
+    def pending_stickers(self) -> int:
+        """Number of stickers queued or in flight that were not sent yet."""
+        with self._lock:
+            return sum(len(job.sticker_ids) - job.sent for job in self._jobs)
+
+    def drain(self, timeout: float | None = None) -> bool:
+        """Wait until every job submitted so far is done, returning whether all finished in time."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._lock:
+            jobs = list(self._jobs)
+        for job in jobs:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            if not job.wait(remaining):
+                return False
+        return True
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Cancel every pending job and stop the scheduler and the worker threads.
+
+        Queued jobs finish at once; a send already in flight completes first.
+        """
+        with self._lock:
+            for chat in self._chats.values():
+                chat.closed = True
+            self._chats.clear()
+            self._due.clear()
+            for job in list(self._jobs):
+                job.cancel()
+                if job not in self._in_flight:
+                    self._finish(job)
+            executor, self._executor = self._executor, None
+            scheduler, self._scheduler = self._scheduler, None
+            self._wakeup.notify_all()
+        if scheduler is not None and wait:
+            scheduler.join()
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+    def _forget_idle_chats(self) -> None:
+        idle = [
+            chat_id
+            for chat_id, bucket in self._chat_buckets.items()
+            if chat_id not in self._chats and bucket.idle
+        ]
+        for chat_id in idle:
+            del self._chat_buckets[chat_id]
+
+    def _schedule_at(self, chat: _ChatQueue, due: float) -> None:
+        heapq.heappush(self._due, (due, next(self._sequence), chat))
+        self._wakeup.notify()
+
+    def _schedule(self, executor: ThreadPoolExecutor) -> None:
+        with self._lock:
+            while self._executor is executor:
+                if not self._due:
+                    self._wakeup.wait()
+                    continue
+                now = self._clock()
+                due, _, chat = self._due[0]
+                if due > now:
+                    self._wakeup.wait(due - now)
+                    continue
+                heapq.heappop(self._due)
+                self._advance(chat, now, executor)
+
+    def _advance(self, chat: _ChatQueue, now: float, executor: ThreadPoolExecutor) -> None:
+        """Move the chat's first job one step: finish it, take its tokens or start its send."""
+        job = chat.jobs[0]
+        if job.cancelled or chat.position >= len(job.sticker_ids):
+            chat.jobs.popleft()
+            chat.position = chat.attempts = 0
+            self._finish(job)
+            if chat.jobs:
+                self._schedule_at(chat, now)
+            else:
+                del self._chats[job.chat_id]
+            return
+        if not chat.chat_token:
+            chat.chat_token = True
+            delay = chat.bucket.reserve()
+            if delay > 0:
+                self._schedule_at(chat, now + delay)
+                return
+        if not chat.global_token:
+            chat.global_token = True
+            delay = self._global_bucket.reserve()
+            if delay > 0:
+                self._schedule_at(chat, now + delay)
+                return
+        chat.chat_token = chat.global_token = False
+        self._in_flight.add(job)
+        executor.submit(self._send, chat, job, job.sticker_ids[chat.position])
+
+    def _send(self, chat: _ChatQueue, job: SendJob, sticker_id: str) -> None:
+        retry = failed = False
+        try:
+            self._bot.send_sticker(job.chat_id, sticker_id)
+            job.sent += 1
+        except RetryAfter as error:
+            logger.info(
+                "Flood control for chat %s, retrying in %ss", job.chat_id, error.retry_after
+            )
+            chat.bucket.pause(error.retry_after)
+            retry = True
+        except TelegramError as error:
+            logger.error("Couldn't send sticker %s to %s: %s", sticker_id, job.chat_id, error)
+        except Exception as error:  # noqa: BLE001
+            logger.error("Unexpected error while sending stickers to %s: %s", job.chat_id, error)
+            failed = True
+        with self._lock:
+            self._in_flight.discard(job)
+            if chat.closed:
+                self._finish(job)
+                return
+            if failed:
+                chat.position = len(job.sticker_ids)
+            elif retry and chat.attempts < self._max_retries:
+                chat.attempts += 1
+            else:
+                if retry:
+                    logger.error(
+                        "Gave up sending sticker %s to %s after flood control",
+                        sticker_id,
+                        job.chat_id,
+                    )
+                chat.position += 1
+                chat.attempts = 0
+            self._schedule_at(chat, self._clock())
+
+    def _finish(self, job: SendJob) -> None:
+        self._jobs.discard(job)
+        job.finish()
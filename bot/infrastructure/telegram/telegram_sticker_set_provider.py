@@ -0,0 +1,26 @@
+"""Bot API adapter for the `StickerSetProvider` port."""
+
+from __future__ import annotations
+
+from telegram import Bot
+from telegram.error import BadRequest
+
+from bot.application.errors import StickerSetNotFoundError
+from bot.application.ports import StickerSetItem
+
+
+class TelegramStickerSetProvider:
+    """Fetch sticker sets with the Bot API ``getStickerSet`` method."""
+
+    def __init__(self, bot: Bot) -> None:
+        self._bot = bot
+
+    def get_sticker_set(self, name: str) -> tuple[StickerSetItem, ...]:
+        try:
+            sticker_set = self._bot.get_sticker_set(name)
+        except BadRequest as error:
+            raise StickerSetNotFoundError(f"Sticker set {name!r} was not found.") from error
+        return tuple(
+            StickerSetItem(file_id=sticker.file_id, emoji=sticker.emoji)
+            for sticker in sticker_set.stickers
+        )
@@ -0,0 +1,221 @@
+"""Opt-in recording of incoming updates, sanitized, for replaying real traffic locally.
+
+The recorder sits in the dispatcher path as a handler of its own group, so it sees every update
+before the regular handlers and never changes how they run. The dispatcher only timestamps and
+queues the update; a background thread sanitizes it and writes it as one compact JSON line,
+``{"t": <unix time>, "update": <Bot API payload>}``, to a file that is only ever appended to. The
+file is flushed at most once per `FLUSH_INTERVAL` and on `UpdateRecorder.close`, so a ``.gz``
+suffix compresses whole batches rather than single lines.
+
+Recordings keep what drives the bot's work — commands, inline query text, sticker file ids — and
+drop who sent it: user and chat objects, wherever they are nested, are reduced to a pseudonymous id
+(plus the flags and chat type handlers look at), and names, usernames, bios and phone numbers are
+not written. Pseudonyms are keyed hashes; the key is random per recorder unless one is given, so
+ids cannot be recovered by hashing every possible Telegram id, while the same user keeps the same
+pseudonym throughout a recording.
+"""
+
+from __future__ import annotations
+
+import gzip
+import json
+import os
+import threading
+import time
+from collections.abc import Callable, Iterator
+from hashlib import blake2b
+from pathlib import Path
+from queue import Empty, SimpleQueue
+from typing import IO, Any
+
+from telegram import Update
+from telegram.ext import CallbackContext, Dispatcher, TypeHandler
+
+from bot.utils.logger import StickfixLogger
+
+logger = StickfixLogger(__name__)
+
+RECORDER_GROUP = -1
+FLUSH_INTERVAL = 1.0
+USER_KEYS = frozenset(
+    {
+        "from",
+        "user",
+        "forward_from",
+        "via_bot",
+        "left_chat_member",
+        "creator",
+        "traveler",
+        "watcher",
+    }
+)
+USER_LIST_KEYS = frozenset({"new_chat_members", "users"})
+CHAT_KEYS = frozenset({"chat", "sender_chat", "forward_from_chat"})
+PRIVATE_KEYS = frozenset(
+    {"contact", "location", "venue", "author_signature", "forward_signature", "bio"}
+)
+
+Payload = dict[str, Any]
+_Entry = tuple[float, Payload]
+
+
+class UpdateRecorder:
+    """Append a sanitized copy of every update the dispatcher receives to `path`.
+
+    Updates are written by a background thread; call `close` to write what is still queued.
+    """
+
+    def __init__(
+        self,
+        path: str | os.PathLike[str],
+        key: bytes | None = None,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self._path = Path(path)
+        self._key = key or os.urandom(16)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: SimpleQueue[_Entry | None] = SimpleQueue()
+        self._writer: threading.Thread | None = None
+
+    @property
+    def path(self) -> Path:
+        return self._path
+
+    def attach(self, dispatcher: Dispatcher) -> None:
+        """Record every update `dispatcher` processes, ahead of the regular handlers."""
+        dispatcher.add_handler(TypeHandler(Update, self.__on_update), RECORDER_GROUP)
+        logger.info("Recording sanitized updates to %s", self._path)
+
+    def record(self, payload: Payload) -> None:
+        """Queue one update payload, to be sanitized and appended by the writer thread."""
+        entry = (round(self._clock(), 3), payload)
+        with self._lock:
+            if self._writer is None:
+                self._entries = SimpleQueue()
+                self._writer = threading.Thread(
+                    target=self._write_until_closed,
+                    args=(self._entries,),
+                    name="update-recorder",
+                    daemon=True,
+                )
+                self._writer.start()
+            self._entries.put(entry)
+
+    def pseudonym(self, telegram_id: int) -> int:
+        """Map a user or chat id to a stable 48-bit pseudonym, keeping the sign of chat ids."""
+        digest = blake2b(str(abs(telegram_id)).encode(), key=self._key, digest_size=6).digest()
+        pseudonym = int.from_bytes(digest, "big") or 1
+        return -pseudonym if telegram_id < 0 else pseudonym
+
+    def close(self) -> None:
+        """Write every queued update and close the file."""
+        with self._lock:
+            writer, self._writer = self._writer, None
+            if writer is None:
+                return
+            self._entries.put(None)
+        writer.join()
+
+    def _write_until_closed(self, entries: SimpleQueue[_Entry | None]) -> None:
+        closed = False
+        try:
+            with _open(self._path, "a") as handle:
+                self._write_entries(entries, handle)
+                closed = True
+        except OSError as error:
+            logger.error("Couldn't record updates to %s: %s", self._path, error)
+            while not closed:
+                closed = entries.get() is None
+
+    def _write_entries(self, entries: SimpleQueue[_Entry | None], handle: IO[str]) -> None:
+        flushed = time.monotonic()
+        unflushed = False
+        while True:
+            try:
+                entry = entries.get(timeout=FLUSH_INTERVAL)
+            except Empty:
+                if unflushed:
+                    handle.flush()
+                    flushed, unflushed = time.monotonic(), False
+                continue
+            if entry is None:
+                return
+            timestamp, payload = entry
+            try:
+                record = {"t": timestamp, "update": sanitize_update(payload, self.pseudonym)}
+                line = json.dumps(record, ensure_ascii=False, separators=(",", ":"))
+            except (KeyError, TypeError, ValueError) as error:
+                logger.error("Couldn't record update %s: %s", payload.get("update_id"), error)
+                continue
+            handle.write(line + "\n")
+            unflushed = True
+            if time.monotonic() - flushed >= FLUSH_INTERVAL:
+                handle.flush()
+                flushed, unflushed = time.monotonic(), False
+
+    def __on_update(self, update: Update, _context: CallbackContext) -> None:
+        try:
+            self.record(update.to_dict())
+        except (TypeError, ValueError) as error:
+            logger.error("Couldn't record update %s: %s", update.update_id, error)
+
+
+def sanitize_update(payload: Payload, pseudonym: Callable[[int], int]) -> Payload:
+    """Return a copy of `payload` without personal data, with ids replaced by `pseudonym`."""
+    return _sanitize(payload, pseudonym)
+
+
+def read_recording(path: str | os.PathLike[str]) -> Iterator[tuple[float, Payload]]:
+    """Yield the ``(time, update payload)`` entries of a recording, in order.
+
+    A last line cut short by a crash while it was being written is skipped.
+    """
+    with _open(Path(path), "r") as handle:
+        try:
+            for line in handle:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    logger.warning("Skipping a truncated entry in %s", path)
+                    continue
+                yield entry["t"], entry["update"]
+        except EOFError:
+            logger.warning("%s ends with a truncated block", path)
+
+
+def _sanitize(value: Any, pseudonym: Callable[[int], int]) -> Any:
+    if isinstance(value, list):
+        return [_sanitize(item, pseudonym) for item in value]
+    if not isinstance(value, dict):
+        return value
+    sanitized: Payload = {}
+    for key, item in value.items():
+        if key in PRIVATE_KEYS:
+            continue
+        if isinstance(item, dict) and (key in USER_KEYS or _is_user(item)):
+            sanitized[key] = _user(item, pseudonym)
+        elif key in USER_LIST_KEYS and isinstance(item, list):
+            sanitized[key] = [_user(user, pseudonym) for user in item]
+        elif key in CHAT_KEYS and isinstance(item, dict):
+            sanitized[key] = {"id": pseudonym(item["id"]), "type": item.get("type", "private")}
+        else:
+            sanitized[key] = _sanitize(item, pseudonym)
+    return sanitized
+
+
+def _is_user(value: Payload) -> bool:
+    """Whether `value` has the shape of a Bot API ``User``, whatever key it is nested under."""
+    return "id" in value and "is_bot" in value and "first_name" in value
+
+
+def _user(user: Payload, pseudonym: Callable[[int], int]) -> Payload:
+    return {"id": pseudonym(user["id"]), "is_bot": user.get("is_bot", False), "first_name": "user"}
+
+
+def _open(path: Path, mode: str) -> IO[str]:
+    if mode == "a":
+        path.parent.mkdir(parents=True, exist_ok=True)
+    if path.suffix == ".gz":
+        return gzip.open(path, f"{mode}t", encoding="utf-8")
+    return path.open(mode, encoding="utf-8")
@@ -1,17 +1,39 @@
 """Stickfix bot bootstrap: builds the Telegram updater, wires handlers, and runs
 the bot through long polling (never PTB's Tornado webhook server)."""
 
+import os
+import signal
+import threading
+import time
+from collections.abc import Collection
+from dataclasses import dataclass
+from pathlib import Path
 from typing import Any, Final, cast
 
 from telegram.ext import CallbackContext, Dispatcher, JobQueue, Updater
 
+from bot.config import StickfixConfig
+from bot.database.flush_policy import FlushPolicy, StoreFlusher
 from bot.database.storage import StickfixDB
+from bot.handlers.common import HELP_PATH
 from bot.handlers.inline import InlineHandler
 from bot.handlers.stickers import StickerHandler
-from bot.handlers.utility import HelperHandler, UserHandler
+from bot.handlers.utility import HelperHandler, ProfilerHandler, UserHandler
+from bot.infrastructure.help import CachedHelpContentProvider
+from bot.infrastructure.telegram import TelegramStickerSender, UpdateRecorder
 from bot.utils.logger import StickfixLogger
+from bot.utils.metrics import METRICS, metrics_path
+from bot.utils.profiler import SamplingProfiler, install_signal_toggle
 
 USERS_DB: Final[str] = "users"
+METRICS_INTERVAL: Final[int] = 60
+FLUSH_CHECK_INTERVAL: Final[int] = 1
+# Packs with at least this many tags get their indexes built at startup instead of on first use.
+INDEXED_PACK_MIN_TAGS: Final[int] = 1_000
+SHUTDOWN_TIMEOUT: Final[float] = 30.0
+SHUTDOWN_SIGNALS: Final = (signal.SIGINT, signal.SIGTERM)
+SHUTDOWN_LATENCY: Final[str] = "stickfix_shutdown_seconds"
+METRICS.describe(SHUTDOWN_LATENCY, "Time from a stop request until the bot stopped.")
 
 DataDict = dict[str, Any]
 CallbackCtx = CallbackContext[DataDict, DataDict, DataDict]
@@ -32,6 +54,87 @@ def start_polling_service(
     updater.start_polling()  # pyright: ignore[reportUnknownMemberType]
 
 
+def register_handlers(
+    dispatcher: Dispatcher,
+    user_db: StickfixDB,
+    profiler: SamplingProfiler,
+    admin_ids: Collection[str] = (),
+    sticker_sender: TelegramStickerSender | None = None,
+) -> None:
+    """Registers every Stickfix handler on `dispatcher`.
+
+    Kept outside `Stickfix` so the benchmarks drive exactly the handlers the bot runs.
+    """
+    help_content = CachedHelpContentProvider(Path(HELP_PATH))
+    HelperHandler(dispatcher, user_db, help_content=help_content)
+    UserHandler(dispatcher, user_db)
+    StickerHandler(dispatcher, user_db, admin_ids=admin_ids, sticker_sender=sticker_sender)
+    InlineHandler(dispatcher, user_db, help_content=help_content)
+    ProfilerHandler(dispatcher, user_db, profiler, admin_ids=admin_ids)
+
+
+def build_indexes(user_db: StickfixDB, min_tags: int) -> int:
+    """Builds the derived tag indexes of every pack holding at least `min_tags` tags.
+
+    Returns how many packs were indexed.
+    """
+    indexed = 0
+    for user_id in list(user_db.get_keys()):
+        user = user_db.get(user_id)
+        if user is not None and len(user.stickers) >= min_tags:
+            user.build_indexes()
+            indexed += 1
+    return indexed
+
+
+@dataclass(frozen=True, slots=True)
+class ShutdownReport:
+    """What `Stickfix.stop` managed to finish before its deadline.
+
+    `saved` tells whether unsaved changes were written once every received update was handled; a
+    save that raced handlers still running at the deadline is partial and reported as false.
+    """
+
+    seconds: float
+    drained: bool
+    saved: bool
+    unsent_stickers: int
+
+
+class _UpdaterStopper:
+    """Stops an updater on its own thread, since PTB's `Updater.stop` waits for the received
+    updates to be handled without a limit.
+
+    If the caller abandons the wait before the updates are handled, the thread saves the database
+    itself once they are, so their writes are not lost.
+    """
+
+    def __init__(self, updater: Updater, flusher: StoreFlusher) -> None:
+        self.__updater = updater
+        self.__flusher = flusher
+        self.__lock = threading.Lock()
+        self.__handled = False
+        self.__abandoned = False
+        self.__thread = threading.Thread(target=self.__stop, name="stickfix-stop", daemon=True)
+        self.__thread.start()
+
+    def join(self, timeout: float, abandon: bool = False) -> bool:
+        """Waits up to `timeout` seconds, returning whether the updates were handled; with
+        `abandon`, leaves saving late writes to the stopping thread if they were not."""
+        self.__thread.join(timeout)
+        with self.__lock:
+            self.__abandoned = abandon and not self.__handled
+            return self.__handled
+
+    def __stop(self) -> None:
+        self.__updater.stop()
+        with self.__lock:
+            self.__handled = True
+            abandoned = self.__abandoned
+        if abandoned:
+            self.__flusher.flush()
+
+
 class Stickfix:
     """Base class for @stickfixbot.
     This class implements functions to help manage and store stickers in telegram using chat
@@ -42,13 +145,38 @@ class Stickfix:
     __dispatcher: Dispatcher[CallbackCtx, DataDict, DataDict, DataDict]
     __logger: StickfixLogger
     __user_db: StickfixDB
+    __flusher: StoreFlusher
+    __profiler: SamplingProfiler
+    __sticker_sender: TelegramStickerSender
+    __recorder: UpdateRecorder | None
+    __stop_requested: threading.Event
+    __stop_lock: threading.Lock
+    __report: ShutdownReport | None
 
-    def __init__(self, token: str):
+    def __init__(
+        self,
+        token: str,
+        admin_ids: Collection[str] = (),
+        record_updates: str | os.PathLike[str] | None = None,
+        flush_policy: FlushPolicy | None = None,
+    ):
         """Initializes the bot.
 
         :param token:
             the bot's telegram token
+        :param admin_ids:
+            ids of the users allowed to edit the tags of the public pack and to run the profiler,
+            which can also be toggled by sending ``SIGUSR2`` to the process
+        :param record_updates:
+            file to append sanitized copies of the incoming updates to, for
+            ``benchmarks.replay``; nothing is recorded when omitted
+        :param flush_policy:
+            when to save the user database; checked every second, and the database is saved on
+            `stop` regardless
         """
+        self.__stop_requested = threading.Event()
+        self.__stop_lock = threading.Lock()
+        self.__report = None
         self.__logger = StickfixLogger(__name__)
         self.__start_updater(token)
         self.__dispatcher = cast(
@@ -56,26 +184,135 @@ class Stickfix:
             self.__updater.dispatcher,  # pyright: ignore[reportUnknownMemberType]
         )
         self.__user_db = StickfixDB(USERS_DB)
-        self.__setup_handlers()
+        self.__flusher = StoreFlusher(self.__user_db, flush_policy)
+        self.__profiler = SamplingProfiler()
+        install_signal_toggle(self.__profiler)
+        self.__sticker_sender = TelegramStickerSender(self.__dispatcher.bot)
+        register_handlers(
+            self.__dispatcher,
+            self.__user_db,
+            self.__profiler,
+            admin_ids,
+            sticker_sender=self.__sticker_sender,
+        )
+        self.__recorder = None
+        if record_updates is not None:
+            self.__recorder = UpdateRecorder(record_updates)
+            self.__recorder.attach(self.__dispatcher)
         job_queue = cast(JobQueue, self.__updater.job_queue)  # pyright: ignore[reportUnknownMemberType]
+        job_queue.run_once(self.__build_indexes, 0)  # pyright: ignore[reportUnknownMemberType]
+        job_queue.run_repeating(  # pyright: ignore[reportUnknownMemberType]
+            self.__flush_db, interval=FLUSH_CHECK_INTERVAL, first=FLUSH_CHECK_INTERVAL
+        )
         job_queue.run_repeating(  # pyright: ignore[reportUnknownMemberType]
-            self.__save_db, interval=5 * 60, first=0
+            self.__dump_metrics, interval=METRICS_INTERVAL, first=METRICS_INTERVAL
+        )
+
+    @classmethod
+    def from_config(cls, config: StickfixConfig) -> "Stickfix":
+        """Builds the bot from a `StickfixConfig`, usually the one `load_config` reads from the
+        environment, so its admins, update recording and flush policy all take effect."""
+        return cls(
+            config.token,
+            admin_ids=config.admin_ids,
+            record_updates=config.record_updates,
+            flush_policy=config.flush_policy,
         )
 
     def run(self) -> None:
         """Runs the bot."""
         start_polling_service(self.__updater, self.__logger)
 
+    def run_until_stopped(self, timeout: float = SHUTDOWN_TIMEOUT) -> ShutdownReport:
+        """Runs the bot until `request_stop` is called or the process gets ``SIGINT`` or
+        ``SIGTERM``, then stops it within `timeout` seconds."""
+        self.run()
+        previous = self.__install_shutdown_signals()
+        try:
+            while not self.__stop_requested.wait(1.0):
+                pass
+        finally:
+            for signum, handler in previous.items():
+                signal.signal(signum, handler)
+        return self.stop(timeout)
+
+    def request_stop(self) -> None:
+        """Asks `run_until_stopped` to stop the bot; safe to call from a signal handler."""
+        self.__stop_requested.set()
+
+    def stop(self, timeout: float = SHUTDOWN_TIMEOUT) -> ShutdownReport:
+        """Stops the bot, giving up on whatever is still running after `timeout` seconds.
+
+        Polling stops first and the updates already received are handled, then the database is
+        saved, the queued sticker batches are delivered and the metrics are written. Saving always
+        happens, even once the deadline passed; if updates were still being handled then, the
+        database is saved again as soon as they finish. Sticker batches are sent at the per-chat
+        rate of about one sticker per second, so a batch with more stickers left than seconds in
+        the budget is cut short and counted as unsent. Calling it again returns the first report.
+        """
+        with self.__stop_lock:
+            if self.__report is None:
+                self.__report = self.__shut_down(timeout)
+            return self.__report
+
+    def __shut_down(self, timeout: float) -> ShutdownReport:
+        self.__logger.info("Stopping bot")
+        started = time.monotonic()
+        deadline = started + timeout
+        stopper = _UpdaterStopper(self.__updater, self.__flusher)
+        drained = stopper.join(timeout)
+        if not drained:
+            self.__logger.warning("Updates were still being handled after %.1f s", timeout)
+        saved = self.__flusher.flush()
+        if not self.__sticker_sender.drain(max(0.0, deadline - time.monotonic())):
+            self.__logger.warning("Sticker batches were still being sent when the time ran out")
+        unsent = self.__sticker_sender.pending_stickers
+        if not drained:
+            if stopper.join(max(0.0, deadline - time.monotonic()), abandon=True):
+                saved = self.__flusher.flush() or saved
+            else:
+                saved = False
+                self.__logger.warning("Saved while updates were still being handled")
+        self.__sticker_sender.shutdown(wait=False)
+        if self.__recorder is not None:
+            self.__recorder.close()
+        seconds = time.monotonic() - started
+        METRICS.histogram(SHUTDOWN_LATENCY).record(seconds)
+        METRICS.write(metrics_path())
+        self.__logger.info(
+            "Stopped in %.2f s (updates drained: %s, database saved: %s, unsent stickers: %d)",
+            seconds,
+            drained,
+            saved,
+            unsent,
+        )
+        return ShutdownReport(seconds, drained, saved, unsent)
+
+    def __install_shutdown_signals(self) -> dict[int, Any]:
+        """Makes ``SIGINT`` and ``SIGTERM`` request a stop, returning the handlers they replace.
+
+        Signals can only be handled from the main thread, so nothing is installed elsewhere.
+        """
+        if threading.current_thread() is not threading.main_thread():
+            return {}
+        previous = {}
+        for signum in SHUTDOWN_SIGNALS:
+            previous[signum] = signal.signal(signum, lambda _signum, _frame: self.request_stop())
+        return previous
+
     def __start_updater(self, token: str) -> None:
         """Starts the bot's updater with the given token."""
         self.__logger.info("Starting bot updater")
         self.__updater = Updater(token, use_context=True)
 
-    def __save_db(self, _context: CallbackCtx) -> None:
-        self.__user_db.save()
+    def __build_indexes(self, _context: CallbackCtx) -> None:
+        """Builds the tag indexes of large packs in the background; the fuzzy index of a pack with
+        tens of thousands of tags takes about a second, too long for the first query to wait."""
+        build_indexes(self.__user_db, INDEXED_PACK_MIN_TAGS)
+
+    def __flush_db(self, _context: CallbackCtx) -> None:
+        self.__flusher.tick()
 
-    def __setup_handlers(self) -> None:
-        HelperHandler(self.__dispatcher, self.__user_db)
-        UserHandler(self.__dispatcher, self.__user_db)
-        StickerHandler(self.__dispatcher, self.__user_db)
-        InlineHandler(self.__dispatcher, self.__user_db)
+    def __dump_metrics(self, _context: CallbackCtx) -> None:
+        """Writes the metrics snapshot to a local file; Stickfix never serves it over HTTP."""
+        METRICS.write(metrics_path())
@@ -58,5 +58,5 @@ class Databasexception(StickfixException):
 def unexpected_error(e: Exception, a_logger: StickfixLogger):
     """ Logs an unhandled exception.    """
     a_logger.critical("Unexpected error")
-    a_logger.critical(str(type(e)))
-    a_logger.critical(str(e.args))
+    a_logger.critical("%s", type(e))
+    a_logger.critical("%s", e.args)
@@ -1,15 +1,41 @@
+"""Logging facade for Stickfix modules.
+
+Every Stickfix logger sharing a `LoggerConfig` is routed through one `QueueHandler`: emitting a
+record only enqueues it, and a single background `QueueListener` per configuration owns the console
+and rotating file handlers. Calling threads never block on disk I/O, and each log file has exactly
+one writer, so rotation cannot race.
+
+Messages use ``%``-style placeholders rather than f-strings, so arguments are only formatted for
+records that pass the logger's level, and then by the listener thread. Arguments that are
+expensive to compute can be wrapped in `Lazy`, and key/value context can be attached as ``fields``
+for structured output.
+
+With ``structured=True`` the log file holds one JSON object per record instead of text lines.
+Handler entry points open an `update_context`, and every record logged while it is active carries
+the update id, user id and command, plus the milliseconds elapsed since the update started.
+"""
+
 from __future__ import annotations
 
+import atexit
+import json
 import logging
 import os
+import queue
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
 from dataclasses import dataclass
-from logging.handlers import RotatingFileHandler
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from pathlib import Path
-from typing import Any
+from typing import Any, Callable, Mapping
 
 DEFAULT_LOG_PATH = Path("logs") / "stickfix.log"
 LOG_PATH_ENVVAR = "STICKFIX_LOG_PATH"
 DISABLE_FILE_LOGGING_ENVVAR = "STICKFIX_DISABLE_FILE_LOGGING"
+LOG_FORMAT_ENVVAR = "STICKFIX_LOG_FORMAT"
 
 
 @dataclass(frozen=True)
@@ -22,34 +48,247 @@ class LoggerConfig:
     backup_count: int = 2
     console_format: str = "%(levelname)s:%(name)s:%(message)s"
     file_format: str = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+    structured: bool = False
+    static_fields: tuple[tuple[str, str], ...] = ()
+
+
+@dataclass(frozen=True, slots=True)
+class UpdateContext:
+    """Identity of the Telegram update being handled, shared by every record it logs."""
+
+    command: str
+    update_id: int | None = None
+    user_id: int | str | None = None
+    started: float = 0.0
+
+
+_current_update: ContextVar[UpdateContext | None] = ContextVar("stickfix_update", default=None)
+
+
+@contextmanager
+def update_context(
+    command: str, update_id: int | None = None, user_id: int | str | None = None
+) -> Iterator[UpdateContext]:
+    """Tag every record logged inside the block with one update's identity."""
+    context = UpdateContext(command, update_id, user_id, time.time())
+    token = _current_update.set(context)
+    try:
+        yield context
+    finally:
+        _current_update.reset(token)
+
+
+class _UpdateContextFilter(logging.Filter):
+    """Stamp records with the active `UpdateContext` on the thread that logs them."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.update = _current_update.get()
+        return True
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """Format each record as one JSON object on a single line.
+
+    Static fields are encoded once, when the formatter is built, and spliced into every line; each
+    record only builds the small mapping of its own values.
+    """
+
+    def __init__(self, static_fields: Mapping[str, Any] | None = None) -> None:
+        super().__init__()
+        encoded = json.dumps(dict(static_fields or {}), ensure_ascii=False)[1:-1]
+        self._prefix = "{" + (f"{encoded}, " if encoded else "")
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: dict[str, Any] = {
+            "time": record.created,
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        update: UpdateContext | None = getattr(record, "update", None)
+        if update is not None:
+            entry["command"] = update.command
+            entry["update_id"] = update.update_id
+            entry["user_id"] = update.user_id
+            entry["elapsed_ms"] = round((record.created - update.started) * 1000, 3)
+        fields = getattr(record, "fields", None)
+        if fields:
+            entry.update(fields)
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        if record.stack_info:
+            entry["stack"] = self.formatStack(record.stack_info)
+        return self._prefix + json.dumps(entry, ensure_ascii=False, default=str)[1:]
+
+
+class Lazy:
+    """Log argument computed only when a record using it is formatted.
+
+    ``logger.debug("Received %s", Lazy(json.dumps, payload, indent=2))`` never serializes
+    `payload` unless DEBUG records are emitted.
+    """
+
+    __slots__ = ("_args", "_function", "_kwargs", "_value")
+
+    _PENDING: Any = object()
+
+    def __init__(self, function: Callable[..., Any], *args: Any, **kwargs: Any) -> None:
+        self._function = function
+        self._args = args
+        self._kwargs = kwargs
+        self._value = Lazy._PENDING
+
+    def __str__(self) -> str:
+        return str(self.value)
+
+    def __repr__(self) -> str:
+        return repr(self.value)
+
+    @property
+    def value(self) -> Any:
+        """The computed argument; several handlers formatting one record share one computation."""
+        if self._value is Lazy._PENDING:
+            self._value = self._function(*self._args, **self._kwargs)
+        return self._value
+
+
+class _RecordQueueHandler(QueueHandler):
+    """`QueueHandler` that leaves all formatting to the listener thread.
+
+    The stock handler renders the message and traceback on the calling thread, folding the
+    traceback into the message; here records are queued as logged, so `Lazy` arguments and
+    tracebacks are only rendered by the listener, for the outputs whose level they pass. Arguments
+    must therefore not be mutated after they are logged.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+class _LogPipeline:
+    """Queue, listener thread and output handlers shared by every logger of one configuration."""
+
+    def __init__(self, config: LoggerConfig) -> None:
+        self.handler = _RecordQueueHandler(queue.SimpleQueue())
+        self.handler.addFilter(_UpdateContextFilter())
+        self.__loggers: list[logging.Logger] = []
+        console = logging.StreamHandler()
+        console.setLevel(config.console_level)
+        console.setFormatter(logging.Formatter(config.console_format))
+        self.outputs: list[logging.Handler] = [console]
+        if config.log_path is not None:
+            config.log_path.parent.mkdir(parents=True, exist_ok=True)
+            file_logger = RotatingFileHandler(
+                filename=config.log_path,
+                encoding="utf-8",
+                maxBytes=config.max_bytes,
+                backupCount=config.backup_count,
+            )
+            file_logger.setLevel(config.file_level)
+            file_logger.setFormatter(
+                JsonLinesFormatter(dict(config.static_fields))
+                if config.structured
+                else logging.Formatter(config.file_format)
+            )
+            self.outputs.append(file_logger)
+        self.__listener = QueueListener(
+            self.handler.queue, *self.outputs, respect_handler_level=True
+        )
+        self.__listener.start()
+
+    def attach(self, logger: logging.Logger) -> None:
+        if not any(isinstance(handler, QueueHandler) for handler in logger.handlers):
+            logger.addHandler(self.handler)
+            self.__loggers.append(logger)
+
+    def close(self) -> None:
+        """Detach from every logger, write out the queued records and close the outputs."""
+        for logger in self.__loggers:
+            logger.removeHandler(self.handler)
+        self.__listener.stop()
+        for handler in self.outputs:
+            handler.close()
+
+
+_pipelines: dict[LoggerConfig, _LogPipeline] = {}
+_pipelines_lock = threading.Lock()
+
+
+def _pipeline_for(config: LoggerConfig) -> _LogPipeline:
+    with _pipelines_lock:
+        pipeline = _pipelines.get(config)
+        if pipeline is None:
+            pipeline = _pipelines[config] = _LogPipeline(config)
+        return pipeline
+
+
+def shutdown_logging(config: LoggerConfig | None = None) -> None:
+    """Flush and stop the pipeline of `config`, or every pipeline when no config is given.
+
+    Loggers lose their queue handler, so records logged afterwards only reach the root logger until
+    a new `StickfixLogger` is created for them. This runs automatically at interpreter exit.
+    """
+    with _pipelines_lock:
+        if config is None:
+            closing = list(_pipelines.values())
+            _pipelines.clear()
+        else:
+            closing = [pipeline] if (pipeline := _pipelines.pop(config, None)) else []
+    for pipeline in closing:
+        pipeline.close()
+
+
+atexit.register(shutdown_logging)
 
 
 class StickfixLogger:
-    """Simple facade that ensures bot logging is configured once per logger name."""
+    """Simple facade that routes each logger name once through its configuration's pipeline."""
 
     def __init__(self, context: str, *, config: LoggerConfig | None = None):
         self.__config = config or self.__default_config()
+        self.__pipeline = _pipeline_for(self.__config)
         self.__logger = self.__configure_logger(context)
 
     def debug(self, msg: str, *args: Any, **kwargs: Any) -> None:
-        self.__logger.debug(msg, *args, **kwargs)
+        self.__emit(logging.DEBUG, msg, args, kwargs)
 
     def info(self, msg: str, *args: Any, **kwargs: Any) -> None:
-        self.__logger.info(msg, *args, **kwargs)
+        self.__emit(logging.INFO, msg, args, kwargs)
 
     def warning(self, msg: str, *args: Any, **kwargs: Any) -> None:
-        self.__logger.warning(msg, *args, **kwargs)
+        self.__emit(logging.WARNING, msg, args, kwargs)
 
     def error(self, msg: str, *args: Any, **kwargs: Any) -> None:
-        self.__logger.error(msg, *args, **kwargs)
+        self.__emit(logging.ERROR, msg, args, kwargs)
 
     def critical(self, msg: str, *args: Any, **kwargs: Any) -> None:
-        self.__logger.critical(msg, *args, **kwargs)
+        self.__emit(logging.CRITICAL, msg, args, kwargs)
 
     def exception(self, msg: str, *args: Any, **kwargs: Any) -> None:
-        self.__logger.exception(msg, *args, **kwargs)
+        kwargs.setdefault("exc_info", True)
+        self.__emit(logging.ERROR, msg, args, kwargs)
 
     def log(self, level: int, msg: str, *args: Any, **kwargs: Any) -> None:
+        """Log `msg % args` at `level`, doing no formatting work when the level is disabled.
+
+        Every logging method also accepts a ``fields`` mapping of key/value context, stored on the
+        record as ``record.fields`` for structured handlers.
+        """
+        self.__emit(level, msg, args, kwargs)
+
+    def is_enabled_for(self, level: int) -> bool:
+        """Whether records at `level` would be emitted, to guard work done only for logging."""
+        return self.__logger.isEnabledFor(level)
+
+    def __emit(self, level: int, msg: str, args: tuple[Any, ...], kwargs: dict[str, Any]) -> None:
+        if not self.__logger.isEnabledFor(level):
+            return
+        fields: Mapping[str, Any] | None = kwargs.pop("fields", None)
+        if fields:
+            kwargs["extra"] = {**kwargs.get("extra", {}), "fields": dict(fields)}
+        kwargs.setdefault("stacklevel", 3)
         self.__logger.log(level, msg, *args, **kwargs)
 
     @property
@@ -57,41 +296,25 @@ class StickfixLogger:
         """Expose the configured logger for advanced integrations or tests."""
         return self.__logger
 
+    @property
+    def output_handlers(self) -> tuple[logging.Handler, ...]:
+        """Console and file handlers the background listener writes this logger's records to."""
+        return tuple(self.__pipeline.outputs)
+
     @staticmethod
     def __default_config() -> LoggerConfig:
+        structured = os.environ.get(LOG_FORMAT_ENVVAR, "").strip().lower() == "json"
         if os.environ.get(DISABLE_FILE_LOGGING_ENVVAR, "").strip() == "1":
-            return LoggerConfig(log_path=None)
+            return LoggerConfig(log_path=None, structured=structured)
 
         log_path_value = os.environ.get(LOG_PATH_ENVVAR, "").strip()
         if log_path_value:
-            return LoggerConfig(log_path=Path(log_path_value))
+            return LoggerConfig(log_path=Path(log_path_value), structured=structured)
 
-        return LoggerConfig()
+        return LoggerConfig(structured=structured)
 
     def __configure_logger(self, context: str) -> logging.Logger:
         logger = logging.getLogger(context)
         logger.setLevel(self.__config.level)
-        self.__ensure_handlers(logger)
+        self.__pipeline.attach(logger)
         return logger
-
-    def __ensure_handlers(self, logger: logging.Logger) -> None:
-        if not any(isinstance(handler, logging.StreamHandler) for handler in logger.handlers):
-            console = logging.StreamHandler()
-            console.setLevel(self.__config.console_level)
-            console.setFormatter(logging.Formatter(self.__config.console_format))
-            logger.addHandler(console)
-
-        if self.__config.log_path is None:
-            return
-
-        if not any(isinstance(handler, RotatingFileHandler) for handler in logger.handlers):
-            self.__config.log_path.parent.mkdir(parents=True, exist_ok=True)
-            file_logger = RotatingFileHandler(
-                filename=self.__config.log_path,
-                encoding="utf-8",
-                maxBytes=self.__config.max_bytes,
-                backupCount=self.__config.backup_count,
-            )
-            file_logger.setLevel(self.__config.file_level)
-            file_logger.setFormatter(logging.Formatter(self.__config.file_format))
-            logger.addHandler(file_logger)
@@ -12,7 +12,7 @@ from typing import Callable, Tuple, Union
 from telegram import Chat, Message, Sticker, Update, User
 
 from bot.utils.errors import InputException, NoStickerException, WrongContextException
-from bot.utils.logger import StickfixLogger
+from bot.utils.logger import Lazy, StickfixLogger
 
 module_logger = StickfixLogger(__name__)
 
@@ -21,7 +21,8 @@ def get_message_content(update: Update):
     """ Gets the content of a telegram message  """
     message_content: Message = update.effective_message
     module_logger.debug(
-        f"Received message: \n {json.dumps(message_content.to_dict(), indent=2, sort_keys=True)}")
+        "Received message: \n %s",
+        Lazy(lambda: json.dumps(message_content.to_dict(), indent=2, sort_keys=True)))
     return message_content
 
 
@@ -75,10 +76,15 @@ def get_message_meta(update: Update) -> Tuple[Message, User, Chat]:
 
 class Commands(str, Enum):
     ADD = "add"
+    ADD_SET = "addset"
     DELETE_FROM = "deleteFrom"
     DELETE_ME = "deleteMe"
+    DROP_TAG = "dropTag"
     GET = "get"
     HELP = "help"
+    MERGE_TAGS = "mergeTags"
+    PROFILE = "profile"
+    RENAME_TAG = "renameTag"
     SET_MODE = "setMode"
     SHUFFLE = "shuffle"
     START = "start"
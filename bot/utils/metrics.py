@@ -0,0 +1,219 @@
+"""In-process latency histograms and counters, dumped to a file in Prometheus text format.
+
+Stickfix deliberately runs without an HTTP listener, so metrics are not scraped: the bot's job queue
+periodically writes a snapshot of the registry to a local ``.prom`` file that a node exporter's
+textfile collector, or a person with ``cat``, can read.
+
+Histograms are HDR-style: values are recorded in microseconds into log-linear buckets, each power
+of two split into `SUB_BUCKETS` linear sub-buckets. Recording a value is one ``bit_length`` and one
+list increment, memory grows with the logarithm of the largest value seen, and every quantile is
+reported within ``1 / SUB_BUCKETS`` of its true value.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from functools import wraps
+from pathlib import Path
+from tempfile import NamedTemporaryFile
+from typing import Any, TypeVar
+
+SUB_BUCKET_BITS = 5
+SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+QUANTILES = (0.5, 0.95, 0.99)
+METRICS_PATH_ENVVAR = "STICKFIX_METRICS_PATH"
+DEFAULT_METRICS_PATH = Path("metrics") / "stickfix.prom"
+
+Labels = tuple[tuple[str, str], ...]
+CallableT = TypeVar("CallableT", bound=Callable[..., Any])
+
+
+class LatencyHistogram:
+    """Log-linear histogram of durations, recorded in whole microseconds."""
+
+    __slots__ = ("_counts", "_lock", "count", "maximum", "total")
+
+    def __init__(self) -> None:
+        self._counts: list[int] = []
+        self._lock = threading.Lock()
+        self.count = 0
+        self.total = 0.0
+        self.maximum = 0.0
+
+    def record(self, seconds: float) -> None:
+        """Record one duration."""
+        index = _bucket_index(max(0, int(seconds * 1_000_000)))
+        with self._lock:
+            if index >= len(self._counts):
+                self._counts.extend([0] * (index + 1 - len(self._counts)))
+            self._counts[index] += 1
+            self.count += 1
+            self.total += seconds
+            self.maximum = max(self.maximum, seconds)
+
+    def quantile(self, q: float) -> float:
+        """Return the duration in seconds below which a fraction `q` of the records fall."""
+        with self._lock:
+            if not self.count:
+                return 0.0
+            rank = max(1, round(q * self.count))
+            seen = 0
+            for index, bucket_count in enumerate(self._counts):
+                seen += bucket_count
+                if seen >= rank:
+                    return min(_bucket_upper(index) / 1_000_000, self.maximum)
+            return self.maximum
+
+
+class MetricsRegistry:
+    """Named, labelled histograms and counters shared by the whole process."""
+
+    def __init__(self) -> None:
+        self._histograms: dict[str, dict[Labels, LatencyHistogram]] = {}
+        self._counters: dict[str, dict[Labels, float]] = {}
+        self._help: dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def describe(self, name: str, help_text: str) -> None:
+        """Set the ``# HELP`` line rendered for `name`."""
+        with self._lock:
+            self._help[name] = help_text
+
+    def histogram(self, name: str, **labels: str) -> LatencyHistogram:
+        """Return the histogram of `name` with `labels`, creating it on first use."""
+        key = _labels(labels)
+        series = self._histograms.get(name)
+        histogram = series.get(key) if series is not None else None
+        if histogram is None:
+            with self._lock:
+                series = self._histograms.setdefault(name, {})
+                histogram = series.setdefault(key, LatencyHistogram())
+        return histogram
+
+    def increment(self, name: str, amount: float = 1, **labels: str) -> None:
+        """Add `amount` to the counter of `name` with `labels`."""
+        key = _labels(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + amount
+
+    @contextmanager
+    def timer(self, name: str, **labels: str) -> Iterator[None]:
+        """Record how long the block takes in the histogram of `name`, even if it raises."""
+        histogram = self.histogram(name, **labels)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            histogram.record(time.perf_counter() - started)
+
+    def timed(self, name: str, **labels: str) -> Callable[[CallableT], CallableT]:
+        """Decorate a function so every call is recorded in the histogram of `name`."""
+
+        def decorate(function: CallableT) -> CallableT:
+            @wraps(function)
+            def wrapper(*args: Any, **kwargs: Any) -> Any:
+                histogram = self.histogram(name, **labels)
+                started = time.perf_counter()
+                try:
+                    return function(*args, **kwargs)
+                finally:
+                    histogram.record(time.perf_counter() - started)
+
+            return wrapper  # type: ignore[return-value]
+
+        return decorate
+
+    def render(self) -> str:
+        """Return every metric in the Prometheus text exposition format.
+
+        Histograms are exposed as summaries with p50, p95 and p99 quantiles, plus their sum, count
+        and maximum.
+        """
+        with self._lock:
+            histograms = {name: dict(series) for name, series in self._histograms.items()}
+            counters = {name: dict(series) for name, series in self._counters.items()}
+            help_texts = dict(self._help)
+        lines: list[str] = []
+        for name in sorted(histograms):
+            _header(lines, name, help_texts.get(name), "summary")
+            for labels, histogram in sorted(histograms[name].items()):
+                for q in QUANTILES:
+                    quantile_labels = (*labels, ("quantile", str(q)))
+                    lines.append(f"{name}{_format(quantile_labels)} {histogram.quantile(q):.6f}")
+                lines.append(f"{name}_sum{_format(labels)} {histogram.total:.6f}")
+                lines.append(f"{name}_count{_format(labels)} {histogram.count}")
+            _header(lines, f"{name}_max", help_texts.get(name), "gauge")
+            for labels, histogram in sorted(histograms[name].items()):
+                lines.append(f"{name}_max{_format(labels)} {histogram.maximum:.6f}")
+        for name in sorted(counters):
+            _header(lines, name, help_texts.get(name), "counter")
+            for labels, value in sorted(counters[name].items()):
+                lines.append(f"{name}{_format(labels)} {value:g}")
+        return "\n".join(lines) + "\n" if lines else ""
+
+    def write(self, path: str | os.PathLike[str]) -> None:
+        """Atomically replace `path` with the current snapshot."""
+        target = Path(path)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        with NamedTemporaryFile(
+            "w", encoding="utf-8", dir=target.parent, prefix=f".{target.name}.", delete=False
+        ) as temporary:
+            temporary.write(self.render())
+        os.replace(temporary.name, target)
+
+
+HANDLER_LATENCY = "stickfix_handler_latency_seconds"
+HANDLER_UPDATES = "stickfix_handler_updates_total"
+USE_CASE_LATENCY = "stickfix_use_case_latency_seconds"
+STORAGE_LATENCY = "stickfix_storage_latency_seconds"
+
+METRICS = MetricsRegistry()
+METRICS.describe(HANDLER_LATENCY, "Time spent in a Telegram handler callback.")
+METRICS.describe(HANDLER_UPDATES, "Updates handled, by command and outcome.")
+METRICS.describe(USE_CASE_LATENCY, "Time spent in an application use case.")
+METRICS.describe(STORAGE_LATENCY, "Time spent in a user store operation.")
+
+
+def metrics_path() -> Path:
+    """Return the file the metrics snapshot is written to, from `STICKFIX_METRICS_PATH`."""
+    return Path(os.environ.get(METRICS_PATH_ENVVAR, "").strip() or DEFAULT_METRICS_PATH)
+
+
+def _bucket_index(value: int) -> int:
+    shift = max(0, value.bit_length() - SUB_BUCKET_BITS)
+    return (shift << (SUB_BUCKET_BITS - 1)) + (value >> shift)
+
+
+def _bucket_upper(index: int) -> int:
+    half = SUB_BUCKETS >> 1
+    if index < SUB_BUCKETS:
+        return index
+    shift = (index - SUB_BUCKETS) // half + 1
+    sub_bucket = (index - SUB_BUCKETS) % half + half
+    return ((sub_bucket + 1) << shift) - 1
+
+
+def _labels(labels: dict[str, str]) -> Labels:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _format(labels: Labels) -> str:
+    if not labels:
+        return ""
+    pairs = (f'{key}="{_escape(value)}"' for key, value in labels)
+    return "{" + ",".join(pairs) + "}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _header(lines: list[str], name: str, help_text: str | None, metric_type: str) -> None:
+    if help_text:
+        lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} {metric_type}")
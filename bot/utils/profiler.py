@@ -0,0 +1,146 @@
+"""On-demand sampling profiler for a running bot.
+
+The profiler never instruments code: while it runs, a helper thread wakes up every `interval`
+seconds, reads the current stack of every other thread with `sys._current_frames` and counts each
+distinct stack. The dispatcher workers, the job queue and the background senders are all sampled,
+and code runs at full speed between samples. While stopped, no thread exists and nothing is hooked,
+so keeping the profiler available costs nothing.
+
+Each profiling window is written as a collapsed-stack file (one ``thread;outer;...;inner count``
+line per stack), ready for ``flamegraph.pl`` or speedscope.
+"""
+
+from __future__ import annotations
+
+import os
+import signal
+import sys
+import threading
+import time
+from collections import Counter
+from collections.abc import Callable
+from pathlib import Path
+from types import FrameType
+
+from bot.utils.logger import StickfixLogger
+
+logger = StickfixLogger(__name__)
+
+DEFAULT_INTERVAL = 0.005
+DEFAULT_OUTPUT_DIR = Path("logs") / "profiles"
+
+
+class SamplingProfiler:
+    """Stack-sampling profiler that can be started and stopped at runtime."""
+
+    def __init__(
+        self,
+        output_dir: str | os.PathLike[str] = DEFAULT_OUTPUT_DIR,
+        interval: float = DEFAULT_INTERVAL,
+        frames: Callable[[], dict[int, FrameType]] = sys._current_frames,  # noqa: SLF001
+    ) -> None:
+        self._output_dir = Path(output_dir)
+        self._interval = interval
+        self._frames = frames
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._stacks: Counter[str] = Counter()
+        self._started = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def start(self) -> bool:
+        """Start sampling, returning whether the profiler was stopped before."""
+        with self._lock:
+            if self._thread is not None:
+                return False
+            self._start_locked()
+            return True
+
+    def stop(self) -> Path | None:
+        """Stop sampling and write the collapsed stacks, returning the file or `None` if idle."""
+        with self._lock:
+            return self._stop_locked()
+
+    def toggle(self) -> Path | None:
+        """Start the profiler if it is stopped, otherwise stop it and return the written file.
+
+        The check and the switch happen under one lock, so a ``SIGUSR2`` racing a ``/profile``
+        command toggles twice instead of both stopping or both starting.
+        """
+        with self._lock:
+            if self._thread is not None:
+                return self._stop_locked()
+            self._start_locked()
+            return None
+
+    def sample(self) -> None:
+        """Record the current stack of every thread except the calling one."""
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        own = threading.get_ident()
+        for ident, frame in self._frames().items():
+            if ident != own:
+                self._stacks[_collapse(names.get(ident, str(ident)), frame)] += 1
+
+    def _start_locked(self) -> None:
+        self._stacks = Counter()
+        self._stop.clear()
+        self._started = time.time()
+        self._thread = threading.Thread(
+            target=self._sample_until_stopped, name="stickfix-profiler", daemon=True
+        )
+        self._thread.start()
+        logger.info("Sampling profiler started every %s s", self._interval)
+
+    def _stop_locked(self) -> Path | None:
+        thread, self._thread = self._thread, None
+        if thread is None:
+            return None
+        self._stop.set()
+        thread.join()
+        path = self._write(self._stacks)
+        logger.info("Sampling profiler wrote %s", path)
+        return path
+
+    def _sample_until_stopped(self) -> None:
+        while not self._stop.wait(self._interval):
+            self.sample()
+
+    def _write(self, stacks: Counter[str]) -> Path:
+        self._output_dir.mkdir(parents=True, exist_ok=True)
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(self._started))
+        path = self._output_dir / f"stickfix-{stamp}-{os.getpid()}.folded"
+        with path.open("w", encoding="utf-8") as handle:
+            for stack, count in stacks.most_common():
+                handle.write(f"{stack} {count}\n")
+        return path
+
+
+def install_signal_toggle(profiler: SamplingProfiler, signum: int | None = None) -> bool:
+    """Toggle `profiler` whenever the process receives `signum` (``SIGUSR2`` by default).
+
+    Returns whether the handler was installed: signals are unavailable on some platforms and can
+    only be handled from the main thread. The toggle itself runs on a short-lived thread, so
+    writing the profile never happens inside the signal handler.
+    """
+    signum = signum if signum is not None else getattr(signal, "SIGUSR2", None)
+    if signum is None or threading.current_thread() is not threading.main_thread():
+        return False
+    signal.signal(
+        signum,
+        lambda _signum, _frame: threading.Thread(target=profiler.toggle, daemon=True).start(),
+    )
+    return True
+
+
+def _collapse(thread_name: str, frame: FrameType | None) -> str:
+    names: list[str] = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+        frame = frame.f_back
+    names.append(thread_name)
+    return ";".join(reversed(names))
@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+from hamcrest import assert_that, equal_to, is_, none
+
+from bot.application.answered_results import AnsweredResults
+from bot.application.inline_cache_policy import sticker_result_id
+from bot.domain.query import Term, parse_inline_query
+
+
+def test_answered_result_ids_map_back_to_their_stickers_until_evicted() -> None:
+    answered = AnsweredResults(sticker_capacity=2)
+
+    answered.remember("alice", "wave", ["wave-1", "wave-2"])
+    answered.remember("alice", "wave", ["wave-1"])
+    answered.remember("alice", "smile", ["smile-1"])
+
+    assert_that(answered.sticker_id(sticker_result_id("wave-1")), equal_to("wave-1"))
+    assert_that(answered.sticker_id(sticker_result_id("smile-1")), equal_to("smile-1"))
+    assert_that(answered.sticker_id(sticker_result_id("wave-2")), is_(none()))
+
+
+def test_corrected_queries_are_kept_per_user_and_shared_answers_for_everyone() -> None:
+    answered = AnsweredResults()
+
+    answered.remember("alice", "wavr", [], corrected_query=Term("wave"))
+    answered.remember("bob", "smil", [], corrected_query=Term("smile"), shared=True)
+
+    assert_that(answered.searched_query("alice", "wavr"), equal_to(Term("wave")))
+    assert_that(answered.searched_query("carol", "wavr"), equal_to(parse_inline_query("wavr")))
+    assert_that(answered.searched_query("carol", "smil"), equal_to(Term("smile")))
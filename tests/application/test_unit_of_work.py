@@ -0,0 +1,102 @@
+"""Tests for the backend-agnostic buffered unit of work."""
+
+from __future__ import annotations
+
+from hamcrest import assert_that, equal_to, is_, none, same_instance
+
+from bot.application.ports import UnitOfWork
+from bot.application.unit_of_work import BufferedUnitOfWork
+from bot.domain.user import SF_PUBLIC, StickfixUser
+
+
+class FakeUserRepository:
+    def __init__(self) -> None:
+        self.users: dict[str, StickfixUser] = {}
+        self.saved_users: list[StickfixUser] = []
+        self.deleted_ids: list[str] = []
+
+    def get_user(self, user_id: str) -> StickfixUser | None:
+        return self.users.get(user_id)
+
+    def has_user(self, user_id: str) -> bool:
+        return user_id in self.users
+
+    def save_user(self, user: StickfixUser) -> None:
+        self.users[user.id] = user
+        self.saved_users.append(user)
+
+    def delete_user(self, user_id: str) -> bool:
+        self.deleted_ids.append(user_id)
+        return self.users.pop(user_id, None) is not None
+
+    def get_public_pack(self) -> StickfixUser | None:
+        return self.get_user(SF_PUBLIC)
+
+    def ensure_public_pack(self) -> StickfixUser:
+        public_pack = self.get_public_pack()
+        if public_pack is None:
+            public_pack = StickfixUser(SF_PUBLIC)
+            self.save_user(public_pack)
+        return public_pack
+
+
+def test_buffered_unit_of_work_satisfies_the_port() -> None:
+    assert_that(isinstance(BufferedUnitOfWork(FakeUserRepository()), UnitOfWork), is_(True))
+
+
+def test_repeated_saves_of_one_user_are_written_once_on_commit() -> None:
+    repository = FakeUserRepository()
+    user = StickfixUser("alice")
+
+    with BufferedUnitOfWork(repository) as unit_of_work:
+        unit_of_work.users.save_user(user)
+        unit_of_work.users.save_user(user)
+        public_pack = unit_of_work.users.ensure_public_pack()
+        unit_of_work.users.save_user(public_pack)
+        assert_that(repository.saved_users, equal_to([]))
+        unit_of_work.commit()
+
+    assert_that(repository.saved_users, equal_to([user, public_pack]))
+
+
+def test_staged_writes_are_visible_to_reads_inside_the_unit_of_work() -> None:
+    repository = FakeUserRepository()
+    repository.users["bob"] = StickfixUser("bob")
+    alice = StickfixUser("alice")
+
+    with BufferedUnitOfWork(repository) as unit_of_work:
+        unit_of_work.users.save_user(alice)
+        assert_that(unit_of_work.users.delete_user("bob"), is_(True))
+
+        assert_that(unit_of_work.users.get_user("alice"), same_instance(alice))
+        assert_that(unit_of_work.users.has_user("alice"), is_(True))
+        assert_that(unit_of_work.users.get_user("bob"), none())
+        assert_that(unit_of_work.users.has_user("bob"), is_(False))
+        assert_that(unit_of_work.users.delete_user("bob"), is_(False))
+        unit_of_work.commit()
+
+    assert_that(set(repository.users), equal_to({"alice"}))
+    assert_that(repository.deleted_ids, equal_to(["bob"]))
+
+
+def test_leaving_without_commit_discards_staged_writes() -> None:
+    repository = FakeUserRepository()
+
+    with BufferedUnitOfWork(repository) as unit_of_work:
+        unit_of_work.users.ensure_public_pack()
+
+    assert_that(repository.saved_users, equal_to([]))
+    assert_that(repository.get_public_pack(), none())
+
+
+def test_error_inside_the_unit_of_work_discards_staged_writes() -> None:
+    repository = FakeUserRepository()
+
+    try:
+        with BufferedUnitOfWork(repository) as unit_of_work:
+            unit_of_work.users.save_user(StickfixUser("alice"))
+            raise RuntimeError("boom")
+    except RuntimeError:
+        pass
+
+    assert_that(repository.saved_users, equal_to([]))
@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import pytest
+from hamcrest import assert_that, equal_to, is_
+
+from bot.application.errors import InvalidCommandInputError, StickerSetNotFoundError
+from bot.application.ports import StickerSetItem
+from bot.application.requests import AddStickerSetCommand
+from bot.application.use_cases import AddStickerSet
+from bot.domain.user import SF_PUBLIC, StickfixUser
+from tests.support.unit_of_work import CountingUnitsOfWork
+
+
+class FakeUserRepository:
+    def __init__(self) -> None:
+        self.users: dict[str, StickfixUser] = {}
+        self.saved_users: list[StickfixUser] = []
+
+    def get_user(self, user_id: str) -> StickfixUser | None:
+        return self.users.get(user_id)
+
+    def has_user(self, user_id: str) -> bool:
+        return user_id in self.users
+
+    def save_user(self, user: StickfixUser) -> None:
+        self.users[user.id] = user
+        self.saved_users.append(user)
+
+    def delete_user(self, user_id: str) -> bool:
+        return self.users.pop(user_id, None) is not None
+
+    def get_public_pack(self) -> StickfixUser | None:
+        return self.get_user(SF_PUBLIC)
+
+    def ensure_public_pack(self) -> StickfixUser:
+        public_pack = self.get_public_pack()
+        if public_pack is None:
+            public_pack = StickfixUser(SF_PUBLIC)
+            self.save_user(public_pack)
+        return public_pack
+
+
+class FakeStickerSetProvider:
+    def __init__(self, sets: dict[str, tuple[StickerSetItem, ...]]) -> None:
+        self.sets = sets
+        self.requested: list[str] = []
+
+    def get_sticker_set(self, name: str) -> tuple[StickerSetItem, ...]:
+        self.requested.append(name)
+        if name not in self.sets:
+            raise StickerSetNotFoundError(name)
+        return self.sets[name]
+
+
+def make_command(set_name: str = "cats", tags: tuple[str, ...] = ()) -> AddStickerSetCommand:
+    return AddStickerSetCommand(
+        user_id="alice", chat_id="1", chat_type="private", set_name=set_name, tags=tags
+    )
+
+
+def make_set(count: int) -> tuple[StickerSetItem, ...]:
+    return tuple(
+        StickerSetItem(file_id=f"sticker-{index:03d}", emoji="😺") for index in range(count)
+    )
+
+
+def test_whole_set_is_added_to_the_effective_pack_with_one_write() -> None:
+    repository = FakeUserRepository()
+    user = StickfixUser("alice")
+    user.private_mode = True
+    repository.users["alice"] = user
+    provider = FakeStickerSetProvider({"cats": make_set(120)})
+    units_of_work = CountingUnitsOfWork(repository)
+    use_case = AddStickerSet(repository, provider, unit_of_work=units_of_work)
+
+    result = use_case(make_command(tags=("Cat", "cute")))
+
+    assert_that(result.sticker_count, equal_to(120))
+    assert_that(result.added_count, equal_to(120))
+    assert_that(result.changed, is_(True))
+    assert_that(provider.requested, equal_to(["cats"]))
+    assert_that(len(user.stickers["cat"]), equal_to(120))
+    assert_that(user.stickers["cute"], equal_to(user.stickers["cat"]))
+    assert_that(user.version, equal_to(1))
+    assert_that(units_of_work.batches, equal_to([(SF_PUBLIC, "alice")]))
+    assert_that(repository.saved_users.count(user), equal_to(1))
+
+
+def test_stickers_are_tagged_with_their_emoji_without_command_tags() -> None:
+    repository = FakeUserRepository()
+    provider = FakeStickerSetProvider(
+        {"mixed": (StickerSetItem("a", "😺"), StickerSetItem("b", "🐶"), StickerSetItem("c"))}
+    )
+
+    result = AddStickerSet(repository, provider)(make_command("mixed"))
+
+    public_pack = repository.get_public_pack()
+    assert_that(public_pack.stickers, equal_to({"😺": ["a"], "🐶": ["b"]}))
+    assert_that(result.sticker_count, equal_to(2))
+
+
+def test_importing_the_same_set_twice_does_not_change_the_pack() -> None:
+    repository = FakeUserRepository()
+    provider = FakeStickerSetProvider({"cats": make_set(3)})
+    use_case = AddStickerSet(repository, provider)
+    use_case(make_command())
+    repository.saved_users.clear()
+
+    result = use_case(make_command())
+
+    assert_that(result.sticker_count, equal_to(3))
+    assert_that(result.added_count, equal_to(0))
+    assert_that(result.changed, is_(False))
+    assert_that(repository.saved_users, equal_to([]))
+
+
+def test_missing_set_name_or_unknown_set_is_rejected() -> None:
+    use_case = AddStickerSet(FakeUserRepository(), FakeStickerSetProvider({}))
+
+    with pytest.raises(InvalidCommandInputError):
+        use_case(make_command(""))
+    with pytest.raises(StickerSetNotFoundError):
+        use_case(make_command("unknown"))
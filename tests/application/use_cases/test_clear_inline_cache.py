@@ -62,7 +62,7 @@ def test_clears_private_user_cache_when_existing_user_is_in_private_mode() -> No
 
     assert_that(user.cache, equal_to({}))
     assert_that(public_pack.cache, equal_to({"wave": ["cached-wave"], "smile": ["cached-smile"]}))
-    assert_that(repository.saved_users, equal_to([user]))
+    assert_that(repository.saved_users, equal_to([]))
 
 
 def test_clears_public_cache_when_existing_user_is_in_public_mode() -> None:
@@ -78,7 +78,7 @@ def test_clears_public_cache_when_existing_user_is_in_public_mode() -> None:
 
     assert_that(public_pack.cache, equal_to({}))
     assert_that(user.cache, equal_to({"wave": ["cached-wave"], "smile": ["cached-smile"]}))
-    assert_that(repository.saved_users, equal_to([public_pack]))
+    assert_that(repository.saved_users, equal_to([]))
 
 
 def test_clears_public_cache_when_user_id_is_none() -> None:
@@ -90,7 +90,7 @@ def test_clears_public_cache_when_user_id_is_none() -> None:
     make_use_case(repository)(ClearInlineCacheCommand(user_id=None))
 
     assert_that(public_pack.cache, equal_to({}))
-    assert_that(repository.saved_users, equal_to([public_pack]))
+    assert_that(repository.saved_users, equal_to([]))
 
 
 def test_clears_public_cache_when_user_id_is_unknown() -> None:
@@ -102,7 +102,7 @@ def test_clears_public_cache_when_user_id_is_unknown() -> None:
     make_use_case(repository)(ClearInlineCacheCommand(user_id="missing"))
 
     assert_that(public_pack.cache, equal_to({}))
-    assert_that(repository.saved_users, equal_to([public_pack]))
+    assert_that(repository.saved_users, equal_to([]))
 
 
 def test_raises_when_public_cache_owner_is_missing() -> None:
@@ -133,10 +133,10 @@ def test_ignores_query_text() -> None:
     make_use_case(repository)(ClearInlineCacheCommand(user_id=None, query_text="wave"))
 
     assert_that(public_pack.cache, equal_to({}))
-    assert_that(repository.saved_users, equal_to([public_pack]))
+    assert_that(repository.saved_users, equal_to([]))
 
 
-def test_saves_only_the_resolved_cache_owner_and_leaves_unrelated_users_untouched() -> None:
+def test_clears_only_the_resolved_cache_owner_and_saves_nothing() -> None:
     repository = FakeUserRepository()
     public_pack = repository.ensure_public_pack()
     user = StickfixUser("alice")
@@ -153,5 +153,4 @@ def test_saves_only_the_resolved_cache_owner_and_leaves_unrelated_users_untouche
     assert_that(public_pack.cache, equal_to({}))
     assert_that(user.cache, equal_to({"wave": ["cached-wave"], "smile": ["cached-smile"]}))
     assert_that(unrelated.cache, equal_to({"wave": ["cached-wave"], "smile": ["cached-smile"]}))
-    assert_that(repository.saved_users, equal_to([public_pack]))
-    assert_that(repository.saved_users.count(public_pack), is_(1))
+    assert_that(repository.saved_users, equal_to([]))
@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import pytest
+from hamcrest import assert_that, equal_to, is_
+
+from bot.application.errors import InsufficientPermissionsError, InvalidCommandInputError
+from bot.application.requests import DropTagCommand, MergeTagsCommand, RenameTagCommand
+from bot.application.use_cases import DropTag, MergeTags, RenameTag
+from bot.domain.user import SF_PUBLIC, StickfixUser
+from tests.support.unit_of_work import CountingUnitsOfWork
+
+
+class FakeUserRepository:
+    def __init__(self) -> None:
+        self.users: dict[str, StickfixUser] = {}
+        self.saved_users: list[StickfixUser] = []
+
+    def get_user(self, user_id: str) -> StickfixUser | None:
+        return self.users.get(user_id)
+
+    def has_user(self, user_id: str) -> bool:
+        return user_id in self.users
+
+    def save_user(self, user: StickfixUser) -> None:
+        self.users[user.id] = user
+        self.saved_users.append(user)
+
+    def delete_user(self, user_id: str) -> bool:
+        return self.users.pop(user_id, None) is not None
+
+    def get_public_pack(self) -> StickfixUser | None:
+        return self.get_user(SF_PUBLIC)
+
+    def ensure_public_pack(self) -> StickfixUser:
+        public_pack = self.get_public_pack()
+        if public_pack is None:
+            public_pack = StickfixUser(SF_PUBLIC)
+            self.save_user(public_pack)
+        return public_pack
+
+
+def make_repository(private_mode: bool = True) -> FakeUserRepository:
+    repository = FakeUserRepository()
+    repository.users[SF_PUBLIC] = StickfixUser(SF_PUBLIC)
+    user = StickfixUser("alice")
+    user.private_mode = private_mode
+    user.add_stickers({"s1": ["cat"], "s2": ["kitty"], "s3": ["dog"]})
+    repository.users["alice"] = user
+    return repository
+
+
+def test_merge_tags_edits_the_private_pack_with_one_write() -> None:
+    repository = make_repository()
+    units_of_work = CountingUnitsOfWork(repository)
+    use_case = MergeTags(repository, unit_of_work=units_of_work)
+
+    result = use_case(MergeTagsCommand(user_id="alice", source_tags=("Kitty",), target_tag="CAT"))
+
+    assert_that(result.removed_tags, equal_to(("kitty",)))
+    assert_that(result.updated_tags, equal_to(("cat",)))
+    assert_that(result.changed, is_(True))
+    assert_that(
+        repository.users["alice"].stickers, equal_to({"cat": ["s1", "s2"], "dog": ["s3"]})
+    )
+    assert_that(units_of_work.batches, equal_to([("alice",)]))
+
+
+def test_rename_and_drop_tag_edit_the_private_pack() -> None:
+    repository = make_repository()
+
+    RenameTag(repository)(RenameTagCommand(user_id="alice", old_tag="dog", new_tag="puppy"))
+    DropTag(repository)(DropTagCommand(user_id="alice", tag="kitty"))
+
+    assert_that(repository.users["alice"].stickers, equal_to({"cat": ["s1"], "puppy": ["s3"]}))
+
+
+def test_editing_unknown_tags_does_not_write() -> None:
+    repository = make_repository()
+
+    result = DropTag(repository)(DropTagCommand(user_id="alice", tag="missing"))
+
+    assert_that(result.changed, is_(False))
+    assert_that(repository.saved_users, equal_to([]))
+
+
+def test_public_pack_can_only_be_edited_by_admins() -> None:
+    repository = make_repository(private_mode=False)
+    repository.users[SF_PUBLIC].add_sticker("p1", ["cat"])
+    command = RenameTagCommand(user_id="alice", old_tag="cat", new_tag="feline")
+
+    with pytest.raises(InsufficientPermissionsError):
+        RenameTag(repository)(command)
+    RenameTag(repository, admin_ids=["alice"])(command)
+
+    assert_that(repository.users[SF_PUBLIC].stickers, equal_to({"feline": ["p1"]}))
+    assert_that(repository.users["alice"].stickers["cat"], equal_to(["s1"]))
+
+
+def test_empty_tags_are_rejected() -> None:
+    repository = make_repository()
+
+    with pytest.raises(InvalidCommandInputError):
+        RenameTag(repository)(RenameTagCommand(user_id="alice", old_tag="cat", new_tag=" "))
+    with pytest.raises(InvalidCommandInputError):
+        MergeTags(repository)(MergeTagsCommand(user_id="alice", source_tags=(), target_tag="cat"))
+    with pytest.raises(InvalidCommandInputError):
+        DropTag(repository)(DropTagCommand(user_id="alice", tag=""))
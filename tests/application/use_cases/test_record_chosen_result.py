@@ -0,0 +1,191 @@
+from __future__ import annotations
+
+from unittest.mock import patch
+
+import pytest
+from hamcrest import assert_that, equal_to, is_
+
+from bot.application.answered_results import AnsweredResults
+from bot.application.errors import UserNotFoundError
+from bot.application.inline_cache_policy import sticker_result_id
+from bot.application.requests import InlineQueryRequest, RecordChosenResultCommand
+from bot.application.use_cases import RecordChosenResult, ResolveInlineQuery
+from bot.domain.services import StickerPackService
+from bot.domain.user import SF_PUBLIC, StickfixUser
+
+
+class FakeUserRepository:
+    def __init__(self) -> None:
+        self.users: dict[str, StickfixUser] = {}
+        self.saved_users: list[StickfixUser] = []
+
+    def get_user(self, user_id: str) -> StickfixUser | None:
+        return self.users.get(user_id)
+
+    def has_user(self, user_id: str) -> bool:
+        return user_id in self.users
+
+    def save_user(self, user: StickfixUser) -> None:
+        self.users[user.id] = user
+        self.saved_users.append(user)
+
+    def delete_user(self, user_id: str) -> bool:
+        return self.users.pop(user_id, None) is not None
+
+    def get_public_pack(self) -> StickfixUser | None:
+        return self.get_user(SF_PUBLIC)
+
+    def ensure_public_pack(self) -> StickfixUser:
+        public_pack = self.get_public_pack()
+        if public_pack is None:
+            public_pack = StickfixUser(SF_PUBLIC)
+            self.save_user(public_pack)
+        return public_pack
+
+
+class FakeHelpContentProvider:
+    def get_help_text(self) -> str:
+        return "help text"
+
+
+def choose(
+    repository: FakeUserRepository,
+    query_text: str,
+    sticker_id: str,
+    user_id=None,
+    answered_results: AnsweredResults | None = None,
+):
+    """Answer `query_text` as the inline handler would, then choose `sticker_id` from it."""
+    answered_results = answered_results or AnsweredResults()
+    ResolveInlineQuery(
+        repository, FakeHelpContentProvider(), answered_results=answered_results
+    )(InlineQueryRequest(user_id=user_id, query_text=query_text, limit=1_000))
+    command = RecordChosenResultCommand(
+        user_id=user_id, query_text=query_text, result_id=sticker_result_id(sticker_id)
+    )
+    return RecordChosenResult(
+        repository, clock=lambda: 1_000.0, answered_results=answered_results
+    )(command)
+
+
+def test_chosen_sticker_is_credited_to_the_query_tags_and_saved() -> None:
+    repository = FakeUserRepository()
+    public_pack = repository.ensure_public_pack()
+    public_pack.add_sticker("wave-1", ["wave"])
+    public_pack.add_sticker("wave-2", ["wave", "hello"])
+    repository.saved_users.clear()
+
+    result = choose(repository, "wave hel", "wave-2")
+
+    assert_that(result.acknowledged, is_(True))
+    assert_that(set(public_pack.usage), equal_to({"wave", "hello"}))
+    assert_that(list(public_pack.usage["wave"]), equal_to(["wave-2"]))
+    assert_that(repository.saved_users, equal_to([public_pack]))
+
+
+def test_unknown_result_or_empty_query_records_nothing() -> None:
+    repository = FakeUserRepository()
+    public_pack = repository.ensure_public_pack()
+    public_pack.add_sticker("wave-1", ["wave"])
+    repository.saved_users.clear()
+
+    unknown = choose(repository, "wave", "other-sticker")
+    empty = choose(repository, "  ", "wave-1")
+
+    assert_that(unknown.acknowledged, is_(False))
+    assert_that(empty.acknowledged, is_(False))
+    assert_that(public_pack.usage, equal_to({}))
+    assert_that(repository.saved_users, equal_to([]))
+
+
+def test_missing_user_and_public_pack_raises_user_not_found() -> None:
+    use_case = RecordChosenResult(FakeUserRepository())
+
+    with pytest.raises(UserNotFoundError):
+        use_case(RecordChosenResultCommand(user_id="alice", query_text="wave", result_id="x"))
+
+
+def test_sticker_found_through_a_corrected_query_is_credited_to_the_corrected_tag() -> None:
+    repository = FakeUserRepository()
+    public_pack = repository.ensure_public_pack()
+    public_pack.add_sticker("wave-1", ["wave"])
+
+    result = choose(repository, "wavr", "wave-1")
+
+    assert_that(result.acknowledged, is_(True))
+    assert_that(list(public_pack.usage), equal_to(["wave"]))
+
+
+def test_results_are_found_without_searching_the_query_again() -> None:
+    repository = FakeUserRepository()
+    public_pack = repository.ensure_public_pack()
+    public_pack.add_sticker("wave-1", ["wave"])
+    answered_results = AnsweredResults()
+    answered_results.remember(None, "wave", ["wave-1"])
+    stickers = StickerPackService()
+    use_case = RecordChosenResult(
+        repository, stickers=stickers, clock=lambda: 1_000.0, answered_results=answered_results
+    )
+
+    with patch.object(stickers, "search_stickers", side_effect=AssertionError("searched")):
+        result = use_case(
+            RecordChosenResultCommand(
+                user_id=None, query_text="wave", result_id=sticker_result_id("wave-1")
+            )
+        )
+
+    assert_that(result.acknowledged, is_(True))
+    assert_that(list(public_pack.usage), equal_to(["wave"]))
+
+
+def test_chosen_stickers_rank_first_on_the_next_inline_query() -> None:
+    repository = FakeUserRepository()
+    public_pack = repository.ensure_public_pack()
+    for index in range(60):
+        public_pack.add_sticker(f"sticker-{index:02d}", ["wave"])
+
+    choose(repository, "wave", "sticker-59")
+    choose(repository, "wave", "sticker-42")
+    choose(repository, "wave", "sticker-42")
+    result = ResolveInlineQuery(repository, FakeHelpContentProvider())(
+        InlineQueryRequest(user_id=None, query_text="wave", limit=3)
+    )
+
+    assert_that(result.sticker_ids, equal_to(("sticker-42", "sticker-59", "sticker-00")))
+
+
+def test_chosen_sticker_is_remembered_as_recent_for_registered_users() -> None:
+    repository = FakeUserRepository()
+    public_pack = repository.ensure_public_pack()
+    public_pack.add_sticker("wave-1", ["wave"])
+    public_pack.add_sticker("smile-1", ["smile"])
+    user = StickfixUser("alice")
+    repository.save_user(user)
+
+    choose(repository, "wave", "wave-1", user_id="alice")
+    choose(repository, "smile", "smile-1", user_id="alice")
+    choose(repository, "", "wave-1", user_id="alice")
+
+    assert_that(user.recent_stickers(), equal_to(["wave-1", "smile-1"]))
+    assert_that(public_pack.recent_stickers(), equal_to([]))
+
+
+def test_empty_inline_query_serves_recent_stickers_as_a_personal_answer() -> None:
+    repository = FakeUserRepository()
+    public_pack = repository.ensure_public_pack()
+    public_pack.add_sticker("wave-1", ["wave"])
+    user = StickfixUser("alice")
+    repository.save_user(user)
+    choose(repository, "wave", "wave-1", user_id="alice")
+    resolve = ResolveInlineQuery(repository, FakeHelpContentProvider())
+
+    result = resolve(InlineQueryRequest(user_id="alice", query_text=""))
+    next_page = resolve(InlineQueryRequest(user_id="alice", query_text="", offset=49))
+    anonymous = resolve(InlineQueryRequest(user_id=None, query_text=""))
+
+    assert_that(result.sticker_ids, equal_to(("wave-1",)))
+    assert_that(result.show_default_help, is_(True))
+    assert_that(result.is_personal, is_(True))
+    assert_that(next_page.sticker_ids, equal_to(()))
+    assert_that(anonymous.sticker_ids, equal_to(()))
+    assert_that(anonymous.is_personal, is_(True))
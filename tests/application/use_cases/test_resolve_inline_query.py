@@ -6,8 +6,10 @@ import pytest
 from hamcrest import assert_that, equal_to, has_length, is_, none
 
 from bot.application.errors import UserNotFoundError
+from bot.application.inline_cache_policy import InlineCachePolicy
 from bot.application.requests import InlineQueryRequest
 from bot.application.use_cases import ResolveInlineQuery
+from bot.domain.services import PopularTagSuggester
 from bot.domain.user import SF_PUBLIC, StickfixUser
 
 
@@ -75,7 +77,7 @@ def test_missing_repository_user_falls_back_to_public_pack() -> None:
     )
 
     assert_that(result.sticker_ids, equal_to(("public-sticker",)))
-    assert_that(repository.saved_users, equal_to([public_pack]))
+    assert_that(repository.saved_users, equal_to([]))
 
 
 def test_none_user_id_falls_back_to_public_pack() -> None:
@@ -89,7 +91,7 @@ def test_none_user_id_falls_back_to_public_pack() -> None:
     )
 
     assert_that(result.sticker_ids, equal_to(("public-sticker",)))
-    assert_that(repository.saved_users, equal_to([public_pack]))
+    assert_that(repository.saved_users, equal_to([]))
 
 
 def test_missing_user_without_public_pack_raises_user_not_found() -> None:
@@ -113,7 +115,7 @@ def test_public_mode_user_preserves_current_public_and_own_union_behaviour() ->
     )
 
     assert_that(set(result.sticker_ids), equal_to({"private-sticker", "public-sticker"}))
-    assert_that(repository.saved_users, equal_to([user]))
+    assert_that(repository.saved_users, equal_to([]))
 
 
 def test_private_mode_user_resolves_only_private_stickers() -> None:
@@ -131,7 +133,7 @@ def test_private_mode_user_resolves_only_private_stickers() -> None:
     )
 
     assert_that(result.sticker_ids, equal_to(("private-sticker",)))
-    assert_that(repository.saved_users, equal_to([user]))
+    assert_that(repository.saved_users, equal_to([]))
 
 
 def test_empty_query_at_first_page_returns_help_metadata(
@@ -152,9 +154,9 @@ def test_empty_query_at_first_page_returns_help_metadata(
     assert_that(result.show_default_help, is_(True))
     assert_that(result.help_text, equal_to("raw help"))
     assert_that(result.default_tags, equal_to(("wave",)))
-    assert_that(result.sticker_ids, equal_to(("empty-query-sticker",)))
+    assert_that(result.sticker_ids, equal_to(()))
     assert_that(help_provider.calls, equal_to(1))
-    assert_that(repository.saved_users, equal_to([public_pack]))
+    assert_that(repository.saved_users, equal_to([]))
 
 
 def test_empty_query_after_first_page_does_not_return_help_metadata() -> None:
@@ -224,7 +226,7 @@ def test_pagination_allows_fewer_than_limit_and_no_remaining_stickers() -> None:
     assert_that(empty_result.next_offset, equal_to(98))
 
 
-def test_private_lookup_saves_user_after_cache_mutation() -> None:
+def test_private_lookup_caches_matches_without_saving_the_user() -> None:
     repository = FakeUserRepository()
     repository.ensure_public_pack()
     user = StickfixUser("alice")
@@ -236,4 +238,229 @@ def test_private_lookup_saves_user_after_cache_mutation() -> None:
     make_use_case(repository)(InlineQueryRequest(user_id="alice", query_text="wave"))
 
     assert_that(user.cache, equal_to({"wave": ["private-sticker"]}))
-    assert_that(repository.saved_users, equal_to([user]))
+    assert_that(repository.saved_users, equal_to([]))
+
+
+def test_public_pack_only_answers_are_shared_and_cached_longer() -> None:
+    repository = FakeUserRepository()
+    public_pack = repository.ensure_public_pack()
+    public_pack.add_sticker("public-sticker", ["wave"])
+    repository.users["alice"] = StickfixUser("alice")
+
+    result = make_use_case(repository)(InlineQueryRequest(user_id="alice", query_text="wave"))
+
+    assert_that(result.is_personal, is_(False))
+    assert_that(result.cache_time, equal_to(300))
+
+
+def test_public_pack_only_answers_stay_personal_for_users_who_shuffle() -> None:
+    repository = FakeUserRepository()
+    public_pack = repository.ensure_public_pack()
+    public_pack.add_sticker("public-sticker", ["wave"])
+    user = StickfixUser("alice")
+    user.shuffle = True
+    repository.users[user.id] = user
+
+    result = make_use_case(repository)(InlineQueryRequest(user_id="alice", query_text="wave"))
+
+    assert_that(result.is_personal, is_(True))
+    assert_that(result.cache_time, equal_to(1))
+
+
+@pytest.mark.parametrize("private_mode", [True, False], ids=["private-mode", "own-stickers"])
+def test_answers_including_a_private_pack_stay_personal(private_mode: bool) -> None:
+    repository = FakeUserRepository()
+    repository.ensure_public_pack()
+    user = StickfixUser("alice")
+    user.private_mode = private_mode
+    user.add_sticker("private-sticker", ["wave"])
+    repository.users[user.id] = user
+
+    result = make_use_case(repository)(InlineQueryRequest(user_id="alice", query_text="wave"))
+
+    assert_that(result.is_personal, is_(True))
+    assert_that(result.cache_time, equal_to(1))
+
+
+def test_cache_policy_can_be_injected() -> None:
+    repository = FakeUserRepository()
+    repository.ensure_public_pack()
+    use_case = ResolveInlineQuery(
+        repository,
+        FakeHelpContentProvider(),
+        cache_policy=InlineCachePolicy(shared_cache_time=60),
+    )
+
+    result = use_case(InlineQueryRequest(user_id=None, query_text="wave"))
+
+    assert_that(result.cache_time, equal_to(60))
+
+
+def test_popularity_weighted_suggester_can_pick_default_tags() -> None:
+    repository = FakeUserRepository()
+    public_pack = repository.ensure_public_pack()
+    public_pack.add_sticker("sticker-1", ["wave"])
+    use_case = ResolveInlineQuery(
+        repository,
+        FakeHelpContentProvider(),
+        tag_suggester=PopularTagSuggester(),
+    )
+
+    result = use_case(InlineQueryRequest(user_id=None, query_text=""))
+
+    assert_that(result.default_tags, equal_to(("wave",)))
+
+
+@pytest.mark.parametrize("query_text", ["WAVE", "  wave   smile ", "ｗａｖｅ smile wave"])
+def test_query_text_is_tokenized_and_normalized(query_text: str) -> None:
+    repository = FakeUserRepository()
+    public_pack = repository.ensure_public_pack()
+    public_pack.add_sticker("sticker-1", ["wave", "smile"])
+
+    result = make_use_case(repository)(InlineQueryRequest(user_id=None, query_text=query_text))
+
+    assert_that(result.sticker_ids, equal_to(("sticker-1",)))
+
+
+def test_unknown_tag_short_circuits_before_resolving_other_tags() -> None:
+    repository = FakeUserRepository()
+    public_pack = repository.ensure_public_pack()
+    public_pack.add_sticker("sticker-1", ["wave"])
+
+    result = make_use_case(repository)(
+        InlineQueryRequest(user_id=None, query_text="wave missing"),
+    )
+
+    assert_that(result.sticker_ids, equal_to(()))
+    assert_that(public_pack.cache, equal_to({}))
+
+
+def test_whitespace_only_query_is_treated_as_empty() -> None:
+    repository = FakeUserRepository()
+    repository.ensure_public_pack()
+
+    result = make_use_case(repository)(InlineQueryRequest(user_id=None, query_text="   "))
+
+    assert_that(result.show_default_help, is_(True))
+
+
+def test_partial_last_word_matches_tags_by_prefix() -> None:
+    repository = FakeUserRepository()
+    public_pack = repository.ensure_public_pack()
+    public_pack.add_sticker("cat-sticker", ["cat"])
+    public_pack.add_sticker("catalog-sticker", ["catalog"])
+    public_pack.add_sticker("dog-sticker", ["dog"])
+
+    result = make_use_case(repository)(InlineQueryRequest(user_id=None, query_text="ca"))
+
+    assert_that(set(result.sticker_ids), equal_to({"cat-sticker", "catalog-sticker"}))
+
+
+def test_trailing_space_marks_the_last_word_as_complete() -> None:
+    repository = FakeUserRepository()
+    public_pack = repository.ensure_public_pack()
+    public_pack.add_sticker("cat-sticker", ["cat"])
+    public_pack.add_sticker("catalog-sticker", ["catalog"])
+
+    complete = make_use_case(repository)(InlineQueryRequest(user_id=None, query_text="cat "))
+    partial = ResolveInlineQuery(repository, FakeHelpContentProvider(), fuzzy_matching=False)(
+        InlineQueryRequest(user_id=None, query_text="ca ")
+    )
+
+    assert_that(complete.sticker_ids, equal_to(("cat-sticker",)))
+    assert_that(partial.sticker_ids, equal_to(()))
+
+
+def test_prefix_completion_merges_at_most_the_configured_number_of_tags() -> None:
+    repository = FakeUserRepository()
+    public_pack = repository.ensure_public_pack()
+    for tag in ("caa", "cab", "cac"):
+        public_pack.add_sticker(f"{tag}-sticker", [tag])
+    use_case = ResolveInlineQuery(repository, FakeHelpContentProvider(), prefix_completions=2)
+
+    result = use_case(InlineQueryRequest(user_id=None, query_text="ca"))
+
+    assert_that(set(result.sticker_ids), equal_to({"caa-sticker", "cab-sticker"}))
+
+
+def test_misspelled_tag_is_substituted_by_the_nearest_known_tag() -> None:
+    repository = FakeUserRepository()
+    public_pack = repository.ensure_public_pack()
+    public_pack.add_sticker("wave-sticker", ["wave"])
+    public_pack.add_sticker("smile-sticker", ["smile"])
+
+    result = make_use_case(repository)(InlineQueryRequest(user_id=None, query_text="smlie "))
+
+    assert_that(result.sticker_ids, equal_to(("smile-sticker",)))
+    assert_that(result.corrected_tags, equal_to(("smile",)))
+
+
+def test_fuzzy_matching_is_skipped_when_the_query_has_results_or_no_close_tag() -> None:
+    repository = FakeUserRepository()
+    public_pack = repository.ensure_public_pack()
+    public_pack.add_sticker("wave-sticker", ["wave"])
+
+    exact = make_use_case(repository)(InlineQueryRequest(user_id=None, query_text="wave "))
+    unrelated = make_use_case(repository)(InlineQueryRequest(user_id=None, query_text="zzzzzz "))
+
+    assert_that(exact.corrected_tags, equal_to(()))
+    assert_that(unrelated.sticker_ids, equal_to(()))
+    assert_that(unrelated.corrected_tags, equal_to(()))
+
+
+def test_boolean_operators_combine_user_and_public_stickers() -> None:
+    repository = FakeUserRepository()
+    public_pack = repository.ensure_public_pack()
+    public_pack.add_sticker("public-cat", ["cat"])
+    public_pack.add_sticker("public-dog", ["dog", "cute"])
+    user = StickfixUser("user-1")
+    user.add_sticker("user-cat", ["cat", "cute"])
+    repository.save_user(user)
+
+    def resolve(text: str) -> set[str]:
+        result = make_use_case(repository)(InlineQueryRequest(user_id="user-1", query_text=text))
+        return set(result.sticker_ids)
+
+    assert_that(resolve("cat|dog "), equal_to({"public-cat", "public-dog", "user-cat"}))
+    assert_that(resolve("cute -dog "), equal_to({"user-cat"}))
+    assert_that(resolve("c* -cute "), equal_to({"public-cat"}))
+
+    user.private_mode = True
+    assert_that(resolve("cat|dog "), equal_to({"user-cat"}))
+
+
+def test_paginated_boolean_query_returns_consecutive_pages() -> None:
+    repository = FakeUserRepository()
+    public_pack = repository.ensure_public_pack()
+    for index in range(5):
+        public_pack.add_sticker(f"sticker-{index}", ["cat" if index % 2 else "dog"])
+    use_case = make_use_case(repository)
+
+    pages = [
+        use_case(InlineQueryRequest(user_id=None, query_text="cat|dog ", offset=offset, limit=2))
+        for offset in (0, 2, 4)
+    ]
+
+    sticker_ids = [sticker for page in pages for sticker in page.sticker_ids]
+    assert_that(sorted(sticker_ids), equal_to([f"sticker-{index}" for index in range(5)]))
+
+
+def test_empty_query_answers_are_personal_even_without_recent_stickers() -> None:
+    repository = FakeUserRepository()
+    public_pack = repository.ensure_public_pack()
+    public_pack.add_sticker("wave-1", ["wave"])
+    newcomer = StickfixUser("newcomer")
+    regular = StickfixUser("regular")
+    regular.remember_sticker("wave-1")
+    repository.save_user(newcomer)
+    repository.save_user(regular)
+    resolve = make_use_case(repository)
+
+    first = resolve(InlineQueryRequest(user_id="newcomer", query_text=""))
+    second = resolve(InlineQueryRequest(user_id="regular", query_text=""))
+
+    assert_that(first.sticker_ids, equal_to(()))
+    assert_that(first.is_personal, is_(True))
+    assert_that(first.cache_time, equal_to(1))
+    assert_that(second.sticker_ids, equal_to(("wave-1",)))
+    assert_that(second.is_personal, is_(True))
@@ -173,3 +173,36 @@ def test_delete_sticker_removes_from_private_pack_when_private_mode_is_enabled()
     )
 
     assert_that(repository.users["alice"].stickers, equal_to({}))
+
+
+def test_add_sticker_stores_canonical_deduplicated_tags() -> None:
+    repository = FakeUserRepository()
+
+    result = AddSticker(repository)(add_command(tags=("Wave", "WAVE", " ｗａｖｅ ", "Smile")))
+
+    assert_that(result.effective_tags, equal_to(("wave", "smile")))
+    assert_that(
+        repository.users[SF_PUBLIC].stickers,
+        equal_to({"wave": ["sticker-1"], "smile": ["sticker-1"]}),
+    )
+
+
+def test_get_and_delete_match_tags_written_in_another_case() -> None:
+    repository = FakeUserRepository()
+    AddSticker(repository)(add_command(tags=("wave",)))
+
+    found = GetStickers(repository)(
+        GetStickersQuery(user_id="alice", chat_id="chat-1", chat_type="private", tags=("WAVE",))
+    )
+    DeleteSticker(repository)(
+        DeleteStickerCommand(
+            user_id="alice",
+            chat_id="chat-1",
+            chat_type="private",
+            reply_sticker_id="sticker-1",
+            tags=("Wave",),
+        )
+    )
+
+    assert_that(found.sticker_ids, equal_to(("sticker-1",)))
+    assert_that(repository.users[SF_PUBLIC].stickers, equal_to({}))
@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+from collections import Counter
+
+import pytest
+from hamcrest import assert_that, equal_to, greater_than
+
+from benchmarks.dispatcher_throughput import FakeBot, format_results, run_benchmark
+from benchmarks.load import PopulationSpec, SyntheticPopulation, UpdateFactory, UpdateMix
+
+SMALL = PopulationSpec(users=20, tags=50, public_stickers=200, stickers_per_user=10)
+
+
+def kind_of(payload: dict) -> str:
+    return next(key for key in payload if key != "update_id")
+
+
+def test_population_is_determined_by_its_spec() -> None:
+    first, second = SyntheticPopulation(SMALL), SyntheticPopulation(SMALL)
+
+    assert_that(first.packs, equal_to(second.packs))
+    assert_that(first.private_users, equal_to(second.private_users))
+    assert_that(len(first.users()), equal_to(SMALL.users + 1))
+
+
+def test_update_mix_controls_the_generated_update_kinds() -> None:
+    population = SyntheticPopulation(SMALL)
+    mix = UpdateMix(inline_query=1, chosen_inline_result=0, add=0, get=0)
+
+    payloads = list(UpdateFactory(population, mix).payloads(20))
+
+    assert_that({kind_of(payload) for payload in payloads}, equal_to({"inline_query"}))
+    assert_that([payload["update_id"] for payload in payloads], equal_to(list(range(1, 21))))
+
+
+@pytest.mark.parametrize("workers", [0, 2])
+def test_every_update_goes_through_the_real_handlers(workers: int) -> None:
+    population = SyntheticPopulation(SMALL)
+    payloads = list(UpdateFactory(population).payloads(60))
+    bot = FakeBot()
+
+    result = run_benchmark(population.seed, payloads, workers, timeout=30, bot=bot)
+
+    assert_that(result.completed, equal_to(True))
+    assert_that(result.errors, equal_to(0))
+    assert_that(result.latency.count, equal_to(60))
+    assert_that(result.updates_per_second, greater_than(0))
+    inline_queries = Counter(kind_of(payload) for payload in payloads)["inline_query"]
+    assert_that(bot.calls["answer_inline_query"], equal_to(inline_queries))
+    assert_that(format_results([result]).splitlines()[1].split()[0], equal_to(str(workers)))
@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from hamcrest import assert_that, equal_to
+
+from benchmarks.dispatcher_throughput import format_breakdown, run_benchmark
+from benchmarks.load import PopulationSpec, SyntheticPopulation, UpdateFactory
+from benchmarks.replay import load_recording, scale, store_seeder
+from bot.database.storage import StickfixDB
+from bot.infrastructure.telegram import UpdateRecorder
+
+SMALL = PopulationSpec(users=10, tags=30, public_stickers=100, stickers_per_user=5)
+
+
+def record(path: Path, payloads: list[dict], times: list[float]) -> None:
+    clock = iter(times)
+    recorder = UpdateRecorder(path, clock=lambda: next(clock))
+    for payload in payloads:
+        recorder.record(payload)
+    recorder.close()
+
+
+def test_recordings_load_as_renumbered_updates_with_offsets(tmp_path: Path) -> None:
+    path = tmp_path / "updates.jsonl"
+    payloads = list(UpdateFactory(SyntheticPopulation(SMALL)).payloads(3))
+    for payload in payloads:
+        payload["update_id"] += 1000
+    record(path, payloads, [50.0, 50.5, 52.0])
+
+    replayed, offsets = load_recording(path)
+
+    assert_that([payload["update_id"] for payload in replayed], equal_to([1, 2, 3]))
+    assert_that(offsets, equal_to([0.0, 0.5, 2.0]))
+    assert_that(scale(offsets, 2), equal_to([0.0, 0.25, 1.0]))
+    assert_that(scale(offsets, None), equal_to(None))
+
+
+def test_a_recording_replays_through_the_real_handlers(tmp_path: Path) -> None:
+    population = SyntheticPopulation(SMALL)
+    path = tmp_path / "updates.jsonl.gz"
+    payloads = list(UpdateFactory(population).payloads(30))
+    unhandled = {"update_id": 31, "edited_message": payloads[0].get("message", {})}
+    record(path, [*payloads, unhandled], [float(index) / 1000 for index in range(31)])
+    replayed, offsets = load_recording(path)
+
+    result = run_benchmark(population.seed, replayed, 0, timeout=30, offsets=scale(offsets, 10))
+
+    assert_that(result.completed, equal_to(True))
+    assert_that(result.errors, equal_to(0))
+    assert_that(result.latency.count + result.ignored, equal_to(31))
+    assert_that(result.ignored, equal_to(1))
+    assert_that("inline_query" in format_breakdown(result), equal_to(True))
+
+
+def test_stores_are_seeded_from_a_copy_of_the_snapshot(tmp_path: Path) -> None:
+    source = StickfixDB("users", data_dir=tmp_path / "prod")
+    SyntheticPopulation(SMALL).seed(source)
+    source.save()
+    snapshot = tmp_path / "prod" / "users.yaml"
+    before = snapshot.read_bytes()
+    target = StickfixDB("users", data_dir=tmp_path / "bench")
+
+    store_seeder(snapshot)(target)
+
+    assert_that(set(target), equal_to(set(source)))
+    assert_that(snapshot.read_bytes(), equal_to(before))
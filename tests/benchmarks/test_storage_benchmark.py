@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+from hamcrest import assert_that, contains_string, empty, equal_to, greater_than, has_length
+
+from benchmarks.storage import OPERATIONS, find_regressions, format_results, generate_users, measure
+
+
+def report(**seconds: float) -> dict:
+    return {"results": [{"users": 1000, "seconds": seconds}]}
+
+
+def test_generated_users_are_deterministic_and_sized() -> None:
+    first, second = generate_users(30, stickers_per_user=4), generate_users(30, stickers_per_user=4)
+
+    assert_that(len(first), equal_to(30))
+    assert_that(
+        {key: user.stickers for key, user in first.items()},
+        equal_to({key: user.stickers for key, user in second.items()}),
+    )
+    stickers = {
+        sticker for user in first.values() for ids in user.stickers.values() for sticker in ids
+    }
+    assert_that(len(stickers), equal_to(30 * 4))
+
+
+def test_measure_reports_every_operation_and_the_snapshot_size() -> None:
+    result = measure(20, repeat=2)
+
+    assert_that(result["users"], equal_to(20))
+    assert_that(set(result["seconds"]), equal_to(set(OPERATIONS)))
+    assert_that(result["samples"]["recover"], has_length(2))
+    assert_that(result["snapshot_bytes"], greater_than(0))
+    assert_that(format_results([result]), contains_string("recover"))
+
+
+def test_regressions_are_reported_above_the_threshold_only() -> None:
+    baseline = report(save=1.0, init=1.0, reload=1.0, recover=1.0)
+    current = report(save=1.05, init=1.2, reload=0.9, recover=5.0)
+
+    regressions = find_regressions(baseline, current, threshold=10)
+
+    assert_that(regressions, has_length(1))
+    assert_that(regressions[0], contains_string("init with 1000 users"))
+    assert_that(find_regressions(baseline, current, threshold=25), empty())
+    assert_that(find_regressions({"results": []}, current, threshold=0), empty())
@@ -0,0 +1,78 @@
+import pytest
+
+from bot.domain.query import (
+    And,
+    Not,
+    Or,
+    Prefix,
+    Term,
+    normalize_tag,
+    normalize_tags,
+    parse_boolean_query,
+    parse_query,
+    query_terms,
+    rewrite_leaves,
+)
+
+
+@pytest.mark.parametrize(
+    ("raw", "expected"),
+    [
+        ("Wave", "wave"),
+        ("  wave\t", "wave"),
+        ("ｗａｖｅ", "wave"),
+        ("STRASSE", "strasse"),
+        ("Straße", "strasse"),
+        ("   ", ""),
+    ],
+)
+def test_normalize_tag_applies_nfkc_casefold_and_strip(raw, expected):
+    assert normalize_tag(raw) == expected
+
+
+def test_normalized_tags_are_interned():
+    first = normalize_tag("".join(["Wa", "ve"]))
+    second = normalize_tag("".join(["wa", "VE"]))
+
+    assert first is second
+
+
+def test_normalize_tags_drops_empty_and_duplicate_tags_preserving_order():
+    assert normalize_tags(["Smile", "", "wave", "SMILE", " "]) == ("smile", "wave")
+
+
+def test_parse_query_splits_on_any_whitespace():
+    assert parse_query("  wave   smile\tcat ") == ("wave", "smile", "cat")
+    assert parse_query("") == ()
+
+
+@pytest.mark.parametrize(
+    ("text", "expected"),
+    [
+        ("Cat", Term("cat")),
+        ("cat dog", And((Term("cat"), Term("dog")))),
+        ("cat|Dog", Or((Term("cat"), Term("dog")))),
+        ("cat -dog", And((Term("cat"), Not(Term("dog"))))),
+        ("ca*", Prefix("ca")),
+        ("-cat|dog*", Not(Or((Term("cat"), Prefix("dog"))))),
+        ("cat cat|cat", Term("cat")),
+        ("  ", None),
+        ("- | *", None),
+    ],
+)
+def test_parse_boolean_query_builds_the_query_ast(text, expected):
+    assert parse_boolean_query(text) == expected
+
+
+def test_parse_boolean_query_completes_the_last_plain_alternative_while_typing():
+    assert parse_boolean_query("cat do", complete_last=True) == And((Term("cat"), Prefix("do")))
+    assert parse_boolean_query("cat|do", complete_last=True) == Or((Term("cat"), Prefix("do")))
+    assert parse_boolean_query("cat -do", complete_last=True) == And((Term("cat"), Not(Term("do"))))
+
+
+def test_query_terms_and_rewrite_leaves_skip_negations():
+    query = parse_boolean_query("cat|dog* -cow")
+
+    assert list(query_terms(query)) == [Term("cat"), Prefix("dog")]
+    rewritten = rewrite_leaves(query, lambda leaf: Term("x") if leaf == Term("cat") else None)
+    assert rewritten == And((Or((Term("x"), Prefix("dog"))), Not(Term("cow"))))
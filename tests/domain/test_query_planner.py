@@ -0,0 +1,69 @@
+from itertools import islice
+
+from bot.domain.query import And, Not, Or, Prefix, Term
+from bot.domain.query_planner import QueryPlanner
+
+
+class FakePostingSource:
+    def __init__(self, postings):
+        self._postings = postings
+        self.materialized = []
+
+    def cardinality(self, tag):
+        return len(self._postings.get(tag, ()))
+
+    def postings(self, tag):
+        self.materialized.append(tag)
+        return set(self._postings.get(tag, ()))
+
+    def ordered(self, tag):
+        self.materialized.append(tag)
+        return sorted(self._postings.get(tag, ()))
+
+    def completions(self, prefix):
+        return sorted(tag for tag in self._postings if tag.startswith(prefix))
+
+
+def make_planner(**postings):
+    source = FakePostingSource(postings)
+    return QueryPlanner(source), source
+
+
+def test_and_is_driven_by_the_smallest_posting_list():
+    planner, source = make_planner(big=[f"s{i}" for i in range(100)], small=["s1", "s7", "x"])
+
+    assert list(planner.iterate(And((Term("big"), Term("small"))))) == ["s1", "s7"]
+    assert source.materialized[0] == "small"
+
+
+def test_not_is_evaluated_against_the_driving_candidates():
+    planner, _ = make_planner(cat=["s1", "s2", "s3"], dog=["s2"])
+
+    assert list(planner.iterate(And((Term("cat"), Not(Term("dog")))))) == ["s1", "s3"]
+    assert list(planner.iterate(And((Not(Term("dog")),)))) == []
+    assert list(planner.iterate(Not(Term("dog")))) == []
+
+
+def test_unknown_tag_short_circuits_a_conjunction():
+    planner, source = make_planner(cat=["s1"])
+
+    assert list(planner.iterate(And((Term("cat"), Term("missing"))))) == []
+    assert source.materialized == []
+
+
+def test_or_is_lazy_and_deduplicated():
+    planner, source = make_planner(cat=["s1", "s2"], dog=["s2", "s3"], cow=["s4"])
+    query = Or((Term("cat"), Term("dog"), Term("cow")))
+
+    assert list(islice(planner.iterate(query), 2)) == ["s1", "s2"]
+    assert source.materialized == ["cat"]
+    assert list(planner.iterate(query)) == ["s1", "s2", "s3", "s4"]
+
+
+def test_prefix_expands_to_completions():
+    planner, _ = make_planner(cat=["s1"], catgirl=["s2"], dog=["s3"])
+
+    assert list(planner.iterate(Prefix("cat"))) == ["s1", "s2"]
+    assert planner.contains(Prefix("cat"), "s2")
+    assert not planner.contains(Prefix("cat"), "s3")
+    assert planner.estimate(Prefix("cat")) == 2
@@ -0,0 +1,51 @@
+import pytest
+import yaml
+
+from bot.domain.recent_stickers import RecentStickers
+
+
+def test_recent_stickers_are_read_newest_first():
+    recent = RecentStickers(capacity=3)
+
+    for sticker_id in ("a", "b", "c"):
+        recent.remember(sticker_id)
+
+    assert recent.latest() == ["c", "b", "a"]
+    assert len(recent) == 3
+
+
+def test_oldest_sticker_is_overwritten_when_the_buffer_is_full():
+    recent = RecentStickers(capacity=3)
+
+    for sticker_id in ("a", "b", "c", "d", "e"):
+        recent.remember(sticker_id)
+
+    assert recent.latest() == ["e", "d", "c"]
+    assert len(recent) == 3
+
+
+def test_consecutive_repeats_are_recorded_once_and_older_repeats_are_skipped():
+    recent = RecentStickers(capacity=4)
+
+    assert recent.remember("a") is True
+    assert recent.remember("a") is False
+    recent.remember("b")
+    recent.remember("a")
+
+    assert recent.latest() == ["a", "b"]
+
+
+def test_recent_stickers_survive_a_yaml_round_trip():
+    recent = RecentStickers(capacity=2)
+    for sticker_id in ("a", "b", "c"):
+        recent.remember(sticker_id)
+
+    loaded = yaml.load(yaml.dump(recent, Dumper=yaml.Dumper), yaml.Loader)  # noqa: S506
+
+    assert loaded.capacity == 2
+    assert loaded.latest() == ["c", "b"]
+
+
+def test_recent_stickers_need_at_least_one_slot():
+    with pytest.raises(ValueError):
+        RecentStickers(capacity=0)
@@ -0,0 +1,151 @@
+from collections import Counter
+from unittest.mock import patch
+
+from bot.domain.tag_index import FuzzyTagIndex, TagIndex, WeightedTagSampler, bounded_distance
+
+
+def test_tag_index_adds_and_discards_tags_with_swap_removal():
+    index = TagIndex(["wave", "smile", "cat"])
+
+    assert index.add("wave") is False
+    assert index.discard("wave") is True
+    assert index.discard("wave") is False
+
+    assert set(index) == {"smile", "cat"}
+    assert len(index) == 2
+    assert "wave" not in index
+    assert "cat" in index
+
+
+def test_tag_index_random_tag_picks_from_dense_array():
+    index = TagIndex(["wave", "smile"])
+
+    with patch("bot.domain.tag_index.random.choice", side_effect=lambda tags: tags[-1]):
+        assert index.random_tag() == "smile"
+
+    assert TagIndex().random_tag() is None
+
+
+def test_tag_index_stays_consistent_after_interleaved_updates():
+    index = TagIndex()
+    expected = set()
+    for step in range(200):
+        tag = f"tag-{step % 17}"
+        if step % 3 == 0:
+            index.discard(tag)
+            expected.discard(tag)
+        else:
+            index.add(tag)
+            expected.add(tag)
+
+    assert set(index) == expected
+    assert len(index) == len(expected)
+
+
+def test_weighted_sampler_holds_one_slot_per_posting():
+    sampler = WeightedTagSampler({"wave": ["a", "b", "c"], "smile": ["a"]})
+
+    with patch("bot.domain.tag_index.random.choice", side_effect=Counter):
+        slots = sampler.random_tag()
+
+    assert slots == Counter({"wave": 3, "smile": 1})
+    assert len(sampler) == 4
+
+
+def test_weighted_sampler_removal_keeps_remaining_slots_consistent():
+    sampler = WeightedTagSampler({"wave": ["a", "b"], "smile": ["a", "b", "c"], "cat": ["a"]})
+
+    sampler.remove("wave")
+    sampler.remove("cat")
+    sampler.remove("cat")
+    sampler.add("dog")
+    sampler.remove("smile")
+
+    with patch("bot.domain.tag_index.random.choice", side_effect=Counter):
+        slots = sampler.random_tag()
+
+    assert slots == Counter({"wave": 1, "smile": 2, "dog": 1})
+    assert WeightedTagSampler().random_tag() is None
+
+
+def test_with_prefix_returns_sorted_completions_up_to_limit():
+    index = TagIndex(["cats", "cat", "dog", "catalog", "car"])
+
+    assert index.with_prefix("cat", 10) == ["cat", "catalog", "cats"]
+    assert index.with_prefix("ca", 2) == ["car", "cat"]
+    assert index.with_prefix("z", 10) == []
+
+
+def test_with_prefix_follows_incremental_updates():
+    index = TagIndex(["cat"])
+    index.add("cattle")
+    index.add("ant")
+    index.discard("cat")
+
+    assert index.with_prefix("cat", 10) == ["cattle"]
+    assert index.with_prefix("", 10) == ["ant", "cattle"]
+
+
+def test_bounded_distance_counts_transpositions_and_stops_past_the_bound():
+    assert bounded_distance("smile", "smile", 2) == 0
+    assert bounded_distance("smlie", "smile", 2) == 1
+    assert bounded_distance("cat", "cart", 2) == 1
+    assert bounded_distance("kitten", "sitting", 2) == 3
+    assert bounded_distance("a", "abcdef", 2) == 3
+
+
+def test_fuzzy_index_returns_nearest_tags_first():
+    index = FuzzyTagIndex(["smile", "smiles", "simile", "wave"])
+
+    assert index.nearest("smlie") == ["smile"]
+    assert index.nearest("smile", limit=3) == ["smile", "simile", "smiles"]
+    assert index.nearest("zzzz") == []
+
+
+def test_fuzzy_index_matches_typos_past_the_indexed_prefix():
+    index = FuzzyTagIndex(["celebration", "celebrate"], prefix_length=4)
+
+    assert index.nearest("celebratoin") == ["celebration"]
+    assert index.nearest("clebrate") == ["celebrate"]
+
+
+def test_fuzzy_index_forgets_discarded_tags():
+    index = FuzzyTagIndex(["wave", "wade"])
+    index.discard("wave")
+    index.add("wake")
+
+    assert index.nearest("wave", limit=5) == ["wade", "wake"]
+    index.discard("wade")
+    index.discard("wake")
+    assert index.nearest("wave") == []
+
+
+def test_fuzzy_index_stops_verifying_candidates_once_the_budget_is_spent():
+    ticks = iter(range(1000))
+    index = FuzzyTagIndex(
+        [f"tag{i}" for i in range(100)], budget=0.5, clock=lambda: float(next(ticks))
+    )
+
+    assert len(index.nearest("tag5", limit=100)) < 100
+
+
+def test_tag_index_changes_publish_new_lists_instead_of_editing_scanned_ones():
+    index = TagIndex(["cat", "dog"])
+    scanned = index._sorted
+
+    assert index.update(added=["cow", "ant"], removed=["dog"]) == 3
+
+    assert scanned == ["cat", "dog"]
+    assert index.with_prefix("", 10) == ["ant", "cat", "cow"]
+    assert sorted(index) == ["ant", "cat", "cow"]
+
+
+def test_fuzzy_index_replaces_candidate_sets_instead_of_editing_them():
+    index = FuzzyTagIndex(["wave"])
+    candidates = index._deletes["wave"]
+
+    index.add("wave2")
+    index.discard("wave")
+
+    assert candidates == {"wave"}
+    assert index.nearest("wavr") == ["wave2"]
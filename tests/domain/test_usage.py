@@ -0,0 +1,29 @@
+import math
+
+import pytest
+
+from bot.domain.usage import DEFAULT_HALF_LIFE, UNUSED, combine, decayed_score, record_use
+
+
+def test_decayed_score_halves_every_half_life():
+    score = record_use(UNUSED, now=0.0)
+
+    assert decayed_score(score, now=0.0) == pytest.approx(1.0)
+    assert decayed_score(score, now=DEFAULT_HALF_LIFE) == pytest.approx(0.5)
+    assert decayed_score(UNUSED, now=0.0) == 0.0
+
+
+def test_recent_uses_outweigh_older_ones():
+    old = record_use(record_use(UNUSED, now=0.0), now=0.0)
+    recent = record_use(UNUSED, now=2 * DEFAULT_HALF_LIFE)
+
+    assert recent > old
+    assert decayed_score(old, now=2 * DEFAULT_HALF_LIFE) == pytest.approx(0.5)
+
+
+def test_scores_do_not_overflow_at_current_timestamps():
+    score = record_use(UNUSED, now=1.8e9, half_life=60.0)
+
+    assert math.isfinite(score)
+    assert combine([score, score]) == pytest.approx(score + 1)
+    assert combine([UNUSED, UNUSED]) == UNUSED
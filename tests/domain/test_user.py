@@ -1,5 +1,9 @@
+import threading
 from unittest.mock import patch
 
+import yaml
+
+from bot.domain.query import And, Not, Or, Prefix, Term, parse_boolean_query
 from bot.domain.user import SF_PUBLIC, StickfixUser
 
 
@@ -117,3 +121,471 @@ def test_get_shuffled_sticker_list_only_changes_order():
 
     assert set(stickers) == {"a", "b", "c"}
     shuffle.assert_called_once()
+
+
+def test_tag_index_tracks_tags_through_add_and_unlink():
+    user = StickfixUser("user-1")
+    user.add_sticker("sticker-1", ["wave", "smile"])
+    assert set(user.tag_index) == {"wave", "smile"}
+
+    user.add_sticker("sticker-2", ["wave", "cat"])
+    user.unlink_sticker("sticker-1", ["wave", "smile"])
+
+    assert set(user.tag_index) == {"wave", "cat"}
+    assert len(user.tag_sampler) == 2
+
+
+def test_random_tag_reuses_the_incrementally_maintained_index():
+    user = StickfixUser("user-1")
+    user.add_sticker("sticker-1", ["wave"])
+    index = user.tag_index
+
+    with patch("bot.domain.user.TagIndex", side_effect=AssertionError("rebuilt tag index")):
+        user.add_sticker("sticker-2", ["smile"])
+        assert user.random_tag()[0] in {"wave", "smile"}
+
+    assert user.tag_index is index
+
+
+def test_popular_random_tag_weights_tags_by_sticker_count():
+    user = StickfixUser("user-1")
+    user.add_sticker("sticker-1", ["wave", "smile"])
+    user.add_sticker("sticker-2", ["wave"])
+
+    with patch("bot.domain.tag_index.random.choice", side_effect=lambda slots: sorted(slots)):
+        assert user.popular_random_tag() == [["smile", "wave", "wave"]]
+
+    assert StickfixUser("empty").popular_random_tag() == []
+
+
+def test_derived_tag_indexes_are_not_persisted_and_rebuild_after_loading():
+    user = StickfixUser("user-1")
+    user.add_sticker("sticker-1", ["wave"])
+    user.random_tag()
+    user.popular_random_tag()
+
+    dumped = yaml.dump(user, Dumper=yaml.Dumper)
+    loaded = yaml.load(dumped, yaml.Loader)  # noqa: S506
+
+    assert "_tag_index" not in dumped
+    assert "_tag_sampler" not in dumped
+    assert loaded.stickers == {"wave": ["sticker-1"]}
+    assert loaded.random_tag() == ["wave"]
+    assert loaded.popular_random_tag() == ["wave"]
+
+
+def test_build_indexes_prepares_every_derived_index_up_front():
+    user = StickfixUser("alice")
+    user.add_sticker("s1", ["wave", "smile"])
+
+    user.build_indexes()
+
+    assert user._tag_index is not None
+    assert user._tag_sampler is not None
+    assert user._fuzzy_index is not None
+    assert user.suggest_tag("wavr") == "wave"
+
+
+def test_loading_legacy_state_canonicalizes_and_merges_tags():
+    user = StickfixUser("user-1")
+    user.stickers = {"Wave": ["b"], "wave": ["a"], "smile": ["c"]}
+
+    loaded = yaml.load(yaml.dump(user, Dumper=yaml.Dumper), yaml.Loader)  # noqa: S506
+
+    assert loaded.stickers == {"wave": ["a", "b"], "smile": ["c"]}
+
+
+def test_resolve_sticker_list_short_circuits_unknown_tags():
+    user = StickfixUser("user-1")
+    public_user = StickfixUser(SF_PUBLIC)
+    user.add_sticker("private", ["wave"])
+    public_user.add_sticker("public", ["smile"])
+
+    assert set(user.resolve_sticker_list(["wave"], public_user=public_user)) == {"private"}
+    user.remove_cached_stickers()
+
+    assert user.resolve_sticker_list(["wave", "missing"], public_user=public_user) == []
+    assert user.cache == {}
+
+
+def test_complete_tag_merges_user_and_public_completions():
+    user = StickfixUser("user-1")
+    public_user = StickfixUser(SF_PUBLIC)
+    user.add_sticker("s1", ["cat"])
+    public_user.add_sticker("s2", ["catalog", "cat"])
+    public_user.add_sticker("s3", ["car"])
+
+    assert user.complete_tag("cat", 5, public_user=public_user) == ["cat", "catalog"]
+    assert user.complete_tag("ca", 2, public_user=public_user) == ["car", "cat"]
+
+    user.private_mode = True
+    assert user.complete_tag("ca", 5, public_user=public_user) == ["cat"]
+
+
+def test_resolve_sticker_list_expands_last_tag_as_prefix():
+    user = StickfixUser("user-1")
+    user.add_sticker("cat-sticker", ["cat", "cute"])
+    user.add_sticker("catalog-sticker", ["catalog", "cute"])
+    user.add_sticker("car-sticker", ["car", "cute"])
+
+    assert set(user.resolve_sticker_list(["cute", "cat"], prefix_completions=5)) == {
+        "cat-sticker",
+        "catalog-sticker",
+    }
+    assert user.resolve_sticker_list(["cute", "cat"]) == ["cat-sticker"]
+    assert user.resolve_sticker_list(["cute", "x"], prefix_completions=5) == []
+
+
+def test_correct_query_substitutes_unknown_tags_from_both_packs():
+    user = StickfixUser("user-1")
+    public_user = StickfixUser(SF_PUBLIC)
+    user.add_sticker("s1", ["smile"])
+    public_user.add_sticker("s2", ["wave"])
+
+    corrected = user.correct_query(parse_boolean_query("smlie|wvae -cta"), public_user=public_user)
+
+    assert corrected == And((Or((Term("smile"), Term("wave"))), Not(Term("cta"))))
+    assert user.correct_query(Term("smile"), public_user=public_user) is None
+    assert user.correct_query(Term("zzzzzz"), public_user=public_user) is None
+
+
+def test_correct_query_keeps_prefixes_that_still_complete():
+    user = StickfixUser("user-1")
+    user.add_sticker("s1", ["celebration", "party"])
+
+    assert user.correct_query(parse_boolean_query("prty cele", complete_last=True)) == And(
+        (Term("party"), Prefix("cele"))
+    )
+    assert user.correct_query(Prefix("prty")) == Term("party")
+
+
+def test_search_evaluates_boolean_queries_over_both_packs():
+    user = StickfixUser("user-1")
+    public_user = StickfixUser(SF_PUBLIC)
+    user.add_sticker("s1", ["cat", "cute"])
+    user.add_sticker("s2", ["dog", "cute"])
+    public_user.add_sticker("s3", ["cat"])
+    public_user.add_sticker("s4", ["catgirl", "cute"])
+
+    def search(text, **kwargs):
+        return user.search(parse_boolean_query(text), public_user=public_user, **kwargs)
+
+    assert search("cat|dog") == ["s1", "s3", "s2"]
+    assert search("cute -dog") == ["s1", "s4"]
+    assert search("cat* cute") == ["s1", "s4"]
+    assert search("cute", limit=2) == ["s1", "s2"]
+
+    user.private_mode = True
+    assert search("cat*") == ["s1"]
+
+
+def test_fuzzy_index_follows_add_and_unlink():
+    user = StickfixUser("user-1")
+    user.add_sticker("s1", ["wave"])
+    assert user.suggest_tag("wvae") == "wave"
+
+    user.add_sticker("s2", ["smile"])
+    user.unlink_sticker("s1", ["wave"])
+
+    assert user.suggest_tag("wvae") is None
+    assert user.suggest_tag("smiel") == "smile"
+
+
+def test_ranked_search_puts_the_most_used_stickers_first():
+    user = StickfixUser("user-1")
+    for sticker_id in ("a", "b", "c", "d"):
+        user.add_sticker(sticker_id, ["cat"])
+    user.record_usage("cat", "c", now=0.0)
+    user.record_usage("cat", "b", now=0.0)
+    user.record_usage("cat", "b", now=0.0)
+
+    assert user.search(Term("cat"), ranked=True) == ["b", "c", "a", "d"]
+    assert user.search(Term("cat"), ranked=True, limit=1) == ["b"]
+    assert user.search(Term("cat")) == ["a", "b", "c", "d"]
+
+
+def test_record_choice_credits_every_pack_holding_the_sticker_under_a_query_tag():
+    user = StickfixUser("user-1")
+    public_user = StickfixUser(SF_PUBLIC)
+    user.add_sticker("s1", ["cat"])
+    public_user.add_sticker("s1", ["catgirl", "cute"])
+
+    changed = user.record_choice(
+        parse_boolean_query("cat* cute -dog"), "s1", now=0.0, public_user=public_user
+    )
+
+    assert changed == [user, public_user]
+    assert set(user.usage) == {"cat"}
+    assert set(public_user.usage) == {"catgirl", "cute"}
+    assert user.record_choice(Term("dog"), "s1", now=0.0) == []
+
+
+def test_unlinking_a_sticker_forgets_its_usage_and_usage_is_persisted():
+    user = StickfixUser("user-1")
+    user.add_sticker("s1", ["cat", "cute"])
+    user.record_usage("cat", "s1", now=0.0)
+    user.record_usage("cute", "s1", now=0.0)
+    user.unlink_sticker("s1", ["cat"])
+
+    loaded = yaml.load(yaml.dump(user, Dumper=yaml.Dumper), yaml.Loader)  # noqa: S506
+
+    assert set(loaded.usage) == {"cute"}
+    legacy = StickfixUser("legacy")
+    del legacy.usage
+    assert yaml.load(yaml.dump(legacy, Dumper=yaml.Dumper), yaml.Loader).usage == {}  # noqa: S506
+
+
+def test_persisted_state_is_detached_from_later_usage_and_history_updates():
+    user = StickfixUser("user-1")
+    user.add_sticker("s1", ["cat"])
+    user.record_usage("cat", "s1", now=0.0)
+    user.remember_sticker("s1")
+    scores = user.usage["cat"]
+
+    state = user.__getstate__()
+    user.record_usage("cat", "s2", now=1.0)
+    user.record_usage("dog", "s1", now=1.0)
+    user.remember_sticker("s2")
+
+    assert set(scores) == {"s1"}
+    assert state["usage"] == {"cat": {"s1": scores["s1"]}}
+    assert state["recent"].latest() == ["s1"]
+    assert user.recent_stickers() == ["s2", "s1"]
+
+
+def test_inline_cache_is_never_persisted():
+    user = StickfixUser("user-1")
+    user.add_sticker("s1", ["cat"])
+    user.cache["cat"] = ["s1"]
+
+    assert user.__getstate__()["cached_stickers"] == {}
+    assert user.cache == {"cat": ["s1"]}
+
+
+def test_add_sticker_publishes_a_new_snapshot_sharing_untouched_postings():
+    user = StickfixUser(SF_PUBLIC)
+    user.add_sticker("s1", ["wave", "hello"])
+    before = user.snapshot
+
+    user.add_sticker("s2", ["wave"])
+    user.add_sticker("s2", ["wave"])
+
+    assert before.version == 1
+    assert user.version == 2
+    assert before.postings == {"wave": ["s1"], "hello": ["s1"]}
+    assert user.snapshot.get("wave") == ["s1", "s2"]
+    assert user.snapshot.get("hello") is before.get("hello")
+
+
+def test_unlink_sticker_leaves_published_snapshots_untouched():
+    user = StickfixUser(SF_PUBLIC)
+    user.add_sticker("s1", ["wave", "hello"])
+    before = user.snapshot
+
+    user.unlink_sticker("s1", ["wave", "missing"])
+    user.unlink_sticker("s1", ["wave"])
+
+    assert before.postings == {"wave": ["s1"], "hello": ["s1"]}
+    assert user.stickers == {"hello": ["s1"]}
+    assert user.version == before.version + 1
+
+
+def test_readers_never_observe_a_half_applied_add():
+    user = StickfixUser(SF_PUBLIC)
+    torn_reads = []
+
+    def write():
+        for index in range(500):
+            user.add_sticker(f"s{index}", ["left", "right"])
+
+    def read():
+        for _ in range(2000):
+            snapshot = user.snapshot
+            if snapshot.get("left") != snapshot.get("right"):
+                torn_reads.append(snapshot.version)
+
+    threads = [threading.Thread(target=write)] + [threading.Thread(target=read) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert torn_reads == []
+    assert len(user.stickers["left"]) == 500
+
+
+def test_index_lookups_run_safely_alongside_tag_writes():
+    user = StickfixUser(SF_PUBLIC)
+    user.add_stickers({f"s{index}": [f"tag{index:03d}"] for index in range(200)})
+    user.build_indexes()
+    errors = []
+    done = threading.Event()
+
+    def write():
+        for index in range(200, 400):
+            user.add_sticker(f"s{index}", [f"tag{index:03d}"])
+            user.unlink_sticker(f"s{index - 200}", [f"tag{index - 200:03d}"])
+        done.set()
+
+    def read():
+        try:
+            while not done.is_set():
+                completions = user.complete_tag("tag", 50)
+                assert completions == sorted(set(completions))
+                user.suggest_tag("tagg1")
+                user.popular_random_tag()
+        except Exception as error:  # noqa: BLE001
+            errors.append(error)
+
+    threads = [threading.Thread(target=write)] + [threading.Thread(target=read) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert user.complete_tag("tag", 3) == ["tag200", "tag201", "tag202"]
+
+
+def test_search_fetches_each_view_once_and_caches_only_the_answer_tags():
+    user = StickfixUser("user-1")
+    public_pack = StickfixUser(SF_PUBLIC)
+    public_pack.add_stickers({f"s{index}": ["a"] for index in range(50)})
+    public_pack.add_stickers({f"s{index}": ["b"] for index in range(0, 50, 2)})
+
+    merged_view = StickfixUser.merged_view
+    with patch.object(StickfixUser, "merged_view", autospec=True, side_effect=merged_view) as views:
+        result = user.search(And((Term("a"), Not(Term("b")))), public_user=public_pack)
+
+    assert len(result) == 25
+    assert sorted(call.args[1] for call in views.call_args_list) == ["a", "b"]
+    assert set(user.cache) == {"a"}
+
+
+def test_snapshot_state_is_persisted_as_plain_stickers():
+    user = StickfixUser("user-1")
+    user.add_sticker("s1", ["wave"])
+
+    dumped = yaml.dump(user, Dumper=yaml.Dumper)
+    loaded = yaml.load(dumped, yaml.Loader)  # noqa: S506
+
+    assert "_snapshot" not in dumped
+    assert "_write_lock" not in dumped
+    assert loaded.stickers == {"wave": ["s1"]}
+    loaded.add_sticker("s2", ["wave"])
+    assert loaded.stickers == {"wave": ["s1", "s2"]}
+
+
+def test_merged_view_is_reused_until_one_of_its_posting_lists_changes():
+    user = StickfixUser("user-1")
+    public_user = StickfixUser(SF_PUBLIC)
+    user.add_sticker("s2", ["cat"])
+    public_user.add_sticker("s1", ["cat"])
+
+    members, ordered = user.merged_view("cat", [user.snapshot, public_user.snapshot])
+    public_user.add_sticker("s9", ["dog"])
+    again = user.merged_view("cat", [user.snapshot, public_user.snapshot])
+    public_user.add_sticker("s3", ["cat"])
+    updated = user.merged_view("cat", [user.snapshot, public_user.snapshot])
+
+    assert ordered == ("s1", "s2")
+    assert again[0] is members
+    assert updated[1] == ("s1", "s2", "s3")
+    assert list(user.merged_view("cat", [user.snapshot])[1]) == ["s2"]
+
+
+def test_merged_views_are_bounded_across_users_and_evict_the_least_recently_used(monkeypatch):
+    monkeypatch.setattr("bot.domain.user.MERGED_VIEW_CAPACITY", 2)
+    user = StickfixUser("user-1")
+    other_user = StickfixUser("user-2")
+    user.add_sticker("s1", ["a", "b"])
+    other_user.add_sticker("s2", ["c"])
+
+    first_a = user.merged_view("a", [user.snapshot])[0]
+    first_b = user.merged_view("b", [user.snapshot])[0]
+    assert user.merged_view("a", [user.snapshot])[0] is first_a
+    other_user.merged_view("c", [other_user.snapshot])
+
+    assert user.merged_view("a", [user.snapshot])[0] is first_a
+    assert user.merged_view("b", [user.snapshot])[0] is not first_b
+
+
+def test_users_without_private_stickers_for_a_tag_share_the_public_posting_list():
+    public_user = StickfixUser(SF_PUBLIC)
+    public_user.add_sticker("s1", ["cat"])
+    user = StickfixUser("user-1")
+    other_user = StickfixUser("user-2")
+    user.add_sticker("s9", ["dog"])
+
+    members, ordered = user.merged_view("cat", [user.snapshot, public_user.snapshot])
+    other_members, other_ordered = other_user.merged_view(
+        "cat", [other_user.snapshot, public_user.snapshot]
+    )
+
+    assert ordered is public_user.stickers["cat"]
+    assert other_ordered is ordered
+    assert other_members is members
+
+
+def test_search_reflects_public_writes_through_merged_views():
+    user = StickfixUser("user-1")
+    public_user = StickfixUser(SF_PUBLIC)
+    user.add_sticker("s1", ["cat"])
+
+    assert user.search(Term("cat"), public_user=public_user) == ["s1"]
+    public_user.add_sticker("s0", ["cat"])
+    assert user.search(Term("cat"), public_user=public_user) == ["s0", "s1"]
+    user.private_mode = True
+    assert user.search(Term("cat"), public_user=public_user) == ["s1"]
+
+
+def test_add_stickers_links_a_batch_in_one_published_version():
+    user = StickfixUser("user-1")
+    user.add_sticker("s0", ["cat"])
+
+    added = user.add_stickers({"s2": ["cat", "cute"], "s1": ["cat"], "s0": ["cat"]})
+
+    assert added == 2
+    assert user.version == 2
+    assert user.stickers == {"cat": ["s0", "s1", "s2"], "cute": ["s2"]}
+    assert set(user.tag_index) == {"cat", "cute"}
+    assert user.add_stickers({"s1": ["cat"]}) == 0
+    assert user.version == 2
+
+
+def test_merge_tags_moves_postings_indexes_and_usage_in_one_version():
+    user = StickfixUser("user-1")
+    user.add_stickers({"s1": ["cat", "kitty"], "s2": ["kitty"], "s3": ["kitten", "cute"]})
+    user.record_usage("kitty", "s1", now=0.0)
+    user.record_usage("cat", "s1", now=0.0)
+    assert user.fuzzy_index.nearest("kity") == ["kitty"]
+    assert len(user.tag_sampler) == 5
+    cute_postings = user.stickers["cute"]
+
+    delta = user.merge_tags(["kitty", "kitten", "missing"], "cat")
+
+    assert delta.removed_tags == ("kitty", "kitten")
+    assert delta.updated_tags == ("cat",)
+    assert user.version == 2
+    assert user.stickers == {"cat": ["s1", "s2", "s3"], "cute": ["s3"]}
+    assert user.stickers["cute"] is cute_postings
+    assert set(user.tag_index) == {"cat", "cute"}
+    assert len(user.tag_sampler) == 4
+    assert user.fuzzy_index.nearest("kity") == []
+    assert set(user.usage) == {"cat"}
+    assert user.usage["cat"]["s1"] == 1.0
+
+
+def test_rename_and_drop_tag():
+    user = StickfixUser("user-1")
+    user.add_stickers({"s1": ["cat"], "s2": ["cat", "dog"]})
+
+    assert user.rename_tag("cat", "feline").updated_tags == ("feline",)
+    assert user.stickers == {"feline": ["s1", "s2"], "dog": ["s2"]}
+    assert user.drop_tag("dog").removed_tags == ("dog",)
+    assert user.stickers == {"feline": ["s1", "s2"]}
+    assert set(user.tag_index) == {"feline"}
+    assert len(user.tag_sampler) == 2
+    assert not user.drop_tag("dog").changed
+    assert not user.rename_tag("feline", "feline").changed
+    assert user.version == 3
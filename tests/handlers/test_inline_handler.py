@@ -16,6 +16,7 @@ from hamcrest import (
 from telegram import InlineQueryResultArticle, InlineQueryResultCachedSticker, ParseMode
 from telegram.ext import ChosenInlineResultHandler, InlineQueryHandler
 
+from bot.application.inline_cache_policy import sticker_result_id
 from bot.application.requests import ClearInlineCacheCommand, InlineQueryRequest
 from bot.application.results import AcknowledgementResult, InlineQueryResult
 from bot.application.use_cases.clear_inline_cache import ClearInlineCache
@@ -54,6 +55,12 @@ class FakeUserStore:
         """Get a user or return None if not found."""
         return self.users.get(key)
 
+    def apply_batch(self, saved: dict[object, StickfixUser], deleted: set[object] = ()) -> None:
+        for key, value in saved.items():
+            self[key] = value
+        for key in deleted:
+            self.users.pop(key, None)
+
 
 class FakeBot:
     def __init__(self) -> None:
@@ -111,6 +118,7 @@ class FakeInlineQuery:
 @dataclass
 class FakeChosenInlineResult:
     query: str
+    result_id: str = ""
 
 
 @dataclass
@@ -215,15 +223,17 @@ def assert_answer_arguments(
     *,
     inline_query_id: str = "inline-1",
     next_offset: str = "49",
+    cache_time: int = 300,
+    is_personal: bool = False,
 ) -> None:
     call = bot.answer_inline_query_calls[0]
     assert_that(call["args"][0], equal_to(inline_query_id))
-    assert_that(call["kwargs"]["cache_time"], equal_to(1))
-    assert_that(call["kwargs"]["is_personal"], is_(True))
+    assert_that(call["kwargs"]["cache_time"], equal_to(cache_time))
+    assert_that(call["kwargs"]["is_personal"], is_(is_personal))
     assert_that(call["kwargs"]["next_offset"], equal_to(next_offset))
 
 
-def test_empty_inline_query_at_first_page_includes_help_article_before_stickers(
+def test_empty_inline_query_at_first_page_answers_with_help_article_only(
     monkeypatch: pytest.MonkeyPatch,
 ) -> None:
     monkeypatch.setattr(random, "choice", lambda tags: "wave")
@@ -240,9 +250,8 @@ def test_empty_inline_query_at_first_page_includes_help_article_before_stickers(
     assert_that(results[0].title, equal_to("Click me for help"))
     assert_that(results[0].description, equal_to("Try calling me inline like `@stickfixbot wave`"))
     assert_that(results[0].input_message_content.parse_mode, equal_to(ParseMode.MARKDOWN))
-    assert_that(results[1], instance_of(InlineQueryResultCachedSticker))
-    assert_that(results[1].sticker_file_id, equal_to("empty-query-sticker"))
-    assert_answer_arguments(bot)
+    assert_that(results, has_length(1))
+    assert_answer_arguments(bot, cache_time=1, is_personal=True)
 
 
 def test_non_empty_inline_query_returns_cached_sticker_results_without_help_article() -> None:
@@ -323,7 +332,52 @@ def test_inline_query_resolves_current_public_private_fallback_behaviour(
     )
 
 
-def test_chosen_result_clears_existing_user_cache_and_writes_user_back() -> None:
+def test_private_pack_answers_stay_personal_and_short_lived() -> None:
+    store = FakeUserStore()
+    make_public_pack(store)
+    user = make_user(store, 123, private_mode=True)
+    user.add_sticker("private-sticker", ["wave"])
+    bot = FakeBot()
+
+    call_inline_get(make_handler(store), bot, user_id=123, query="wave")
+
+    assert_answer_arguments(bot, cache_time=1, is_personal=True)
+
+
+def test_inline_queries_never_write_to_the_store() -> None:
+    store = FakeUserStore()
+    make_public_pack(store).add_sticker("public-sticker", ["wave"])
+    make_user(store, 123).add_sticker("private-sticker", ["wave"])
+    handler = make_handler(store)
+
+    for user_id, query in ((123, "wave"), (123, ""), (456, "wave"), (456, "")):
+        call_inline_get(handler, FakeBot(), user_id=user_id, query=query)
+
+    assert_that(store.writes, empty())
+
+
+def test_sticker_results_use_stable_ids_derived_from_sticker_ids() -> None:
+    store = FakeUserStore()
+    public_pack = make_public_pack(store)
+    add_numbered_stickers(public_pack, "wave", 3)
+    handler = make_handler(store)
+    first_bot = FakeBot()
+    second_bot = FakeBot()
+
+    call_inline_get(handler, first_bot, query="wave")
+    call_inline_get(handler, second_bot, query="wave")
+
+    first_ids = {result.sticker_file_id: result.id for result in returned_results(first_bot)}
+    second_ids = {result.sticker_file_id: result.id for result in returned_results(second_bot)}
+    assert_that(first_ids, equal_to(second_ids))
+    assert_that(
+        first_ids,
+        equal_to({sticker_id: sticker_result_id(sticker_id) for sticker_id in first_ids}),
+    )
+    assert_that(all(len(result_id) <= 64 for result_id in first_ids.values()), is_(True))
+
+
+def test_chosen_result_clears_existing_user_cache_without_writing_it_back() -> None:
     store = FakeUserStore()
     make_public_pack(store)
     user = make_user(store, 123, private_mode=True)
@@ -337,10 +391,10 @@ def test_chosen_result_clears_existing_user_cache_and_writes_user_back() -> None
     make_handler(store)._InlineHandler__on_result(update, FakeContext(bot=bot))
 
     assert_that(user.cache, equal_to({}))
-    assert_that(store.writes, equal_to([("123", user)]))
+    assert_that(store.writes, empty())
 
 
-def test_chosen_result_for_missing_user_clears_public_pack_cache_and_writes_public_pack_back() -> (
+def test_chosen_result_for_missing_user_clears_public_pack_cache_without_writing_it_back() -> (
     None
 ):
     store = FakeUserStore()
@@ -355,7 +409,7 @@ def test_chosen_result_for_missing_user_clears_public_pack_cache_and_writes_publ
     make_handler(store)._InlineHandler__on_result(update, FakeContext(bot=bot))
 
     assert_that(public_pack.cache, equal_to({}))
-    assert_that(store.writes, equal_to([(SF_PUBLIC, public_pack)]))
+    assert_that(store.writes, empty())
 
 
 def test_invalid_inline_query_offset_raises_value_error_and_does_not_answer_or_write() -> None:
@@ -495,3 +549,38 @@ def test_chosen_result_builds_command_with_query_text() -> None:
     )
 
     assert_that(fake_use_case.calls[0].query_text, equal_to("wave moon"))
+
+
+def test_chosen_result_records_usage_for_the_chosen_sticker() -> None:
+    store = FakeUserStore()
+    public_pack = make_public_pack(store)
+    public_pack.add_sticker("wave-sticker", ["wave"])
+    update = FakeUpdate(
+        effective_user=FakeTelegramUser(123),
+        chosen_inline_result=FakeChosenInlineResult(
+            query="wave", result_id=sticker_result_id("wave-sticker")
+        ),
+    )
+
+    handler = make_handler(store)
+    call_inline_get(handler, FakeBot(), query="wave")
+
+    handler._InlineHandler__on_result(update, FakeContext(bot=FakeBot()))
+
+    assert_that(list(public_pack.usage), equal_to(["wave"]))
+
+
+def test_chosen_result_that_was_never_answered_records_nothing() -> None:
+    store = FakeUserStore()
+    public_pack = make_public_pack(store)
+    public_pack.add_sticker("wave-sticker", ["wave"])
+    update = FakeUpdate(
+        effective_user=FakeTelegramUser(123),
+        chosen_inline_result=FakeChosenInlineResult(
+            query="wave", result_id=sticker_result_id("wave-sticker")
+        ),
+    )
+
+    make_handler(store)._InlineHandler__on_result(update, FakeContext(bot=FakeBot()))
+
+    assert_that(public_pack.usage, equal_to({}))
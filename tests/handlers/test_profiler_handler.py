@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+from pathlib import Path
+from types import SimpleNamespace
+
+from hamcrest import assert_that, equal_to
+
+from bot.handlers.utility import ProfilerHandler
+
+
+class FakeDispatcher:
+    def __init__(self) -> None:
+        self.handlers = []
+
+    def add_handler(self, handler) -> None:
+        self.handlers.append(handler)
+
+
+class FakeMessage:
+    def __init__(self) -> None:
+        self.text_replies: list[str] = []
+
+    def reply_text(self, text: str) -> None:
+        self.text_replies.append(text)
+
+
+class FakeProfiler:
+    def __init__(self) -> None:
+        self.running = False
+
+    def toggle(self) -> Path | None:
+        self.running = not self.running
+        return None if self.running else Path("logs/profiles/stickfix.folded")
+
+
+def make_update(message: FakeMessage, user_id: int):
+    return SimpleNamespace(
+        effective_message=message,
+        effective_user=SimpleNamespace(id=user_id, username="alice"),
+        effective_chat=SimpleNamespace(id=456, type="private"),
+    )
+
+
+def test_admins_toggle_the_profiler_and_get_the_profile_path() -> None:
+    profiler = FakeProfiler()
+    handler = ProfilerHandler(FakeDispatcher(), {}, profiler, admin_ids=["123"])
+    message = FakeMessage()
+
+    handler._ProfilerHandler__toggle_profiler(make_update(message, 123), SimpleNamespace())
+    handler._ProfilerHandler__toggle_profiler(make_update(message, 123), SimpleNamespace())
+
+    assert_that(message.text_replies, equal_to([
+        "Profiling started. Send /profile again to stop it.",
+        f"Profile written to {Path('logs/profiles/stickfix.folded')}.",
+    ]))
+
+
+def test_other_users_cannot_toggle_the_profiler() -> None:
+    profiler = FakeProfiler()
+    handler = ProfilerHandler(FakeDispatcher(), {}, profiler, admin_ids=["123"])
+    message = FakeMessage()
+
+    handler._ProfilerHandler__toggle_profiler(make_update(message, 999), SimpleNamespace())
+
+    assert_that(profiler.running, equal_to(False))
+    assert_that(message.text_replies, equal_to(["Only admins can use this command."]))
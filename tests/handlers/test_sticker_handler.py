@@ -4,15 +4,36 @@ from types import SimpleNamespace
 
 from hamcrest import assert_that, equal_to
 
-from bot.application.errors import WrongInteractionContextError
-from bot.application.requests import AddStickerCommand, DeleteStickerCommand, GetStickersQuery
-from bot.application.results import AddStickerResult, DeleteStickerResult, GetStickersResult
+from bot.application.errors import (
+    InsufficientPermissionsError,
+    InvalidCommandInputError,
+    StickerSetNotFoundError,
+    WrongInteractionContextError,
+)
+from bot.application.requests import (
+    AddStickerCommand,
+    AddStickerSetCommand,
+    DeleteStickerCommand,
+    DropTagCommand,
+    GetStickersQuery,
+    MergeTagsCommand,
+    RenameTagCommand,
+)
+from bot.application.results import (
+    AddStickerResult,
+    AddStickerSetResult,
+    DeleteStickerResult,
+    GetStickersResult,
+    TagEditResult,
+)
 from bot.handlers.stickers import StickerHandler
+from bot.utils.metrics import HANDLER_LATENCY, METRICS
 
 
 class FakeDispatcher:
     def __init__(self) -> None:
         self.handlers = []
+        self.bot = None
 
     def add_handler(self, handler) -> None:
         self.handlers.append(handler)
@@ -42,6 +63,14 @@ class FakeChat:
         self.sent_stickers.append(sticker_id)
 
 
+class FakeStickerSender:
+    def __init__(self) -> None:
+        self.batches: list[tuple[int, tuple[str, ...]]] = []
+
+    def submit(self, chat_id: int, sticker_ids: tuple[str, ...]) -> None:
+        self.batches.append((chat_id, tuple(sticker_ids)))
+
+
 class FakeAddSticker:
     def __init__(self) -> None:
         self.commands: list[AddStickerCommand] = []
@@ -83,7 +112,7 @@ def make_handler(
     get_use_case: FakeGetStickers | None = None,
     delete_use_case: FakeDeleteSticker | None = None,
 ) -> StickerHandler:
-    handler = StickerHandler(FakeDispatcher(), {})
+    handler = StickerHandler(FakeDispatcher(), {}, sticker_sender=FakeStickerSender())
     handler._StickerHandler__add_sticker_use_case = add_use_case or FakeAddSticker()
     handler._StickerHandler__get_stickers_use_case = get_use_case or FakeGetStickers()
     handler._StickerHandler__delete_sticker_use_case = delete_use_case or FakeDeleteSticker()
@@ -119,9 +148,10 @@ def test_add_handler_builds_command_and_replies_ok() -> None:
     assert_that(message.text_replies, equal_to(["Ok!"]))
 
 
-def test_get_handler_builds_query_and_sends_returned_stickers() -> None:
+def test_get_handler_builds_query_and_queues_returned_stickers() -> None:
     get_use_case = FakeGetStickers()
     handler = make_handler(get_use_case=get_use_case)
+    sender = handler._StickerHandler__sticker_sender
     message = FakeMessage()
     chat = FakeChat()
 
@@ -133,7 +163,8 @@ def test_get_handler_builds_query_and_sends_returned_stickers() -> None:
     assert_that(get_use_case.queries, equal_to([
         GetStickersQuery(user_id=123, chat_id=456, chat_type="private", tags=("wave",))
     ]))
-    assert_that(chat.sent_stickers, equal_to(["sticker-a", "sticker-b"]))
+    assert_that(sender.batches, equal_to([(456, ("sticker-a", "sticker-b"))]))
+    assert_that(chat.sent_stickers, equal_to([]))
 
 
 def test_get_handler_maps_wrong_context_to_existing_reply() -> None:
@@ -170,3 +201,143 @@ def test_delete_handler_builds_command_and_stays_silent_on_success() -> None:
     ]))
     assert_that(message.text_replies, equal_to([]))
     assert_that(message.markdown_replies, equal_to([]))
+
+
+class FakeAddStickerSet:
+    def __init__(self, error: Exception | None = None, added_count: int = 3) -> None:
+        self.error = error
+        self.added_count = added_count
+        self.commands: list[AddStickerSetCommand] = []
+
+    def __call__(self, command: AddStickerSetCommand) -> AddStickerSetResult:
+        self.commands.append(command)
+        if self.error is not None:
+            raise self.error
+        return AddStickerSetResult(
+            set_name=command.set_name,
+            sticker_count=3,
+            added_count=self.added_count,
+            changed=self.added_count > 0,
+        )
+
+
+def test_add_set_handler_builds_command_and_replies_with_count() -> None:
+    handler = make_handler()
+    add_set_use_case = FakeAddStickerSet()
+    handler._StickerHandler__add_sticker_set_use_case = add_set_use_case
+    message = FakeMessage()
+
+    handler._StickerHandler__add_sticker_set(
+        make_update(message), SimpleNamespace(args=["cats", "cat", "cute"])
+    )
+
+    assert_that(add_set_use_case.commands, equal_to([
+        AddStickerSetCommand(
+            user_id=123,
+            chat_id=456,
+            chat_type="private",
+            set_name="cats",
+            tags=("cat", "cute"),
+        )
+    ]))
+    assert_that(message.text_replies, equal_to(["Ok! Added 3 stickers."]))
+
+
+def test_add_set_handler_reports_only_the_stickers_that_were_new() -> None:
+    handler = make_handler()
+    handler._StickerHandler__add_sticker_set_use_case = FakeAddStickerSet(added_count=1)
+    message = FakeMessage()
+
+    handler._StickerHandler__add_sticker_set(make_update(message), SimpleNamespace(args=["cats"]))
+
+    assert_that(
+        message.text_replies,
+        equal_to(["Ok! Added 1 stickers, 2 were already in the pack."]),
+    )
+
+
+def test_add_set_handler_replies_with_usage_or_missing_set() -> None:
+    handler = make_handler()
+    message = FakeMessage()
+
+    handler._StickerHandler__add_sticker_set_use_case = FakeAddStickerSet(
+        InvalidCommandInputError("missing name")
+    )
+    handler._StickerHandler__add_sticker_set(make_update(message), SimpleNamespace(args=[]))
+    handler._StickerHandler__add_sticker_set_use_case = FakeAddStickerSet(
+        StickerSetNotFoundError("missing")
+    )
+    handler._StickerHandler__add_sticker_set(make_update(message), SimpleNamespace(args=["x"]))
+
+    assert_that(message.text_replies, equal_to([
+        "Usage: /addset <set name> <tags...>",
+        "I couldn't find that sticker set.",
+    ]))
+
+
+class FakeEditTags:
+    def __init__(self, error: Exception | None = None, changed: bool = True) -> None:
+        self.error = error
+        self.changed = changed
+        self.commands = []
+
+    def __call__(self, command) -> TagEditResult:
+        self.commands.append(command)
+        if self.error is not None:
+            raise self.error
+        return TagEditResult(changed=self.changed)
+
+
+def test_tag_edit_handlers_build_commands_and_reply() -> None:
+    handler = make_handler()
+    rename, merge, drop = FakeEditTags(), FakeEditTags(), FakeEditTags(changed=False)
+    handler._StickerHandler__rename_tag_use_case = rename
+    handler._StickerHandler__merge_tags_use_case = merge
+    handler._StickerHandler__drop_tag_use_case = drop
+    message = FakeMessage()
+
+    handler._StickerHandler__rename_tag(make_update(message), SimpleNamespace(args=["a", "b"]))
+    handler._StickerHandler__merge_tags(
+        make_update(message), SimpleNamespace(args=["a", "b", "c"])
+    )
+    handler._StickerHandler__drop_tag(make_update(message), SimpleNamespace(args=["a"]))
+
+    assert_that(rename.commands, equal_to([
+        RenameTagCommand(user_id=123, old_tag="a", new_tag="b")
+    ]))
+    assert_that(merge.commands, equal_to([
+        MergeTagsCommand(user_id=123, source_tags=("a", "b"), target_tag="c")
+    ]))
+    assert_that(drop.commands, equal_to([DropTagCommand(user_id=123, tag="a")]))
+    assert_that(message.text_replies, equal_to(["Ok!", "Ok!", "I couldn't find those tags."]))
+
+
+def test_tag_edit_handlers_reply_with_usage_or_missing_permissions() -> None:
+    handler = make_handler()
+    handler._StickerHandler__drop_tag_use_case = FakeEditTags(InsufficientPermissionsError())
+    message = FakeMessage()
+
+    handler._StickerHandler__rename_tag(make_update(message), SimpleNamespace(args=["a"]))
+    handler._StickerHandler__drop_tag(make_update(message), SimpleNamespace(args=["a"]))
+
+    assert_that(message.text_replies, equal_to([
+        "Usage: /renameTag <old tag> <new tag>",
+        "Only admins can edit the tags of the public pack.",
+    ]))
+
+
+def test_handler_entry_points_log_their_latency_with_the_update_identity(caplog) -> None:
+    handler = make_handler()
+    message = FakeMessage()
+    recorded = METRICS.histogram(HANDLER_LATENCY, command="add").count
+
+    with caplog.at_level("INFO", logger="bot.handlers.common"):
+        handler._StickerHandler__add_sticker(
+            make_update(message), SimpleNamespace(args=["wave"])
+        )
+
+    record = next(r for r in caplog.records if r.getMessage().startswith("Handled add"))
+    assert_that(record.fields["outcome"], equal_to("ok"))
+    assert_that(record.fields["latency_ms"] >= 0, equal_to(True))
+    assert_that((record.update.command, record.update.user_id), equal_to(("add", 123)))
+    assert_that(METRICS.histogram(HANDLER_LATENCY, command="add").count, equal_to(recorded + 1))
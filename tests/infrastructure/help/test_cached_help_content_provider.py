@@ -0,0 +1,109 @@
+"""Tests for CachedHelpContentProvider."""
+
+from __future__ import annotations
+
+import os
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from bot.application.ports import HelpContentProvider
+from bot.infrastructure.help import CachedHelpContentProvider
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def rewrite(path: Path, content: str) -> None:
+    """Write new content and force a distinct modification time."""
+    previous = path.stat().st_mtime_ns if path.exists() else 0
+    path.write_text(content, encoding="utf-8")
+    os.utime(path, ns=(previous + 1_000_000_000, previous + 1_000_000_000))
+
+
+class TestCachedHelpContentProvider:
+    """Contract tests for CachedHelpContentProvider."""
+
+    def test_implements_help_content_port(self, tmp_path: Path) -> None:
+        """Adapter satisfies the HelpContentProvider protocol."""
+        provider = CachedHelpContentProvider(tmp_path / "HELP.md")
+
+        assert isinstance(provider, HelpContentProvider)
+
+    def test_reads_help_text_from_utf8_file(self, tmp_path: Path) -> None:
+        """Adapter returns UTF-8 file content unchanged."""
+        help_file = tmp_path / "HELP.md"
+        help_file.write_text("# Help\n\nUse /add ✨\n", encoding="utf-8")
+
+        provider = CachedHelpContentProvider(help_file)
+
+        assert provider.get_help_text() == "# Help\n\nUse /add ✨\n"
+
+    def test_does_not_touch_the_filesystem_within_the_revalidation_interval(
+        self, tmp_path: Path
+    ) -> None:
+        """Repeated calls inside the interval are served from memory without stat or read."""
+        help_file = tmp_path / "HELP.md"
+        help_file.write_text("first", encoding="utf-8")
+        clock = FakeClock()
+        provider = CachedHelpContentProvider(help_file, revalidate_interval=5.0, clock=clock)
+        provider.get_help_text()
+
+        clock.now += 4.0
+        with patch.object(Path, "stat", side_effect=AssertionError("unexpected stat")):
+            with patch.object(Path, "read_text", side_effect=AssertionError("unexpected read")):
+                assert provider.get_help_text() == "first"
+
+    def test_reloads_when_file_changes_after_the_revalidation_interval(
+        self, tmp_path: Path
+    ) -> None:
+        """A changed modification time is picked up on the next revalidation."""
+        help_file = tmp_path / "HELP.md"
+        help_file.write_text("first", encoding="utf-8")
+        clock = FakeClock()
+        provider = CachedHelpContentProvider(help_file, revalidate_interval=5.0, clock=clock)
+        assert provider.get_help_text() == "first"
+
+        rewrite(help_file, "second")
+
+        assert provider.get_help_text() == "first"
+        clock.now += 5.0
+        assert provider.get_help_text() == "second"
+
+    def test_unchanged_file_is_not_read_again(self, tmp_path: Path) -> None:
+        """Revalidation only stats the file when its signature did not change."""
+        help_file = tmp_path / "HELP.md"
+        help_file.write_text("first", encoding="utf-8")
+        clock = FakeClock()
+        provider = CachedHelpContentProvider(help_file, revalidate_interval=5.0, clock=clock)
+        provider.get_help_text()
+
+        clock.now += 10.0
+        with patch.object(Path, "read_text", side_effect=AssertionError("unexpected read")):
+            assert provider.get_help_text() == "first"
+
+    def test_raises_when_help_file_is_missing(self, tmp_path: Path) -> None:
+        """Adapter raises FileNotFoundError when the file was never readable."""
+        provider = CachedHelpContentProvider(tmp_path / "missing.md")
+
+        with pytest.raises(FileNotFoundError):
+            provider.get_help_text()
+
+    def test_keeps_serving_cached_text_when_file_disappears(self, tmp_path: Path) -> None:
+        """A file removed after a successful load does not break help responses."""
+        help_file = tmp_path / "HELP.md"
+        help_file.write_text("first", encoding="utf-8")
+        clock = FakeClock()
+        provider = CachedHelpContentProvider(help_file, revalidate_interval=1.0, clock=clock)
+        provider.get_help_text()
+
+        help_file.unlink()
+        clock.now += 2.0
+
+        assert provider.get_help_text() == "first"
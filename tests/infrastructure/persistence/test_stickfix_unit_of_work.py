@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+from unittest.mock import patch
+
+from hamcrest import assert_that, equal_to, is_
+
+from bot.domain.user import SF_PUBLIC, StickfixUser
+from bot.infrastructure.persistence import StickfixUnitOfWork
+
+
+def test_commit_applies_all_staged_writes_as_one_store_batch(store) -> None:
+    store["bob"] = StickfixUser("bob")
+    alice = StickfixUser("alice")
+
+    with patch.object(store, "apply_batch", wraps=store.apply_batch) as apply_batch:
+        with StickfixUnitOfWork(store) as unit_of_work:
+            unit_of_work.users.ensure_public_pack()
+            unit_of_work.users.save_user(alice)
+            unit_of_work.users.save_user(alice)
+            unit_of_work.users.delete_user("bob")
+            unit_of_work.commit()
+
+    apply_batch.assert_called_once()
+    assert_that(set(store.keys()), equal_to({SF_PUBLIC, "alice"}))
+
+
+def test_uncommitted_unit_of_work_leaves_the_store_untouched(store) -> None:
+    with StickfixUnitOfWork(store) as unit_of_work:
+        unit_of_work.users.save_user(StickfixUser("alice"))
+
+    assert_that("alice" in store, is_(False))
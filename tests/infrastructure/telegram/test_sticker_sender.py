@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import threading
+
+from hamcrest import assert_that, close_to, equal_to, is_
+from telegram.error import BadRequest, RetryAfter
+
+from bot.infrastructure.telegram import TelegramStickerSender, TokenBucket
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class FakeBot:
+    def __init__(self, failures: dict[str, list[Exception]] | None = None) -> None:
+        self.failures = failures or {}
+        self.sent: list[tuple[int, str]] = []
+        self.lock = threading.Lock()
+
+    def send_sticker(self, chat_id: int, sticker_id: str) -> None:
+        with self.lock:
+            pending = self.failures.get(sticker_id)
+            if pending:
+                raise pending.pop(0)
+            self.sent.append((chat_id, sticker_id))
+
+
+def make_sender(bot: FakeBot, **kwargs) -> TelegramStickerSender:
+    options = {"global_rate": 10_000.0, "chat_rate": 10_000.0, "chat_burst": 10_000}
+    return TelegramStickerSender(bot, **{**options, **kwargs})
+
+
+def test_bucket_allows_a_burst_then_spaces_reservations_at_its_rate() -> None:
+    clock = FakeClock()
+    bucket = TokenBucket(rate=2.0, capacity=2, clock=clock)
+
+    delays = [bucket.reserve() for _ in range(4)]
+
+    assert_that(delays, equal_to([0.0, 0.0, 0.5, 1.0]))
+    clock.now = 1.0
+    assert_that(bucket.reserve(), close_to(0.5, 1e-9))
+
+
+def test_bucket_pause_withholds_tokens_and_refills_when_idle() -> None:
+    clock = FakeClock()
+    bucket = TokenBucket(rate=1.0, capacity=3, clock=clock)
+
+    bucket.pause(2.0)
+
+    assert_that(bucket.reserve(), close_to(3.0, 1e-9))
+    assert_that(bucket.idle, is_(False))
+    clock.now = 6.0
+    assert_that(bucket.idle, is_(True))
+
+
+def test_submit_returns_immediately_and_delivers_each_batch_in_order() -> None:
+    bot = FakeBot()
+    sender = make_sender(bot)
+
+    first = sender.submit(1, ["a", "b", "c"])
+    second = sender.submit(2, ["d"])
+
+    assert_that(first.wait(5) and second.wait(5), is_(True))
+    assert_that([sticker for chat, sticker in bot.sent if chat == 1], equal_to(["a", "b", "c"]))
+    assert_that(first.sent + second.sent, equal_to(4))
+    sender.shutdown()
+
+
+def test_jobs_for_the_same_chat_are_delivered_one_after_the_other() -> None:
+    bot = FakeBot()
+    sender = make_sender(bot)
+
+    jobs = [sender.submit(1, [f"{batch}-{index}" for index in range(20)]) for batch in "abc"]
+
+    assert_that(all(job.wait(5) for job in jobs), is_(True))
+    expected = [(1, f"{batch}-{index}") for batch in "abc" for index in range(20)]
+    assert_that(bot.sent, equal_to(expected))
+    sender.shutdown()
+
+
+def test_a_chat_waiting_for_its_rate_does_not_hold_a_worker() -> None:
+    bot = FakeBot()
+    sender = make_sender(bot, max_workers=1, chat_rate=1.0, chat_burst=1)
+
+    slow = sender.submit(1, ["a", "b", "c"])
+    others = [sender.submit(chat, [f"s{chat}"]) for chat in (2, 3)]
+
+    assert_that(all(job.wait(0.5) for job in others), is_(True))
+    assert_that(slow.done, is_(False))
+    sender.shutdown()
+
+
+def test_flood_control_is_retried_and_other_errors_skip_the_sticker() -> None:
+    bot = FakeBot({"a": [RetryAfter(0)], "b": [BadRequest("Wrong file identifier")]})
+    sender = make_sender(bot)
+
+    job = sender.submit(1, ["a", "b", "c"])
+
+    assert_that(job.wait(5), is_(True))
+    assert_that(bot.sent, equal_to([(1, "a"), (1, "c")]))
+    assert_that(job.sent, equal_to(2))
+    sender.shutdown()
+
+
+def test_cancelled_jobs_stop_before_the_next_send() -> None:
+    bot = FakeBot()
+    sender = make_sender(bot, chat_rate=1.0, chat_burst=1)
+
+    job = sender.submit(1, ["a", "b", "c"])
+    job.cancel()
+
+    assert_that(job.wait(5), is_(True))
+    assert_that(job.cancelled, is_(True))
+    assert_that(len(bot.sent), equal_to(job.sent))
+    assert_that(job.sent < 3, is_(True))
+    sender.shutdown()
+
+
+def test_shutdown_cancels_pending_jobs() -> None:
+    bot = FakeBot()
+    sender = make_sender(bot, chat_rate=0.01, chat_burst=1)
+
+    job = sender.submit(1, ["a", "b"])
+    sender.shutdown()
+
+    assert_that(job.done, is_(True))
+    assert_that((1, "b") in bot.sent, is_(False))
+
+
+def test_drain_waits_for_queued_jobs_to_be_delivered() -> None:
+    bot = FakeBot()
+    sender = make_sender(bot)
+
+    sender.submit(1, ["a", "b"])
+    sender.submit(2, ["c"])
+
+    assert_that(sender.drain(timeout=5), is_(True))
+    assert_that(sorted(bot.sent), equal_to([(1, "a"), (1, "b"), (2, "c")]))
+    assert_that(sender.pending_stickers, equal_to(0))
+    sender.shutdown()
+
+
+def test_drain_gives_up_at_the_timeout_and_reports_unsent_stickers() -> None:
+    bot = FakeBot()
+    sender = make_sender(bot, chat_rate=0.01, chat_burst=1)
+
+    sender.submit(1, ["a", "b", "c"])
+
+    assert_that(sender.drain(timeout=0.05), is_(False))
+    assert_that(sender.pending_stickers, equal_to(2))
+    sender.shutdown()
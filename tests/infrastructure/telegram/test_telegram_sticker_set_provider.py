@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+from types import SimpleNamespace
+
+import pytest
+from hamcrest import assert_that, equal_to
+from telegram.error import BadRequest
+
+from bot.application.errors import StickerSetNotFoundError
+from bot.application.ports import StickerSetItem, StickerSetProvider
+from bot.infrastructure.telegram import TelegramStickerSetProvider
+
+
+class FakeBot:
+    def __init__(self, sets: dict[str, list[SimpleNamespace]]) -> None:
+        self.sets = sets
+
+    def get_sticker_set(self, name: str) -> SimpleNamespace:
+        if name not in self.sets:
+            raise BadRequest("Stickerset_invalid")
+        return SimpleNamespace(name=name, stickers=self.sets[name])
+
+
+def test_provider_implements_the_port() -> None:
+    assert isinstance(TelegramStickerSetProvider(FakeBot({})), StickerSetProvider)
+
+
+def test_provider_maps_bot_api_stickers_to_items() -> None:
+    bot = FakeBot(
+        {
+            "cats": [
+                SimpleNamespace(file_id="a", emoji="😺"),
+                SimpleNamespace(file_id="b", emoji=None),
+            ]
+        }
+    )
+
+    items = TelegramStickerSetProvider(bot).get_sticker_set("cats")
+
+    assert_that(items, equal_to((StickerSetItem("a", "😺"), StickerSetItem("b", None))))
+
+
+def test_unknown_set_raises_sticker_set_not_found() -> None:
+    with pytest.raises(StickerSetNotFoundError):
+        TelegramStickerSetProvider(FakeBot({})).get_sticker_set("missing")
@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+import gzip
+import threading
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+from hamcrest import assert_that, equal_to, is_not
+
+from bot.infrastructure.telegram import UpdateRecorder, read_recording, sanitize_update
+
+
+def command_payload(update_id: int = 7) -> dict:
+    alice = {"id": 123, "is_bot": False, "first_name": "Alice", "username": "alice"}
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": 1,
+            "date": 0,
+            "from": alice,
+            "chat": {"id": -100456, "type": "supergroup", "title": "Friends"},
+            "text": "/add cat",
+            "contact": {"phone_number": "+56 9 1234 5678", "first_name": "Alice"},
+            "reply_to_message": {
+                "message_id": 0,
+                "date": 0,
+                "from": alice,
+                "chat": {"id": -100456, "type": "supergroup", "title": "Friends"},
+                "sticker": {"file_id": "sticker-1", "file_unique_id": "u1"},
+            },
+        },
+    }
+
+
+def test_personal_data_is_dropped_and_ids_are_pseudonymized() -> None:
+    recorder = UpdateRecorder("unused.jsonl", key=b"k" * 16)
+
+    message = sanitize_update(command_payload(), recorder.pseudonym)["message"]
+
+    sender = message["from"]
+    assert_that(sender, equal_to({"id": sender["id"], "is_bot": False, "first_name": "user"}))
+    assert_that(sender["id"], is_not(123))
+    assert_that(message["reply_to_message"]["from"], equal_to(sender))
+    assert_that(message["chat"], equal_to({"id": message["chat"]["id"], "type": "supergroup"}))
+    assert_that(message["chat"]["id"] < 0, equal_to(True))
+    assert_that("contact" in message, equal_to(False))
+    assert_that(message["text"], equal_to("/add cat"))
+    assert_that(message["reply_to_message"]["sticker"]["file_id"], equal_to("sticker-1"))
+
+
+def test_users_nested_under_any_key_are_pseudonymized() -> None:
+    recorder = UpdateRecorder("unused.jsonl", key=b"k" * 16)
+    alice = {"id": 123, "is_bot": False, "first_name": "Alice", "username": "alice"}
+    payload = {
+        "update_id": 8,
+        "chat_join_request": {
+            "chat": {"id": -100456, "type": "supergroup", "title": "Friends"},
+            "from": alice,
+            "date": 0,
+            "bio": "Lives in Santiago",
+            "invite_link": {"invite_link": "https://t.me/+abc", "creator": alice},
+        },
+        "chat_member": {"new_chat_member": {"status": "member", "inviter": alice}},
+    }
+
+    sanitized = sanitize_update(payload, recorder.pseudonym)
+
+    request = sanitized["chat_join_request"]
+    pseudonymized = {"id": recorder.pseudonym(123), "is_bot": False, "first_name": "user"}
+    assert_that(request["invite_link"]["creator"], equal_to(pseudonymized))
+    assert_that(sanitized["chat_member"]["new_chat_member"]["inviter"], equal_to(pseudonymized))
+    assert_that("bio" in request, equal_to(False))
+
+
+def test_pseudonyms_depend_on_the_key() -> None:
+    first = UpdateRecorder("unused.jsonl", key=b"a" * 16)
+    second = UpdateRecorder("unused.jsonl", key=b"b" * 16)
+
+    assert_that(first.pseudonym(123), equal_to(first.pseudonym(123)))
+    assert_that(first.pseudonym(123), is_not(second.pseudonym(123)))
+
+
+@pytest.mark.parametrize("name", ["updates.jsonl", "updates.jsonl.gz"])
+def test_recordings_are_appended_and_read_back_in_order(tmp_path: Path, name: str) -> None:
+    path = tmp_path / "recordings" / name
+    times = iter([100.0, 100.25, 101.5])
+    recorder = UpdateRecorder(path, clock=lambda: next(times))
+
+    recorder.record(command_payload(1))
+    recorder.record(command_payload(2))
+    recorder.close()
+    reopened = UpdateRecorder(path, clock=lambda: next(times))
+    reopened.record(command_payload(3))
+    reopened.close()
+
+    entries = list(read_recording(path))
+    assert_that([timestamp for timestamp, _ in entries], equal_to([100.0, 100.25, 101.5]))
+    assert_that([update["update_id"] for _, update in entries], equal_to([1, 2, 3]))
+
+
+def test_a_truncated_last_line_is_skipped(tmp_path: Path) -> None:
+    path = tmp_path / "updates.jsonl"
+    recorder = UpdateRecorder(path, clock=lambda: 1.0)
+    recorder.record(command_payload())
+    recorder.close()
+    with path.open("a", encoding="utf-8") as handle:
+        handle.write('{"t":2.0,"update":{"upd')
+
+    assert_that(len(list(read_recording(path))), equal_to(1))
+
+
+def test_a_truncated_compressed_recording_keeps_its_complete_lines(tmp_path: Path) -> None:
+    path = tmp_path / "updates.jsonl.gz"
+    recorder = UpdateRecorder(path, clock=lambda: 1.0)
+    for update_id in range(50):
+        recorder.record(command_payload(update_id))
+    recorder.close()
+    data = path.read_bytes()
+    path.write_bytes(data[: len(data) - 12])
+
+    entries = list(read_recording(path))
+
+    assert_that(0 < len(entries) <= 50, equal_to(True))
+    assert_that(gzip.decompress(data).count(b"\n"), equal_to(50))
+
+
+def test_updates_are_sanitized_and_written_off_the_recording_thread(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    path = tmp_path / "updates.jsonl"
+    sanitizing_threads: list[str] = []
+
+    def sanitize(payload: dict, pseudonym) -> dict:
+        sanitizing_threads.append(threading.current_thread().name)
+        return sanitize_update(payload, pseudonym)
+
+    monkeypatch.setattr(
+        "bot.infrastructure.telegram.update_recorder.sanitize_update", sanitize
+    )
+    recorder = UpdateRecorder(path)
+
+    recorder.record(command_payload(1))
+    recorder.record(command_payload(2))
+    recorder.close()
+
+    assert_that(sanitizing_threads, equal_to(["update-recorder", "update-recorder"]))
+    assert_that(len(list(read_recording(path))), equal_to(2))
+
+
+class FakeDispatcher:
+    def __init__(self) -> None:
+        self.handlers = []
+
+    def add_handler(self, handler, group=0) -> None:
+        self.handlers.append((handler, group))
+
+
+def test_updates_reaching_the_dispatcher_are_recorded_before_other_handlers(
+    tmp_path: Path,
+) -> None:
+    path = tmp_path / "updates.jsonl"
+    dispatcher = FakeDispatcher()
+    recorder = UpdateRecorder(path)
+    recorder.attach(dispatcher)
+    [(handler, group)] = dispatcher.handlers
+    update = SimpleNamespace(update_id=7, to_dict=command_payload)
+
+    handler.callback(update, SimpleNamespace())
+    recorder.close()
+
+    assert_that(group < 0, equal_to(True))
+    [(_, recorded)] = read_recording(path)
+    assert_that(recorded["message"]["text"], equal_to("/add cat"))
@@ -0,0 +1,39 @@
+"""Unit-of-work doubles shared by the use case tests."""
+
+from __future__ import annotations
+
+from typing import Any
+
+from bot.application.ports import UserRepository
+from bot.application.unit_of_work import BufferedUnitOfWork
+from bot.domain.user import StickfixUser
+
+
+class CountingUnitOfWork(BufferedUnitOfWork):
+    """`BufferedUnitOfWork` that records the user ids of every batch it applies."""
+
+    def __init__(self, users: UserRepository) -> None:
+        super().__init__(users)
+        self.batches: list[tuple[Any, ...]] = []
+
+    def _apply(self, saved: dict[Any, StickfixUser], deleted: set[Any]) -> None:
+        self.batches.append(tuple(saved))
+        super()._apply(saved, deleted)
+
+
+class CountingUnitsOfWork:
+    """Unit-of-work factory for use cases that keeps every `CountingUnitOfWork` it creates."""
+
+    def __init__(self, users: UserRepository) -> None:
+        self._users = users
+        self.created: list[CountingUnitOfWork] = []
+
+    def __call__(self) -> CountingUnitOfWork:
+        unit_of_work = CountingUnitOfWork(self._users)
+        self.created.append(unit_of_work)
+        return unit_of_work
+
+    @property
+    def batches(self) -> list[tuple[Any, ...]]:
+        """Batches applied by the created units of work, in creation order."""
+        return [batch for unit_of_work in self.created for batch in unit_of_work.batches]
@@ -10,6 +10,7 @@ from tempfile import TemporaryDirectory
 import pytest
 
 from bot.config import ConfigError, load_config
+from bot.database.flush_policy import FlushPolicy
 
 
 @pytest.fixture(autouse=True)
@@ -22,6 +23,12 @@ def clear_env(monkeypatch: pytest.MonkeyPatch) -> None:
         "STICKFIX_TOKEN_PROD",
         "STICKFIX_TOKEN_FILE",
         "STICKFIX_LOG_PATH",
+        "STICKFIX_ADMIN_IDS",
+        "STICKFIX_RECORD_UPDATES",
+        "STICKFIX_FLUSH_MAX_DIRTY_USERS",
+        "STICKFIX_FLUSH_MAX_DIRTY_AGE",
+        "STICKFIX_FLUSH_MAX_INTERVAL",
+        "STICKFIX_FLUSH_MIN_SPACING",
     ]:
         monkeypatch.delenv(key, raising=False)
 
@@ -72,6 +79,34 @@ def test_log_path_can_be_overridden(monkeypatch):
     assert cfg.log_path == Path("custom/logs/bot.log")
 
 
+def test_admin_ids_are_read_as_a_comma_separated_list(monkeypatch):
+    monkeypatch.setenv("STICKFIX_TOKEN", "generic-token")
+    assert load_config().admin_ids == frozenset()
+    monkeypatch.setenv("STICKFIX_ADMIN_IDS", " 123, 456 ,,")
+    assert load_config().admin_ids == frozenset({"123", "456"})
+
+
 def test_error_is_raised_when_no_token_available():
     with pytest.raises(ConfigError):
         load_config()
+
+
+def test_update_recording_is_opt_in(monkeypatch):
+    monkeypatch.setenv("STICKFIX_TOKEN", "generic-token")
+    assert load_config().record_updates is None
+    monkeypatch.setenv("STICKFIX_RECORD_UPDATES", "recordings/updates.jsonl.gz")
+    assert load_config().record_updates == Path("recordings/updates.jsonl.gz")
+
+
+def test_flush_policy_knobs_are_read_from_the_environment(monkeypatch):
+    monkeypatch.setenv("STICKFIX_TOKEN", "generic-token")
+    assert load_config().flush_policy == FlushPolicy()
+    monkeypatch.setenv("STICKFIX_FLUSH_MAX_DIRTY_USERS", "10")
+    monkeypatch.setenv("STICKFIX_FLUSH_MAX_DIRTY_AGE", "off")
+    monkeypatch.setenv("STICKFIX_FLUSH_MIN_SPACING", "0.5")
+    assert load_config().flush_policy == FlushPolicy(
+        max_dirty_users=10, max_dirty_age=None, min_spacing=0.5
+    )
+    monkeypatch.setenv("STICKFIX_FLUSH_MAX_INTERVAL", "0")
+    with pytest.raises(ConfigError):
+        load_config()
@@ -12,11 +12,36 @@ network listener is created.
 
 from __future__ import annotations
 
-from unittest.mock import MagicMock
+# ruff: noqa: S101
+import signal
+import threading
+from pathlib import Path
+from unittest.mock import MagicMock, call
 
 import pytest
 
-from bot.stickfix import Stickfix, start_polling_service
+from bot.config import load_config
+from bot.database.flush_policy import FlushPolicy
+from bot.database.storage import StickfixDB
+from bot.domain.user import StickfixUser
+from bot.stickfix import ShutdownReport, Stickfix, build_indexes, start_polling_service
+
+
+@pytest.fixture
+def metrics_file(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> Path:
+    """Keeps the metrics written on shutdown out of the working directory."""
+    path = tmp_path / "stickfix.prom"
+    monkeypatch.setenv("STICKFIX_METRICS_PATH", str(path))
+    return path
+
+
+def substitute_collaborators(monkeypatch: pytest.MonkeyPatch, calls: MagicMock) -> None:
+    """Replaces the updater, the store and the handlers with children of `calls`."""
+    monkeypatch.setattr("bot.stickfix.Updater", MagicMock(return_value=calls.updater))
+    monkeypatch.setattr("bot.stickfix.StickfixDB", MagicMock(return_value=calls.store))
+    for handler in ("HelperHandler", "UserHandler", "StickerHandler", "InlineHandler"):
+        monkeypatch.setattr(f"bot.stickfix.{handler}", MagicMock(name=handler))
+    calls.store.dirty_count = 1
 
 
 def test_start_polling_service_starts_polling_and_never_webhook() -> None:
@@ -53,3 +78,136 @@ def test_run_delegates_to_polling_only_startup(monkeypatch: pytest.MonkeyPatch)
     updater.start_polling.assert_called_once_with()
     updater.start_webhook.assert_not_called()
     updater.listen.assert_not_called()
+
+
+def test_from_config_applies_the_environment_settings(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    """The documented launcher honours the admins, update recording and flush knobs."""
+    calls = MagicMock(name="calls")
+    substitute_collaborators(monkeypatch, calls)
+    monkeypatch.setattr("bot.stickfix.StoreFlusher", calls.flusher)
+    monkeypatch.setattr("bot.stickfix.UpdateRecorder", calls.recorder)
+    monkeypatch.setattr("bot.stickfix.ProfilerHandler", calls.profiler_handler)
+    config = load_config(
+        environ={
+            "STICKFIX_TOKEN": "dummy-token",
+            "STICKFIX_ADMIN_IDS": "42",
+            "STICKFIX_RECORD_UPDATES": str(tmp_path / "updates.jsonl"),
+            "STICKFIX_FLUSH_MAX_DIRTY_USERS": "7",
+        }
+    )
+
+    Stickfix.from_config(config)
+
+    calls.flusher.assert_called_once_with(calls.store, FlushPolicy(max_dirty_users=7))
+    calls.recorder.assert_called_once_with(tmp_path / "updates.jsonl")
+    assert calls.profiler_handler.call_args.kwargs["admin_ids"] == frozenset({"42"})
+
+
+def test_stop_stops_polling_before_saving_the_database(
+    monkeypatch: pytest.MonkeyPatch, metrics_file: Path
+) -> None:
+    """``Stickfix.stop`` receives no more updates and then saves unsaved changes."""
+    calls = MagicMock(name="calls")
+    substitute_collaborators(monkeypatch, calls)
+
+    report = Stickfix("dummy-token").stop()
+
+    calls.assert_has_calls([call.updater.stop(), call.store.save()])
+    assert report.drained
+    assert report.saved
+    assert report.unsent_stickers == 0
+    assert "stickfix_shutdown_seconds_count" in metrics_file.read_text()
+
+
+def test_stop_saves_the_database_even_when_draining_times_out(
+    monkeypatch: pytest.MonkeyPatch, metrics_file: Path
+) -> None:
+    """A dispatcher stuck on an update delays shutdown by the timeout at most, and the writes of
+    the late update are saved once it is handled."""
+    calls = MagicMock(name="calls")
+    substitute_collaborators(monkeypatch, calls)
+    release, saved_again = threading.Event(), threading.Event()
+    calls.updater.stop.side_effect = lambda: release.wait(5)
+
+    try:
+        report = Stickfix("dummy-token").stop(timeout=0.05)
+        calls.store.save.assert_called_once_with()
+        calls.store.save.side_effect = saved_again.set
+    finally:
+        release.set()
+
+    assert not report.drained
+    assert not report.saved
+    assert report.seconds < 5
+    assert saved_again.wait(5)
+
+
+def test_stop_saves_again_when_late_updates_finish_before_the_deadline(
+    monkeypatch: pytest.MonkeyPatch, metrics_file: Path
+) -> None:
+    """Updates handled while queued stickers are still being sent are saved before returning."""
+    calls = MagicMock(name="calls")
+    substitute_collaborators(monkeypatch, calls)
+    release = threading.Event()
+    calls.updater.stop.side_effect = lambda: release.wait(5)
+    bot = Stickfix("dummy-token")
+
+    def finish_late_updates(timeout: float) -> bool:
+        release.set()
+        for thread in threading.enumerate():
+            if thread.name == "stickfix-stop":
+                thread.join(5)
+        return True
+
+    monkeypatch.setattr(bot._Stickfix__sticker_sender, "drain", finish_late_updates)
+
+    report = bot.stop(timeout=0.05)
+
+    assert not report.drained
+    assert report.saved
+    assert calls.store.save.call_count == 2
+
+
+def test_stop_runs_only_once(monkeypatch: pytest.MonkeyPatch, metrics_file: Path) -> None:
+    """Stopping an already stopped bot returns the first report without stopping again."""
+    calls = MagicMock(name="calls")
+    substitute_collaborators(monkeypatch, calls)
+    bot = Stickfix("dummy-token")
+
+    first = bot.stop()
+    second = bot.stop()
+
+    assert second is first
+    calls.updater.stop.assert_called_once_with()
+
+
+def test_run_until_stopped_stops_on_request_and_restores_signal_handlers(
+    monkeypatch: pytest.MonkeyPatch, metrics_file: Path
+) -> None:
+    """The blocking entry point polls until a stop is requested, then shuts down."""
+    calls = MagicMock(name="calls")
+    substitute_collaborators(monkeypatch, calls)
+    previous = signal.getsignal(signal.SIGTERM)
+    bot = Stickfix("dummy-token")
+    bot.request_stop()
+
+    report = bot.run_until_stopped()
+
+    assert isinstance(report, ShutdownReport)
+    calls.assert_has_calls([call.updater.start_polling(), call.updater.stop()])
+    assert signal.getsignal(signal.SIGTERM) is previous
+
+
+def test_build_indexes_prepares_only_packs_with_many_tags(tmp_path: Path) -> None:
+    """Large packs are indexed ahead of time; small ones keep building on first use."""
+    store = StickfixDB("users", data_dir=tmp_path)
+    large, small = StickfixUser("large"), StickfixUser("small")
+    large.add_stickers({f"s{index}": [f"tag{index}"] for index in range(3)})
+    small.add_sticker("s1", ["wave"])
+    store.apply_batch({"large": large, "small": small})
+
+    assert build_indexes(store, min_tags=3) == 1
+    assert large._fuzzy_index is not None
+    assert small._fuzzy_index is None
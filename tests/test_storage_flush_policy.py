@@ -0,0 +1,158 @@
+"""Dirty tracking of `StickfixDB` and the policy deciding when it is saved."""
+
+from __future__ import annotations
+
+# ruff: noqa: S101
+from pathlib import Path
+
+import pytest
+
+from bot.database.flush_policy import FlushPolicy, StoreFlusher
+from bot.database.storage import StickfixDB
+from tests.support.storage import create_user
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class FakeStore:
+    def __init__(self, clock: FakeClock) -> None:
+        self._clock = clock
+        self.dirty: set[str] = set()
+        self.dirty_since: float | None = None
+        self.saves = 0
+
+    @property
+    def dirty_count(self) -> int:
+        return len(self.dirty)
+
+    def change(self, *keys: str) -> None:
+        if self.dirty_since is None:
+            self.dirty_since = self._clock()
+        self.dirty.update(keys)
+
+    def save(self) -> None:
+        self.saves += 1
+        self.dirty.clear()
+        self.dirty_since = None
+
+
+def test_store_tracks_changed_users_until_saved(store: StickfixDB) -> None:
+    assert store.dirty_count == 0
+    assert store.dirty_since is None
+
+    store["alice"] = create_user("alice")
+    store.apply_batch({"bob": create_user("bob"), "alice": create_user("alice")}, ["carol"])
+    since = store.dirty_since
+
+    assert store.dirty_count == 3
+    assert since is not None
+    del store["bob"]
+    assert store.dirty_since == since
+
+    store.save()
+
+    assert store.dirty_count == 0
+    assert store.dirty_since is None
+
+
+def test_reload_discards_changes_and_cleans_the_store(store: StickfixDB) -> None:
+    store["alice"] = create_user("alice")
+
+    store.reload()
+
+    assert "alice" not in store
+    assert store.dirty_count == 0
+
+
+@pytest.mark.parametrize(
+    ("dirty_users", "dirty_age", "since_last_flush", "reason"),
+    [
+        (0, 0.0, 10_000.0, None),
+        (100, 0.0, 6.0, "dirty_users"),
+        (100, 60.0, 4.0, None),
+        (1, 30.0, 30.0, "dirty_age"),
+        (1, 29.0, 300.0, "interval"),
+        (1, 29.0, 299.0, None),
+    ],
+)
+def test_policy_names_the_first_trigger_reached(
+    dirty_users: int, dirty_age: float, since_last_flush: float, reason: str | None
+) -> None:
+    assert FlushPolicy().reason_to_flush(dirty_users, dirty_age, since_last_flush) == reason
+
+
+def test_triggers_can_be_disabled() -> None:
+    policy = FlushPolicy(max_dirty_users=None, max_dirty_age=None, max_interval=60)
+
+    assert policy.reason_to_flush(10_000, 59.0, 59.0) is None
+    assert policy.reason_to_flush(1, 0.0, 60.0) == "interval"
+
+
+@pytest.mark.parametrize(
+    "knobs",
+    [{"max_dirty_users": 0}, {"max_dirty_age": 0}, {"max_interval": -1}, {"min_spacing": -1}],
+)
+def test_invalid_policies_are_rejected(knobs: dict) -> None:
+    with pytest.raises(ValueError):
+        FlushPolicy(**knobs)
+
+
+def test_flusher_saves_bursts_promptly_but_spaces_saves_out() -> None:
+    clock = FakeClock()
+    store = FakeStore(clock)
+    flusher = StoreFlusher(store, FlushPolicy(max_dirty_users=3, min_spacing=5), clock)
+
+    clock.now += 10
+    store.change("a", "b")
+    assert not flusher.tick()
+    store.change("c")
+    assert flusher.tick()
+    store.change("d", "e", "f")
+    clock.now += 4
+    assert not flusher.tick()
+    clock.now += 1
+    assert flusher.tick()
+    assert store.saves == 2
+
+
+def test_flusher_bounds_how_long_a_change_stays_unsaved() -> None:
+    clock = FakeClock()
+    store = FakeStore(clock)
+    flusher = StoreFlusher(store, FlushPolicy(max_dirty_age=30), clock)
+
+    clock.now += 100
+    assert not flusher.tick()
+    store.change("a")
+    clock.now += 29
+    assert not flusher.tick()
+    clock.now += 1
+    assert flusher.tick()
+    clock.now += 1000
+    assert not flusher.tick()
+    assert store.saves == 1
+
+
+def test_forced_flush_ignores_the_policy_but_skips_clean_stores() -> None:
+    clock = FakeClock()
+    store = FakeStore(clock)
+    flusher = StoreFlusher(store, FlushPolicy(), clock)
+
+    assert not flusher.flush()
+    store.change("a")
+    assert flusher.flush()
+    assert store.saves == 1
+
+
+def test_flusher_saves_a_real_store(store: StickfixDB, tmp_path: Path) -> None:
+    flusher = StoreFlusher(store, FlushPolicy(max_dirty_users=1, min_spacing=0))
+
+    store["alice"] = create_user("alice")
+
+    assert flusher.tick()
+    assert StickfixDB("users", data_dir=tmp_path).get_keys() == {"alice"}
@@ -108,3 +108,13 @@ def test_mutations_are_not_persisted_until_save(tmp_path: Path) -> None:
     reloaded = StickfixDB("users", data_dir=tmp_path)
 
     assert "alice" not in reloaded
+
+
+def test_apply_batch_saves_and_deletes_in_one_update(store: StickfixDB) -> None:
+    store["bob"] = create_user("bob")
+    alice = create_user("alice")
+
+    store.apply_batch({"alice": alice}, {"bob", "missing"})
+
+    assert_store_keys(store, {"alice"})
+    assert store["alice"] is alice
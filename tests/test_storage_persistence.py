@@ -3,6 +3,7 @@
 from __future__ import annotations
 
 # ruff: noqa: S101
+import threading
 from pathlib import Path
 from typing import Any
 
@@ -54,6 +55,45 @@ def test_reload_is_idempotent_when_file_is_unchanged(store: StickfixDB) -> None:
     assert second_snapshot == first_snapshot
 
 
+def test_save_keeps_the_in_memory_users_and_their_indexes(store: StickfixDB) -> None:
+    alice = create_user("alice", tags=("wave", "spark"))
+    store["alice"] = alice
+    alice.build_indexes()
+
+    store.save()
+
+    assert store["alice"] is alice
+    assert alice._fuzzy_index is not None
+    assert store.dirty_count == 0
+
+
+def test_writes_proceed_while_a_save_is_writing_the_file(
+    store: StickfixDB, store_paths: tuple[Path, Path, Path], monkeypatch: pytest.MonkeyPatch
+) -> None:
+    yaml_path, _, _ = store_paths
+    store["alice"] = create_user("alice")
+    writing, release = threading.Event(), threading.Event()
+    write_temp_file = store._write_temp_file
+
+    def slow_write(data: Any) -> Path:
+        writing.set()
+        release.wait(5)
+        return write_temp_file(data)
+
+    monkeypatch.setattr(store, "_write_temp_file", slow_write)
+    saver = threading.Thread(target=store.save)
+    saver.start()
+    assert writing.wait(5)
+
+    store.apply_batch({"bob": create_user("bob")})
+    release.set()
+    saver.join(5)
+
+    assert set(load_snapshot(yaml_path)) == {"alice"}
+    assert store.dirty_count == 1
+    assert_store_keys(store, {"alice", "bob"})
+
+
 def test_save_rotates_backups_in_order(
     store: StickfixDB, store_paths: tuple[Path, Path, Path]
 ) -> None:
@@ -179,6 +219,7 @@ def test_save_is_atomic_on_failure(
     with pytest.raises(expected_error):
         store.save()
 
+    assert store.dirty_count == 1
     assert load_snapshot(yaml_path) == original_snapshot
     reloaded = StickfixDB("users", data_dir=yaml_path.parent)
     assert_store_keys(reloaded, {"first"})
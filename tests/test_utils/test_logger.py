@@ -5,11 +5,13 @@ BDD/property tests for the stickfix logger configuration.
 from __future__ import annotations
 
 # ruff: noqa: S101
+import json
 import logging
 import string
+import threading
 import uuid
 from dataclasses import dataclass, field
-from logging.handlers import RotatingFileHandler
+from logging.handlers import QueueHandler, RotatingFileHandler
 from pathlib import Path
 from tempfile import TemporaryDirectory
 from typing import Callable, List
@@ -22,13 +24,20 @@ from pytest_bdd import parsers, scenarios
 from pytest_bdd import then as bdd_then
 from pytest_bdd import when as bdd_when
 
-from bot.utils.logger import LoggerConfig, StickfixLogger
+from bot.utils.logger import (
+    JsonLinesFormatter,
+    Lazy,
+    LoggerConfig,
+    StickfixLogger,
+    shutdown_logging,
+    update_context,
+)
 
 FEATURE_FILE: Path = Path(__file__).resolve().parents[1] / "features" / "logger.feature"
 scenarios(str(FEATURE_FILE))
 
 
-def _reset_logger(name: str) -> None:
+def _reset_logger(name: str, config: LoggerConfig | None = None) -> None:
     """Reset a logger instance to a clean state.
 
     Tests that construct Logger instances add handlers to the global `logging` registry. To avoid
@@ -41,7 +50,10 @@ def _reset_logger(name: str) -> None:
 
     Args:
         name (str): the logger name to reset
+        config (LoggerConfig | None): configuration whose logging pipeline is stopped, if any
     """
+    if config is not None:
+        shutdown_logging(config)
     logger = logging.getLogger(name)
     # Iterate over a copy since removing handlers mutates the list
     for handler in list(logger.handlers):
@@ -74,7 +86,7 @@ def logger_state(tmp_path: Path):
     yield state
     # Teardown: ensure no handlers remain attached to the logger name
     if state.name:
-        _reset_logger(state.name)
+        _reset_logger(state.name, state.config)
 
 
 @bdd_given(parsers.parse('a logger context "{context}"'))
@@ -106,18 +118,28 @@ def _count_handlers(logger: logging.Logger, predicate: Callable[[logging.Handler
     return sum(1 for handler in logger.handlers if predicate(handler))
 
 
-@bdd_then("the logger has exactly 1 console handler")
-def assert_console_handler(logger_state: LoggerState) -> None:
+def _count_outputs(instance: StickfixLogger, predicate: Callable[[logging.Handler], bool]) -> int:
+    return sum(1 for handler in instance.output_handlers if predicate(handler))
+
+
+@bdd_then("the logger has exactly 1 queue handler")
+def assert_queue_handler(logger_state: LoggerState) -> None:
     assert isinstance(logger_state.name, str)
     logger = _get_logger(logger_state.name)
-    assert _count_handlers(logger, lambda h: type(h) is logging.StreamHandler) == 1
+    assert logger.handlers == [logger_state.instances[0].logger.handlers[0]]
+    assert _count_handlers(logger, lambda h: isinstance(h, QueueHandler)) == 1
+
+
+@bdd_then("the pipeline has exactly 1 console handler")
+def assert_console_handler(logger_state: LoggerState) -> None:
+    instance = logger_state.instances[0]
+    assert _count_outputs(instance, lambda h: type(h) is logging.StreamHandler) == 1
 
 
-@bdd_then("the logger has exactly 1 rotating file handler")
+@bdd_then("the pipeline has exactly 1 rotating file handler")
 def assert_file_handler(logger_state: LoggerState) -> None:
-    assert isinstance(logger_state.name, str)
-    logger = _get_logger(logger_state.name)
-    assert _count_handlers(logger, lambda h: isinstance(h, RotatingFileHandler)) == 1
+    instance = logger_state.instances[0]
+    assert _count_outputs(instance, lambda h: isinstance(h, RotatingFileHandler)) == 1
 
 
 @bdd_then("the log file is created")
@@ -147,7 +169,7 @@ def test_logger_creates_nested_paths(segments: List[str]) -> None:
             assert log_path.exists()
             assert log_path.parent.exists()
         finally:
-            _reset_logger(logger_name)
+            _reset_logger(logger_name, config)
 
 
 def test_logger_skips_file_handler_when_log_path_is_none(tmp_path: Path) -> None:
@@ -155,10 +177,9 @@ def test_logger_skips_file_handler_when_log_path_is_none(tmp_path: Path) -> None
     config = LoggerConfig(log_path=None)
 
     try:
-        StickfixLogger(logger_name, config=config)
-        logger = _get_logger(logger_name)
-        assert _count_handlers(logger, lambda h: isinstance(h, RotatingFileHandler)) == 0
-        assert _count_handlers(logger, lambda h: type(h) is logging.StreamHandler) == 1
+        instance = StickfixLogger(logger_name, config=config)
+        assert _count_outputs(instance, lambda h: isinstance(h, RotatingFileHandler)) == 0
+        assert _count_outputs(instance, lambda h: type(h) is logging.StreamHandler) == 1
         assert not any(tmp_path.iterdir())
     finally:
         _reset_logger(logger_name)
@@ -172,10 +193,9 @@ def test_logger_uses_env_flag_to_disable_default_file_logging(
     monkeypatch.delenv("STICKFIX_LOG_PATH", raising=False)
 
     try:
-        StickfixLogger(logger_name)
-        logger = _get_logger(logger_name)
-        assert _count_handlers(logger, lambda h: isinstance(h, RotatingFileHandler)) == 0
-        assert _count_handlers(logger, lambda h: type(h) is logging.StreamHandler) == 1
+        instance = StickfixLogger(logger_name)
+        assert _count_outputs(instance, lambda h: isinstance(h, RotatingFileHandler)) == 0
+        assert _count_outputs(instance, lambda h: type(h) is logging.StreamHandler) == 1
     finally:
         _reset_logger(logger_name)
 
@@ -188,11 +208,183 @@ def test_logger_uses_env_log_path_for_default_config(
     monkeypatch.delenv("STICKFIX_DISABLE_FILE_LOGGING", raising=False)
     monkeypatch.setenv("STICKFIX_LOG_PATH", str(log_path))
 
+    config = LoggerConfig(log_path=log_path)
     try:
-        StickfixLogger(logger_name)
-        logger = _get_logger(logger_name)
-        assert _count_handlers(logger, lambda h: isinstance(h, RotatingFileHandler)) == 1
-        logger.info("env path test")
+        instance = StickfixLogger(logger_name)
+        assert _count_outputs(instance, lambda h: isinstance(h, RotatingFileHandler)) == 1
+        instance.logger.info("env path test")
         assert log_path.exists()
     finally:
-        _reset_logger(logger_name)
+        _reset_logger(logger_name, config)
+
+
+def test_loggers_sharing_a_config_write_through_one_background_listener(tmp_path: Path) -> None:
+    config = LoggerConfig(log_path=tmp_path / "shared.log", console_level=logging.CRITICAL)
+    names = [f"stickfix.shared.{uuid.uuid4().hex}" for _ in range(2)]
+
+    try:
+        first, second = (StickfixLogger(name, config=config) for name in names)
+        first.info("from the first module")
+        second.info("from the second module")
+        assert first.output_handlers == second.output_handlers
+        assert first.logger.handlers == second.logger.handlers
+        shutdown_logging(config)
+        lines = config.log_path.read_text(encoding="utf-8").splitlines()
+        assert [line.rsplit(" - ", 1)[1] for line in lines] == [
+            "from the first module",
+            "from the second module",
+        ]
+        assert first.logger.handlers == []
+    finally:
+        for name in names:
+            _reset_logger(name, config)
+
+
+class _RecordCollector(logging.Handler):
+    def __init__(self) -> None:
+        super().__init__()
+        self.records: list[logging.LogRecord] = []
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.records.append(record)
+
+
+def test_lazy_arguments_are_only_computed_for_emitted_records() -> None:
+    logger_name = f"stickfix.lazy.{uuid.uuid4().hex}"
+    config = LoggerConfig(log_path=None, level=logging.INFO, console_level=logging.CRITICAL)
+    calls: list[str] = []
+
+    def expensive() -> str:
+        calls.append("called")
+        return "payload"
+
+    try:
+        instance = StickfixLogger(logger_name, config=config)
+        collector = _RecordCollector()
+        instance.logger.addHandler(collector)
+        instance.debug("Skipped %s", Lazy(expensive))
+        assert calls == []
+        assert not instance.is_enabled_for(logging.DEBUG)
+        instance.info("Emitted %s", Lazy(expensive))
+        assert [record.getMessage() for record in collector.records] == ["Emitted payload"]
+        assert calls == ["called"]
+    finally:
+        _reset_logger(logger_name, config)
+
+
+def test_queued_records_are_formatted_by_the_listener_thread(tmp_path: Path) -> None:
+    logger_name = f"stickfix.listener.{uuid.uuid4().hex}"
+    config = LoggerConfig(log_path=tmp_path / "stickfix.log", console_level=logging.CRITICAL)
+    threads: list[str] = []
+
+    def rendered_on() -> str:
+        threads.append(threading.current_thread().name)
+        return "payload"
+
+    try:
+        instance = StickfixLogger(logger_name, config=config)
+        instance.logger.propagate = False
+        instance.info("Emitted %s", Lazy(rendered_on))
+        shutdown_logging(config)
+        assert config.log_path.read_text(encoding="utf-8").endswith(" - Emitted payload\n")
+        assert len(threads) == 1
+        assert threads[0] != threading.current_thread().name
+    finally:
+        logging.getLogger(logger_name).propagate = True
+        _reset_logger(logger_name, config)
+
+
+def test_fields_are_attached_to_records_and_callers_are_reported() -> None:
+    logger_name = f"stickfix.fields.{uuid.uuid4().hex}"
+    config = LoggerConfig(log_path=None, console_level=logging.CRITICAL)
+
+    try:
+        instance = StickfixLogger(logger_name, config=config)
+        collector = _RecordCollector()
+        instance.logger.addHandler(collector)
+        instance.info("Added %d stickers", 3, fields={"user_id": "alice"})
+        instance.log(logging.WARNING, "Plain")
+        first, second = collector.records
+        assert first.getMessage() == "Added 3 stickers"
+        assert first.fields == {"user_id": "alice"}
+        assert not hasattr(second, "fields")
+        assert {first.funcName, second.funcName} == {
+            "test_fields_are_attached_to_records_and_callers_are_reported"
+        }
+    finally:
+        _reset_logger(logger_name, config)
+
+
+def test_structured_mode_writes_one_json_object_per_record(tmp_path: Path) -> None:
+    logger_name = f"stickfix.json.{uuid.uuid4().hex}"
+    config = LoggerConfig(
+        log_path=tmp_path / "stickfix.jsonl",
+        console_level=logging.CRITICAL,
+        structured=True,
+        static_fields=(("service", "stickfix"),),
+    )
+
+    try:
+        instance = StickfixLogger(logger_name, config=config)
+        assert isinstance(instance.output_handlers[1].formatter, JsonLinesFormatter)
+        with update_context("get", update_id=42, user_id=7):
+            instance.info("Sent %d stickers", 3, fields={"latency_ms": 1.5})
+        instance.info("Outside")
+        shutdown_logging(config)
+        inside, outside = (
+            json.loads(line) for line in config.log_path.read_text(encoding="utf-8").splitlines()
+        )
+        assert inside["service"] == "stickfix"
+        assert inside["message"] == "Sent 3 stickers"
+        assert (inside["command"], inside["update_id"], inside["user_id"]) == ("get", 42, 7)
+        assert inside["latency_ms"] == 1.5
+        assert inside["elapsed_ms"] >= 0
+        assert inside["level"] == "INFO"
+        assert outside["message"] == "Outside"
+        assert "update_id" not in outside
+    finally:
+        _reset_logger(logger_name, config)
+
+
+def test_exceptions_reach_structured_output_through_the_queue(tmp_path: Path) -> None:
+    logger_name = f"stickfix.exceptions.{uuid.uuid4().hex}"
+    config = LoggerConfig(
+        log_path=tmp_path / "stickfix.jsonl", console_level=logging.CRITICAL, structured=True
+    )
+
+    try:
+        instance = StickfixLogger(logger_name, config=config)
+        try:
+            raise ValueError("broken pack")
+        except ValueError:
+            instance.exception("Couldn't save %s", "alice")
+        shutdown_logging(config)
+        [line] = config.log_path.read_text(encoding="utf-8").splitlines()
+        entry = json.loads(line)
+        assert entry["message"] == "Couldn't save alice"
+        assert entry["exception"].startswith("Traceback")
+        assert entry["exception"].endswith("ValueError: broken pack")
+    finally:
+        _reset_logger(logger_name, config)
+
+
+def test_update_context_is_restored_after_nested_blocks() -> None:
+    logger_name = f"stickfix.context.{uuid.uuid4().hex}"
+    config = LoggerConfig(log_path=None, console_level=logging.CRITICAL)
+
+    try:
+        instance = StickfixLogger(logger_name, config=config)
+        collector = _RecordCollector()
+        instance.logger.addHandler(collector)
+        with update_context("outer", update_id=1):
+            with update_context("inner", update_id=2):
+                instance.info("inner")
+            instance.info("outer")
+        formatter = JsonLinesFormatter()
+        lines = [json.loads(formatter.format(record)) for record in collector.records]
+        assert [(line["command"], line["update_id"]) for line in lines] == [
+            ("inner", 2),
+            ("outer", 1),
+        ]
+    finally:
+        _reset_logger(logger_name, config)
@@ -0,0 +1,69 @@
+"""
+Tests for the in-process latency histograms and their Prometheus text dump.
+"""
+
+from __future__ import annotations
+
+# ruff: noqa: S101
+from pathlib import Path
+
+import pytest
+from hypothesis import given
+from hypothesis import strategies as st
+
+from bot.utils.metrics import SUB_BUCKETS, LatencyHistogram, MetricsRegistry
+
+
+@given(st.lists(st.integers(min_value=0, max_value=60_000_000), min_size=1, max_size=200))
+def test_quantiles_are_within_the_bucket_precision(micros: list[int]) -> None:
+    histogram = LatencyHistogram()
+    for value in micros:
+        histogram.record(value / 1_000_000)
+
+    ordered = sorted(micros)
+    for q in (0.5, 0.95, 0.99):
+        exact = ordered[max(1, round(q * len(ordered))) - 1] / 1_000_000
+        reported = histogram.quantile(q)
+        assert exact <= reported <= exact * (1 + 2 / SUB_BUCKETS) + 1e-6
+
+
+def test_empty_histogram_reports_zero() -> None:
+    assert LatencyHistogram().quantile(0.99) == 0.0
+
+
+def test_render_writes_summaries_and_counters_in_prometheus_text_format() -> None:
+    registry = MetricsRegistry()
+    registry.describe("stickfix_test_seconds", "Test latency.")
+    for _ in range(3):
+        registry.histogram("stickfix_test_seconds", path='in"line').record(0.002)
+    registry.increment("stickfix_test_total", command="get", outcome="ok")
+
+    lines = registry.render().splitlines()
+
+    assert lines[:2] == [
+        "# HELP stickfix_test_seconds Test latency.",
+        "# TYPE stickfix_test_seconds summary",
+    ]
+    assert 'stickfix_test_seconds{path="in\\"line",quantile="0.99"} 0.002000' in lines
+    assert 'stickfix_test_seconds_count{path="in\\"line"} 3' in lines
+    assert "# TYPE stickfix_test_total counter" in lines
+    assert 'stickfix_test_total{command="get",outcome="ok"} 1' in lines
+
+
+def test_timed_records_calls_that_raise(tmp_path: Path) -> None:
+    registry = MetricsRegistry()
+
+    @registry.timed("stickfix_test_seconds", operation="boom")
+    def boom() -> None:
+        raise RuntimeError
+
+    with pytest.raises(RuntimeError):
+        boom()
+    with registry.timer("stickfix_test_seconds", operation="block"):
+        pass
+    registry.write(tmp_path / "metrics" / "stickfix.prom")
+
+    assert registry.histogram("stickfix_test_seconds", operation="boom").count == 1
+    text = (tmp_path / "metrics" / "stickfix.prom").read_text(encoding="utf-8")
+    assert 'stickfix_test_seconds_count{operation="block"} 1' in text
+    assert [path.name for path in (tmp_path / "metrics").iterdir()] == ["stickfix.prom"]
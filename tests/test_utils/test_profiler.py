@@ -0,0 +1,102 @@
+"""
+Tests for the on-demand sampling profiler.
+"""
+
+from __future__ import annotations
+
+# ruff: noqa: S101
+import signal
+import threading
+from pathlib import Path
+
+from bot.utils.profiler import SamplingProfiler, install_signal_toggle
+
+
+def _parked_worker(ready: threading.Event, release: threading.Event) -> None:
+    ready.set()
+    release.wait(5)
+
+
+def _start_parked_thread() -> tuple[threading.Thread, threading.Event]:
+    ready, release = threading.Event(), threading.Event()
+    thread = threading.Thread(
+        target=_parked_worker, args=(ready, release), name="dispatcher-worker"
+    )
+    thread.start()
+    ready.wait(5)
+    return thread, release
+
+
+def test_samples_are_written_as_collapsed_stacks(tmp_path: Path) -> None:
+    profiler = SamplingProfiler(output_dir=tmp_path, interval=60)
+    thread, release = _start_parked_thread()
+
+    try:
+        assert profiler.start()
+        assert not profiler.start()
+        profiler.sample()
+        profiler.sample()
+    finally:
+        release.set()
+        thread.join()
+    path = profiler.stop()
+
+    assert path is not None and path.parent == tmp_path
+    lines = path.read_text(encoding="utf-8").splitlines()
+    worker = [line for line in lines if line.startswith("dispatcher-worker;")]
+    assert len(worker) == 1
+    stack, count = worker[0].rsplit(" ", 1)
+    assert count == "2"
+    assert "_parked_worker (test_profiler.py:" in stack
+    assert not any("test_samples_are_written_as_collapsed_stacks" in line for line in lines)
+    assert not profiler.running
+    assert profiler.stop() is None
+
+
+def test_toggle_alternates_between_starting_and_writing(tmp_path: Path) -> None:
+    profiler = SamplingProfiler(output_dir=tmp_path, interval=0.001)
+
+    assert profiler.toggle() is None
+    assert profiler.running
+    path = profiler.toggle()
+
+    assert path is not None and path.exists()
+    assert not profiler.running
+    assert all(thread.name != "stickfix-profiler" for thread in threading.enumerate())
+
+
+def test_concurrent_toggles_each_switch_the_profiler_once(tmp_path: Path) -> None:
+    profiler = SamplingProfiler(output_dir=tmp_path, interval=0.001)
+    barrier = threading.Barrier(8)
+    written: list[Path | None] = []
+
+    def toggle() -> None:
+        barrier.wait(5)
+        written.append(profiler.toggle())
+
+    workers = [threading.Thread(target=toggle) for _ in range(8)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    assert sum(path is not None for path in written) == 4
+    assert not profiler.running
+
+
+def test_signal_toggle_is_installed_from_the_main_thread(tmp_path: Path) -> None:
+    profiler = SamplingProfiler(output_dir=tmp_path)
+    previous = signal.getsignal(signal.SIGUSR2)
+    installed: list[bool] = []
+
+    try:
+        assert install_signal_toggle(profiler, signal.SIGUSR2)
+        worker = threading.Thread(
+            target=lambda: installed.append(install_signal_toggle(profiler, signal.SIGUSR2))
+        )
+        worker.start()
+        worker.join()
+    finally:
+        signal.signal(signal.SIGUSR2, previous)
+
+    assert installed == [False]